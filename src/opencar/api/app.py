@@ -1,24 +1,18 @@
 """FastAPI application for OpenCar."""
 
 from contextlib import asynccontextmanager
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 
 from opencar import __version__
-from opencar.config.settings import get_settings
-from opencar.api.routes import main_router
-from opencar.api.middleware import (
-    LoggingMiddleware,
-    MetricsMiddleware,
-    SecurityHeadersMiddleware,
-    RateLimitMiddleware,
-    ErrorHandlingMiddleware,
-    metrics_middleware_instance
-)
+from opencar.config.settings import Settings, get_settings
+from opencar.monitoring.metrics import CONTENT_TYPE_LATEST, get_registry
+from opencar.api.routes import main_router, shutdown_models, start_warmup
+from opencar.api.middleware import MIDDLEWARE_STACKS, create_rate_limit_backend
 
 
 @asynccontextmanager
@@ -29,17 +23,20 @@ async def lifespan(app: FastAPI):
     app.state.settings = settings
 
     # Initialize models
-    await _initialize_models()
+    await _initialize_models(settings)
 
     yield
 
     # Shutdown
     await _cleanup_resources()
+    if getattr(app.state, "rate_limit_backend", None) is not None:
+        await app.state.rate_limit_backend.close()
 
 
-def create_app() -> FastAPI:
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
     """Create and configure FastAPI application."""
-    settings = get_settings()
+    settings = settings or get_settings()
+    middleware = MIDDLEWARE_STACKS[settings.middleware_stack]
 
     app = FastAPI(
         title="OpenCar API",
@@ -52,20 +49,18 @@ def create_app() -> FastAPI:
     )
 
     # Add middleware (order matters - first added is outermost)
-    app.add_middleware(ErrorHandlingMiddleware)
-    app.add_middleware(SecurityHeadersMiddleware)
-    app.add_middleware(LoggingMiddleware)
-    
-    # Add metrics middleware and store reference
-    metrics_middleware = MetricsMiddleware(app)
-    app.add_middleware(MetricsMiddleware)
-    
-    # Store global reference for metrics endpoint
-    import opencar.api.middleware as middleware_module
-    middleware_module.metrics_middleware_instance = metrics_middleware
+    app.add_middleware(middleware["error_handling"])
+    app.add_middleware(middleware["security_headers"])
+    app.add_middleware(middleware["logging"])
+    app.add_middleware(middleware["metrics"])
     
     if not settings.debug:
-        app.add_middleware(RateLimitMiddleware, requests_per_minute=100)
+        app.state.rate_limit_backend = create_rate_limit_backend(settings)
+        app.add_middleware(
+            middleware["rate_limit"],
+            requests_per_minute=settings.rate_limit_per_minute,
+            backend=app.state.rate_limit_backend,
+        )
     
     app.add_middleware(GZipMiddleware, minimum_size=1000)
     app.add_middleware(
@@ -88,6 +83,12 @@ def create_app() -> FastAPI:
         """Health check endpoint."""
         return {"status": "healthy", "version": __version__}
 
+    if settings.enable_metrics:
+        @app.get("/metrics", include_in_schema=False)
+        async def prometheus_metrics() -> Response:
+            """Prometheus metrics endpoint."""
+            return Response(get_registry().generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
     @app.get("/")
     async def root():
         """Root endpoint."""
@@ -101,16 +102,19 @@ def create_app() -> FastAPI:
     return app
 
 
-async def _initialize_models() -> None:
-    """Initialize ML models."""
-    # Mock implementation
-    pass
+async def _initialize_models(settings: Settings) -> None:
+    """Start warming up the default model unless it was preloaded.
+
+    The server accepts requests meanwhile; ``/health/ready`` turns ready
+    once the warmup is done.
+    """
+    if settings.warmup_on_startup:
+        start_warmup(settings.warmup_iterations)
 
 
 async def _cleanup_resources() -> None:
     """Cleanup resources on shutdown."""
-    # Mock implementation
-    pass
+    await shutdown_models()
 
 
 app = create_app() 
\ No newline at end of file
@@ -0,0 +1,171 @@
+"""Negotiable encodings for detection responses.
+
+Clients pick a format with the ``Accept`` header:
+
+- ``application/json`` (default): the usual nested detection dicts, encoded
+  with orjson when it is installed instead of going through FastAPI's
+  ``jsonable_encoder``.
+- ``application/vnd.opencar.columnar+json``: ``detections`` becomes an
+  object of parallel arrays, ``class_name``, ``confidence`` and ``bbox``
+  (``[x1, y1, x2, y2]`` rows), plus ``count``. ``attributes`` is only
+  included when a detection has any.
+- ``application/x-msgpack`` (also ``application/msgpack`` and
+  ``application/vnd.msgpack``): the columnar layout packed with msgpack, with
+  ``confidence`` and ``bbox`` as NumPy buffers. Each buffer is a map with
+  ``dtype``, ``shape`` and ``data``, read with
+  ``np.frombuffer(data, dtype).reshape(shape)``. Needs ``msgpack``.
+
+Without an ``Accept`` header the response is JSON, so existing clients are
+unaffected; a header that accepts none of these (wildcards included) gets
+``406 Not Acceptable``.
+"""
+
+import itertools
+import json
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+from starlette.responses import Response
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+JSON_MEDIA_TYPE = "application/json"
+COLUMNAR_MEDIA_TYPE = "application/vnd.opencar.columnar+json"
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+
+# Accept header media ranges -> response media type
+_MEDIA_RANGES = {
+    JSON_MEDIA_TYPE: JSON_MEDIA_TYPE,
+    "application/*": JSON_MEDIA_TYPE,
+    "*/*": JSON_MEDIA_TYPE,
+    COLUMNAR_MEDIA_TYPE: COLUMNAR_MEDIA_TYPE,
+}
+if MSGPACK_AVAILABLE:
+    _MEDIA_RANGES.update({
+        MSGPACK_MEDIA_TYPE: MSGPACK_MEDIA_TYPE,
+        "application/msgpack": MSGPACK_MEDIA_TYPE,
+        "application/vnd.msgpack": MSGPACK_MEDIA_TYPE,
+    })
+
+SUPPORTED_MEDIA_TYPES = tuple(dict.fromkeys(_MEDIA_RANGES.values()))
+
+_get_class_name = itemgetter("class_name")
+_get_confidence = itemgetter("confidence")
+_get_bbox = itemgetter("bbox")
+_get_corners = itemgetter("x1", "y1", "x2", "y2")
+
+
+def negotiate(accept: Optional[str]) -> Optional[str]:
+    """Pick the response media type for an ``Accept`` header.
+
+    The supported type with the highest quality wins; on a tie, a specific
+    type beats a wildcard and then the earlier one wins. A missing or empty
+    header means JSON.
+
+    Returns:
+        The media type, or None if the header accepts no supported type
+    """
+    if not accept or not accept.strip():
+        return JSON_MEDIA_TYPE
+    best: Tuple[float, bool] = (0.0, False)
+    media_type = None
+    for item in accept.split(","):
+        media_range, *params = item.split(";")
+        resolved = _MEDIA_RANGES.get(media_range.strip().lower())
+        if resolved is None:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        rank = (quality, "*" not in media_range)
+        if quality > 0 and rank > best:
+            best, media_type = rank, resolved
+    return media_type
+
+
+def dumps_json(content: Any) -> bytes:
+    """Encode JSON with orjson, or the standard library as ``JSONResponse`` does."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def to_columns(detections: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """Turn a list of detection dicts into parallel arrays (boxes as tuples)."""
+    columns: Dict[str, Any] = {
+        "count": len(detections),
+        "class_name": list(map(_get_class_name, detections)),
+        "confidence": list(map(_get_confidence, detections)),
+        "bbox": list(map(_get_corners, map(_get_bbox, detections))),
+    }
+    if any(detection.get("attributes") for detection in detections):
+        columns["attributes"] = [detection.get("attributes", {}) for detection in detections]
+    return columns
+
+
+def _ndarray(values: Iterable[float], shape: Tuple[int, ...]) -> Dict[str, Any]:
+    """A float32 NumPy buffer as a msgpack map."""
+    array = np.fromiter(values, dtype="<f4", count=int(np.prod(shape))).reshape(shape)
+    return {"dtype": array.dtype.str, "shape": list(array.shape), "data": array.tobytes()}
+
+
+def encode_detections(body: Dict[str, Any], media_type: str = JSON_MEDIA_TYPE) -> bytes:
+    """Encode a response body holding a ``detections`` list as ``media_type``."""
+    if media_type == JSON_MEDIA_TYPE:
+        return dumps_json(body)
+
+    columns = to_columns(body["detections"])
+    if media_type == COLUMNAR_MEDIA_TYPE:
+        return dumps_json({**body, "detections": columns})
+    if media_type == MSGPACK_MEDIA_TYPE and msgpack is not None:
+        count = columns["count"]
+        columns["confidence"] = _ndarray(columns["confidence"], (count,))
+        columns["bbox"] = _ndarray(itertools.chain.from_iterable(columns["bbox"]), (count, 4))
+        return msgpack.packb({**body, "detections": columns}, use_bin_type=True)
+    raise ValueError(f"Unsupported media type: {media_type}")
+
+
+def detection_response(body: Dict[str, Any], media_type: str = JSON_MEDIA_TYPE) -> Response:
+    """Build the response for a detection body encoded as ``media_type``."""
+    return Response(
+        content=encode_detections(body, media_type),
+        media_type=media_type,
+        headers={"Vary": "Accept"},
+    )
+
+
+__all__ = [
+    "COLUMNAR_MEDIA_TYPE",
+    "JSON_MEDIA_TYPE",
+    "MSGPACK_AVAILABLE",
+    "MSGPACK_MEDIA_TYPE",
+    "ORJSON_AVAILABLE",
+    "SUPPORTED_MEDIA_TYPES",
+    "detection_response",
+    "dumps_json",
+    "encode_detections",
+    "negotiate",
+    "to_columns",
+]
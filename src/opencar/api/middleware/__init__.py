@@ -3,12 +3,29 @@
 import time
 import uuid
 from typing import Callable, Dict, Any, Optional
-from datetime import datetime
 
 from fastapi import Request, Response, HTTPException
+from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 import structlog
 
+from opencar.api.middleware.asgi import (
+    ErrorHandlingASGIMiddleware,
+    LoggingASGIMiddleware,
+    MetricsASGIMiddleware,
+    RateLimitASGIMiddleware,
+    SecurityHeadersASGIMiddleware,
+)
+from opencar.api.middleware.metrics import RequestMetrics, route_label
+from opencar.monitoring.metrics import MetricsRegistry
+from opencar.api.middleware.ratelimit import (
+    InMemoryRateLimitBackend,
+    RateLimitBackend,
+    RateLimiter,
+    RedisRateLimitBackend,
+    create_rate_limit_backend,
+)
+
 logger = structlog.get_logger()
 
 
@@ -67,59 +84,37 @@ class LoggingMiddleware(BaseHTTPMiddleware):
 class MetricsMiddleware(BaseHTTPMiddleware):
     """Middleware for collecting metrics."""
 
-    def __init__(self, app):
+    def __init__(self, app, registry: Optional[MetricsRegistry] = None):
         super().__init__(app)
-        self.metrics = {
-            "total_requests": 0,
-            "requests_by_method": {},
-            "requests_by_status": {},
-            "response_times": [],
-            "errors": 0,
-        }
+        self.metrics = RequestMetrics(registry)
 
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         """Process request and collect metrics."""
-        start_time = time.time()
-        
-        # Increment request counter
-        self.metrics["total_requests"] += 1
-        method = request.method
-        self.metrics["requests_by_method"][method] = self.metrics["requests_by_method"].get(method, 0) + 1
+        start_time = time.perf_counter()
+        self.metrics.in_flight.inc()
         
         try:
             response = await call_next(request)
             
             # Record response metrics
-            status_code = response.status_code
-            self.metrics["requests_by_status"][status_code] = self.metrics["requests_by_status"].get(status_code, 0) + 1
-            
-            # Record response time
-            response_time = (time.time() - start_time) * 1000
-            self.metrics["response_times"].append(response_time)
-            
-            # Keep only last 1000 response times to prevent memory issues
-            if len(self.metrics["response_times"]) > 1000:
-                self.metrics["response_times"] = self.metrics["response_times"][-1000:]
+            self.metrics.observe(
+                request.method,
+                route_label(request.scope),
+                response.status_code,
+                time.perf_counter() - start_time,
+            )
             
             return response
             
-        except Exception as e:
-            self.metrics["errors"] += 1
+        except Exception:
+            self.metrics.error(request.method, route_label(request.scope))
             raise
+        finally:
+            self.metrics.in_flight.dec()
 
     def get_metrics(self) -> Dict[str, Any]:
         """Get current metrics."""
-        response_times = self.metrics["response_times"]
-        avg_response_time = sum(response_times) / len(response_times) if response_times else 0
-        
-        return {
-            "total_requests": self.metrics["total_requests"],
-            "requests_by_method": self.metrics["requests_by_method"],
-            "requests_by_status": self.metrics["requests_by_status"],
-            "errors": self.metrics["errors"],
-            "average_response_time_ms": round(avg_response_time, 2),
-            "timestamp": datetime.utcnow().isoformat(),
-        }
+        return self.metrics.get_metrics()
 
 
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
@@ -141,53 +136,31 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
 
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Simple rate limiting middleware."""
-
-    def __init__(self, app, requests_per_minute: int = 60):
+    """Token-bucket rate limiting middleware."""
+
+    def __init__(
+        self,
+        app,
+        requests_per_minute: int = 60,
+        backend: Optional[RateLimitBackend] = None,
+    ):
         super().__init__(app)
         self.requests_per_minute = requests_per_minute
-        self.client_requests = {}  # In production, use Redis
-        self.window_size = 60  # 1 minute
+        self.limiter = RateLimiter(requests_per_minute, backend)
 
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         """Check rate limits and process request."""
         client_ip = request.client.host if request.client else "unknown"
-        current_time = time.time()
-        
-        # Clean old entries
-        self._clean_old_entries(current_time)
-        
-        # Check rate limit
-        if client_ip in self.client_requests:
-            requests_in_window = [
-                req_time for req_time in self.client_requests[client_ip]
-                if current_time - req_time < self.window_size
-            ]
-            
-            if len(requests_in_window) >= self.requests_per_minute:
-                raise HTTPException(
-                    status_code=429,
-                    detail="Rate limit exceeded. Please try again later.",
-                    headers={"Retry-After": "60"}
-                )
-                
-            self.client_requests[client_ip].append(current_time)
-        else:
-            self.client_requests[client_ip] = [current_time]
-        
-        return await call_next(request)
 
-    def _clean_old_entries(self, current_time: float) -> None:
-        """Remove old request timestamps."""
-        for client_ip in list(self.client_requests.keys()):
-            self.client_requests[client_ip] = [
-                req_time for req_time in self.client_requests[client_ip]
-                if current_time - req_time < self.window_size
-            ]
-            
-            # Remove empty entries
-            if not self.client_requests[client_ip]:
-                del self.client_requests[client_ip]
+        result = await self.limiter.check(client_ip)
+        if not result.allowed:
+            return JSONResponse(
+                {"detail": "Rate limit exceeded. Please try again later."},
+                status_code=429,
+                headers={"Retry-After": RateLimiter.retry_after_header(result)},
+            )
+
+        return await call_next(request)
 
 
 class ErrorHandlingMiddleware(BaseHTTPMiddleware):
@@ -217,14 +190,27 @@ class ErrorHandlingMiddleware(BaseHTTPMiddleware):
             )
 
 
-# Global metrics instance for export
-metrics_middleware_instance: Optional[MetricsMiddleware] = None
+# Middleware stacks selectable through Settings.middleware_stack, innermost first
+MIDDLEWARE_STACKS = {
+    "base": {
+        "error_handling": ErrorHandlingMiddleware,
+        "security_headers": SecurityHeadersMiddleware,
+        "logging": LoggingMiddleware,
+        "metrics": MetricsMiddleware,
+        "rate_limit": RateLimitMiddleware,
+    },
+    "asgi": {
+        "error_handling": ErrorHandlingASGIMiddleware,
+        "security_headers": SecurityHeadersASGIMiddleware,
+        "logging": LoggingASGIMiddleware,
+        "metrics": MetricsASGIMiddleware,
+        "rate_limit": RateLimitASGIMiddleware,
+    },
+}
 
 def get_metrics() -> Dict[str, Any]:
-    """Get metrics from the global metrics middleware."""
-    if metrics_middleware_instance:
-        return metrics_middleware_instance.get_metrics()
-    return {"error": "Metrics not available"}
+    """Get request metrics from the shared registry."""
+    return RequestMetrics().get_metrics()
 
 
 # Export all middleware classes
@@ -234,5 +220,17 @@ __all__ = [
     "SecurityHeadersMiddleware",
     "RateLimitMiddleware",
     "ErrorHandlingMiddleware",
+    "LoggingASGIMiddleware",
+    "MetricsASGIMiddleware",
+    "SecurityHeadersASGIMiddleware",
+    "RateLimitASGIMiddleware",
+    "ErrorHandlingASGIMiddleware",
+    "MIDDLEWARE_STACKS",
+    "RateLimitBackend",
+    "InMemoryRateLimitBackend",
+    "RedisRateLimitBackend",
+    "RateLimiter",
+    "create_rate_limit_backend",
+    "RequestMetrics",
     "get_metrics",
 ] 
\ No newline at end of file
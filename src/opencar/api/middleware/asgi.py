@@ -0,0 +1,241 @@
+"""Pure ASGI middleware for OpenCar.
+
+These mirror the ``BaseHTTPMiddleware`` classes in ``opencar.api.middleware``
+but wrap ``send`` directly instead of buffering responses through
+``call_next``, so they add no task hop per request and stream bodies through
+untouched.
+"""
+
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+import structlog
+from fastapi import HTTPException
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from opencar.api.middleware.metrics import RequestMetrics, route_label
+from opencar.api.middleware.ratelimit import RateLimitBackend, RateLimiter
+from opencar.monitoring.metrics import MetricsRegistry
+
+logger = structlog.get_logger()
+
+SECURITY_HEADERS = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"strict-transport-security", b"max-age=31536000; includeSubDomains"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+    (b"content-security-policy", b"default-src 'self'"),
+]
+
+
+class LoggingASGIMiddleware:
+    """Middleware for request/response logging."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Process request and log details."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Generate request ID
+        request_id = str(uuid.uuid4())
+        scope.setdefault("state", {})["request_id"] = request_id
+
+        # Log request
+        start_time = time.time()
+        request = Request(scope)
+        logger.info(
+            "Request started",
+            request_id=request_id,
+            method=request.method,
+            url=str(request.url),
+            client_ip=request.client.host if request.client else "unknown",
+            user_agent=request.headers.get("user-agent", "unknown"),
+        )
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Calculate processing time
+                process_time_ms = round((time.time() - start_time) * 1000, 2)
+
+                # Log response
+                logger.info(
+                    "Request completed",
+                    request_id=request_id,
+                    status_code=message["status"],
+                    process_time_ms=process_time_ms,
+                )
+
+                # Add headers
+                headers = MutableHeaders(scope=message)
+                headers["X-Request-ID"] = request_id
+                headers["X-Process-Time"] = str(process_time_ms)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            logger.error(
+                "Request failed",
+                request_id=request_id,
+                error=str(e),
+                process_time_ms=round((time.time() - start_time) * 1000, 2),
+            )
+            raise
+
+
+class MetricsASGIMiddleware:
+    """Middleware for collecting metrics."""
+
+    def __init__(self, app: ASGIApp, registry: Optional[MetricsRegistry] = None):
+        self.app = app
+        self.metrics = RequestMetrics(registry)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Process request and collect metrics."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+        self.metrics.in_flight.inc()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+            self.metrics.observe(
+                scope["method"], route_label(scope), status_code, time.perf_counter() - start_time
+            )
+        except Exception:
+            self.metrics.error(scope["method"], route_label(scope))
+            raise
+        finally:
+            self.metrics.in_flight.dec()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get current metrics."""
+        return self.metrics.get_metrics()
+
+
+class SecurityHeadersASGIMiddleware:
+    """Middleware for adding security headers."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Add security headers to response."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for name, value in SECURITY_HEADERS:
+                    headers[name.decode("latin-1")] = value.decode("latin-1")
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class RateLimitASGIMiddleware:
+    """Token-bucket rate limiting middleware."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        requests_per_minute: int = 60,
+        backend: Optional[RateLimitBackend] = None,
+    ):
+        self.app = app
+        self.requests_per_minute = requests_per_minute
+        self.limiter = RateLimiter(requests_per_minute, backend)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Check rate limits and process request."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+
+        result = await self.limiter.check(client_ip)
+        if not result.allowed:
+            response = JSONResponse(
+                {"detail": "Rate limit exceeded. Please try again later."},
+                status_code=429,
+                headers={"Retry-After": RateLimiter.retry_after_header(result)},
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+
+class ErrorHandlingASGIMiddleware:
+    """Middleware for handling errors gracefully."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handle errors and return appropriate responses."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except HTTPException:
+            # Re-raise HTTP exceptions
+            raise
+        except Exception as e:
+            # Log unexpected errors
+            request_id = scope.get("state", {}).get("request_id", "unknown")
+            logger.error(
+                "Unexpected error",
+                request_id=request_id,
+                error=str(e),
+                error_type=type(e).__name__,
+            )
+            if response_started:
+                raise
+
+            # Return generic error response
+            response = JSONResponse(
+                {"detail": "Internal server error occurred"}, status_code=500
+            )
+            await response(scope, receive, send)
+
+
+__all__ = [
+    "LoggingASGIMiddleware",
+    "MetricsASGIMiddleware",
+    "SecurityHeadersASGIMiddleware",
+    "RateLimitASGIMiddleware",
+    "ErrorHandlingASGIMiddleware",
+]
@@ -0,0 +1,90 @@
+"""HTTP request metrics recorded into the shared registry."""
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from opencar.monitoring.metrics import Histogram, MetricsRegistry, get_registry
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def route_label(scope: Dict[str, Any]) -> str:
+    """Route template for a request, so paths with IDs share one label."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class RequestMetrics:
+    """Request counters and latency histograms labeled by route and status."""
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        registry = registry or get_registry()
+        self.requests = registry.counter(
+            "opencar_http_requests_total", "HTTP requests", ["method", "route", "status"]
+        )
+        self.duration = registry.histogram(
+            "opencar_http_request_duration_seconds",
+            "HTTP request latency",
+            ["method", "route", "status"],
+        )
+        self.errors = registry.counter(
+            "opencar_http_request_errors_total", "Unhandled request errors", ["method", "route"]
+        )
+        self.in_flight = registry.gauge(
+            "opencar_http_requests_in_flight", "Requests currently being processed"
+        ).labels()
+
+    def observe(self, method: str, route: str, status: int, duration: float) -> None:
+        """Record one completed request."""
+        self.requests.labels(method, route, status).inc()
+        self.duration.labels(method, route, status).record(duration)
+
+    def error(self, method: str, route: str) -> None:
+        """Record one unhandled error."""
+        self.errors.labels(method, route).inc()
+
+    def reset(self) -> None:
+        """Forget all completed requests, e.g. warmup requests sent before serving."""
+        self.requests.clear()
+        self.duration.clear()
+        self.errors.clear()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get current metrics as JSON-friendly data."""
+        by_method: Dict[str, int] = {}
+        by_status: Dict[str, int] = {}
+        total = 0
+        for (method, _, status), counter in self.requests.children():
+            count = int(counter.value)
+            total += count
+            by_method[method] = by_method.get(method, 0) + count
+            by_status[status] = by_status.get(status, 0) + count
+
+        latency = Histogram()
+        by_route: Dict[str, Histogram] = {}
+        for (method, route, _), histogram in self.duration.children():
+            latency.merge(histogram)
+            route_latency = by_route.setdefault(f"{method} {route}", Histogram())
+            route_latency.merge(histogram)
+
+        return {
+            "total_requests": total,
+            "requests_by_method": by_method,
+            "requests_by_status": by_status,
+            "errors": int(sum(counter.value for _, counter in self.errors.children())),
+            "active_requests": int(self.in_flight.value),
+            "average_response_time_ms": round(latency.mean * 1000, 2),
+            "latency_ms": _rounded(latency.snapshot(scale=1000)),
+            "latency_by_route_ms": {
+                route: _rounded(histogram.snapshot(scale=1000))
+                for route, histogram in by_route.items()
+            },
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+
+
+def _rounded(snapshot: Dict[str, float]) -> Dict[str, float]:
+    return {key: round(value, 3) for key, value in snapshot.items()}
+
+
+__all__ = ["RequestMetrics", "route_label"]
@@ -0,0 +1,169 @@
+"""Rate limiting backends for OpenCar middleware.
+
+Limits use the generic cell rate algorithm (GCRA), the constant-memory form
+of a token bucket: each client is represented by a single "theoretical
+arrival time", so checking a request is O(1) no matter how many clients or
+requests per minute there are.
+"""
+
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, NamedTuple, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+class RateLimitResult(NamedTuple):
+    """Outcome of a rate limit check."""
+
+    allowed: bool
+    remaining: int
+    retry_after: float
+
+
+def _gcra(tat: Optional[float], now: float, interval: float, burst: int):
+    """Apply GCRA to a stored arrival time.
+
+    Returns:
+        Tuple of (result, new arrival time or None when the request is denied)
+    """
+    tat = now if tat is None or tat < now else tat
+    new_tat = tat + interval
+    allow_at = new_tat - burst * interval
+    if now < allow_at:
+        return RateLimitResult(False, 0, allow_at - now), None
+    remaining = int((now - allow_at) / interval + 1e-9)
+    return RateLimitResult(True, remaining, 0.0), new_tat
+
+
+class RateLimitBackend(ABC):
+    """Storage for per-client rate limit state."""
+
+    @abstractmethod
+    async def acquire(
+        self, key: str, requests_per_minute: int, now: Optional[float] = None
+    ) -> RateLimitResult:
+        """Consume one request for ``key`` if its limit allows it."""
+
+    async def close(self) -> None:
+        """Release backend resources."""
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Process-local backend with LRU eviction of idle clients."""
+
+    def __init__(self, max_clients: int = 10000):
+        self.max_clients = max_clients
+        self._arrivals: "OrderedDict[str, float]" = OrderedDict()
+
+    async def acquire(
+        self, key: str, requests_per_minute: int, now: Optional[float] = None
+    ) -> RateLimitResult:
+        """Consume one request for ``key`` if its limit allows it."""
+        now = time.time() if now is None else now
+        result, new_tat = _gcra(
+            self._arrivals.get(key), now, 60.0 / requests_per_minute, requests_per_minute
+        )
+        if new_tat is not None:
+            self._arrivals[key] = new_tat
+        if key in self._arrivals:
+            self._arrivals.move_to_end(key)
+
+        # Evict the least recently seen clients
+        while len(self._arrivals) > self.max_clients:
+            self._arrivals.popitem(last=False)
+
+        return result
+
+    def __len__(self) -> int:
+        return len(self._arrivals)
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Redis backend so limits hold across API worker processes."""
+
+    # KEYS[1]: client key; ARGV: now, interval, burst. Mirrors _gcra.
+    SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local interval = tonumber(ARGV[2])
+    local burst = tonumber(ARGV[3])
+    local tat = tonumber(redis.call('GET', KEYS[1]) or ARGV[1])
+    if tat < now then tat = now end
+    local new_tat = tat + interval
+    local allow_at = new_tat - burst * interval
+    if now < allow_at then
+        return {0, '0', tostring(allow_at - now)}
+    end
+    redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+    return {1, tostring(math.floor((now - allow_at) / interval + 1e-9)), '0'}
+    """
+
+    def __init__(self, client: Any = None, url: Optional[str] = None, prefix: str = "opencar:rl:"):
+        if client is None:
+            import redis.asyncio as redis
+
+            client = redis.Redis.from_url(url or "redis://localhost:6379/0")
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(self.SCRIPT)
+
+    async def acquire(
+        self, key: str, requests_per_minute: int, now: Optional[float] = None
+    ) -> RateLimitResult:
+        """Consume one request for ``key`` if its limit allows it."""
+        now = time.time() if now is None else now
+        allowed, remaining, retry_after = await self._script(
+            keys=[self.prefix + key],
+            args=[repr(now), repr(60.0 / requests_per_minute), requests_per_minute],
+        )
+        return RateLimitResult(bool(int(allowed)), int(remaining), float(retry_after))
+
+    async def close(self) -> None:
+        """Close the Redis connection."""
+        await self.client.aclose()
+
+
+class RateLimiter:
+    """Per-client request limiter shared by both middleware stacks."""
+
+    def __init__(
+        self,
+        requests_per_minute: int = 60,
+        backend: Optional[RateLimitBackend] = None,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.backend = backend or InMemoryRateLimitBackend()
+
+    async def check(self, client_ip: str) -> RateLimitResult:
+        """Check and consume one request for a client, failing open on backend errors."""
+        try:
+            return await self.backend.acquire(client_ip, self.requests_per_minute)
+        except Exception as e:
+            logger.warning(f"Rate limit backend unavailable: {str(e)}")
+            return RateLimitResult(True, self.requests_per_minute, 0.0)
+
+    @staticmethod
+    def retry_after_header(result: RateLimitResult) -> str:
+        """Format a Retry-After header value in whole seconds."""
+        return str(max(1, math.ceil(result.retry_after)))
+
+
+def create_rate_limit_backend(settings: Any) -> RateLimitBackend:
+    """Create the rate limit backend configured in settings."""
+    if settings.rate_limit_backend == "redis":
+        return RedisRateLimitBackend(url=settings.redis_url)
+    return InMemoryRateLimitBackend(max_clients=settings.rate_limit_max_clients)
+
+
+__all__ = [
+    "RateLimitResult",
+    "RateLimitBackend",
+    "InMemoryRateLimitBackend",
+    "RedisRateLimitBackend",
+    "RateLimiter",
+    "create_rate_limit_backend",
+]
@@ -0,0 +1,151 @@
+"""Incremental parsing of multipart file uploads.
+
+``Request.form()`` reads a whole multipart body into spooled files before a
+route sees any of it. ``iter_file_parts`` instead parses the body as it is
+received and yields each file part as soon as that part is complete, so the
+caller can start working on the first files while later ones are still
+uploading. Only one part is held in memory at a time.
+"""
+
+from typing import AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from starlette.requests import Request
+
+try:
+    from python_multipart.exceptions import FormParserError
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.exceptions import FormParserError
+    from multipart.multipart import MultipartParser, parse_options_header
+
+
+class MultipartError(ValueError):
+    """The request body is not a valid multipart upload."""
+
+
+class UploadLimitError(MultipartError):
+    """The upload exceeds a size or file count limit."""
+
+
+class FilePart(NamedTuple):
+    """One uploaded file."""
+
+    field_name: str
+    filename: str
+    content_type: Optional[str]
+    data: bytes
+
+
+class _PartCollector:
+    """``MultipartParser`` callbacks collecting complete file parts.
+
+    The parser calls back synchronously while it consumes a chunk; finished
+    parts are queued in ``completed`` for the async side to yield.
+    """
+
+    def __init__(self, max_files: Optional[int]):
+        self.max_files = max_files
+        self.completed: List[FilePart] = []
+        self.files = 0
+        self._headers: List[Tuple[bytes, bytes]] = []
+        self._header_field = b""
+        self._header_value = b""
+        self._data = bytearray()
+        self._field_name = ""
+        self._filename: Optional[str] = None
+        self._content_type: Optional[str] = None
+
+    def callbacks(self) -> Dict[str, Callable[..., None]]:
+        """Callbacks to pass to ``MultipartParser``."""
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self) -> None:
+        self._headers = []
+        self._data = bytearray()
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers.append((self._header_field.lower(), self._header_value))
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        headers = dict(self._headers)
+        _, options = parse_options_header(headers.get(b"content-disposition", b""))
+        if b"name" not in options:
+            raise MultipartError('Part is missing the Content-Disposition "name"')
+        self._field_name = options[b"name"].decode("utf-8", errors="replace")
+        filename = options.get(b"filename")
+        self._filename = filename.decode("utf-8", errors="replace") if filename else None
+        content_type = headers.get(b"content-type")
+        self._content_type = content_type.decode("latin-1") if content_type else None
+        if self._filename is not None:
+            self.files += 1
+            if self.max_files is not None and self.files > self.max_files:
+                raise UploadLimitError(f"Too many files (at most {self.max_files})")
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        # Plain form fields are skipped; only file contents are kept
+        if self._filename is not None:
+            self._data += data[start:end]
+
+    def on_part_end(self) -> None:
+        if self._filename is not None:
+            self.completed.append(
+                FilePart(self._field_name, self._filename, self._content_type, bytes(self._data))
+            )
+        self._data = bytearray()
+
+
+async def iter_file_parts(
+    request: Request,
+    max_files: Optional[int] = None,
+    max_size: Optional[int] = None,
+) -> AsyncIterator[FilePart]:
+    """Yield the file parts of a multipart request body as they arrive.
+
+    Args:
+        request: Request with a ``multipart/form-data`` body
+        max_files: Most files accepted
+        max_size: Most body bytes accepted
+
+    Raises:
+        MultipartError: If the body is not multipart or is malformed
+        UploadLimitError: If ``max_files`` or ``max_size`` is exceeded
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise MultipartError("Expected a multipart/form-data body")
+
+    collector = _PartCollector(max_files)
+    parser = MultipartParser(params[b"boundary"], collector.callbacks())
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if max_size is not None and received > max_size:
+                raise UploadLimitError(f"Upload exceeds {max_size} bytes")
+            parser.write(chunk)
+            while collector.completed:
+                yield collector.completed.pop(0)
+        parser.finalize()
+    except FormParserError as e:
+        raise MultipartError(f"Invalid multipart data: {str(e)}") from e
+    for part in collector.completed:
+        yield part
+
+
+__all__ = ["FilePart", "MultipartError", "UploadLimitError", "iter_file_parts"]
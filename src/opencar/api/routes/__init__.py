@@ -1,15 +1,53 @@
 """API routes for OpenCar."""
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
-from fastapi.responses import JSONResponse
-from typing import List, Dict, Any, Optional
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    UploadFile,
+    File,
+    WebSocket,
+    status,
+)
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response
+from pathlib import Path
+from pydantic import ValidationError
+from typing import TYPE_CHECKING, AsyncIterator, List, Dict, Any, Optional
 import asyncio
+import time
 from datetime import datetime
 import uuid
 
-from opencar.config.settings import get_settings
+from opencar.api.encoding import (
+    COLUMNAR_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    SUPPORTED_MEDIA_TYPES,
+    detection_response,
+    negotiate,
+)
+from opencar.api.middleware.metrics import RequestMetrics
+from opencar.api.multipart import MultipartError, UploadLimitError, iter_file_parts
+from opencar.api.schemas import (
+    BatchDetectionRequest,
+    BatchDetectionResponse,
+    DetectionResponse,
+    DetectionStatus,
+)
+from opencar.api.streaming import DROP_POLICIES, FrameStream
+from opencar.cache.result_cache import ResultCache, create_result_cache
+from opencar.config.settings import Settings, get_settings
+from opencar.ml.inference.postprocess import COCO_CLASSES
+from opencar.ml.registry import ModelRegistry
 from opencar.perception.models.detector import ObjectDetector
-from opencar.integrations.openai_client import OpenAIClient
+
+if TYPE_CHECKING:
+    # Loaded on first use: the OpenAI client pulls in httpx and Pillow
+    from opencar.integrations.openai_client import OpenAIClient
 
 # Initialize routers
 perception_router = APIRouter(prefix="/perception", tags=["perception"])
@@ -17,49 +55,199 @@ health_router = APIRouter(prefix="/health", tags=["health"])
 admin_router = APIRouter(prefix="/admin", tags=["admin"])
 
 # Global state for initialized models
-_detector: Optional[ObjectDetector] = None
-_openai_client: Optional[OpenAIClient] = None
+_model_registry: Optional[ModelRegistry] = None
+_openai_client: Optional["OpenAIClient"] = None
+_result_cache: Optional[ResultCache] = None
+_result_cache_created = False
+_warmup_task: Optional[asyncio.Task] = None
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Get the shared result cache, or None when caching is disabled."""
+    global _result_cache, _result_cache_created
+    if not _result_cache_created:
+        _result_cache = create_result_cache(get_settings())
+        _result_cache_created = True
+    return _result_cache
+
+
+def _detector_loader(settings: Settings, model_path: Optional[Path]):
+    """Build a loader creating an initialized detector for ``model_path``."""
+
+    async def load() -> ObjectDetector:
+        detector = ObjectDetector(
+            device=settings.device,
+            model_path=model_path,
+            batch_size=settings.batch_size,
+            max_batch_wait_ms=settings.batch_max_wait_ms,
+            num_threads=settings.inference_threads,
+            use_onnx=settings.use_onnx,
+            intra_op_threads=settings.inference_intra_op_threads,
+            inter_op_threads=settings.inference_inter_op_threads,
+            inference_workers=settings.inference_workers,
+        )
+        await detector.initialize()
+        return detector
+
+    return load
+
 
+def get_model_registry(settings: Optional[Settings] = None) -> ModelRegistry:
+    """Get the model registry.
 
-async def get_detector() -> ObjectDetector:
-    """Get initialized object detector."""
-    global _detector
-    if _detector is None:
-        _detector = ObjectDetector()
-        await _detector.initialize()
-    return _detector
+    The default "detector" model serves ``model_path``; with ONNX enabled and
+    ``model_path`` a directory, each ``.onnx`` file in it is also registered
+    under its file name, so requests can select it with ``?model=<name>``.
+
+    Args:
+        settings: Settings to build the registry from when it does not exist
+            yet (defaults to ``get_settings()``)
+    """
+    global _model_registry
+    if _model_registry is None:
+        settings = settings or get_settings()
+        _model_registry = ModelRegistry(
+            max_models=settings.model_cache_size, max_bytes=settings.model_cache_max_bytes
+        )
+        model_path = settings.model_path if settings.use_onnx else None
+        _model_registry.register("detector", _detector_loader(settings, model_path))
+        if model_path is not None and model_path.is_dir():
+            for model_file in sorted(model_path.glob("*.onnx")):
+                _model_registry.register(model_file.stem, _detector_loader(settings, model_file))
+    return _model_registry
+
+
+async def get_detector(model: Optional[str] = None) -> AsyncIterator[ObjectDetector]:
+    """Get an initialized object detector, optionally selected by "name[:version]"."""
+    registry = get_model_registry()
+    try:
+        registry.resolve(model)
+    except KeyError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e.args[0]))
+    async with registry.use(model) as detector:
+        yield detector
 
 
-async def get_openai_client() -> OpenAIClient:
+async def get_openai_client() -> "OpenAIClient":
     """Get initialized OpenAI client."""
     global _openai_client
     if _openai_client is None:
+        from opencar.integrations.openai_client import OpenAIClient
+
         settings = get_settings()
-        _openai_client = OpenAIClient(api_key="test-key", model=settings.openai_model)
+        _openai_client = OpenAIClient.from_settings(settings, cache=get_result_cache())
     return _openai_client
 
 
-@perception_router.post("/detect")
+async def warmup_models(iterations: int = 3) -> None:
+    """Load the default detector and run warmup inferences through it."""
+    async with get_model_registry().use() as detector:
+        await detector.warmup(iterations)
+
+
+def start_warmup(iterations: int = 3) -> Optional[asyncio.Task]:
+    """Warm up the default detector in the background.
+
+    ``/health/ready`` reports not ready until the warmup has finished. Nothing
+    is started when the detector is already loaded, e.g. preloaded before fork.
+
+    Returns:
+        The warmup task, or None if the detector was already loaded
+    """
+    global _warmup_task
+    if _model_registry is not None and _model_registry.peek() is not None:
+        return None
+    _warmup_task = asyncio.ensure_future(warmup_models(iterations))
+    return _warmup_task
+
+
+async def shutdown_models() -> None:
+    """Release initialized models and clients on application shutdown."""
+    global _model_registry, _openai_client, _result_cache, _result_cache_created, _warmup_task
+    if _warmup_task is not None:
+        _warmup_task.cancel()
+        await asyncio.gather(_warmup_task, return_exceptions=True)
+        _warmup_task = None
+    if _model_registry is not None:
+        await _model_registry.close()
+        _model_registry = None
+    if _openai_client is not None:
+        await _openai_client.close()
+        _openai_client = None
+    if _result_cache is not None:
+        await _result_cache.close()
+    _result_cache = None
+    _result_cache_created = False
+
+
+@perception_router.post(
+    "/detect",
+    response_class=Response,
+    responses={
+        200: {
+            "description": "Detections, encoded as negotiated with the Accept header",
+            "content": {
+                JSON_MEDIA_TYPE: {},
+                COLUMNAR_MEDIA_TYPE: {},
+                MSGPACK_MEDIA_TYPE: {},
+            },
+        },
+        406: {"description": "The Accept header allows none of the supported formats"},
+    },
+)
 async def detect_objects(
     file: UploadFile = File(...),
     confidence_threshold: float = 0.5,
-    detector: ObjectDetector = Depends(get_detector)
-) -> Dict[str, Any]:
-    """Detect objects in uploaded image."""
+    model: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    detector: ObjectDetector = Depends(get_detector),
+    cache: Optional[ResultCache] = Depends(get_result_cache),
+) -> Response:
+    """Detect objects in uploaded image.
+
+    The response is JSON, columnar JSON or msgpack, as chosen by the
+    ``Accept`` header (see ``opencar.api.encoding``); other formats get a 406.
+    """
     if not file.content_type or not file.content_type.startswith("image/"):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="File must be an image"
         )
+    media_type = negotiate(accept)
+    if media_type is None:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail=f"Detections can be returned as: {', '.join(SUPPORTED_MEDIA_TYPES)}",
+        )
     
     try:
         # Read image data
         image_data = await file.read()
         
-        # Perform detection
-        detections = await detector.detect(image_data, confidence_threshold)
+        # Identical frames are answered from the cache without inference. The
+        # key names the resolved model and the weights it loaded, so aliases
+        # share entries and a reload to new weights never sees old results,
+        # in this process or in others sharing the Redis tier. A detector
+        # that reports no weights version is never cached.
+        name, version = get_model_registry().resolve(model)
+        weights = getattr(detector, "model_version", None)
+        if weights is None:
+            cache = None
+        if cache is not None:
+            cache_key = ResultCache.make_key(
+                "detect",
+                image_data,
+                confidence_threshold=confidence_threshold,
+                model=f"{name}:{version}",
+                weights=weights,
+            )
+        detections = await cache.get(cache_key) if cache is not None else None
+        if detections is None:
+            detections = await detector.detect(image_data, confidence_threshold)
+            if cache is not None:
+                await cache.set(cache_key, detections)
         
-        return {
+        body = {
             "request_id": str(uuid.uuid4()),
             "timestamp": datetime.utcnow().isoformat(),
             "detections": detections,
@@ -74,13 +262,154 @@ async def detect_objects(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Detection failed: {str(e)}"
         )
+    return detection_response(body, media_type)
+
+
+def get_batch_detection_options(
+    confidence_threshold: float = 0.5,
+    max_detections: int = 100,
+    classes: Optional[List[str]] = Query(None),
+) -> BatchDetectionRequest:
+    """Read batch detection options from the query string."""
+    try:
+        return BatchDetectionRequest(
+            confidence_threshold=confidence_threshold,
+            max_detections=max_detections,
+            classes=classes,
+        )
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+
+@perception_router.post("/detect/batch", response_model=BatchDetectionResponse)
+async def detect_objects_batch(
+    request: Request,
+    model: Optional[str] = None,
+    options: BatchDetectionRequest = Depends(get_batch_detection_options),
+    detector: ObjectDetector = Depends(get_detector),
+) -> BatchDetectionResponse:
+    """Detect objects in every image of a multipart upload.
+
+    Images are decoded and batched as their parts arrive, so inference on
+    the first images overlaps the upload of the rest.
+    """
+    settings = get_settings()
+    class_ids = None
+    if options.classes is not None:
+        unknown = [name for name in options.classes if name not in COCO_CLASSES]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown classes: {', '.join(unknown)}"
+            )
+        class_ids = [COCO_CLASSES.index(name) for name in options.classes]
+
+    start_time = time.perf_counter()
+    image_info: List[Dict[str, Any]] = []
+
+    async def images() -> AsyncIterator[bytes]:
+        async for part in iter_file_parts(
+            request, max_files=settings.batch_max_images, max_size=settings.upload_max_size
+        ):
+            image_info.append({
+                "filename": part.filename,
+                "size": len(part.data),
+                "content_type": part.content_type,
+            })
+            is_image = part.content_type and part.content_type.startswith("image/")
+            yield part.data if is_image else b""
+
+    try:
+        all_detections = await detector.detect_stream(
+            images(),
+            confidence_threshold=options.confidence_threshold,
+            classes=class_ids,
+            max_detections=options.max_detections,
+        )
+    except UploadLimitError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except MultipartError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Batch detection failed: {str(e)}"
+        )
+    if not all_detections:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Request contains no files"
+        )
+
+    timestamp = datetime.utcnow()
+    results = [
+        DetectionResponse(
+            request_id=str(uuid.uuid4()),
+            timestamp=timestamp,
+            status=DetectionStatus.FAILED if detections is None else DetectionStatus.SUCCESS,
+            detections=detections or [],
+            image_info=info,
+        )
+        for detections, info in zip(all_detections, image_info)
+    ]
+    succeeded = any(detections is not None for detections in all_detections)
+    return BatchDetectionResponse(
+        request_id=str(uuid.uuid4()),
+        timestamp=timestamp,
+        status=DetectionStatus.SUCCESS if succeeded else DetectionStatus.FAILED,
+        results=results,
+        total_processed=len(results),
+        processing_time_ms=(time.perf_counter() - start_time) * 1000,
+    )
+
+
+@perception_router.websocket("/stream")
+async def stream_detections(
+    websocket: WebSocket,
+    model: Optional[str] = None,
+    confidence_threshold: Optional[float] = None,
+    drop_policy: Optional[str] = None,
+) -> None:
+    """Detect objects in a continuous stream of frames.
+
+    Send encoded frames as binary messages; each processed frame is answered
+    with a JSON message holding its detections, latency and the stream's
+    dropped-frame count. A text message such as
+    ``{"confidence_threshold": 0.4}`` updates the stream's settings.
+    """
+    settings = get_settings()
+    registry = get_model_registry()
+    drop_policy = (drop_policy or settings.stream_drop_policy).lower()
+    try:
+        registry.resolve(model)
+    except KeyError:
+        await websocket.close(code=1008, reason=f"Unknown model: {model}")
+        return
+    if drop_policy not in DROP_POLICIES:
+        await websocket.close(code=1008, reason=f"Invalid drop policy: {drop_policy}")
+        return
+
+    async def detect_batch(frames: List[bytes], threshold: Optional[float]):
+        # Hold the model per batch so reloads are not blocked by open streams
+        async with registry.use(model) as detector:
+            return await detector.detect_batch(frames, threshold)
+
+    await websocket.accept()
+    stream = FrameStream(
+        detect_batch,
+        max_pending=settings.stream_max_pending,
+        max_batch_size=settings.stream_max_batch_size,
+        drop_policy=drop_policy,
+        confidence_threshold=confidence_threshold,
+    )
+    await stream.run(websocket)
 
 
 @perception_router.post("/analyze")
 async def analyze_scene(
     file: UploadFile = File(...),
     analysis_type: str = "comprehensive",
-    openai_client: OpenAIClient = Depends(get_openai_client)
+    openai_client: "OpenAIClient" = Depends(get_openai_client)
 ) -> Dict[str, Any]:
     """Analyze scene using AI."""
     if not file.content_type or not file.content_type.startswith("image/"):
@@ -123,13 +452,21 @@ async def liveness_check() -> Dict[str, Any]:
 
 
 @health_router.get("/ready")
-async def readiness_check(
-    detector: ObjectDetector = Depends(get_detector)
-) -> Dict[str, Any]:
-    """Readiness probe for Kubernetes."""
+async def readiness_check() -> Dict[str, Any]:
+    """Readiness probe for Kubernetes.
+
+    Not ready while the startup warmup is running; afterwards the default
+    detector is loaded if needed and its health reported.
+    """
+    if _warmup_task is not None and not _warmup_task.done():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service not ready: models are warming up"
+        )
     try:
         # Check if models are loaded
-        is_ready = await detector.health_check()
+        async with get_model_registry().use() as detector:
+            is_ready = await detector.health_check()
         
         return {
             "status": "ready" if is_ready else "not_ready",
@@ -148,29 +485,53 @@ async def readiness_check(
 @health_router.get("/metrics")
 async def get_metrics() -> Dict[str, Any]:
     """Get application metrics."""
+    requests = RequestMetrics().get_metrics()
+    detector = _model_registry.peek() if _model_registry else None
+    detector_stats = detector.get_stats() if detector else None
     return {
         "timestamp": datetime.utcnow().isoformat(),
         "metrics": {
-            "total_requests": 0,  # Would be tracked in production
-            "active_connections": 0,
-            "model_status": "loaded",
-            "memory_usage": "low",
-            "cpu_usage": "normal"
+            "total_requests": requests["total_requests"],
+            "active_connections": requests["active_requests"],
+            "requests": requests,
+            "model_status": "loaded" if detector else "not_loaded",
+            "inference": detector_stats["performance"] if detector_stats else None,
+            "batching": detector_stats["batching"] if detector_stats else None,
+            "result_cache": _result_cache.get_stats() if _result_cache else None,
+            "models": _model_registry.get_stats() if _model_registry else None,
         }
     }
 
 
+@admin_router.get("/models")
+async def list_models() -> Dict[str, Any]:
+    """List registered models and whether they are loaded."""
+    models = get_model_registry().list_models()
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "models": models,
+        "total_models": len(models),
+    }
+
+
 @admin_router.post("/models/reload")
-async def reload_models() -> Dict[str, Any]:
-    """Reload ML models."""
-    global _detector
+async def reload_models(model: Optional[str] = None) -> Dict[str, Any]:
+    """Reload one model, or all loaded models, without pausing requests."""
+    registry = get_model_registry()
+    try:
+        registry.resolve(model)
+    except KeyError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e.args[0]))
     try:
-        if _detector:
-            await _detector.reload()
+        reloaded = await registry.reload(model)
+        if _result_cache is not None:
+            # Entries of the previous weights can no longer be hit; free them
+            _result_cache.clear("detect")
         
         return {
             "status": "success",
             "message": "Models reloaded successfully",
+            "models": reloaded,
             "timestamp": datetime.utcnow().isoformat()
         }
     except Exception as e:
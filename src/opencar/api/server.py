@@ -0,0 +1,265 @@
+"""Preload-and-fork serving for ``opencar serve --preload``.
+
+Plain ``uvicorn --workers N`` starts every worker from scratch: each one
+imports the application and loads its own copy of the model. In preload mode
+the master process imports the application and loads and warms the default
+model once, then forks the workers. The workers share the model memory with
+the master copy-on-write and are ready as soon as they start.
+
+All workers accept connections on one socket bound by the master. The master
+forks a replacement for a worker that exits, and stops all workers on SIGINT
+or SIGTERM; a worker whose master has died shuts itself down.
+
+Threads do not survive ``fork()``. The engine threads used for the warmup are
+stopped before forking, and the model runtimes run single-threaded, which
+also keeps them from starting thread pools of their own; each worker is a
+separate process, so the workers still use one core each.
+"""
+
+import asyncio
+import gc
+import io
+import os
+import resource
+import signal
+import socket
+import time
+from typing import Dict, Optional
+
+import structlog
+import uvicorn
+from fastapi import FastAPI
+
+from opencar.config.settings import Settings, get_settings
+
+logger = structlog.get_logger()
+
+# A worker exiting sooner than this after being forked is treated as a crash
+# on startup and stops the server instead of being restarted in a loop
+MIN_WORKER_UPTIME = 1.0
+
+
+def check_preload_supported(settings: Settings) -> None:
+    """Check the settings allow loading the model before forking.
+
+    Raises:
+        ValueError: If the model runs on CUDA or in inference worker
+            processes, neither of which survives ``fork()``
+    """
+    if settings.device.startswith("cuda"):
+        raise ValueError("Preloading is not supported on CUDA devices")
+    if settings.inference_workers > 0:
+        raise ValueError("Preloading is not supported with inference_workers > 0")
+
+
+def preload_app(settings: Optional[Settings] = None) -> FastAPI:
+    """Create the application with its default model loaded and warmed up.
+
+    The process is left ready to fork: no engine threads are running, and the
+    garbage collector is disabled with everything created so far frozen, so
+    neither collections nor allocations into freed gaps copy the shared pages
+    in the workers (see ``gc.freeze``). Workers re-enable the collector.
+
+    Raises:
+        ValueError: If the settings do not support preloading
+    """
+    from opencar.api.app import create_app
+    from opencar.api.routes import get_model_registry, warmup_models
+
+    settings = settings or get_settings()
+    check_preload_supported(settings)
+    if settings.inference_intra_op_threads > 1 or settings.inference_inter_op_threads > 1:
+        logger.warning("Preload mode runs the model single-threaded in each worker")
+    settings = settings.model_copy(
+        update={"inference_intra_op_threads": 1, "inference_inter_op_threads": 1}
+    )
+
+    async def warm_up() -> None:
+        await warmup_models(settings.warmup_iterations)
+        await _send_warmup_requests(app)
+
+    gc.disable()
+    start_time = time.perf_counter()
+    app = create_app(settings)
+    registry = get_model_registry(settings)
+    asyncio.run(warm_up())
+    detector = registry.peek()
+    if detector is not None:
+        detector.prepare_fork()
+
+    gc.freeze()
+    logger.info(
+        "Preloaded application",
+        load_time_ms=(time.perf_counter() - start_time) * 1000,
+        max_rss_mb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    )
+    return app
+
+
+async def _send_warmup_requests(app: FastAPI) -> None:
+    """Send a detection and a readiness request through the application in-process.
+
+    FastAPI sets a route up on the first request it matches, and Starlette
+    imports what it needs to read uploads then; done here, the workers inherit
+    it. The requests are dropped from the request metrics afterwards.
+    """
+    import httpx
+    from PIL import Image
+
+    from opencar.api.middleware.metrics import RequestMetrics
+
+    image = io.BytesIO()
+    Image.new("RGB", (1280, 720)).save(image, format="JPEG")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+        responses = [
+            await client.post(
+                "/api/v1/perception/detect",
+                files={"file": ("warmup.jpg", image.getvalue(), "image/jpeg")},
+            ),
+            await client.get("/api/v1/health/ready"),
+        ]
+    RequestMetrics().reset()
+    for response in responses:
+        if response.status_code != 200:
+            logger.warning(
+                f"Warmup request {response.request.url.path} failed: {response.status_code}"
+            )
+
+
+class _WorkerServer(uvicorn.Server):
+    """Uvicorn server that shuts down when its master process goes away."""
+
+    def __init__(self, config: uvicorn.Config, master_pid: int):
+        super().__init__(config)
+        self.master_pid = master_pid
+
+    async def on_tick(self, counter: int) -> bool:
+        if os.getppid() != self.master_pid:
+            self.should_exit = True
+        return await super().on_tick(counter)
+
+
+class PreforkServer:
+    """Fork uvicorn workers serving one socket and keep them running."""
+
+    def __init__(self, config: uvicorn.Config, workers: int = 1):
+        """Initialize the server.
+
+        Args:
+            config: Uvicorn configuration with the (preloaded) application object
+            workers: Number of worker processes
+        """
+        self.config = config
+        self.workers = max(1, workers)
+        self.children: Dict[int, float] = {}
+        self.stopping = False
+
+    def run(self) -> None:
+        """Bind the socket, fork the workers and supervise them until stopped.
+
+        Raises:
+            RuntimeError: If a worker exits right after starting
+        """
+        self.config.load()
+        sock = self.config.bind_socket()
+        previous = {
+            signum: signal.signal(signum, self._handle_stop)
+            for signum in (signal.SIGINT, signal.SIGTERM)
+        }
+        try:
+            for _ in range(self.workers):
+                self._spawn(sock)
+            self._supervise(sock)
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+            self._stop_children()
+            sock.close()
+
+    def _spawn(self, sock: socket.socket) -> int:
+        """Fork a worker serving ``sock``."""
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker(sock)
+        self.children[pid] = time.monotonic()
+        logger.info(f"Started worker {pid}")
+        return pid
+
+    def _run_worker(self, sock: socket.socket) -> None:
+        """Serve requests in a forked child; never returns."""
+        master_pid = os.getppid()
+        code = 0
+        try:
+            gc.enable()
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, signal.SIG_DFL)
+            _WorkerServer(self.config, master_pid).run(sockets=[sock])
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else 1
+        except BaseException:
+            logger.exception("Worker failed")
+            code = 1
+        finally:
+            os._exit(code)
+
+    def _supervise(self, sock: socket.socket) -> None:
+        """Reap exited workers and replace them until the server is stopped."""
+        while self.children:
+            try:
+                pid, wait_status = os.wait()
+            except ChildProcessError:
+                break
+            started_at = self.children.pop(pid, None)
+            if started_at is None or self.stopping:
+                continue
+            exit_code = os.waitstatus_to_exitcode(wait_status)
+            if time.monotonic() - started_at < MIN_WORKER_UPTIME:
+                raise RuntimeError(f"Worker {pid} exited on startup with code {exit_code}")
+            logger.warning(f"Worker {pid} exited with code {exit_code}, restarting")
+            self._spawn(sock)
+
+    def _handle_stop(self, signum: int, frame: object) -> None:
+        """Stop the workers on SIGINT/SIGTERM; uvicorn shuts each down gracefully."""
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _stop_children(self) -> None:
+        """Terminate and reap any workers still running."""
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+            self.children.pop(pid, None)
+
+
+def serve_preloaded(
+    host: str = "0.0.0.0",
+    port: int = 8000,
+    workers: int = 1,
+    settings: Optional[Settings] = None,
+) -> None:
+    """Preload the application and serve it from ``workers`` forked processes.
+
+    Raises:
+        ValueError: If the settings do not support preloading
+    """
+    app = preload_app(settings)
+    config = uvicorn.Config(app, host=host, port=port, lifespan="on")
+    PreforkServer(config, workers).run()
+
+
+__all__ = [
+    "MIN_WORKER_UPTIME",
+    "PreforkServer",
+    "check_preload_supported",
+    "preload_app",
+    "serve_preloaded",
+]
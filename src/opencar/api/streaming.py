@@ -0,0 +1,218 @@
+"""Per-connection frame streaming for the WebSocket detection endpoint.
+
+A client sends encoded frames as binary WebSocket messages and gets one JSON
+message back per processed frame. Frames wait in a small bounded queue; when
+inference falls behind, the drop policy decides what happens to a new frame:
+
+- ``drop_oldest``: discard the stalest queued frame (best for live feeds)
+- ``drop_newest``: discard the incoming frame
+- ``block``: stop reading from the socket until there is room, pushing
+  backpressure onto the client through TCP flow control
+
+Everything queued is detected as one batch.
+"""
+
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, NamedTuple, Optional
+
+import structlog
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from opencar.monitoring.metrics import Histogram, MetricsRegistry, get_registry
+
+logger = structlog.get_logger()
+
+DROP_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+# Runs detection on a batch of encoded frames at a confidence threshold
+BatchDetector = Callable[[List[bytes], Optional[float]], Awaitable[List[List[Dict[str, Any]]]]]
+
+
+class _Frame(NamedTuple):
+    """Frame waiting for detection."""
+
+    frame_id: int
+    data: bytes
+    received_at: float
+
+
+class FrameStream:
+    """Bounded frame queue, batching and statistics for one stream."""
+
+    def __init__(
+        self,
+        detect_batch: BatchDetector,
+        max_pending: int = 2,
+        max_batch_size: int = 4,
+        drop_policy: str = "drop_oldest",
+        confidence_threshold: Optional[float] = None,
+        registry: Optional[MetricsRegistry] = None,
+    ):
+        """Initialize the stream.
+
+        Args:
+            detect_batch: Detection function for a list of encoded frames
+            max_pending: Frames queued before the drop policy applies
+            max_batch_size: Most frames detected in one batch
+            drop_policy: One of ``DROP_POLICIES``
+            confidence_threshold: Detection threshold (None: detector default)
+            registry: Metrics registry (defaults to the global one)
+        """
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"drop_policy must be one of {DROP_POLICIES}")
+        self.detect_batch = detect_batch
+        self.max_pending = max(1, max_pending)
+        self.max_batch_size = max(1, max_batch_size)
+        self.drop_policy = drop_policy
+        self.confidence_threshold = confidence_threshold
+
+        self._pending: Deque[_Frame] = deque()
+        self._ready = asyncio.Event()
+        self._space = asyncio.Event()
+        self._closed = False
+
+        self.frames_received = 0
+        self.frames_processed = 0
+        self.frames_dropped = 0
+        self.batches = 0
+        self.latency = Histogram()
+
+        registry = registry or get_registry()
+        frames = registry.counter(
+            "opencar_stream_frames_total", "Frames received on detection streams", ["result"]
+        )
+        self._processed_metric = frames.labels("processed")
+        self._dropped_metric = frames.labels("dropped")
+        self._latency_metric = registry.histogram(
+            "opencar_stream_latency_seconds", "Time from frame receipt to its detections"
+        ).labels()
+        self._active_metric = registry.gauge(
+            "opencar_streams_active", "Open detection streams"
+        ).labels()
+
+    async def put(self, data: bytes) -> None:
+        """Queue a frame, applying the drop policy when the queue is full."""
+        frame = _Frame(self.frames_received, data, time.perf_counter())
+        self.frames_received += 1
+
+        if len(self._pending) >= self.max_pending:
+            if self.drop_policy == "block":
+                while len(self._pending) >= self.max_pending and not self._closed:
+                    self._space.clear()
+                    await self._space.wait()
+            elif self.drop_policy == "drop_newest":
+                self._drop()
+                return
+            else:
+                self._pending.popleft()
+                self._drop()
+
+        self._pending.append(frame)
+        self._ready.set()
+
+    def _drop(self) -> None:
+        """Count a dropped frame."""
+        self.frames_dropped += 1
+        self._dropped_metric.inc()
+
+    async def next_batch(self) -> List[_Frame]:
+        """Wait for queued frames and take up to ``max_batch_size`` of them.
+
+        Returns:
+            Frames in arrival order; empty once the stream is closed and drained
+        """
+        while not self._pending:
+            if self._closed:
+                return []
+            self._ready.clear()
+            await self._ready.wait()
+
+        count = min(len(self._pending), self.max_batch_size)
+        batch = [self._pending.popleft() for _ in range(count)]
+        self._space.set()
+        return batch
+
+    def close(self) -> None:
+        """Stop accepting frames; queued frames are still processed."""
+        self._closed = True
+        self._ready.set()
+        self._space.set()
+
+    async def run(self, websocket: WebSocket) -> None:
+        """Serve an accepted WebSocket until the client disconnects."""
+        self._active_metric.inc()
+        receiver = asyncio.ensure_future(self._receive(websocket))
+        try:
+            while True:
+                batch = await self.next_batch()
+                if not batch:
+                    break
+                await self._process(batch, websocket)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            self.close()
+            receiver.cancel()
+            self._active_metric.dec()
+            logger.info("Detection stream closed", **self.get_stats())
+
+    async def _receive(self, websocket: WebSocket) -> None:
+        """Read frames (binary) and settings updates (JSON text) from the client."""
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes") is not None:
+                    await self.put(message["bytes"])
+                elif message.get("text"):
+                    self._configure(message["text"])
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        finally:
+            self.close()
+
+    def _configure(self, text: str) -> None:
+        """Apply a JSON settings update such as ``{"confidence_threshold": 0.4}``."""
+        try:
+            update = json.loads(text)
+            if "confidence_threshold" in update:
+                self.confidence_threshold = float(update["confidence_threshold"])
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring invalid stream update: {str(e)}")
+
+    async def _process(self, batch: List[_Frame], websocket: WebSocket) -> None:
+        """Detect a batch and send one message per frame."""
+        results = await self.detect_batch(
+            [frame.data for frame in batch], self.confidence_threshold
+        )
+        self.batches += 1
+        for frame, detections in zip(batch, results):
+            latency = time.perf_counter() - frame.received_at
+            self.latency.record(latency)
+            self._latency_metric.record(latency)
+            self.frames_processed += 1
+            self._processed_metric.inc()
+            await websocket.send_json({
+                "frame_id": frame.frame_id,
+                "detections": detections,
+                "latency_ms": latency * 1000,
+                "batch_size": len(batch),
+                "dropped": self.frames_dropped,
+            })
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-stream statistics."""
+        return {
+            "frames_received": self.frames_received,
+            "frames_processed": self.frames_processed,
+            "frames_dropped": self.frames_dropped,
+            "batches": self.batches,
+            "latency_ms": self.latency.snapshot(scale=1000) if self.latency.count else None,
+        }
+
+
+__all__ = ["DROP_POLICIES", "FrameStream"]
@@ -0,0 +1,199 @@
+"""Content-addressed cache for detection and scene analysis results.
+
+Keys are a BLAKE2b digest of the raw request bytes plus the request
+parameters, so byte-identical frames resent by cameras or retries map to the
+same entry. Values are stored JSON-encoded: the encoded size drives the byte
+cap, and every hit returns a fresh copy that callers are free to mutate.
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import structlog
+
+from opencar.monitoring.metrics import MetricsRegistry, get_registry
+
+logger = structlog.get_logger()
+
+
+class ResultCache:
+    """In-process LRU/TTL cache with an optional shared Redis tier."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: float = 3600.0,
+        redis_client: Any = None,
+        redis_prefix: str = "opencar:rc:",
+        registry: Optional[MetricsRegistry] = None,
+    ):
+        """Initialize result cache.
+
+        Args:
+            max_entries: Maximum number of entries kept in process
+            max_bytes: Maximum encoded size of entries kept in process
+            ttl_seconds: Time to live of an entry in both tiers
+            redis_client: Optional ``redis.asyncio`` client used as a second tier
+            redis_prefix: Prefix for Redis keys
+            registry: Metrics registry for hit/miss counters
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.redis = redis_client
+        self.redis_prefix = redis_prefix
+
+        # key -> (expires_at, encoded value), oldest first
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        registry = registry or get_registry()
+        self._lookups = registry.counter(
+            "opencar_result_cache_lookups_total", "Result cache lookups", ["namespace", "result"]
+        )
+        self._evictions = registry.counter(
+            "opencar_result_cache_evictions_total", "Result cache evictions"
+        ).labels()
+        self._size_bytes = registry.gauge(
+            "opencar_result_cache_bytes", "Encoded size of cached results"
+        ).labels()
+
+    @staticmethod
+    def make_key(namespace: str, data: bytes, **params: Any) -> str:
+        """Build a cache key from request bytes and parameters."""
+        digest = hashlib.blake2b(data, digest_size=16)
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+        return f"{namespace}:{digest.hexdigest()}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None on a miss."""
+        namespace = key.partition(":")[0]
+        payload = self._get_local(key)
+        if payload is not None:
+            self.hits += 1
+        elif self.redis is not None:
+            try:
+                payload = await self.redis.get(self.redis_prefix + key)
+            except Exception as e:
+                logger.warning(f"Result cache Redis lookup failed: {str(e)}")
+            if payload is not None:
+                self.redis_hits += 1
+                self._set_local(key, payload)
+
+        if payload is None:
+            self.misses += 1
+            self._lookups.labels(namespace, "miss").inc()
+            return None
+        self._lookups.labels(namespace, "hit").inc()
+        return json.loads(payload)
+
+    async def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value."""
+        payload = json.dumps(value, separators=(",", ":")).encode()
+        self._set_local(key, payload)
+        if self.redis is not None:
+            try:
+                await self.redis.set(
+                    self.redis_prefix + key, payload, ex=max(1, int(self.ttl_seconds))
+                )
+            except Exception as e:
+                logger.warning(f"Result cache Redis write failed: {str(e)}")
+
+    def _get_local(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return payload
+
+    def _set_local(self, key: str, payload: bytes) -> None:
+        if key in self._entries:
+            self._remove(key)
+        if len(payload) > self.max_bytes:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, payload)
+        self._bytes += len(payload)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+            self._evictions.inc()
+        self._size_bytes.set(self._bytes)
+
+    def _remove(self, key: str) -> None:
+        _, payload = self._entries.pop(key)
+        self._bytes -= len(payload)
+        self._size_bytes.set(self._bytes)
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """Drop in-process entries, optionally only those in ``namespace``."""
+        if namespace is None:
+            self._entries.clear()
+            self._bytes = 0
+            self._size_bytes.set(0)
+            return
+        prefix = f"{namespace}:"
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            self._remove(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """Encoded size of in-process entries."""
+        return self._bytes
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.redis_hits) / lookups if lookups else 0.0,
+            "redis_enabled": self.redis is not None,
+        }
+
+    async def close(self) -> None:
+        """Close the Redis connection, if any."""
+        if self.redis is not None:
+            await self.redis.aclose()
+
+
+def create_result_cache(settings: Any) -> Optional[ResultCache]:
+    """Create the result cache configured in settings, or None when disabled."""
+    if not settings.result_cache_enabled:
+        return None
+    redis_client = None
+    if settings.result_cache_backend == "redis":
+        import redis.asyncio as redis
+
+        redis_client = redis.Redis.from_url(settings.redis_url)
+    return ResultCache(
+        max_entries=settings.result_cache_max_entries,
+        max_bytes=settings.result_cache_max_bytes,
+        ttl_seconds=settings.result_cache_ttl_seconds,
+        redis_client=redis_client,
+    )
+
+
+__all__ = ["ResultCache", "create_result_cache"]
@@ -0,0 +1,458 @@
+"""``opencar bench``: performance benchmarks for the inference stack.
+
+Each subcommand times one layer of the detection path, prints throughput,
+latency percentiles and the peak RSS of the process in a table, and can write
+the same numbers as JSON (``--output``) so runs can be compared across
+releases. The model and its dependencies are imported by the subcommands
+only, keeping ``opencar --help`` fast.
+"""
+
+import asyncio
+import io
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from opencar import __version__
+
+console = Console()
+bench_app = typer.Typer(
+    name="bench",
+    help="Benchmark inference, NMS and the API",
+    no_args_is_help=True,
+)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB, or None if unavailable."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def summarize(latencies: Sequence[float], items: int, elapsed: float) -> Dict[str, Any]:
+    """Summarize one benchmark case.
+
+    Args:
+        latencies: Duration of every timed call in seconds
+        items: Number of items (images, frames or requests) processed
+        elapsed: Wall-clock time of the whole case in seconds
+
+    Returns:
+        Throughput in items per second, latency percentiles in milliseconds
+        and the peak RSS so far
+    """
+    import numpy as np
+
+    p50, p95, p99 = np.percentile(np.asarray(latencies) * 1000, [50, 95, 99])
+    return {
+        "iterations": len(latencies),
+        "throughput": items / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def build_report(
+    benchmark: str, unit: str, parameters: Dict[str, Any], results: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Wrap benchmark results with the environment they were measured in."""
+    return {
+        "benchmark": benchmark,
+        "version": __version__,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "throughput_unit": unit,
+        "parameters": parameters,
+        "results": results,
+    }
+
+
+# Short table headers, so a report fits an 80-column terminal
+_HEADERS = {
+    "batch_size": "batch",
+    "iou_threshold": "iou",
+    "concurrency": "clients",
+    "iterations": "n",
+    "peak_rss_mb": "RSS MB",
+}
+
+
+def _format(value: Any) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    return str(value)
+
+
+def _report(report: Dict[str, Any], output: Optional[Path]) -> None:
+    """Print the results table and write the JSON report if requested."""
+    results = report["results"]
+    table = Table(title=f"opencar bench {report['benchmark']}", show_header=True)
+    columns = list(results[0]) if results else []
+    for column in columns:
+        if column == "throughput":
+            header = report["throughput_unit"]
+        else:
+            header = _HEADERS.get(column, column)
+        table.add_column(
+            header,
+            style="cyan" if column == "mode" else "green",
+            justify="left" if column == "mode" else "right",
+            no_wrap=True,
+        )
+    for result in results:
+        table.add_row(*(_format(result[column]) for column in columns))
+    console.print(table)
+
+    if output is not None:
+        output.write_text(json.dumps(report, indent=2) + "\n")
+        console.print(f"Results written to {output}")
+
+
+async def _time_calls(
+    call: Callable[[], Any], iterations: int, warmup: int
+) -> Dict[str, Any]:
+    """Await ``call`` ``warmup`` times untimed, then ``iterations`` times timed."""
+    for _ in range(warmup):
+        await call()
+    latencies = []
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        call_start = time.perf_counter()
+        await call()
+        latencies.append(time.perf_counter() - call_start)
+    return {"latencies": latencies, "elapsed": time.perf_counter() - start_time}
+
+
+async def run_engine_benchmark(
+    batch_sizes: Sequence[int],
+    iterations: int = 50,
+    warmup: int = 5,
+    batches: int = 4,
+    model_path: Optional[Path] = None,
+    device: str = "cpu",
+    use_onnx: bool = False,
+    num_threads: int = 4,
+) -> List[Dict[str, Any]]:
+    """Time ``InferenceEngine.predict`` and ``batch_predict`` per batch size.
+
+    ``predict`` runs one batch per call. ``batch_predict`` runs ``batches``
+    batches per call, so its pipelining of pre- and postprocessing with the
+    model shows in the throughput.
+    """
+    import numpy as np
+
+    from opencar.ml.inference import InferenceEngine
+
+    engine = InferenceEngine(
+        model_path=model_path,
+        device=device,
+        batch_size=max(batch_sizes),
+        use_onnx=use_onnx,
+        num_threads=num_threads,
+    )
+    await engine.load_model()
+    rng = np.random.default_rng(0)
+    frames = list(
+        rng.integers(0, 256, (max(batch_sizes) * batches, *engine.input_shape), dtype=np.uint8)
+    )
+
+    results = []
+    try:
+        for batch_size in batch_sizes:
+            cases = [
+                ("predict", batch_size, lambda: engine.predict(frames[:batch_size])),
+                (
+                    "batch_predict",
+                    batch_size * batches,
+                    lambda: engine.batch_predict(
+                        frames[:batch_size * batches], batch_size=batch_size
+                    ),
+                ),
+            ]
+            for mode, images_per_call, call in cases:
+                timing = await _time_calls(call, iterations, warmup)
+                results.append({
+                    "mode": mode,
+                    "batch_size": batch_size,
+                    **summarize(
+                        timing["latencies"], images_per_call * iterations, timing["elapsed"]
+                    ),
+                })
+    finally:
+        await engine.unload_model()
+        engine.close()
+    return results
+
+
+def run_nms_benchmark(
+    box_counts: Sequence[int],
+    iou_thresholds: Sequence[float],
+    iterations: int = 100,
+    warmup: int = 5,
+    strategy: str = "per_class",
+    num_classes: int = 80,
+) -> List[Dict[str, Any]]:
+    """Time ``batched_non_max_suppression`` on one frame of random boxes per case."""
+    import numpy as np
+
+    from opencar.perception.utils.nms import batched_non_max_suppression
+
+    results = []
+    for num_boxes in box_counts:
+        rng = np.random.default_rng(0)
+        xy = rng.uniform(0, 600, (num_boxes, 2))
+        wh = rng.uniform(10, 120, (num_boxes, 2))
+        boxes = np.concatenate([xy, xy + wh], axis=-1).astype(np.float32)[None]
+        scores = rng.uniform(0.0, 1.0, (1, num_boxes)).astype(np.float32)
+        class_ids = rng.integers(0, num_classes, (1, num_boxes))
+
+        for iou_threshold in iou_thresholds:
+            def call():
+                return batched_non_max_suppression(
+                    boxes, scores, class_ids,
+                    iou_threshold=iou_threshold, score_threshold=0.25, strategy=strategy,
+                )
+
+            for _ in range(warmup):
+                call()
+            latencies = []
+            start_time = time.perf_counter()
+            for _ in range(iterations):
+                call_start = time.perf_counter()
+                call()
+                latencies.append(time.perf_counter() - call_start)
+            elapsed = time.perf_counter() - start_time
+            results.append({
+                "boxes": num_boxes,
+                "iou_threshold": iou_threshold,
+                **summarize(latencies, iterations, elapsed),
+            })
+    return results
+
+
+def _encode_frames(count: int, width: int, height: int) -> List[bytes]:
+    """Encode ``count`` distinct JPEG frames, so the result cache never answers."""
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(count):
+        buffer = io.BytesIO()
+        pixels = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        Image.fromarray(pixels).save(buffer, format="JPEG")
+        frames.append(buffer.getvalue())
+    return frames
+
+
+async def run_api_benchmark(
+    requests: int = 200,
+    concurrency: int = 8,
+    warmup: int = 5,
+    width: int = 640,
+    height: int = 480,
+) -> Dict[str, Any]:
+    """Load ``/api/v1/perception/detect`` in-process at a fixed concurrency.
+
+    Requests go through the full middleware stack over ASGI, without a
+    network. The application starts up as it would under a server, and the
+    benchmark waits for ``/health/ready`` before sending load. Rate limiting
+    is raised above the load generated.
+    """
+    import httpx
+
+    from opencar.api.app import create_app
+    from opencar.config.settings import get_settings
+
+    settings = get_settings()
+    settings = settings.model_copy(
+        update={
+            "rate_limit_per_minute": max(
+                settings.rate_limit_per_minute, (requests + warmup) * 2
+            )
+        }
+    )
+    app = create_app(settings)
+    frames = _encode_frames(requests + warmup, width, height)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://localhost", timeout=None
+        ) as client:
+            while (await client.get("/api/v1/health/ready")).status_code != 200:
+                await asyncio.sleep(0.05)
+
+            async def detect(frame: bytes) -> int:
+                response = await client.post(
+                    "/api/v1/perception/detect",
+                    files={"file": ("frame.jpg", frame, "image/jpeg")},
+                )
+                return response.status_code
+
+            for frame in frames[:warmup]:
+                await detect(frame)
+
+            pending = iter(frames[warmup:])
+            latencies: List[float] = []
+            errors = 0
+
+            async def client_loop() -> None:
+                nonlocal errors
+                for frame in pending:
+                    request_start = time.perf_counter()
+                    status_code = await detect(frame)
+                    latencies.append(time.perf_counter() - request_start)
+                    if status_code != 200:
+                        errors += 1
+
+            start_time = time.perf_counter()
+            await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start_time
+
+    return {
+        "concurrency": concurrency,
+        "errors": errors,
+        **summarize(latencies, requests, elapsed),
+    }
+
+
+@bench_app.command("engine")
+def bench_engine(
+    batch_sizes: List[int] = typer.Option(
+        [1, 4, 8], "--batch-size", "-b", help="Batch sizes to benchmark (repeatable)"
+    ),
+    iterations: int = typer.Option(50, "--iterations", "-n", min=1, help="Timed calls per case"),
+    warmup: int = typer.Option(5, "--warmup", min=0, help="Untimed calls per case"),
+    batches: int = typer.Option(
+        4, "--batches", min=1, help="Batches per batch_predict call"
+    ),
+    model_path: Optional[Path] = typer.Option(None, "--model-path", "-m", help="Model file"),
+    device: str = typer.Option("cpu", "--device", "-d", help="Inference device"),
+    onnx: bool = typer.Option(False, "--onnx", help="Run the model with ONNX Runtime"),
+    num_threads: int = typer.Option(4, "--num-threads", min=0, help="Engine CPU threads"),
+    output: Optional[Path] = typer.Option(None, "--output", "-o", help="Write results as JSON"),
+) -> None:
+    """Benchmark InferenceEngine predict and batch_predict across batch sizes."""
+    try:
+        results = asyncio.run(
+            run_engine_benchmark(
+                batch_sizes,
+                iterations=iterations,
+                warmup=warmup,
+                batches=batches,
+                model_path=model_path,
+                device=device,
+                use_onnx=onnx,
+                num_threads=num_threads,
+            )
+        )
+    except (ValueError, RuntimeError, FileNotFoundError) as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        raise typer.Exit(1)
+    parameters = {
+        "batch_sizes": batch_sizes,
+        "iterations": iterations,
+        "warmup": warmup,
+        "batches": batches,
+        "model_path": str(model_path) if model_path else None,
+        "device": device,
+        "onnx": onnx,
+        "num_threads": num_threads,
+    }
+    _report(build_report("engine", "images/s", parameters, results), output)
+
+
+@bench_app.command("nms")
+def bench_nms(
+    box_counts: List[int] = typer.Option(
+        [1000, 10000], "--boxes", "-b", help="Candidate boxes per frame (repeatable)"
+    ),
+    iou_thresholds: List[float] = typer.Option(
+        [0.45, 0.7], "--iou", help="IoU thresholds (repeatable)"
+    ),
+    iterations: int = typer.Option(100, "--iterations", "-n", min=1, help="Timed calls per case"),
+    warmup: int = typer.Option(5, "--warmup", min=0, help="Untimed calls per case"),
+    strategy: str = typer.Option("per_class", "--strategy", help="NMS strategy (per_class/offset)"),
+    output: Optional[Path] = typer.Option(None, "--output", "-o", help="Write results as JSON"),
+) -> None:
+    """Benchmark batched NMS across box counts and IoU thresholds."""
+    if strategy not in ("per_class", "offset"):
+        console.print(f"[red]Error: Unknown NMS strategy: {strategy}[/red]")
+        raise typer.Exit(1)
+    results = run_nms_benchmark(
+        box_counts, iou_thresholds, iterations=iterations, warmup=warmup, strategy=strategy
+    )
+    parameters = {
+        "box_counts": box_counts,
+        "iou_thresholds": iou_thresholds,
+        "iterations": iterations,
+        "warmup": warmup,
+        "strategy": strategy,
+    }
+    _report(build_report("nms", "frames/s", parameters, results), output)
+
+
+@bench_app.command("api")
+def bench_api(
+    requests: int = typer.Option(200, "--requests", "-n", min=1, help="Timed requests"),
+    concurrency: List[int] = typer.Option(
+        [8], "--concurrency", "-c", help="Concurrent clients (repeatable)"
+    ),
+    warmup: int = typer.Option(5, "--warmup", min=0, help="Untimed requests before each run"),
+    width: int = typer.Option(640, "--width", min=1, help="Frame width"),
+    height: int = typer.Option(480, "--height", min=1, help="Frame height"),
+    output: Optional[Path] = typer.Option(None, "--output", "-o", help="Write results as JSON"),
+) -> None:
+    """Benchmark /detect in-process with a concurrent ASGI load generator."""
+    results = [
+        asyncio.run(
+            run_api_benchmark(
+                requests=requests,
+                concurrency=clients,
+                warmup=warmup,
+                width=width,
+                height=height,
+            )
+        )
+        for clients in concurrency
+    ]
+    parameters = {
+        "requests": requests,
+        "concurrency": concurrency,
+        "warmup": warmup,
+        "width": width,
+        "height": height,
+    }
+    _report(build_report("api", "requests/s", parameters, results), output)
+
+
+__all__ = [
+    "bench_app",
+    "build_report",
+    "peak_rss_mb",
+    "run_api_benchmark",
+    "run_engine_benchmark",
+    "run_nms_benchmark",
+    "summarize",
+]
@@ -0,0 +1,153 @@
+"""``opencar detect``: offline detection over directories of images."""
+
+import asyncio
+from pathlib import Path
+from typing import Optional
+
+import typer
+from rich.console import Console
+from rich.progress import (
+    BarColumn,
+    MofNCompleteColumn,
+    Progress,
+    ProgressColumn,
+    SpinnerColumn,
+    TextColumn,
+    TimeRemainingColumn,
+)
+from rich.text import Text
+
+console = Console()
+
+
+class _RateColumn(ProgressColumn):
+    """Images processed per second."""
+
+    def render(self, task) -> Text:
+        if task.speed is None:
+            return Text("- img/s", style="progress.data.speed")
+        return Text(f"{task.speed:,.1f} img/s", style="progress.data.speed")
+
+
+def detect(
+    source: str = typer.Argument(..., help="Directory (searched recursively) or glob of images"),
+    output: Path = typer.Option(
+        Path("detections.jsonl"), "--output", "-o", help="JSON Lines file or Parquet directory"
+    ),
+    output_format: Optional[str] = typer.Option(
+        None,
+        "--format",
+        "-f",
+        help="jsonl or parquet (default: parquet for a .parquet output, else jsonl)",
+    ),
+    checkpoint: Optional[Path] = typer.Option(
+        None, "--checkpoint", help="Checkpoint file (default: <output>.checkpoint.json)"
+    ),
+    checkpoint_every: int = typer.Option(
+        1000, "--checkpoint-every", min=1, help="Images between checkpoints"
+    ),
+    overwrite: bool = typer.Option(
+        False, "--overwrite", help="Start over, replacing existing output and checkpoint"
+    ),
+    batch_size: Optional[int] = typer.Option(
+        None, "--batch-size", "-b", min=1, help="Images per model batch (default: settings)"
+    ),
+    confidence_threshold: float = typer.Option(
+        0.5, "--confidence", "-c", min=0.0, max=1.0, help="Detection threshold"
+    ),
+    decode_workers: Optional[int] = typer.Option(
+        None, "--decode-workers", "-j", min=1, help="Decode processes (default: one per CPU)"
+    ),
+    read_workers: int = typer.Option(4, "--read-workers", min=1, help="File reader threads"),
+    model_path: Optional[Path] = typer.Option(None, "--model-path", "-m", help="Model file"),
+    device: Optional[str] = typer.Option(None, "--device", "-d", help="Inference device"),
+) -> None:
+    """Run detection over image files and write the results incrementally.
+
+    An interrupted run resumes from its checkpoint when run again.
+    """
+    from opencar.config.settings import get_settings
+    from opencar.ml.inference import InferenceEngine
+    from opencar.perception.offline import (
+        OUTPUT_FORMATS,
+        detect_files,
+        find_images,
+        load_checkpoint,
+    )
+
+    output_format = output_format or ("parquet" if output.suffix == ".parquet" else "jsonl")
+    if output_format not in OUTPUT_FORMATS:
+        console.print(f"[red]Error: Unknown output format: {output_format}[/red]")
+        raise typer.Exit(1)
+    checkpoint = checkpoint or output.with_name(output.name + ".checkpoint.json")
+    if overwrite:
+        checkpoint.unlink(missing_ok=True)
+    elif output.exists() and not checkpoint.exists():
+        console.print(
+            f"[red]Error: {output} exists without a checkpoint; use --overwrite to replace it[/red]"
+        )
+        raise typer.Exit(1)
+
+    paths = find_images(source)
+    if not paths:
+        console.print(f"[red]Error: No images found in {source}[/red]")
+        raise typer.Exit(1)
+
+    settings = get_settings()
+    batch_size = batch_size or settings.batch_size
+    engine = InferenceEngine(
+        model_path=model_path or (settings.model_path if settings.use_onnx else None),
+        device=device or settings.device,
+        batch_size=batch_size,
+        use_onnx=settings.use_onnx,
+        num_threads=settings.inference_threads,
+        intra_op_threads=settings.inference_intra_op_threads,
+        inter_op_threads=settings.inference_inter_op_threads,
+    )
+
+    previous = load_checkpoint(checkpoint)
+    resumed = previous["completed"] if previous is not None else 0
+    if resumed:
+        console.print(f"Resuming after {resumed} of {len(paths)} images")
+
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        _RateColumn(),
+        TimeRemainingColumn(),
+        console=console,
+    ) as progress:
+        task = progress.add_task("Detecting...", total=len(paths), completed=resumed)
+        try:
+            stats = asyncio.run(
+                detect_files(
+                    paths,
+                    engine,
+                    output,
+                    output_format=output_format,
+                    checkpoint_path=checkpoint,
+                    checkpoint_every=checkpoint_every,
+                    batch_size=batch_size,
+                    confidence_threshold=confidence_threshold,
+                    decode_workers=decode_workers,
+                    read_workers=read_workers,
+                    on_progress=lambda count: progress.advance(task, count),
+                )
+            )
+        except (ValueError, RuntimeError, FileNotFoundError) as e:
+            console.print(f"[red]Error: {str(e)}[/red]")
+            raise typer.Exit(1)
+        finally:
+            engine.close()
+
+    console.print(
+        f"[bold green]Processed {stats.processed} images[/bold green] "
+        f"in {stats.elapsed:.1f}s ({stats.images_per_second:,.1f} img/s), "
+        f"{stats.failed} could not be decoded"
+    )
+    console.print(f"Results written to {output}")
+
+
+__all__ = ["detect"]
@@ -12,13 +12,37 @@ from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.table import Table
 
 from opencar import __version__
-from opencar.config.settings import get_settings
+from opencar.cli.commands.bench import bench_app
+from opencar.cli.commands.detect import detect
+
+# Settings and uvicorn are imported by the commands that need them, so that
+# ``opencar --version`` and ``--help`` start without the pydantic and server
+# stacks. Both stay patchable as ``opencar.cli.main.<name>`` in tests.
+
+
+def get_settings():
+    """Load the settings on first use."""
+    from opencar.config.settings import get_settings
+
+    return get_settings()
+
+
+def _import_uvicorn():
+    """Import uvicorn on first use, or None if it is not installed."""
+    if "uvicorn" not in globals():
+        try:
+            import uvicorn
+        except ImportError:
+            uvicorn = None
+        globals()["uvicorn"] = uvicorn
+    return globals()["uvicorn"]
+
+
+def __getattr__(name: str):
+    if name == "uvicorn":
+        return _import_uvicorn()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Import uvicorn at module level for mocking in tests
-try:
-    import uvicorn
-except ImportError:
-    uvicorn = None
 
 # Initialize console and app
 console = Console()
@@ -28,6 +52,8 @@ app = typer.Typer(
     add_completion=True,
     rich_markup_mode="rich",
 )
+app.command()(detect)
+app.add_typer(bench_app, name="bench")
 
 
 def version_callback(value: bool):
@@ -233,6 +259,11 @@ def serve(
     port: int = typer.Option(8000, "--port", "-p", help="Server port"),
     workers: int = typer.Option(1, "--workers", "-w", help="Number of workers"),
     reload: bool = typer.Option(False, "--reload", "-r", help="Enable auto-reload"),
+    preload: bool = typer.Option(
+        False,
+        "--preload",
+        help="Load and warm the model once, then fork workers sharing its memory",
+    ),
 ) -> None:
     """Start the OpenCar API server."""
     console.print(f"[bold blue]Starting OpenCar API Server[/bold blue]")
@@ -240,10 +271,24 @@ def serve(
     console.print(f"Workers: {workers}")
     console.print(f"Reload: {reload}")
     
+    uvicorn = _import_uvicorn()
     if uvicorn is None:
         console.print("[red]Error: uvicorn not installed. Install with 'pip install uvicorn'[/red]")
         raise typer.Exit(1)
     
+    if preload:
+        if reload:
+            console.print("[red]Error: --preload cannot be combined with --reload[/red]")
+            raise typer.Exit(1)
+        from opencar.api.server import serve_preloaded
+
+        try:
+            serve_preloaded(host=host, port=port, workers=workers, settings=get_settings())
+        except (ValueError, RuntimeError) as e:
+            console.print(f"[red]Error: {str(e)}[/red]")
+            raise typer.Exit(1)
+        return
+
     try:
         uvicorn.run(
             "opencar.api.app:app",
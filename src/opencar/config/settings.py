@@ -1,5 +1,8 @@
 """Application configuration and settings management."""
 
+import os
+import shutil
+import sys
 from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional
@@ -33,6 +36,18 @@ class Settings(BaseSettings):
     api_port: int = Field(default=8000, description="API port")
     api_workers: int = Field(default=4, description="Number of API workers")
     api_reload: bool = Field(default=False, description="Enable auto-reload")
+    middleware_stack: str = Field(
+        default="asgi", description="Middleware implementation (asgi/base)"
+    )
+    rate_limit_per_minute: int = Field(
+        default=100, ge=1, description="Requests per minute allowed per client"
+    )
+    rate_limit_backend: str = Field(
+        default="memory", description="Rate limit state backend (memory/redis)"
+    )
+    rate_limit_max_clients: int = Field(
+        default=10000, ge=1, description="Clients tracked by the in-memory rate limiter"
+    )
     cors_origins: List[str] = Field(
         default=["http://localhost:3000", "http://localhost:8000"],
         description="Allowed CORS origins",
@@ -47,6 +62,23 @@ class Settings(BaseSettings):
         default="redis://localhost:6379/0", description="Redis connection URL"
     )
 
+    # Result Cache Settings
+    result_cache_enabled: bool = Field(
+        default=True, description="Cache detection and analysis results by content hash"
+    )
+    result_cache_backend: str = Field(
+        default="memory", description="Result cache tiers (memory/redis)"
+    )
+    result_cache_max_entries: int = Field(
+        default=1024, ge=1, description="Results kept in process"
+    )
+    result_cache_max_bytes: int = Field(
+        default=64 * 1024 * 1024, ge=1, description="Encoded size of results kept in process"
+    )
+    result_cache_ttl_seconds: float = Field(
+        default=3600.0, gt=0, description="Result cache time to live"
+    )
+
     # OpenAI Settings
     openai_api_key: SecretStr = Field(
         default="sk-mock-key", description="OpenAI API key"
@@ -66,6 +98,35 @@ class Settings(BaseSettings):
     openai_timeout: int = Field(
         default=30, ge=1, description="API timeout in seconds"
     )
+    openai_max_connections: int = Field(
+        default=100, ge=1, description="Connection pool size for the OpenAI API"
+    )
+    openai_max_keepalive_connections: int = Field(
+        default=20, ge=0, description="Idle connections kept open to the OpenAI API"
+    )
+    openai_keepalive_expiry: float = Field(
+        default=30.0, ge=0.0, description="Seconds an idle connection is kept open"
+    )
+    openai_http2: bool = Field(
+        default=False, description="Use HTTP/2 for the OpenAI API (requires h2)"
+    )
+    openai_max_concurrency: int = Field(
+        default=16, ge=1, description="Max in-flight OpenAI API requests"
+    )
+    openai_max_retries: int = Field(
+        default=2, ge=0, description="Retries for failed OpenAI API requests"
+    )
+    openai_retry_after_max: float = Field(
+        default=60.0,
+        ge=0.0,
+        description="Longest Retry-After waited out before a request fails instead",
+    )
+    openai_image_format: str = Field(
+        default="jpeg", description="Encoding of images sent for analysis (jpeg/webp)"
+    )
+    openai_image_max_side: Optional[int] = Field(
+        default=None, ge=64, description="Cap on the long side of images sent for analysis"
+    )
 
     # ML Settings
     model_path: Path = Field(
@@ -73,10 +134,50 @@ class Settings(BaseSettings):
     )
     device: str = Field(default="cuda", description="Compute device (cuda/cpu)")
     batch_size: int = Field(default=32, ge=1, description="Batch size")
+    batch_max_wait_ms: float = Field(
+        default=5.0, ge=0.0, description="Max time a request waits for a serving batch"
+    )
+    inference_threads: int = Field(
+        default=4, ge=0, description="Threads for pre/post-processing (0 runs on the event loop)"
+    )
+    inference_workers: int = Field(
+        default=0, ge=0, description="Inference worker processes (0 runs models in-process)"
+    )
+    use_onnx: bool = Field(
+        default=False, description="Serve the .onnx model in model_path with ONNX Runtime"
+    )
+    inference_intra_op_threads: int = Field(
+        default=0, ge=0, description="Threads per model operator (0 uses the runtime default)"
+    )
+    inference_inter_op_threads: int = Field(
+        default=0, ge=0, description="Threads for parallel operators (0 uses the runtime default)"
+    )
+    stream_max_pending: int = Field(
+        default=2, ge=1, description="Frames queued per detection stream before dropping"
+    )
+    stream_max_batch_size: int = Field(
+        default=4, ge=1, description="Most queued stream frames detected as one batch"
+    )
+    stream_drop_policy: str = Field(
+        default="drop_oldest",
+        description="What to do when a stream falls behind (drop_oldest/drop_newest/block)",
+    )
+    batch_max_images: int = Field(
+        default=64, ge=1, description="Most images in one batch detection request"
+    )
     num_workers: int = Field(default=4, ge=0, description="Data loader workers")
     model_cache_size: int = Field(
         default=5, ge=1, description="Number of models to cache"
     )
+    model_cache_max_bytes: Optional[int] = Field(
+        default=None, ge=0, description="Memory budget for cached models (bytes)"
+    )
+    warmup_on_startup: bool = Field(
+        default=True, description="Load and warm the default model when the server starts"
+    )
+    warmup_iterations: int = Field(
+        default=3, ge=0, description="Dummy inferences run to warm up a model"
+    )
 
     # Security Settings
     jwt_secret_key: SecretStr = Field(
@@ -113,16 +214,61 @@ class Settings(BaseSettings):
             raise ValueError(f"Invalid log level: {v}")
         return v
 
+    @field_validator("middleware_stack")
+    @classmethod
+    def validate_middleware_stack(cls, v: str) -> str:
+        """Validate middleware stack."""
+        v = v.lower()
+        if v not in ("asgi", "base"):
+            raise ValueError(f"Invalid middleware stack: {v}")
+        return v
+
+    @field_validator("rate_limit_backend")
+    @classmethod
+    def validate_rate_limit_backend(cls, v: str) -> str:
+        """Validate rate limit backend."""
+        v = v.lower()
+        if v not in ("memory", "redis"):
+            raise ValueError(f"Invalid rate limit backend: {v}")
+        return v
+
+    @field_validator("result_cache_backend")
+    @classmethod
+    def validate_result_cache_backend(cls, v: str) -> str:
+        """Validate result cache backend."""
+        v = v.lower()
+        if v not in ("memory", "redis"):
+            raise ValueError(f"Invalid result cache backend: {v}")
+        return v
+
+    @field_validator("openai_image_format")
+    @classmethod
+    def validate_openai_image_format(cls, v: str) -> str:
+        """Validate image encoding for vision requests."""
+        v = v.lower()
+        if v not in ("jpeg", "webp"):
+            raise ValueError(f"Invalid image format: {v}")
+        return v
+
+    @field_validator("stream_drop_policy")
+    @classmethod
+    def validate_stream_drop_policy(cls, v: str) -> str:
+        """Validate the stream drop policy."""
+        v = v.lower()
+        if v not in ("drop_oldest", "drop_newest", "block"):
+            raise ValueError(f"Invalid stream drop policy: {v}")
+        return v
+
     @field_validator("device")
     @classmethod
     def validate_device(cls, v: str) -> str:
-        """Validate compute device."""
-        try:
-            import torch
-            if v == "cuda" and not torch.cuda.is_available():
-                return "cpu"
-        except ImportError:
-            pass
+        """Validate compute device.
+
+        Importing torch takes seconds, so unless it is already loaded CUDA is
+        detected from the NVIDIA driver instead.
+        """
+        if v == "cuda" and not _cuda_available():
+            return "cpu"
         return v
 
     @property
@@ -146,6 +292,16 @@ class Settings(BaseSettings):
         }
 
 
+def _cuda_available() -> bool:
+    """Whether a CUDA device can be used, without importing torch."""
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        return torch.cuda.is_available()
+    if os.environ.get("CUDA_VISIBLE_DEVICES") in ("", "-1"):
+        return False
+    return Path("/proc/driver/nvidia/version").exists() or shutil.which("nvidia-smi") is not None
+
+
 @lru_cache()
 def get_settings() -> Settings:
     """Get cached settings instance."""
@@ -0,0 +1,171 @@
+"""Image preparation for vision API requests.
+
+Uploaded frames can be far larger than a vision model looks at. Each image is
+decoded once, downscaled to the analysis type's preset and re-encoded before
+it is base64-encoded. The request body is then streamed in chunks, so the
+full base64 string and JSON document are never held in memory.
+"""
+
+import base64
+import io
+import json
+import time
+from typing import Any, AsyncIterator, Callable, Dict, NamedTuple, Optional, Tuple
+
+import structlog
+from PIL import Image, ImageOps, features
+
+from opencar.monitoring.metrics import get_registry
+
+logger = structlog.get_logger()
+
+# Raw bytes per base64 chunk; a multiple of 3 so chunks concatenate cleanly
+BASE64_CHUNK_SIZE = 3 * 16 * 1024
+
+IMAGE_PLACEHOLDER = "__OPENCAR_IMAGE_BASE64__"
+
+
+class ImagePreset(NamedTuple):
+    """Target size and encoder quality for one analysis type."""
+
+    max_side: int
+    quality: int
+
+
+# Weather and lighting survive heavy downscaling; signs and signals do not
+ANALYSIS_PRESETS: Dict[str, ImagePreset] = {
+    "comprehensive": ImagePreset(max_side=1024, quality=85),
+    "traffic": ImagePreset(max_side=1280, quality=85),
+    "safety": ImagePreset(max_side=1024, quality=80),
+    "weather": ImagePreset(max_side=512, quality=75),
+    "navigation": ImagePreset(max_side=768, quality=80),
+}
+
+IMAGE_FORMATS = {"jpeg": ("JPEG", "image/jpeg"), "webp": ("WEBP", "image/webp")}
+
+
+class PreparedImage(NamedTuple):
+    """Encoded image ready to embed in a request."""
+
+    data: bytes
+    mime_type: str
+    original_size: int
+    width: int
+    height: int
+
+    @property
+    def bytes_saved(self) -> int:
+        """Bytes saved compared with sending the upload as is."""
+        return self.original_size - len(self.data)
+
+
+def get_preset(analysis_type: str, max_side: Optional[int] = None) -> ImagePreset:
+    """Get the preset for an analysis type, optionally capped to ``max_side``."""
+    preset = ANALYSIS_PRESETS.get(analysis_type, ANALYSIS_PRESETS["comprehensive"])
+    if max_side is not None and max_side < preset.max_side:
+        preset = preset._replace(max_side=max_side)
+    return preset
+
+
+def prepare_image(
+    image_data: bytes, preset: ImagePreset, image_format: str = "jpeg"
+) -> PreparedImage:
+    """Decode, downscale and re-encode an image.
+
+    Args:
+        image_data: Encoded image as uploaded
+        preset: Target size and quality
+        image_format: Output format ("jpeg" or "webp")
+
+    Returns:
+        Prepared image; the original bytes when decoding fails or re-encoding
+        would not make the image smaller. Original bytes are labelled with the
+        format PIL identified, or ``application/octet-stream`` if it could not
+    """
+    start_time = time.perf_counter()
+    image_format = image_format.lower()
+    if image_format == "webp" and not features.check("webp"):
+        image_format = "jpeg"
+    pil_format, mime_type = IMAGE_FORMATS[image_format]
+
+    source_format = None
+    try:
+        image = Image.open(io.BytesIO(image_data))
+        source_format = image.format
+        resized = max(image.size) > preset.max_side
+        # Let the JPEG decoder downscale by a power of two while decoding
+        image.draft("RGB", (preset.max_side, preset.max_side))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        if max(image.size) > preset.max_side:
+            image.thumbnail((preset.max_side, preset.max_side), Image.BICUBIC, reducing_gap=2.0)
+
+        buffer = io.BytesIO()
+        image.save(buffer, format=pil_format, quality=preset.quality)
+        encoded = buffer.getvalue()
+        width, height = image.size
+    except Exception as e:
+        logger.warning(f"Could not re-encode image, sending original: {str(e)}")
+        _record(len(image_data), len(image_data), start_time)
+        source_type = Image.MIME.get(source_format, "application/octet-stream")
+        return PreparedImage(image_data, source_type, len(image_data), 0, 0)
+
+    if not resized and len(encoded) >= len(image_data) and source_format in ("JPEG", "WEBP"):
+        # Already small and compressed; re-encoding would only lose quality
+        encoded = image_data
+        mime_type = f"image/{source_format.lower()}"
+
+    _record(len(image_data), len(encoded), start_time)
+    return PreparedImage(encoded, mime_type, len(image_data), width, height)
+
+
+def _record(original_size: int, encoded_size: int, start_time: float) -> None:
+    registry = get_registry()
+    registry.counter(
+        "opencar_vision_image_bytes_saved_total", "Upload bytes saved by image preparation"
+    ).labels().inc(max(0, original_size - encoded_size))
+    registry.counter(
+        "opencar_vision_image_bytes_sent_total", "Image bytes sent to the vision API"
+    ).labels().inc(encoded_size)
+    registry.histogram(
+        "opencar_vision_image_prep_seconds", "Time spent decoding and re-encoding images"
+    ).labels().record(time.perf_counter() - start_time)
+
+
+def base64_length(size: int) -> int:
+    """Length of the base64 encoding of ``size`` bytes."""
+    return 4 * ((size + 2) // 3)
+
+
+def streamed_json_body(
+    payload: Dict[str, Any], data: bytes
+) -> Tuple[int, Callable[[], AsyncIterator[bytes]]]:
+    """Build a JSON body whose ``IMAGE_PLACEHOLDER`` is filled with base64 of ``data``.
+
+    Returns:
+        Tuple of (content length, factory returning a fresh chunk iterator).
+        A factory rather than an iterator so the body can be resent on retry.
+    """
+    head, tail = (part.encode() for part in json.dumps(payload).split(IMAGE_PLACEHOLDER, 1))
+    length = len(head) + base64_length(len(data)) + len(tail)
+
+    async def chunks() -> AsyncIterator[bytes]:
+        yield head
+        view = memoryview(data)
+        for offset in range(0, len(data), BASE64_CHUNK_SIZE):
+            yield base64.b64encode(view[offset:offset + BASE64_CHUNK_SIZE])
+        yield tail
+
+    return length, chunks
+
+
+__all__ = [
+    "ANALYSIS_PRESETS",
+    "IMAGE_PLACEHOLDER",
+    "ImagePreset",
+    "PreparedImage",
+    "get_preset",
+    "prepare_image",
+    "streamed_json_body",
+]
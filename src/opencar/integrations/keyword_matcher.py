@@ -0,0 +1,93 @@
+"""Single-pass keyword matching with word-boundary semantics.
+
+The text is tokenized once: one byte-level ``translate`` folds case and turns
+every non-letter into a separator, and one ``split`` yields the words. Single
+word keywords are then resolved with a set intersection against the distinct
+words, so the cost does not grow with the number of keywords. Multi-word
+phrases are only searched for when all of their words occur in the text.
+"""
+
+import re
+from typing import Dict, FrozenSet, List, Mapping, Sequence, Set, Tuple
+
+# Whitespace, "_" and "-" join the words of a phrase; other non-letters end it
+_PHRASE_BREAK = ord("\n")
+_TRANSLATE_TABLE = bytes(
+    i + 32 if 65 <= i <= 90  # A-Z -> a-z
+    else i if 97 <= i <= 122 or i >= 128  # letters and UTF-8 continuation bytes
+    else 32 if chr(i) in " \t\r\n_-"
+    else _PHRASE_BREAK
+    for i in range(256)
+)
+
+_SEPARATORS = (32, _PHRASE_BREAK)
+
+Target = Tuple[str, str]
+
+
+class KeywordMatcher:
+    """Match keywords from several categories in one scan of a text."""
+
+    def __init__(self, categories: Mapping[str, Mapping[str, Sequence[str]]]):
+        """Compile the matcher.
+
+        Args:
+            categories: ``{category: {label: [surface forms, ...]}}``. A label
+                is reported when any of its forms occurs as whole words.
+        """
+        self._labels: Dict[str, List[str]] = {}
+        self._words: Dict[bytes, List[Target]] = {}
+        phrases: Dict[Tuple[bytes, ...], List[Target]] = {}
+
+        for category, labels in categories.items():
+            self._labels[category] = list(labels)
+            for label, forms in labels.items():
+                for form in forms:
+                    words = tuple(form.encode().translate(_TRANSLATE_TABLE).split())
+                    if not words:
+                        raise ValueError(f"Empty keyword for {category}/{label}")
+                    if len(words) == 1:
+                        self._words.setdefault(words[0], []).append((category, label))
+                    else:
+                        phrases.setdefault(words, []).append((category, label))
+
+        self._word_set: FrozenSet[bytes] = frozenset(self._words)
+        self._phrases: List[Tuple[FrozenSet[bytes], "re.Pattern[bytes]", List[Target]]] = [
+            (
+                frozenset(words),
+                # Starts with a literal so the regex engine can use a fast
+                # substring search; the leading boundary is checked per match
+                re.compile(
+                    rb" +".join(re.escape(word) for word in words) + rb"(?![a-z\x80-\xff])"
+                ),
+                targets,
+            )
+            for words, targets in phrases.items()
+        ]
+
+    def match(self, text: str) -> Dict[str, List[str]]:
+        """Find the labels present in ``text``.
+
+        Returns:
+            Labels found per category, in the order they were declared
+        """
+        normalized = text.encode("utf-8", "ignore").translate(_TRANSLATE_TABLE)
+        words = set(normalized.split())
+
+        found: Set[Target] = set()
+        for word in words & self._word_set:
+            found.update(self._words[word])
+        for phrase_words, pattern, targets in self._phrases:
+            if phrase_words <= words and any(
+                m.start() == 0 or normalized[m.start() - 1] in _SEPARATORS
+                for m in pattern.finditer(normalized)
+            ):
+                found.update(targets)
+
+        return {
+            category: [label for label in labels if (category, label) in found]
+            for category, labels in self._labels.items()
+        }
+
+
+__all__ = ["KeywordMatcher"]
@@ -1,39 +1,292 @@
 """OpenAI API client integration."""
 
 import asyncio
-import base64
 import json
-from typing import Any, Dict, List, Optional, Union
-from datetime import datetime, timedelta
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+from datetime import datetime, timedelta, timezone
 
 import httpx
-from tenacity import retry, stop_after_attempt, wait_exponential
 import structlog
 
+from opencar.cache.result_cache import ResultCache
 from opencar.config.settings import Settings
+from opencar.integrations.image_prep import (
+    IMAGE_PLACEHOLDER,
+    get_preset,
+    prepare_image,
+    streamed_json_body,
+)
+from opencar.integrations.keyword_matcher import KeywordMatcher
+from opencar.integrations.singleflight import SingleFlight
 
 logger = structlog.get_logger()
 
 
+def _noun(word: str) -> Tuple[str, str]:
+    """Singular and plural forms of a keyword."""
+    return (word, f"{word}s")
+
+
+# Keywords read from free-text analyses, compiled once for all responses.
+# Within a category, labels are listed in priority order.
+ANALYSIS_KEYWORDS = KeywordMatcher({
+    "scene_type": {
+        "urban": ("urban",),
+        "highway": _noun("highway"),
+        "rural": ("rural",),
+        "intersection": _noun("intersection"),
+        "parking": ("parking",),
+        "residential": ("residential",),
+    },
+    "objects": {
+        "vehicle": _noun("vehicle"),
+        "pedestrian": _noun("pedestrian"),
+        "bicycle": _noun("bicycle"),
+        "traffic_light": _noun("traffic light"),
+        "stop_sign": _noun("stop sign"),
+        "building": _noun("building"),
+    },
+    "hazards": {
+        "pedestrian": _noun("pedestrian"),
+        "vehicle": _noun("vehicle"),
+        "weather": ("weather",),
+        "visibility": ("visibility",),
+        "construction": ("construction",),
+        "debris": ("debris",),
+    },
+    "recommendations": {
+        "reduce_speed": ("reduce speed",),
+        "maintain_distance": ("maintain distance",),
+        "check_blind_spots": ("check blind spots",),
+        "signal_early": ("signal early",),
+        "prepare_to_stop": ("prepare to stop",),
+        "increase_following_distance": ("increase following distance",),
+    },
+    "risk_terms": {
+        "danger": ("danger", "dangers", "dangerous"),
+        "hazard": ("hazard", "hazards", "hazardous"),
+        "risk": ("risk", "risks", "risky"),
+        "caution": ("caution",),
+        "warning": _noun("warning"),
+        "unsafe": ("unsafe",),
+    },
+    "positive_terms": {
+        "safe": ("safe",),
+        "clear": ("clear",),
+        "normal": ("normal",),
+        "good": ("good",),
+        "optimal": ("optimal",),
+    },
+    "weather": {
+        "clear": ("clear",),
+        "cloudy": ("cloudy",),
+        "rainy": ("rainy",),
+        "foggy": ("foggy",),
+        "snowy": ("snowy",),
+        "stormy": ("stormy",),
+    },
+    "traffic": {
+        "heavy": ("heavy",),
+        "moderate": ("moderate",),
+        "light": ("light",),
+        "congested": ("congested",),
+        "flowing": ("flowing",),
+        "stopped": ("stopped",),
+    },
+})
+
+# Upstream statuses worth retrying; everything else is returned to the caller
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+
+def _http2_available() -> bool:
+    """Check whether the optional h2 package needed for HTTP/2 is installed."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
 class OpenAIClient:
     """OpenAI API client with retry logic and caching."""
 
-    def __init__(self, api_key: str, model: str = "gpt-4-turbo-preview"):
-        """Initialize OpenAI client."""
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "gpt-4-turbo-preview",
+        cache: Optional[ResultCache] = None,
+        timeout: float = 60.0,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        max_concurrency: int = 16,
+        max_retries: int = 2,
+        backoff_base: float = 0.25,
+        backoff_max: float = 8.0,
+        retry_after_max: float = 60.0,
+        image_format: str = "jpeg",
+        image_max_side: Optional[int] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """Initialize OpenAI client.
+
+        Successful image analyses are stored in ``cache`` keyed by the image
+        content, so resent frames skip the vision API call. Concurrent
+        identical requests share a single upstream call, and at most
+        ``max_concurrency`` requests are in flight on the pooled connection.
+        Retryable failures back off exponentially with jitter, or for as long
+        as the upstream asks via ``Retry-After``; a ``Retry-After`` longer than
+        ``retry_after_max`` seconds is not waited out, the response is
+        returned at once instead. Images are downscaled to the
+        analysis type's preset (capped at ``image_max_side``) and re-encoded
+        as ``image_format`` before upload.
+        """
         self.api_key = api_key
         self.model = model
         self.base_url = "https://api.openai.com/v1"
+        if http2 and not _http2_available():
+            logger.warning("HTTP/2 requested but h2 is not installed, using HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_after_max = retry_after_max
+        self.image_format = image_format
+        self.image_max_side = image_max_side
         self._client = httpx.AsyncClient(
-            timeout=60.0,
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 10.0)),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            http2=http2,
+            transport=transport,
             headers={"Authorization": f"Bearer {api_key}"}
         )
-        self._cache: Dict[str, Any] = {}
-        self._cache_ttl = timedelta(hours=1)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Shared cooldown after a Retry-After, so other calls do not pile on
+        self._cooldown_until = 0.0
+        self.upstream_requests = 0
+        self.retries = 0
+        self._cache = cache if cache is not None else ResultCache(ttl_seconds=3600.0)
+        self._cache_ttl = timedelta(seconds=self._cache.ttl_seconds)
+        self._inflight = SingleFlight()
+
+    @classmethod
+    def from_settings(
+        cls, settings: Settings, cache: Optional[ResultCache] = None
+    ) -> "OpenAIClient":
+        """Create a client configured from settings."""
+        return cls(
+            api_key=settings.openai_api_key.get_secret_value(),
+            model=settings.openai_model,
+            cache=cache,
+            timeout=float(settings.openai_timeout),
+            max_connections=settings.openai_max_connections,
+            max_keepalive_connections=settings.openai_max_keepalive_connections,
+            keepalive_expiry=settings.openai_keepalive_expiry,
+            http2=settings.openai_http2,
+            max_concurrency=settings.openai_max_concurrency,
+            max_retries=settings.openai_max_retries,
+            retry_after_max=settings.openai_retry_after_max,
+            image_format=settings.openai_image_format,
+            image_max_side=settings.openai_image_max_side,
+        )
+
+    async def _post(
+        self,
+        path: str,
+        payload: Optional[Dict[str, Any]] = None,
+        body: Optional[Tuple[int, Callable[[], AsyncIterator[bytes]]]] = None,
+    ) -> httpx.Response:
+        """POST to the API with bounded concurrency and retries.
+
+        Either ``payload`` is sent as JSON, or ``body`` (content length and a
+        chunk iterator factory, see ``image_prep.streamed_json_body``) is
+        streamed. Returns the last response (which may be an error status);
+        raises the last transport error if no response was received at all.
+        """
+        attempt = 0
+        while True:
+            cooldown = self._cooldown_until - time.monotonic()
+            if cooldown > 0:
+                await asyncio.sleep(cooldown)
+
+            response: Optional[httpx.Response] = None
+            error: Optional[Exception] = None
+            async with self._semaphore:
+                self.upstream_requests += 1
+                try:
+                    if body is not None:
+                        length, chunks = body
+                        response = await self._client.post(
+                            f"{self.base_url}{path}",
+                            content=chunks(),
+                            headers={
+                                "Content-Type": "application/json",
+                                "Content-Length": str(length),
+                            },
+                        )
+                    else:
+                        response = await self._client.post(
+                            f"{self.base_url}{path}", json=payload
+                        )
+                except httpx.TransportError as e:
+                    error = e
+
+            retryable = error is not None or response.status_code in RETRYABLE_STATUS_CODES
+            retry_after = None
+            if retryable and response is not None:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if retry_after is not None and retry_after > self.retry_after_max:
+                    # Retrying sooner than the upstream allows would only be refused
+                    logger.warning(
+                        f"OpenAI request to {path} asked to retry after {retry_after:.0f}s, "
+                        "giving up"
+                    )
+                    retryable = False
+            if not retryable or attempt >= self.max_retries:
+                if error is not None:
+                    raise error
+                return response
+
+            if retry_after is not None:
+                delay = retry_after
+                self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+            else:
+                # Full jitter keeps retrying clients from synchronizing
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+            reason = str(error) if error is not None else f"status {response.status_code}"
+            logger.warning(f"OpenAI request to {path} failed ({reason}), retrying in {delay:.2f}s")
+            self.retries += 1
+            attempt += 1
+            await asyncio.sleep(delay)
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-    )
     async def generate_completion(
         self,
         prompt: str,
@@ -44,7 +297,25 @@ class OpenAIClient:
     ) -> str:
         """Generate text completion with retry logic."""
         model = model or self.model
-        
+        key = SingleFlight.make_key(
+            "completion", model, system_prompt, prompt, temperature, max_tokens
+        )
+        return await self._inflight.do(
+            key,
+            lambda: self._generate_completion(
+                prompt, model, temperature, max_tokens, system_prompt
+            ),
+        )
+
+    async def _generate_completion(
+        self,
+        prompt: str,
+        model: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        system_prompt: Optional[str],
+    ) -> str:
+        """Send one completion request."""
         try:
             # Build messages
             messages = []
@@ -53,9 +324,9 @@ class OpenAIClient:
             messages.append({"role": "user", "content": prompt})
             
             # Make API request
-            response = await self._client.post(
-                f"{self.base_url}/chat/completions",
-                json={
+            response = await self._post(
+                "/chat/completions",
+                {
                     "model": model,
                     "messages": messages,
                     "temperature": temperature,
@@ -82,9 +353,36 @@ class OpenAIClient:
         analysis_type: str = "comprehensive",
     ) -> Dict[str, Any]:
         """Analyze image using GPT-4 Vision."""
+        vision_model = "gpt-4-vision-preview"
+        cache_key = ResultCache.make_key(
+            "analyze", image_data, analysis_type=analysis_type, model=vision_model
+        )
+        cached = await self._cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # The cache key already covers model, prompt and image hash
+        return await self._inflight.do(
+            cache_key,
+            lambda: self._analyze_image(image_data, analysis_type, vision_model, cache_key),
+        )
+
+    async def _analyze_image(
+        self,
+        image_data: bytes,
+        analysis_type: str,
+        vision_model: str,
+        cache_key: str,
+    ) -> Dict[str, Any]:
+        """Send one vision analysis request."""
         try:
-            # Encode image to base64
-            image_b64 = base64.b64encode(image_data).decode('utf-8')
+            # Downscale and re-encode once; base64 is streamed into the body
+            image = await asyncio.to_thread(
+                prepare_image,
+                image_data,
+                get_preset(analysis_type, self.image_max_side),
+                self.image_format,
+            )
             
             system_prompt = """You are an expert autonomous vehicle perception system. 
             Analyze the driving scene and provide detailed safety recommendations and situational awareness."""
@@ -101,50 +399,52 @@ class OpenAIClient:
             
             # Use vision model if available, otherwise fall back to text analysis
             try:
-                response = await self._client.post(
-                    f"{self.base_url}/chat/completions",
-                    json={
-                        "model": "gpt-4-vision-preview",
-                        "messages": [{
-                            "role": "user",
-                            "content": [
-                                {"type": "text", "text": prompt},
-                                {
-                                    "type": "image_url",
-                                    "image_url": {
-                                        "url": f"data:image/jpeg;base64,{image_b64}"
-                                    }
+                payload = {
+                    "model": vision_model,
+                    "messages": [{
+                        "role": "user",
+                        "content": [
+                            {"type": "text", "text": prompt},
+                            {
+                                "type": "image_url",
+                                "image_url": {
+                                    "url": f"data:{image.mime_type};base64,"
+                                    f"{IMAGE_PLACEHOLDER}"
                                 }
-                            ]
-                        }],
-                        "temperature": 0.3,
-                        "max_tokens": 1000,
-                    }
+                            }
+                        ]
+                    }],
+                    "temperature": 0.3,
+                    "max_tokens": 1000,
+                }
+                response = await self._post(
+                    "/chat/completions", body=streamed_json_body(payload, image.data)
                 )
                 
                 if response.status_code == 200:
                     data = response.json()
                     analysis_text = data["choices"][0]["message"]["content"]
+                    from_api = True
                 else:
                     raise Exception(f"API error: {response.status_code}")
                     
             except Exception as e:
                 logger.warning(f"Vision API unavailable, using mock analysis: {str(e)}")
                 analysis_text = f"Mock {analysis_type} analysis: Scene appears to be a typical driving environment with standard traffic elements."
+                from_api = False
 
             # Return structured analysis
-            return {
-                "scene_type": self._extract_scene_type(analysis_text),
-                "objects": self._extract_objects(analysis_text),
-                "hazards": self._extract_hazards(analysis_text),
-                "recommendations": self._extract_recommendations(analysis_text),
-                "safety_score": self._calculate_safety_score(analysis_text),
-                "weather_conditions": self._extract_weather(analysis_text),
-                "traffic_situation": self._extract_traffic(analysis_text),
+            analysis = {
+                **self._parse_analysis(analysis_text),
                 "full_analysis": analysis_text,
                 "confidence": 0.85,
                 "analysis_type": analysis_type
             }
+
+            # Only real answers are cached; fallbacks should be retried
+            if from_api:
+                await self._cache.set(cache_key, analysis)
+            return analysis
             
         except Exception as e:
             logger.error(f"Image analysis error: {str(e)}")
@@ -161,86 +461,22 @@ class OpenAIClient:
                 "analysis_type": analysis_type
             }
 
-    def _extract_scene_type(self, analysis: str) -> str:
-        """Extract scene type from analysis."""
-        scene_types = ["urban", "highway", "rural", "intersection", "parking", "residential"]
-        analysis_lower = analysis.lower()
-        for scene_type in scene_types:
-            if scene_type in analysis_lower:
-                return scene_type
-        return "general"
-
-    def _extract_objects(self, analysis: str) -> List[str]:
-        """Extract detected objects from analysis."""
-        objects = ["vehicle", "pedestrian", "bicycle", "traffic_light", "stop_sign", "building"]
-        found_objects = []
-        analysis_lower = analysis.lower()
-        for obj in objects:
-            if obj in analysis_lower or obj.replace("_", " ") in analysis_lower:
-                found_objects.append(obj)
-        return found_objects
-
-    def _extract_hazards(self, analysis: str) -> List[str]:
-        """Extract hazards from analysis."""
-        hazards = ["pedestrian", "vehicle", "weather", "visibility", "construction", "debris"]
-        found_hazards = []
-        analysis_lower = analysis.lower()
-        for hazard in hazards:
-            if hazard in analysis_lower:
-                found_hazards.append(hazard)
-        return found_hazards
-
-    def _extract_recommendations(self, analysis: str) -> List[str]:
-        """Extract recommendations from analysis."""
-        recommendations = [
-            "reduce_speed", "maintain_distance", "check_blind_spots", 
-            "signal_early", "prepare_to_stop", "increase_following_distance"
-        ]
-        found_recs = []
-        analysis_lower = analysis.lower()
-        for rec in recommendations:
-            if rec.replace("_", " ") in analysis_lower:
-                found_recs.append(rec)
-        return found_recs if found_recs else ["proceed_normally"]
-
-    def _calculate_safety_score(self, analysis: str) -> float:
-        """Calculate safety score from analysis."""
-        analysis_lower = analysis.lower()
-        
-        # Start with base score
-        score = 0.8
-        
-        # Reduce score for hazards
-        hazard_words = ["danger", "hazard", "risk", "caution", "warning", "unsafe"]
-        for word in hazard_words:
-            if word in analysis_lower:
-                score -= 0.1
-        
-        # Increase score for positive indicators
-        positive_words = ["safe", "clear", "normal", "good", "optimal"]
-        for word in positive_words:
-            if word in analysis_lower:
-                score += 0.05
-        
-        return max(0.0, min(1.0, score))
-
-    def _extract_weather(self, analysis: str) -> str:
-        """Extract weather conditions from analysis."""
-        weather_conditions = ["clear", "cloudy", "rainy", "foggy", "snowy", "stormy"]
-        analysis_lower = analysis.lower()
-        for condition in weather_conditions:
-            if condition in analysis_lower:
-                return condition
-        return "clear"
-
-    def _extract_traffic(self, analysis: str) -> str:
-        """Extract traffic situation from analysis."""
-        traffic_situations = ["heavy", "moderate", "light", "congested", "flowing", "stopped"]
-        analysis_lower = analysis.lower()
-        for situation in traffic_situations:
-            if situation in analysis_lower:
-                return situation
-        return "normal"
+    def _parse_analysis(self, analysis: str) -> Dict[str, Any]:
+        """Extract structured fields from analysis text in one keyword scan."""
+        found = ANALYSIS_KEYWORDS.match(analysis)
+
+        # Start with base score, lower it for hazards and raise it for positives
+        score = 0.8 - 0.1 * len(found["risk_terms"]) + 0.05 * len(found["positive_terms"])
+
+        return {
+            "scene_type": next(iter(found["scene_type"]), "general"),
+            "objects": found["objects"],
+            "hazards": found["hazards"],
+            "recommendations": found["recommendations"] or ["proceed_normally"],
+            "safety_score": max(0.0, min(1.0, score)),
+            "weather_conditions": next(iter(found["weather"]), "clear"),
+            "traffic_situation": next(iter(found["traffic"]), "normal"),
+        }
 
     async def generate_embeddings(
         self,
@@ -249,9 +485,9 @@ class OpenAIClient:
     ) -> List[List[float]]:
         """Generate embeddings for text inputs."""
         try:
-            response = await self._client.post(
-                f"{self.base_url}/embeddings",
-                json={
+            response = await self._post(
+                "/embeddings",
+                {
                     "model": model,
                     "input": texts,
                 }
@@ -272,10 +508,7 @@ class OpenAIClient:
     async def moderate_content(self, text: str) -> Dict[str, Any]:
         """Moderate content using OpenAI moderation API."""
         try:
-            response = await self._client.post(
-                f"{self.base_url}/moderations",
-                json={"input": text}
-            )
+            response = await self._post("/moderations", {"input": text})
             
             if response.status_code == 200:
                 data = response.json()
@@ -298,7 +531,7 @@ class OpenAIClient:
         model = model or self.model
         
         try:
-            async with self._client.stream(
+            async with self._semaphore, self._client.stream(
                 "POST",
                 f"{self.base_url}/chat/completions",
                 json={
@@ -344,6 +577,12 @@ class OpenAIClient:
             "base_url": self.base_url,
             "cache_size": len(self._cache),
             "cache_ttl_hours": self._cache_ttl.total_seconds() / 3600,
+            "cache": self._cache.get_stats(),
+            "singleflight": self._inflight.get_stats(),
+            "http2": self.http2,
+            "max_concurrency": self.max_concurrency,
+            "upstream_requests": self.upstream_requests,
+            "retries": self.retries,
         }
 
     async def health_check(self) -> bool:
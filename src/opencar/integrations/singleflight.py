@@ -0,0 +1,75 @@
+"""In-flight call coalescing for upstream API requests.
+
+When several coroutines ask for the same key while a call for it is still
+running, only the first one reaches the upstream service; the others await
+the same task and receive a copy of its result (or its exception).
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls that share a key."""
+
+    def __init__(self) -> None:
+        self._inflight: Dict[str, "asyncio.Task[Any]"] = {}
+        self.calls = 0
+        self.executions = 0
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Build a key from JSON-serializable parts (model, prompt, image hash, ...)."""
+        payload = json.dumps(parts, sort_keys=True, default=str).encode()
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn`` once for all concurrent callers with the same key.
+
+        The call runs in its own task, so a caller being cancelled does not
+        cancel the call for the callers still waiting on it.
+        """
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+            return await asyncio.shield(task)
+
+        logger.debug(f"Coalescing in-flight call {key}")
+        result = await asyncio.shield(task)
+        # Followers get their own copy so callers cannot mutate each other's result
+        return copy.deepcopy(result)
+
+    def _forget(self, key: str, task: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when every caller was cancelled
+            task.exception()
+
+    @property
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running."""
+        return len(self._inflight)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics."""
+        return {
+            "calls": self.calls,
+            "upstream_calls": self.executions,
+            "coalesced": self.calls - self.executions,
+            "in_flight": len(self._inflight),
+        }
+
+
+__all__ = ["SingleFlight"]
@@ -1,16 +1,49 @@
 """ML inference module for OpenCar."""
 
 import asyncio
+import functools
+import sys
 import time
-from typing import Any, Dict, List, Optional, Union, Tuple
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Union, Tuple
 from pathlib import Path
 import numpy as np
-import torch
 import structlog
 
+from opencar.monitoring.metrics import Histogram, get_registry
+from opencar.ml.inference.backends import InferenceBackend, create_backend
+from opencar.ml.inference.buffers import BufferPool, normalize_into
+from opencar.ml.inference.postprocess import (
+    decode_yolo_output,
+    detections_to_dicts,
+    get_class_name,
+    split_detections,
+)
+
+if TYPE_CHECKING:
+    import torch
+
 logger = structlog.get_logger()
 
 
+def __getattr__(name: str) -> Any:
+    """Import torch on first access; it is not needed to serve ONNX or mock models."""
+    if name == "torch":
+        import torch
+
+        return torch
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _to_numpy(frame: Any) -> np.ndarray:
+    """View a frame as a NumPy array, converting torch tensors."""
+    # A tensor can only exist if torch has been imported already
+    torch = sys.modules.get("torch")
+    if torch is not None and isinstance(frame, torch.Tensor):
+        return frame.numpy()
+    return np.asarray(frame)
+
+
 class InferenceEngine:
     """High-performance inference engine for ML models."""
 
@@ -21,22 +54,49 @@ class InferenceEngine:
         batch_size: int = 1,
         use_tensorrt: bool = False,
         use_onnx: bool = False,
+        num_threads: int = 4,
+        executor: Optional[Executor] = None,
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 0,
+        backend: Optional[InferenceBackend] = None,
     ):
-        """Initialize inference engine."""
+        """Initialize inference engine.
+
+        Preprocessing, model execution and postprocessing are CPU-bound and
+        run on a pool of ``num_threads`` threads (NumPy and the model runtimes
+        release the GIL), keeping the event loop free for other requests.
+        ``num_threads=0`` runs everything inline on the event loop.
+
+        The model runs on ``backend``, or on the one selected by ``use_onnx``
+        and ``model_path`` (see ``backends.create_backend``).
+        ``intra_op_threads`` and ``inter_op_threads`` configure the runtime's
+        own thread pools.
+        """
         self.model_path = model_path
         self.device = device
         self.batch_size = batch_size
         self.use_tensorrt = use_tensorrt
         self.use_onnx = use_onnx
+        self.num_threads = num_threads
+        self._executor = executor
+        self._owns_executor = executor is None
+        self.buffers = BufferPool(pin_memory=device.startswith("cuda"))
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self._backend_override = backend
+        self.backend: Optional[InferenceBackend] = None
         
         self.model = None
         self.is_loaded = False
         self.input_shape = None
         self.output_shape = None
         
-        # Performance tracking
-        self.inference_times = []
+        # Performance tracking (seconds)
+        self.latency = Histogram()
         self.total_inferences = 0
+        self._latency_metric = get_registry().histogram(
+            "opencar_inference_duration_seconds", "Model inference latency", ["device"]
+        ).labels(device)
 
     async def load_model(self) -> None:
         """Load model for inference."""
@@ -46,19 +106,27 @@ class InferenceEngine:
         try:
             logger.info(f"Loading model from {self.model_path}")
             
-            # Simulate model loading
-            await asyncio.sleep(0.1)
+            backend = self._backend_override or create_backend(
+                self.model_path,
+                device=self.device,
+                use_onnx=self.use_onnx,
+                use_tensorrt=self.use_tensorrt,
+                intra_op_threads=self.intra_op_threads,
+                inter_op_threads=self.inter_op_threads,
+            )
+            await self.run_cpu(backend.load)
+            await self.run_cpu(backend.warmup, (1, self.batch_size))
+            self.backend = backend
             
-            # Mock model for demonstration
             self.model = {
-                "type": "mock_model",
+                "type": backend.name,
                 "device": self.device,
                 "batch_size": self.batch_size,
                 "loaded_at": time.time()
             }
             
-            self.input_shape = (3, 640, 640)  # CHW format
-            self.output_shape = (85, 8400)    # YOLO output format
+            self.input_shape = backend.input_shape  # CHW format
+            self.output_shape = backend.output_shape
             self.is_loaded = True
             
             logger.info("Model loaded successfully")
@@ -69,38 +137,55 @@ class InferenceEngine:
 
     async def predict(
         self,
-        inputs: Union[np.ndarray, torch.Tensor, List[np.ndarray]],
+        inputs: Union[np.ndarray, "torch.Tensor", List[np.ndarray]],
         return_raw: bool = False,
+        conf_threshold: float = 0.5,
+        as_arrays: bool = False,
+        input_max: Optional[float] = None,
+        classes: Optional[Sequence[int]] = None,
+        max_detections: Optional[int] = None,
     ) -> Dict[str, Any]:
-        """Run inference on inputs."""
+        """Run inference on inputs.
+
+        With ``as_arrays=True`` each entry of ``detections`` is a structured
+        array (see ``postprocess.DETECTION_DTYPE``) instead of a list of dicts.
+        ``input_max`` declares the input value range (see ``normalize_into``):
+        integer inputs are taken as 0-255 and float inputs as already in [0, 1].
+        ``classes`` and ``max_detections`` are applied during decoding (see
+        ``decode_yolo_output``).
+        """
         if not self.is_loaded:
             await self.load_model()
             
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             # Preprocess inputs
-            processed_inputs = self._preprocess(inputs)
+            processed_inputs = await self.run_cpu(self._preprocess, inputs, input_max)
             
             # Run inference (mock implementation)
-            outputs = await self._run_inference(processed_inputs)
+            try:
+                outputs = await self._run_inference(processed_inputs)
+            finally:
+                self.buffers.release(processed_inputs)
             
             # Postprocess outputs
             if return_raw:
                 results = {"raw_outputs": outputs}
             else:
-                results = self._postprocess(outputs)
-            
-            # Track performance
-            inference_time = (time.time() - start_time) * 1000
-            self.inference_times.append(inference_time)
-            self.total_inferences += 1
-            
-            # Keep only last 1000 times
-            if len(self.inference_times) > 1000:
-                self.inference_times = self.inference_times[-1000:]
+                try:
+                    results = await self.run_cpu(
+                        self._postprocess,
+                        outputs,
+                        conf_threshold,
+                        as_arrays,
+                        classes,
+                        max_detections,
+                    )
+                finally:
+                    self.backend.release(outputs)
             
-            results["inference_time_ms"] = inference_time
+            results["inference_time_ms"] = self._record_latency(start_time) * 1000
             
             return results
             
@@ -108,57 +193,73 @@ class InferenceEngine:
             logger.error(f"Inference failed: {str(e)}")
             raise
 
-    def _preprocess(self, inputs: Union[np.ndarray, torch.Tensor, List[np.ndarray]]) -> np.ndarray:
-        """Preprocess inputs for inference."""
-        if isinstance(inputs, list):
-            # Batch processing
-            batch = np.stack([self._normalize_input(inp) for inp in inputs])
-        else:
-            batch = np.expand_dims(self._normalize_input(inputs), axis=0)
-            
-        return batch
+    def _get_executor(self) -> Optional[Executor]:
+        """Get the CPU executor, creating it on first use."""
+        if self._executor is None and self.num_threads > 0:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.num_threads, thread_name_prefix="opencar-inference"
+            )
+        return self._executor
 
-    def _normalize_input(self, input_data: Union[np.ndarray, torch.Tensor]) -> np.ndarray:
-        """Normalize single input."""
-        if isinstance(input_data, torch.Tensor):
-            input_data = input_data.numpy()
-            
-        # Ensure correct shape and type
-        if input_data.dtype != np.float32:
-            input_data = input_data.astype(np.float32)
-            
-        # Normalize to [0, 1] if needed
-        if input_data.max() > 1.0:
-            input_data = input_data / 255.0
-            
-        return input_data
+    async def run_cpu(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a CPU-bound step on the executor (or inline without one)."""
+        executor = self._get_executor()
+        if executor is None:
+            return fn(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(fn, *args))
+
+    def _record_latency(self, start_time: float) -> float:
+        """Record one inference call; returns its latency in seconds."""
+        elapsed = time.perf_counter() - start_time
+        self.latency.record(elapsed)
+        self._latency_metric.record(elapsed)
+        self.total_inferences += 1
+        return elapsed
+
+    def _preprocess(
+        self,
+        inputs: Union[np.ndarray, "torch.Tensor", List[np.ndarray]],
+        input_max: Optional[float] = None,
+    ) -> np.ndarray:
+        """Normalize inputs into a pooled float32 batch buffer.
+
+        The caller must hand the buffer back with ``self.buffers.release``.
+        """
+        frames = inputs if isinstance(inputs, list) else [inputs]
+        frames = [_to_numpy(frame) for frame in frames]
+        shape = frames[0].shape
+        if any(frame.shape != shape for frame in frames):
+            raise ValueError("All inputs in a batch must have the same shape")
+
+        batch = self.buffers.acquire((len(frames), *shape))
+        for out, frame in zip(batch, frames):
+            normalize_into(frame, out, input_max)
+        return batch
 
     async def _run_inference(self, inputs: np.ndarray) -> np.ndarray:
-        """Run actual inference (mock implementation)."""
-        # Simulate inference time
-        await asyncio.sleep(0.01)
-        
-        batch_size = inputs.shape[0]
-        
-        # Mock YOLO-style output
-        # Shape: (batch_size, 85, 8400) where 85 = 4 (bbox) + 1 (conf) + 80 (classes)
-        mock_output = np.random.rand(batch_size, 85, 8400).astype(np.float32)
-        
-        # Make some detections more confident
-        mock_output[:, 4, :100] = np.random.uniform(0.7, 0.95, (batch_size, 100))  # High confidence
-        mock_output[:, 4, 100:] = np.random.uniform(0.0, 0.3, (batch_size, 8300))  # Low confidence
-        
-        return mock_output
+        """Run the model on a preprocessed batch."""
+        return await self.run_cpu(self.backend.run, inputs)
 
-    def _postprocess(self, outputs: np.ndarray) -> Dict[str, Any]:
+    def _postprocess(
+        self,
+        outputs: np.ndarray,
+        conf_threshold: float = 0.5,
+        as_arrays: bool = False,
+        classes: Optional[Sequence[int]] = None,
+        max_detections: Optional[int] = None,
+    ) -> Dict[str, Any]:
         """Postprocess inference outputs."""
         batch_size = outputs.shape[0]
-        all_detections = []
-        
-        for i in range(batch_size):
-            detections = self._extract_detections(outputs[i])
-            all_detections.append(detections)
-        
+
+        # Decode the whole (B, 85, A) batch in one vectorized pass
+        detections = decode_yolo_output(outputs, conf_threshold, classes, max_detections)
+        per_image = split_detections(detections, batch_size)
+        if as_arrays:
+            all_detections = per_image
+        else:
+            all_detections = [detections_to_dicts(dets) for dets in per_image]
+
         return {
             "detections": all_detections,
             "batch_size": batch_size,
@@ -166,116 +267,108 @@ class InferenceEngine:
         }
 
     def _extract_detections(self, output: np.ndarray, conf_threshold: float = 0.5) -> List[Dict[str, Any]]:
-        """Extract detections from model output."""
-        # output shape: (85, 8400)
-        confidences = output[4, :]  # Objectness scores
-        
-        # Filter by confidence
-        valid_indices = confidences > conf_threshold
-        
-        if not np.any(valid_indices):
-            return []
-        
-        # Extract valid detections
-        valid_boxes = output[:4, valid_indices].T  # (N, 4)
-        valid_confs = confidences[valid_indices]
-        valid_classes = output[5:, valid_indices].T  # (N, 80)
-        
-        detections = []
-        for i in range(len(valid_confs)):
-            # Get class with highest probability
-            class_probs = valid_classes[i]
-            class_id = np.argmax(class_probs)
-            class_conf = class_probs[class_id]
-            
-            # Combined confidence
-            final_conf = valid_confs[i] * class_conf
-            
-            if final_conf > conf_threshold:
-                # Convert from center format to corner format
-                x_center, y_center, width, height = valid_boxes[i]
-                x1 = x_center - width / 2
-                y1 = y_center - height / 2
-                x2 = x_center + width / 2
-                y2 = y_center + height / 2
-                
-                detections.append({
-                    "class_name": self._get_class_name(class_id),
-                    "confidence": float(final_conf),
-                    "bbox": {
-                        "x1": float(x1),
-                        "y1": float(y1),
-                        "x2": float(x2),
-                        "y2": float(y2)
-                    },
-                    "attributes": {}
-                })
-        
-        return detections
+        """Extract detections from a single (85, A) model output."""
+        return detections_to_dicts(decode_yolo_output(output[None], conf_threshold))
 
     def _get_class_name(self, class_id: int) -> str:
         """Get class name from ID."""
-        # COCO class names
-        coco_classes = [
-            "person", "bicycle", "car", "motorcycle", "airplane", "bus", "train", "truck", "boat",
-            "traffic light", "fire hydrant", "stop sign", "parking meter", "bench", "bird", "cat",
-            "dog", "horse", "sheep", "cow", "elephant", "bear", "zebra", "giraffe", "backpack",
-            "umbrella", "handbag", "tie", "suitcase", "frisbee", "skis", "snowboard", "sports ball",
-            "kite", "baseball bat", "baseball glove", "skateboard", "surfboard", "tennis racket",
-            "bottle", "wine glass", "cup", "fork", "knife", "spoon", "bowl", "banana", "apple",
-            "sandwich", "orange", "broccoli", "carrot", "hot dog", "pizza", "donut", "cake",
-            "chair", "couch", "potted plant", "bed", "dining table", "toilet", "tv", "laptop",
-            "mouse", "remote", "keyboard", "cell phone", "microwave", "oven", "toaster", "sink",
-            "refrigerator", "book", "clock", "vase", "scissors", "teddy bear", "hair drier", "toothbrush"
-        ]
-        
-        if class_id < len(coco_classes):
-            return coco_classes[class_id]
-        return f"class_{class_id}"
+        return get_class_name(class_id)
 
     async def batch_predict(
         self,
-        inputs_list: List[Union[np.ndarray, torch.Tensor]],
+        inputs_list: List[Union[np.ndarray, "torch.Tensor"]],
         batch_size: Optional[int] = None,
+        conf_threshold: float = 0.5,
+        as_arrays: bool = False,
+        input_max: Optional[float] = None,
+        classes: Optional[Sequence[int]] = None,
+        max_detections: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
-        """Run batch inference on multiple inputs."""
+        """Run batch inference on multiple inputs.
+
+        Batches are pipelined: the next batch is preprocessed and the previous
+        one postprocessed on the executor while the model runs. Arguments are
+        as for ``predict``.
+        """
         if not self.is_loaded:
             await self.load_model()
             
         batch_size = batch_size or self.batch_size
+        batches = [
+            inputs_list[i:i + batch_size] for i in range(0, len(inputs_list), batch_size)
+        ]
+        if not batches:
+            return []
+
+        async def postprocess(
+            outputs: np.ndarray, start_time: float
+        ) -> Tuple[Dict[str, Any], float]:
+            try:
+                batch_results = await self.run_cpu(
+                    self._postprocess,
+                    outputs,
+                    conf_threshold,
+                    as_arrays,
+                    classes,
+                    max_detections,
+                )
+            finally:
+                self.backend.release(outputs)
+            return batch_results, self._record_latency(start_time)
+
+        pending = []
+        start_time = time.perf_counter()
+        next_batch = asyncio.ensure_future(self.run_cpu(self._preprocess, batches[0], input_max))
+        try:
+            for index in range(len(batches)):
+                processed_inputs = await next_batch
+                batch_start = start_time
+                if index + 1 < len(batches):
+                    start_time = time.perf_counter()
+                    next_batch = asyncio.ensure_future(
+                        self.run_cpu(self._preprocess, batches[index + 1], input_max)
+                    )
+                try:
+                    outputs = await self._run_inference(processed_inputs)
+                finally:
+                    self.buffers.release(processed_inputs)
+                pending.append(asyncio.ensure_future(postprocess(outputs, batch_start)))
+            completed = await asyncio.gather(*pending)
+        except BaseException:
+            next_batch.cancel()
+            for task in pending:
+                task.cancel()
+            raise
+
+        # Split batch results back to individual results
         results = []
-        
-        # Process in batches
-        for i in range(0, len(inputs_list), batch_size):
-            batch = inputs_list[i:i + batch_size]
-            batch_results = await self.predict(batch)
-            
-            # Split batch results back to individual results
+        for i, (batch_results, elapsed) in enumerate(completed):
+            batch = batches[i]
             for j, detections in enumerate(batch_results["detections"]):
                 results.append({
                     "detections": detections,
-                    "inference_time_ms": batch_results["inference_time_ms"] / len(batch),
-                    "batch_index": i + j
+                    "inference_time_ms": elapsed * 1000 / len(batch),
+                    "batch_index": i * batch_size + j
                 })
         
         return results
 
     def get_performance_stats(self) -> Dict[str, Any]:
         """Get performance statistics."""
-        if not self.inference_times:
+        if not self.latency.count:
             return {"error": "No inference data available"}
         
-        times = self.inference_times
+        latency = self.latency
         return {
             "total_inferences": self.total_inferences,
-            "average_time_ms": np.mean(times),
-            "median_time_ms": np.median(times),
-            "min_time_ms": np.min(times),
-            "max_time_ms": np.max(times),
-            "std_time_ms": np.std(times),
-            "p95_time_ms": np.percentile(times, 95),
-            "p99_time_ms": np.percentile(times, 99),
-            "throughput_fps": 1000.0 / np.mean(times) if np.mean(times) > 0 else 0,
+            "average_time_ms": latency.mean * 1000,
+            "median_time_ms": latency.percentile(50) * 1000,
+            "min_time_ms": latency.min * 1000,
+            "max_time_ms": latency.max * 1000,
+            "std_time_ms": latency.std * 1000,
+            "p95_time_ms": latency.percentile(95) * 1000,
+            "p99_time_ms": latency.percentile(99) * 1000,
+            "throughput_fps": 1.0 / latency.mean if latency.mean > 0 else 0,
         }
 
     async def warmup(self, num_iterations: int = 10) -> None:
@@ -293,13 +386,31 @@ class InferenceEngine:
             
         logger.info("Model warmup completed")
 
+    def close(self, wait: bool = False) -> None:
+        """Shut down the CPU executor if the engine created it.
+
+        A later call needing the executor creates a new one, so ``close(wait=True)``
+        also leaves the engine without threads before the process forks.
+        """
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
     async def unload_model(self) -> None:
         """Unload model from memory."""
         if self.is_loaded:
+            self.backend.close()
+            self.backend = None
             self.model = None
             self.is_loaded = False
+            self.buffers.clear()
             logger.info("Model unloaded from memory")
 
+    def memory_footprint(self) -> int:
+        """Approximate bytes held by the model and the pooled input buffers."""
+        backend_bytes = self.backend.memory_footprint() if self.backend else 0
+        return backend_bytes + self.buffers.nbytes
+
     def get_model_info(self) -> Dict[str, Any]:
         """Get model information."""
         return {
@@ -311,7 +422,10 @@ class InferenceEngine:
             "output_shape": self.output_shape,
             "use_tensorrt": self.use_tensorrt,
             "use_onnx": self.use_onnx,
+            "num_threads": self.num_threads,
             "total_inferences": self.total_inferences,
+            "input_buffers": self.buffers.get_stats(),
+            "backend": self.backend.get_info() if self.backend else None,
         }
 
 
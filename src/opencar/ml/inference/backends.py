@@ -0,0 +1,384 @@
+"""Model execution backends for the inference engine.
+
+A backend loads a model and runs it on preprocessed NCHW float32 batches.
+``run`` is synchronous and thread-safe; the engine calls it from its worker
+threads. Outputs may come from a pool owned by the backend and must be handed
+back with ``release`` once postprocessing is done.
+"""
+
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import structlog
+
+from opencar.ml.inference.buffers import BufferPool
+
+logger = structlog.get_logger()
+
+# Default YOLO-style input (CHW) and output (4 + 1 + 80 classes, anchors)
+DEFAULT_INPUT_SHAPE = (3, 640, 640)
+DEFAULT_OUTPUT_SHAPE = (85, 8400)
+
+
+class InferenceBackend(ABC):
+    """Interface implemented by model execution backends."""
+
+    name = "base"
+
+    def __init__(self) -> None:
+        self.input_shape: Tuple[int, ...] = DEFAULT_INPUT_SHAPE
+        self.output_shape: Tuple[int, ...] = DEFAULT_OUTPUT_SHAPE
+
+    @abstractmethod
+    def load(self) -> None:
+        """Load the model; blocking."""
+
+    @abstractmethod
+    def run(self, inputs: np.ndarray) -> np.ndarray:
+        """Run the model on an (N, C, H, W) float32 batch."""
+
+    def release(self, outputs: np.ndarray) -> None:
+        """Hand back an output array returned by ``run``."""
+
+    def warmup(self, batch_sizes: Sequence[int] = (1,)) -> None:
+        """Run zero batches so the first real request does not pay setup costs."""
+        for batch_size in sorted(set(batch_sizes)):
+            outputs = self.run(np.zeros((batch_size, *self.input_shape), dtype=np.float32))
+            self.release(outputs)
+
+    def close(self) -> None:
+        """Release the model."""
+
+    def memory_footprint(self) -> int:
+        """Approximate bytes held by the loaded model."""
+        return 0
+
+    def get_info(self) -> Dict[str, Any]:
+        """Get backend information."""
+        return {
+            "backend": self.name,
+            "input_shape": self.input_shape,
+            "output_shape": self.output_shape,
+        }
+
+
+class MockBackend(InferenceBackend):
+    """Backend producing random YOLO-style outputs, for development and tests."""
+
+    name = "mock"
+
+    def __init__(self, latency: float = 0.01):
+        """Initialize the backend.
+
+        Args:
+            latency: Simulated execution time per batch in seconds
+        """
+        super().__init__()
+        self.latency = latency
+
+    def load(self) -> None:
+        """Nothing to load."""
+
+    def warmup(self, batch_sizes: Sequence[int] = (1,)) -> None:
+        """Nothing to warm up."""
+
+    def run(self, inputs: np.ndarray) -> np.ndarray:
+        """Return random outputs with about 100 confident anchors per image.
+
+        Boxes are in input pixel coordinates, like a real detector's.
+        """
+        if self.latency:
+            time.sleep(self.latency)
+
+        batch_size, height, width = inputs.shape[0], inputs.shape[-2], inputs.shape[-1]
+        num_anchors = self.output_shape[1]
+        outputs = np.random.rand(batch_size, *self.output_shape).astype(np.float32)
+        outputs[:, 0:4:2] *= width
+        outputs[:, 1:4:2] *= height
+        outputs[:, 4, :100] = np.random.uniform(0.7, 0.95, (batch_size, 100))
+        outputs[:, 4, 100:] = np.random.uniform(0.0, 0.3, (batch_size, num_anchors - 100))
+        return outputs
+
+
+class ONNXRuntimeBackend(InferenceBackend):
+    """Backend running an ONNX model with ONNX Runtime.
+
+    Outputs are written through IO binding into pooled, preallocated buffers
+    when the output shape is static apart from the batch dimension. Models
+    with a fixed batch size are fed in chunks of that size.
+    """
+
+    name = "onnxruntime"
+
+    def __init__(
+        self,
+        model_path: Path,
+        device: str = "cpu",
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 0,
+        io_binding: bool = True,
+        providers: Optional[List[str]] = None,
+    ):
+        """Initialize the backend.
+
+        Args:
+            model_path: ``.onnx`` file, or a directory holding one
+            device: "cpu" or "cuda"; CUDA is used only if the provider exists
+            intra_op_threads: Threads used inside one operator (0: runtime default)
+            inter_op_threads: Threads running independent operators (0: runtime default)
+            io_binding: Bind outputs to preallocated buffers
+            providers: Explicit execution providers, overriding ``device``
+        """
+        super().__init__()
+        self.model_path = Path(model_path)
+        self.device = device
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.io_binding = io_binding
+        self.providers = providers
+        self.session = None
+        self.model_file: Optional[Path] = None
+        self.input_name: Optional[str] = None
+        self.output_name: Optional[str] = None
+        self.fixed_batch_size: Optional[int] = None
+        self.outputs = BufferPool()
+
+    def load(self) -> None:
+        """Create the inference session."""
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise RuntimeError(
+                "onnxruntime is not installed; install it with 'pip install opencar[onnx]'"
+            )
+
+        model_file = self.model_file = resolve_model_file(self.model_path, ".onnx")
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = self.inter_op_threads
+        options.execution_mode = (
+            ort.ExecutionMode.ORT_PARALLEL
+            if self.inter_op_threads > 1
+            else ort.ExecutionMode.ORT_SEQUENTIAL
+        )
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        providers = self.providers
+        if providers is None:
+            providers = ["CPUExecutionProvider"]
+            if self.device.startswith("cuda"):
+                if "CUDAExecutionProvider" in ort.get_available_providers():
+                    providers.insert(0, "CUDAExecutionProvider")
+        self.session = ort.InferenceSession(str(model_file), options, providers=providers)
+
+        model_input = self.session.get_inputs()[0]
+        model_output = self.session.get_outputs()[0]
+        self.input_name = model_input.name
+        self.output_name = model_output.name
+
+        if any(not isinstance(dim, int) for dim in model_input.shape[1:]):
+            raise ValueError(f"Model input must have a static CHW shape: {model_input.shape}")
+        self.input_shape = tuple(model_input.shape[1:])
+        batch_dim = model_input.shape[0]
+        self.fixed_batch_size = batch_dim if isinstance(batch_dim, int) else None
+
+        output_dims = model_output.shape[1:]
+        if all(isinstance(dim, int) for dim in output_dims):
+            self.output_shape = tuple(output_dims)
+        else:
+            # Only known after a run; outputs are then returned by the session
+            self.output_shape = None
+
+        logger.info(
+            f"Loaded ONNX model {model_file.name}",
+            providers=self.session.get_providers(),
+            dynamic_batch=self.fixed_batch_size is None,
+        )
+
+    def run(self, inputs: np.ndarray) -> np.ndarray:
+        """Run the model on a batch of any size."""
+        if self.session is None:
+            raise RuntimeError("Model is not loaded")
+        inputs = np.ascontiguousarray(inputs, dtype=np.float32)
+        if self.fixed_batch_size is None or len(inputs) == self.fixed_batch_size:
+            return self._run_batch(inputs)
+
+        # Feed a fixed-batch model in chunks, zero-padding the last one
+        step = self.fixed_batch_size
+        chunks = []
+        for start in range(0, len(inputs), step):
+            chunk = inputs[start:start + step]
+            if len(chunk) < step:
+                padded = np.zeros((step, *self.input_shape), dtype=np.float32)
+                padded[:len(chunk)] = chunk
+                chunk = padded
+            outputs = self._run_batch(chunk)
+            chunks.append(outputs[:min(step, len(inputs) - start)].copy())
+            self.release(outputs)
+        return np.concatenate(chunks)
+
+    def _run_batch(self, inputs: np.ndarray) -> np.ndarray:
+        """Run one batch, binding the output to a pooled buffer when possible."""
+        if not self.io_binding or self.output_shape is None:
+            return self.session.run([self.output_name], {self.input_name: inputs})[0]
+
+        outputs = self.outputs.acquire((len(inputs), *self.output_shape))
+        binding = self.session.io_binding()
+        binding.bind_cpu_input(self.input_name, inputs)
+        binding.bind_output(
+            self.output_name, "cpu", 0, np.float32, outputs.shape, outputs.ctypes.data
+        )
+        try:
+            self.session.run_with_iobinding(binding)
+        except Exception:
+            self.outputs.release(outputs)
+            raise
+        return outputs
+
+    def release(self, outputs: np.ndarray) -> None:
+        """Return a bound output buffer to the pool."""
+        if self.io_binding and self.output_shape is not None:
+            self.outputs.release(outputs)
+
+    def close(self) -> None:
+        """Drop the session and output buffers."""
+        self.session = None
+        self.outputs.clear()
+
+    def memory_footprint(self) -> int:
+        """Model file size (about the size of its weights) plus output buffers."""
+        if self.session is None or self.model_file is None:
+            return 0
+        return self.model_file.stat().st_size + self.outputs.nbytes
+
+    def get_info(self) -> Dict[str, Any]:
+        """Get backend information."""
+        info = super().get_info()
+        info.update({
+            "model_path": str(self.model_path),
+            "providers": self.session.get_providers() if self.session else None,
+            "dynamic_batch": self.fixed_batch_size is None,
+            "intra_op_threads": self.intra_op_threads,
+            "inter_op_threads": self.inter_op_threads,
+            "io_binding": self.io_binding,
+            "output_buffers": self.outputs.get_stats(),
+        })
+        return info
+
+
+class TorchBackend(InferenceBackend):
+    """Backend running a TorchScript model with PyTorch."""
+
+    name = "torch"
+
+    def __init__(
+        self,
+        model_path: Path,
+        device: str = "cpu",
+        intra_op_threads: int = 0,
+        input_shape: Tuple[int, ...] = DEFAULT_INPUT_SHAPE,
+    ):
+        """Initialize the backend.
+
+        Args:
+            model_path: TorchScript file (``.pt``/``.torchscript``), or a
+                directory holding one
+            device: Torch device string
+            intra_op_threads: Threads used by torch on CPU (0: torch default)
+            input_shape: CHW input shape of the model
+        """
+        super().__init__()
+        self.model_path = Path(model_path)
+        self.device = device
+        self.intra_op_threads = intra_op_threads
+        self.input_shape = tuple(input_shape)
+        self.model = None
+
+    def load(self) -> None:
+        """Load and script-compile the model."""
+        import torch
+
+        if self.intra_op_threads:
+            torch.set_num_threads(self.intra_op_threads)
+        model_file = resolve_model_file(self.model_path, ".pt", ".torchscript")
+        self.model = torch.jit.load(str(model_file), map_location=self.device).eval()
+
+        with torch.inference_mode():
+            sample = torch.zeros((1, *self.input_shape), device=self.device)
+            self.output_shape = tuple(self.model(sample).shape[1:])
+        logger.info(f"Loaded TorchScript model {model_file.name}", device=self.device)
+
+    def run(self, inputs: np.ndarray) -> np.ndarray:
+        """Run the model on a batch."""
+        import torch
+
+        if self.model is None:
+            raise RuntimeError("Model is not loaded")
+        with torch.inference_mode():
+            tensor = torch.from_numpy(np.ascontiguousarray(inputs)).to(self.device)
+            return self.model(tensor).float().cpu().numpy()
+
+    def close(self) -> None:
+        """Drop the model."""
+        self.model = None
+
+    def memory_footprint(self) -> int:
+        """Bytes of the model's parameters and buffers."""
+        if self.model is None:
+            return 0
+        tensors = list(self.model.parameters()) + list(self.model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def resolve_model_file(model_path: Path, *suffixes: str) -> Path:
+    """Get the model file at ``model_path``, or the first one with a suffix in it."""
+    if model_path.is_dir():
+        candidates = sorted(p for p in model_path.iterdir() if p.suffix in suffixes)
+        if not candidates:
+            raise FileNotFoundError(f"No {'/'.join(suffixes)} model in {model_path}")
+        return candidates[0]
+    if not model_path.exists():
+        raise FileNotFoundError(f"Model file not found: {model_path}")
+    return model_path
+
+
+def create_backend(
+    model_path: Optional[Path] = None,
+    device: str = "cpu",
+    use_onnx: bool = False,
+    use_tensorrt: bool = False,
+    intra_op_threads: int = 0,
+    inter_op_threads: int = 0,
+) -> InferenceBackend:
+    """Create the backend selected by the engine's flags.
+
+    ONNX Runtime is used with ``use_onnx``, TorchScript for ``.pt`` and
+    ``.torchscript`` files, and the mock backend otherwise.
+    """
+    if use_tensorrt:
+        logger.warning("TensorRT backend is not available, ignoring use_tensorrt")
+    if use_onnx:
+        if model_path is None:
+            raise ValueError("use_onnx requires a model_path")
+        return ONNXRuntimeBackend(
+            model_path,
+            device=device,
+            intra_op_threads=intra_op_threads,
+            inter_op_threads=inter_op_threads,
+        )
+    if model_path is not None and Path(model_path).suffix in (".pt", ".torchscript"):
+        return TorchBackend(model_path, device=device, intra_op_threads=intra_op_threads)
+    return MockBackend()
+
+
+__all__ = [
+    "InferenceBackend",
+    "MockBackend",
+    "ONNXRuntimeBackend",
+    "TorchBackend",
+    "create_backend",
+    "resolve_model_file",
+]
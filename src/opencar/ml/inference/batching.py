@@ -0,0 +1,193 @@
+"""Dynamic micro-batching for the serving path."""
+
+import asyncio
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+import structlog
+
+logger = structlog.get_logger()
+
+# Upper bounds (ms) of the queue wait time histogram buckets
+WAIT_TIME_BUCKETS_MS = (0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, float("inf"))
+
+
+class _PendingRequest(NamedTuple):
+    """Single caller waiting for its share of a batch."""
+
+    inputs: np.ndarray
+    conf_threshold: float
+    future: asyncio.Future
+    enqueued_at: float
+
+
+class MicroBatchScheduler:
+    """Coalesce concurrent single-image requests into batched predict calls.
+
+    Requests are queued and a background task drains the queue into batches of
+    up to ``max_batch_size`` inputs. A batch is dispatched as soon as it is
+    full or when its oldest request has waited ``max_wait_ms``. Each batch runs
+    one ``InferenceEngine.predict`` call and every caller gets back only its own
+    detections, as a structured array filtered by its own threshold.
+    """
+
+    def __init__(self, engine: Any, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        """Initialize scheduler."""
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Requests taken off the queue and not yet answered
+        self._batch: List[_PendingRequest] = []
+
+        # Metrics
+        self.total_requests = 0
+        self.total_batches = 0
+        self.batch_size_counts = [0] * (max_batch_size + 1)
+        self.wait_time_counts = [0] * len(WAIT_TIME_BUCKETS_MS)
+        self.wait_time_total_ms = 0.0
+        self.wait_time_max_ms = 0.0
+
+    async def submit(self, inputs: np.ndarray, conf_threshold: float = 0.5) -> np.ndarray:
+        """Queue one input and wait for its detections."""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(
+            _PendingRequest(inputs, conf_threshold, future, time.perf_counter())
+        )
+        self.total_requests += 1
+        return await future
+
+    def _ensure_worker(self) -> None:
+        """Start the batching task on the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        """Collect requests into batches and dispatch them."""
+        queue = self._queue
+        while True:
+            first = await queue.get()
+            batch = self._batch = [first]
+            deadline = first.enqueued_at + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._dispatch(batch)
+            self._batch = []
+
+    async def _dispatch(self, batch: List[_PendingRequest]) -> None:
+        """Run one predict per input shape and resolve the callers' futures."""
+        dispatched_at = time.perf_counter()
+        self.total_batches += 1
+        self.batch_size_counts[len(batch)] += 1
+        for request in batch:
+            self._record_wait((dispatched_at - request.enqueued_at) * 1000)
+
+        # Inputs can only be stacked if they share a shape
+        by_shape: Dict[tuple, List[_PendingRequest]] = defaultdict(list)
+        for request in batch:
+            by_shape[request.inputs.shape].append(request)
+
+        for requests in by_shape.values():
+            try:
+                results = await self.engine.predict(
+                    [request.inputs for request in requests],
+                    conf_threshold=min(request.conf_threshold for request in requests),
+                    as_arrays=True,
+                )
+            except Exception as e:
+                logger.error(f"Batched inference failed: {str(e)}")
+                for request in requests:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                continue
+
+            for request, detections in zip(requests, results["detections"]):
+                if not request.future.done():
+                    request.future.set_result(
+                        detections[detections["confidence"] > request.conf_threshold]
+                    )
+
+    def _record_wait(self, wait_ms: float) -> None:
+        """Record time a request spent queued."""
+        for i, bound in enumerate(WAIT_TIME_BUCKETS_MS):
+            if wait_ms <= bound:
+                self.wait_time_counts[i] += 1
+                break
+        self.wait_time_total_ms += wait_ms
+        self.wait_time_max_ms = max(self.wait_time_max_ms, wait_ms)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests waiting to be batched."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batching statistics."""
+        dispatched = sum(self.wait_time_counts)
+        return {
+            "queue_depth": self.queue_depth,
+            "total_requests": self.total_requests,
+            "total_batches": self.total_batches,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "average_batch_size": dispatched / self.total_batches if self.total_batches else 0.0,
+            "batch_size_histogram": {
+                str(size): count for size, count in enumerate(self.batch_size_counts) if count
+            },
+            "wait_time_histogram_ms": {
+                ("+Inf" if bound == float("inf") else str(bound)): count
+                for bound, count in zip(WAIT_TIME_BUCKETS_MS, self.wait_time_counts)
+            },
+            "average_wait_time_ms": self.wait_time_total_ms / dispatched if dispatched else 0.0,
+            "max_wait_time_ms": self.wait_time_max_ms,
+        }
+
+    async def close(self) -> None:
+        """Stop the batching task and cancel requests still queued or in a batch."""
+        if self._loop is not asyncio.get_running_loop():
+            # Task belongs to a loop that is gone; nothing left to await
+            self._worker = None
+            self._queue = None
+            self._batch = []
+            return
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        pending = list(self._batch)
+        if self._queue is not None:
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+        for request in pending:
+            if not request.future.done():
+                request.future.cancel()
+        self._worker = None
+        self._queue = None
+        self._batch = []
+
+
+__all__ = ["MicroBatchScheduler", "WAIT_TIME_BUCKETS_MS"]
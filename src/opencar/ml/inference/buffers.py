@@ -0,0 +1,121 @@
+"""Reusable input buffers for the inference engine.
+
+Preprocessing writes every batch into a float32 buffer taken from a pool keyed
+by batch shape, so steady-state serving does not allocate a new input tensor
+per frame. On CUDA devices the buffers are page-locked (pinned) host memory,
+which lets host-to-device copies run asynchronously.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import structlog
+
+logger = structlog.get_logger()
+
+Shape = Tuple[int, ...]
+
+
+def _allocate_pinned(shape: Shape) -> np.ndarray:
+    """Allocate a page-locked float32 array, or a regular one without CUDA."""
+    try:
+        import torch
+
+        if torch.cuda.is_available():
+            return torch.empty(shape, dtype=torch.float32).pin_memory().numpy()
+    except Exception as e:
+        logger.debug(f"Pinned allocation unavailable: {str(e)}")
+    return np.empty(shape, dtype=np.float32)
+
+
+class BufferPool:
+    """Thread-safe pool of float32 arrays keyed by shape."""
+
+    def __init__(self, max_per_shape: int = 4, max_shapes: int = 8, pin_memory: bool = False):
+        """Initialize the pool.
+
+        Args:
+            max_per_shape: Free buffers kept per shape
+            max_shapes: Distinct shapes kept; the least recently used is dropped
+            pin_memory: Allocate page-locked memory when CUDA is available
+        """
+        self.max_per_shape = max_per_shape
+        self.max_shapes = max_shapes
+        self.pin_memory = pin_memory
+        self._free: "OrderedDict[Shape, List[np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.allocations = 0
+        self.reuses = 0
+
+    def acquire(self, shape: Shape) -> np.ndarray:
+        """Get a buffer of ``shape``; its contents are undefined."""
+        shape = tuple(shape)
+        with self._lock:
+            free = self._free.get(shape)
+            if free:
+                self._free.move_to_end(shape)
+                self.reuses += 1
+                return free.pop()
+            self.allocations += 1
+
+        if self.pin_memory:
+            return _allocate_pinned(shape)
+        return np.empty(shape, dtype=np.float32)
+
+    def release(self, buffer: np.ndarray) -> None:
+        """Return a buffer from ``acquire`` once nothing reads it any more."""
+        with self._lock:
+            free = self._free.setdefault(buffer.shape, [])
+            self._free.move_to_end(buffer.shape)
+            if len(free) < self.max_per_shape:
+                free.append(buffer)
+            while len(self._free) > self.max_shapes:
+                self._free.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all free buffers."""
+        with self._lock:
+            self._free.clear()
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by free buffers."""
+        with self._lock:
+            return sum(buffer.nbytes for free in self._free.values() for buffer in free)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics."""
+        return {
+            "allocations": self.allocations,
+            "reuses": self.reuses,
+            "shapes": len(self._free),
+            "free_bytes": self.nbytes,
+        }
+
+
+def normalize_into(
+    frame: np.ndarray, out: np.ndarray, input_max: Optional[float] = None
+) -> np.ndarray:
+    """Write ``frame`` scaled to [0, 1] into the float32 array ``out``.
+
+    Args:
+        frame: Input image of any numeric dtype
+        out: Destination with the same shape as ``frame``
+        input_max: Largest value of the input range. Defaults to 255 for
+            integer dtypes and 1.0 (already normalized) for floats.
+
+    Returns:
+        ``out``
+    """
+    if input_max is None:
+        input_max = 255.0 if np.issubdtype(frame.dtype, np.integer) else 1.0
+    if input_max == 1.0:
+        np.copyto(out, frame, casting="same_kind")
+    else:
+        np.multiply(frame, np.float32(1.0 / input_max), out=out, casting="same_kind")
+    return out
+
+
+__all__ = ["BufferPool", "normalize_into"]
@@ -0,0 +1,169 @@
+"""Vectorized decoding of YOLO-style model outputs."""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# COCO class names
+COCO_CLASSES = [
+    "person", "bicycle", "car", "motorcycle", "airplane", "bus", "train", "truck", "boat",
+    "traffic light", "fire hydrant", "stop sign", "parking meter", "bench", "bird", "cat",
+    "dog", "horse", "sheep", "cow", "elephant", "bear", "zebra", "giraffe", "backpack",
+    "umbrella", "handbag", "tie", "suitcase", "frisbee", "skis", "snowboard", "sports ball",
+    "kite", "baseball bat", "baseball glove", "skateboard", "surfboard", "tennis racket",
+    "bottle", "wine glass", "cup", "fork", "knife", "spoon", "bowl", "banana", "apple",
+    "sandwich", "orange", "broccoli", "carrot", "hot dog", "pizza", "donut", "cake",
+    "chair", "couch", "potted plant", "bed", "dining table", "toilet", "tv", "laptop",
+    "mouse", "remote", "keyboard", "cell phone", "microwave", "oven", "toaster", "sink",
+    "refrigerator", "book", "clock", "vase", "scissors", "teddy bear", "hair drier", "toothbrush"
+]
+
+# One row per detection; bbox is [x1, y1, x2, y2]
+DETECTION_DTYPE = np.dtype([
+    ("batch_index", np.int32),
+    ("class_id", np.int32),
+    ("confidence", np.float32),
+    ("bbox", np.float32, (4,)),
+])
+
+
+def get_class_name(class_id: int) -> str:
+    """Get class name from ID."""
+    if 0 <= class_id < len(COCO_CLASSES):
+        return COCO_CLASSES[class_id]
+    return f"class_{class_id}"
+
+
+def decode_yolo_output(
+    outputs: np.ndarray,
+    conf_threshold: float = 0.5,
+    classes: Optional[Sequence[int]] = None,
+    max_detections: Optional[int] = None,
+) -> np.ndarray:
+    """Decode a batch of YOLO outputs into a structured detection array.
+
+    Args:
+        outputs: Raw model output with shape (B, 4 + 1 + C, A): cx, cy, w, h,
+            objectness and C class probabilities for each of A anchors
+        conf_threshold: Minimum objectness and objectness x class score
+        classes: Class IDs to keep (None keeps every class)
+        max_detections: Keep at most this many detections per image, the
+            most confident ones
+
+    Returns:
+        Array of DETECTION_DTYPE ordered by batch index, then anchor
+    """
+    if outputs.ndim == 2:
+        outputs = outputs[None]
+
+    # Objectness prefilter over the whole batch
+    batch_idx, anchor_idx = np.nonzero(outputs[:, 4, :] > conf_threshold)
+    if len(batch_idx) == 0:
+        return np.empty(0, dtype=DETECTION_DTYPE)
+
+    # (M, C) class probabilities and (M, 4) boxes of the surviving candidates
+    class_probs = outputs[batch_idx, 5:, anchor_idx]
+    class_ids = np.argmax(class_probs, axis=1)
+    class_conf = np.take_along_axis(class_probs, class_ids[:, None], axis=1)[:, 0]
+    confidences = outputs[batch_idx, 4, anchor_idx] * class_conf
+
+    selected = confidences > conf_threshold
+    if classes is not None or max_detections is not None:
+        selected &= _selection_mask(batch_idx, class_ids, confidences, classes, max_detections)
+    boxes = outputs[batch_idx[selected], :4, anchor_idx[selected]]
+
+    detections = np.empty(int(selected.sum()), dtype=DETECTION_DTYPE)
+    detections["batch_index"] = batch_idx[selected]
+    detections["class_id"] = class_ids[selected]
+    detections["confidence"] = confidences[selected]
+
+    # Convert from center format to corner format
+    half_wh = boxes[:, 2:] / 2
+    detections["bbox"][:, :2] = boxes[:, :2] - half_wh
+    detections["bbox"][:, 2:] = boxes[:, :2] + half_wh
+
+    return detections
+
+
+def filter_detections(
+    detections: np.ndarray,
+    classes: Optional[Sequence[int]] = None,
+    max_detections: Optional[int] = None,
+) -> np.ndarray:
+    """Select decoded detections by class and per-image count, like ``decode_yolo_output``."""
+    if classes is None and max_detections is None:
+        return detections
+    mask = _selection_mask(
+        detections["batch_index"],
+        detections["class_id"],
+        detections["confidence"],
+        classes,
+        max_detections,
+    )
+    return detections[mask]
+
+
+def _selection_mask(
+    batch_idx: np.ndarray,
+    class_ids: np.ndarray,
+    confidences: np.ndarray,
+    classes: Optional[Sequence[int]],
+    max_detections: Optional[int],
+) -> np.ndarray:
+    """Mask of the candidates kept by class filtering and per-image top-k."""
+    mask = np.ones(len(batch_idx), dtype=bool)
+    if classes is not None:
+        mask &= np.isin(class_ids, np.asarray(classes, dtype=class_ids.dtype))
+    if max_detections is not None:
+        # Rank candidates within their image by descending confidence;
+        # filtered-out candidates sort last so they never take a slot
+        order = np.lexsort((-confidences, ~mask, batch_idx))
+        sorted_batch = batch_idx[order]
+        starts = np.searchsorted(sorted_batch, sorted_batch, side="left")
+        rank = np.empty(len(order), dtype=np.intp)
+        rank[order] = np.arange(len(order)) - starts
+        mask &= rank < max_detections
+    return mask
+
+
+def split_detections(detections: np.ndarray, batch_size: int) -> List[np.ndarray]:
+    """Split a decoded batch into one detection array per image."""
+    bounds = np.searchsorted(detections["batch_index"], np.arange(batch_size + 1))
+    return [detections[bounds[i]:bounds[i + 1]] for i in range(batch_size)]
+
+
+def detections_to_dicts(
+    detections: np.ndarray,
+    class_names: Optional[Sequence[str]] = None,
+) -> List[Dict[str, Any]]:
+    """Convert a structured detection array to API detection dicts."""
+    if class_names is None:
+        class_names = COCO_CLASSES
+    num_names = len(class_names)
+
+    class_ids = detections["class_id"].tolist()
+    confidences = detections["confidence"].tolist()
+    boxes = detections["bbox"].tolist()
+
+    return [
+        {
+            "class_name": (
+                class_names[class_id] if 0 <= class_id < num_names else f"class_{class_id}"
+            ),
+            "confidence": confidence,
+            "bbox": {"x1": box[0], "y1": box[1], "x2": box[2], "y2": box[3]},
+            "attributes": {},
+        }
+        for class_id, confidence, box in zip(class_ids, confidences, boxes)
+    ]
+
+
+__all__ = [
+    "COCO_CLASSES",
+    "DETECTION_DTYPE",
+    "decode_yolo_output",
+    "detections_to_dicts",
+    "filter_detections",
+    "get_class_name",
+    "split_detections",
+]
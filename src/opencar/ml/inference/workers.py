@@ -0,0 +1,517 @@
+"""Multi-process inference workers fed through shared-memory ring buffers.
+
+Each worker process owns one model backend and a ring of fixed-size slots in
+a ``multiprocessing.shared_memory`` block. A slot holds one request's input
+frame followed by room for its detections. The API process copies a frame
+into a free slot and sends only a small descriptor (request id, slot, shape,
+dtype) over a queue; the worker normalizes the frame straight out of shared
+memory, runs the model on everything queued (as one batch per input shape),
+decodes the detections into the same slot and replies with a descriptor over
+its own pipe. No frame or output tensor is ever pickled.
+
+Pre/post-processing therefore runs in the workers, outside the API process's
+GIL, and one model copy is loaded per worker rather than per API process.
+"""
+
+import asyncio
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import structlog
+
+from opencar.ml.inference.backends import InferenceBackend, create_backend
+from opencar.ml.inference.buffers import BufferPool, normalize_into
+from opencar.ml.inference.postprocess import (
+    DETECTION_DTYPE,
+    decode_yolo_output,
+    split_detections,
+)
+
+logger = structlog.get_logger()
+
+# Default slot input capacity: one 3x640x640 float32 frame
+DEFAULT_MAX_FRAME_BYTES = 3 * 640 * 640 * 4
+
+
+class _Request(NamedTuple):
+    """Descriptor of a frame waiting in a worker's ring."""
+
+    request_id: int
+    slot: int
+    shape: Tuple[int, ...]
+    dtype: str
+    conf_threshold: float
+
+
+class _Result(NamedTuple):
+    """Descriptor of detections written back into a slot."""
+
+    request_id: int
+    worker_id: int
+    slot: int
+    num_detections: int
+    error: Optional[str]
+
+
+class _Ring:
+    """Fixed-size slots laid out in one shared memory block."""
+
+    def __init__(
+        self,
+        num_slots: int,
+        input_bytes: int,
+        output_bytes: int,
+        name: Optional[str] = None,
+    ):
+        self.num_slots = num_slots
+        self.input_bytes = input_bytes
+        self.output_bytes = output_bytes
+        self.slot_bytes = input_bytes + output_bytes
+        size = num_slots * self.slot_bytes
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+
+    def input(self, slot: int, shape: Tuple[int, ...], dtype: np.dtype) -> np.ndarray:
+        """View of a slot's input frame."""
+        return np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+
+    def output(self, slot: int, count: int) -> np.ndarray:
+        """View of a slot's detections."""
+        offset = slot * self.slot_bytes + self.input_bytes
+        return np.ndarray((count,), dtype=DETECTION_DTYPE, buffer=self.shm.buf, offset=offset)
+
+    @property
+    def max_detections(self) -> int:
+        """Detections that fit in a slot."""
+        return self.output_bytes // DETECTION_DTYPE.itemsize
+
+    def close(self, unlink: bool = False) -> None:
+        """Detach from the block; the creator also unlinks it."""
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def _worker_main(
+    worker_id: int,
+    ring_name: str,
+    ring_config: Tuple[int, int, int],
+    requests: Any,
+    results: Any,
+    backend_factory: Callable[[], InferenceBackend],
+    max_batch_size: int,
+) -> None:
+    """Worker process: load the model, then serve descriptors until told to stop.
+
+    Replies go over ``results``, a pipe only this worker writes to, so a
+    worker dying mid-send cannot block the others' replies.
+    """
+    ring = _Ring(*ring_config, name=ring_name)
+    try:
+        backend = backend_factory()
+        backend.load()
+        backend.warmup((1,))
+    except Exception as e:
+        results.send(("failed", worker_id, str(e)))
+        results.close()
+        ring.close()
+        return
+    results.send(("ready", worker_id, backend.input_shape))
+
+    buffers = BufferPool()
+    running = True
+    while running:
+        batch = [requests.get()]
+        # Take whatever else is already queued, up to the batch size
+        while len(batch) < max_batch_size:
+            try:
+                batch.append(requests.get_nowait())
+            except queue.Empty:
+                break
+        if None in batch:
+            running = False
+            batch = [request for request in batch if request is not None]
+
+        by_shape: Dict[Tuple[Tuple[int, ...], str], List[_Request]] = {}
+        for request in batch:
+            by_shape.setdefault((request.shape, request.dtype), []).append(request)
+
+        for (shape, dtype), group in by_shape.items():
+            try:
+                inputs = buffers.acquire((len(group), *shape))
+                for out, request in zip(inputs, group):
+                    normalize_into(ring.input(request.slot, shape, np.dtype(dtype)), out)
+                outputs = backend.run(inputs)
+                buffers.release(inputs)
+                conf_threshold = min(request.conf_threshold for request in group)
+                decoded = decode_yolo_output(outputs, conf_threshold)
+                per_image = split_detections(decoded, len(group))
+                backend.release(outputs)
+            except Exception as e:
+                for request in group:
+                    results.send(_Result(request.request_id, worker_id, request.slot, 0, str(e)))
+                continue
+
+            for request, detections in zip(group, per_image):
+                detections = detections[detections["confidence"] > request.conf_threshold]
+                if len(detections) > ring.max_detections:
+                    order = np.argsort(-detections["confidence"], kind="stable")
+                    detections = detections[np.sort(order[:ring.max_detections])]
+                ring.output(request.slot, len(detections))[:] = detections
+                results.send(
+                    _Result(request.request_id, worker_id, request.slot, len(detections), None)
+                )
+
+    backend.close()
+    results.close()
+    ring.close()
+
+
+class _Pending(NamedTuple):
+    """A submitted request awaiting its detections."""
+
+    future: asyncio.Future
+    worker_id: int
+    slot: int
+
+
+class InferenceWorkerPool:
+    """Pool of inference processes fed through shared-memory rings.
+
+    ``submit`` copies a frame into a free slot of the least busy worker and
+    awaits its detections; when every slot is taken it waits for one to free
+    up, which bounds the memory and queueing in front of the workers.
+
+    The pool watches its processes. When a worker exits, the requests it
+    held fail, its slots are freed and a replacement is started on the same
+    ring; if the replacement cannot load its model the pool stops.
+    """
+
+    def __init__(
+        self,
+        num_workers: int = 2,
+        backend_factory: Optional[Callable[[], InferenceBackend]] = None,
+        slots_per_worker: int = 8,
+        max_frame_bytes: int = DEFAULT_MAX_FRAME_BYTES,
+        max_detections: int = 1000,
+        max_batch_size: int = 8,
+        start_method: str = "spawn",
+        monitor_interval: float = 0.5,
+    ):
+        """Initialize the pool; ``start`` launches the processes.
+
+        Args:
+            num_workers: Worker processes, each loading its own model
+            backend_factory: Picklable callable creating a worker's backend
+                (e.g. ``functools.partial(create_backend, path, use_onnx=True)``)
+            slots_per_worker: Frames in flight per worker
+            max_frame_bytes: Largest input frame a slot can hold
+            max_detections: Detections kept per frame (highest confidence first)
+            max_batch_size: Most queued frames a worker runs as one batch
+            start_method: multiprocessing start method
+            monitor_interval: Seconds between checks that the workers are alive
+        """
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+        self.num_workers = num_workers
+        self.backend_factory = backend_factory or create_backend
+        self.slots_per_worker = slots_per_worker
+        self.max_frame_bytes = max_frame_bytes
+        self.max_detections = max_detections
+        self.max_batch_size = max_batch_size
+        self.monitor_interval = monitor_interval
+        self._context = multiprocessing.get_context(start_method)
+
+        self.input_shape: Optional[Tuple[int, ...]] = None
+        self._ring_config: Tuple[int, int, int] = (0, 0, 0)
+        self._rings: List[_Ring] = []
+        self._request_queues: List[Any] = []
+        self._processes: List[Any] = []
+        self._readers: List[threading.Thread] = []
+        self._monitor: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._free_slots: List[List[int]] = []
+        self._slot_available: Optional[asyncio.Condition] = None
+        self._pending: Dict[int, _Pending] = {}
+        self._starting: Dict[int, asyncio.Future] = {}
+        self._request_ids = itertools.count()
+        self.is_running = False
+
+        self.total_requests = 0
+        self.total_errors = 0
+        self.total_restarts = 0
+
+    async def start(self, timeout: float = 120.0) -> None:
+        """Launch the workers and wait until each has loaded its model."""
+        if self.is_running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._slot_available = asyncio.Condition()
+        output_bytes = self.max_detections * DETECTION_DTYPE.itemsize
+        self._ring_config = (self.slots_per_worker, self.max_frame_bytes, output_bytes)
+
+        for worker_id in range(self.num_workers):
+            self._rings.append(_Ring(*self._ring_config))
+            self._request_queues.append(None)
+            self._processes.append(None)
+            self._free_slots.append([])
+            self._spawn(worker_id)
+        self.is_running = True
+
+        try:
+            for worker_id in range(self.num_workers):
+                self.input_shape = await self._wait_started(worker_id, timeout)
+        except BaseException:
+            await self.close()
+            raise
+        self._monitor = asyncio.ensure_future(self._watch_workers(timeout))
+        logger.info(f"Started {self.num_workers} inference workers", pid=os.getpid())
+
+    def _spawn(self, worker_id: int) -> None:
+        """Start a worker process on ``worker_id``'s ring with fresh request and result channels."""
+        requests = self._context.Queue()
+        results, worker_results = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_worker_main,
+            args=(
+                worker_id,
+                self._rings[worker_id].shm.name,
+                self._ring_config,
+                requests,
+                worker_results,
+                self.backend_factory,
+                self.max_batch_size,
+            ),
+            name=f"opencar-inference-{worker_id}",
+            daemon=True,
+        )
+        self._starting[worker_id] = self._loop.create_future()
+        process.start()
+        # Only the worker holds the write end, so its exit ends the reader
+        worker_results.close()
+        reader = threading.Thread(
+            target=self._read_results,
+            args=(results,),
+            name=f"opencar-inference-results-{worker_id}",
+            daemon=True,
+        )
+        reader.start()
+        self._request_queues[worker_id] = requests
+        self._processes[worker_id] = process
+        self._readers = [thread for thread in self._readers if thread.is_alive()] + [reader]
+
+    async def _wait_started(self, worker_id: int, timeout: float) -> Tuple[int, ...]:
+        """Wait for a spawned worker to load its model, then open its slots."""
+        try:
+            input_shape = await asyncio.wait_for(self._starting[worker_id], timeout)
+        finally:
+            del self._starting[worker_id]
+        self._free_slots[worker_id] = list(range(self.slots_per_worker))
+        async with self._slot_available:
+            self._slot_available.notify_all()
+        return tuple(input_shape)
+
+    async def _watch_workers(self, timeout: float) -> None:
+        """Replace workers that exit while the pool is running."""
+        while self.is_running:
+            await asyncio.sleep(self.monitor_interval)
+            for worker_id, process in enumerate(self._processes):
+                if process.exitcode is None or not self.is_running:
+                    continue
+                logger.error(
+                    f"Inference worker {worker_id} exited, restarting it",
+                    exitcode=process.exitcode,
+                )
+                self._fail_worker_requests(worker_id, f"worker exited ({process.exitcode})")
+                self._request_queues[worker_id].cancel_join_thread()
+                self._request_queues[worker_id].close()
+                self.total_restarts += 1
+                try:
+                    self._spawn(worker_id)
+                    await self._wait_started(worker_id, timeout)
+                except Exception as e:
+                    logger.error(f"Inference worker {worker_id} failed to restart: {str(e)}")
+                    await self._stop()
+                    return
+
+    def _fail_worker_requests(self, worker_id: int, reason: str) -> None:
+        """Fail the requests held by a worker and take its slots out of use."""
+        self._free_slots[worker_id] = []
+        for request_id, pending in list(self._pending.items()):
+            if pending.worker_id != worker_id:
+                continue
+            del self._pending[request_id]
+            if not pending.future.done():
+                self.total_errors += 1
+                pending.future.set_exception(RuntimeError(f"Inference failed: {reason}"))
+
+    def _read_results(self, results: Any) -> None:
+        """Forward a worker's messages to the event loop until it exits (runs in a thread)."""
+        try:
+            while True:
+                try:
+                    message = results.recv()
+                except (EOFError, OSError):
+                    return
+                if isinstance(message, _Result):
+                    self._loop.call_soon_threadsafe(self._complete, message)
+                else:
+                    self._loop.call_soon_threadsafe(self._started, *message)
+        except RuntimeError:
+            # The event loop closed before the worker did
+            return
+        finally:
+            results.close()
+
+    def _started(self, status: str, worker_id: int, detail: Any) -> None:
+        """Resolve a starting worker's future from its ready or failed message."""
+        future = self._starting.get(worker_id)
+        if future is None or future.done():
+            return
+        if status == "ready":
+            future.set_result(detail)
+        else:
+            future.set_exception(
+                RuntimeError(f"Inference worker {worker_id} failed to start: {detail}")
+            )
+
+    def _complete(self, result: _Result) -> None:
+        """Resolve a request's future from its slot, then free the slot.
+
+        Results of requests that were already failed (their worker exited)
+        are dropped; the worker's slots were reset when it was replaced.
+        """
+        pending = self._pending.pop(result.request_id, None)
+        if pending is None:
+            return
+        if not pending.future.done():
+            if result.error is not None:
+                self.total_errors += 1
+                pending.future.set_exception(RuntimeError(f"Inference failed: {result.error}"))
+            else:
+                ring = self._rings[result.worker_id]
+                pending.future.set_result(ring.output(result.slot, result.num_detections).copy())
+        self._free_slots[result.worker_id].append(result.slot)
+        asyncio.ensure_future(self._notify_slot_free())
+
+    async def _notify_slot_free(self) -> None:
+        async with self._slot_available:
+            self._slot_available.notify()
+
+    async def _acquire_slot(self) -> Tuple[int, int]:
+        """Take a free slot on the worker with the most free slots."""
+        async with self._slot_available:
+            while True:
+                if not self.is_running:
+                    raise RuntimeError("Worker pool is not running")
+                worker_id = max(range(self.num_workers), key=lambda i: len(self._free_slots[i]))
+                if self._free_slots[worker_id]:
+                    return worker_id, self._free_slots[worker_id].pop()
+                await self._slot_available.wait()
+
+    async def submit(self, frame: np.ndarray, conf_threshold: float = 0.5) -> np.ndarray:
+        """Run detection on one CHW frame in a worker.
+
+        Args:
+            frame: Input frame; integer frames are taken as 0-255
+            conf_threshold: Minimum detection confidence
+
+        Returns:
+            Structured array of ``DETECTION_DTYPE``
+
+        Raises:
+            RuntimeError: If the pool is not running, or inference failed
+                (including the worker exiting while holding the frame)
+        """
+        frame = np.asarray(frame)
+        if frame.nbytes > self.max_frame_bytes:
+            raise ValueError(
+                f"Frame of {frame.nbytes} bytes exceeds max_frame_bytes={self.max_frame_bytes}"
+            )
+        if not self.is_running:
+            raise RuntimeError("Worker pool is not running")
+
+        worker_id, slot = await self._acquire_slot()
+        np.copyto(self._rings[worker_id].input(slot, frame.shape, frame.dtype), frame)
+
+        request_id = next(self._request_ids)
+        future = self._loop.create_future()
+        self._pending[request_id] = _Pending(future, worker_id, slot)
+        self.total_requests += 1
+        self._request_queues[worker_id].put(
+            _Request(request_id, slot, frame.shape, frame.dtype.str, conf_threshold)
+        )
+        return await future
+
+    @property
+    def is_healthy(self) -> bool:
+        """Whether the pool is running with every worker alive and serving."""
+        return (
+            self.is_running
+            and not self._starting
+            and all(process.is_alive() for process in self._processes)
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics."""
+        return {
+            "workers": self.num_workers,
+            "alive": sum(process.is_alive() for process in self._processes),
+            "slots_per_worker": self.slots_per_worker,
+            "in_flight": len(self._pending),
+            "total_requests": self.total_requests,
+            "total_errors": self.total_errors,
+            "total_restarts": self.total_restarts,
+        }
+
+    async def _stop(self) -> None:
+        """Stop accepting work and fail every request still waiting."""
+        self.is_running = False
+        for pending in self._pending.values():
+            if not pending.future.done():
+                pending.future.set_exception(RuntimeError("Worker pool closed"))
+        self._pending.clear()
+        if self._slot_available is not None:
+            async with self._slot_available:
+                self._slot_available.notify_all()
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """Stop the workers and release the shared memory."""
+        monitor, self._monitor = self._monitor, None
+        if monitor is not None and monitor is not asyncio.current_task():
+            monitor.cancel()
+            try:
+                await monitor
+            except asyncio.CancelledError:
+                pass
+        await self._stop()
+        for requests in self._request_queues:
+            requests.put(None)
+        deadline = time.monotonic() + timeout
+        for process in self._processes:
+            await asyncio.to_thread(process.join, max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+        for reader in self._readers:
+            await asyncio.to_thread(reader.join, max(0.0, deadline - time.monotonic()))
+        for ring in self._rings:
+            ring.close(unlink=True)
+
+        self._rings.clear()
+        self._request_queues.clear()
+        self._processes.clear()
+        self._readers.clear()
+        self._free_slots.clear()
+        self._starting.clear()
+
+
+__all__ = ["InferenceWorkerPool"]
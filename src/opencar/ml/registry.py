@@ -0,0 +1,236 @@
+"""Registry of servable models keyed by name and version.
+
+Models are loaded lazily on first use. At most ``max_models`` (and, optionally,
+``max_bytes`` of model memory) stay resident; the least recently used model
+is evicted when a new one would exceed the budget. Callers hold a model
+through ``use()`` so that an evicted or replaced model is only closed once
+the requests still using it have finished. ``reload()`` loads a fresh
+instance alongside the current one, swaps it in and then drains the old one,
+so requests never wait on a reload.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import structlog
+
+logger = structlog.get_logger()
+
+# Loaded models must provide ``async close()``; ``memory_footprint()`` is optional
+ModelLoader = Callable[[], Awaitable[Any]]
+ModelKey = Tuple[str, str]
+
+DEFAULT_VERSION = "latest"
+
+
+@dataclass
+class _Entry:
+    """A resident model and its usage accounting."""
+
+    key: ModelKey
+    model: Any
+    footprint: int
+    load_time_ms: float
+    loaded_at: datetime
+    refs: int = 0
+    idle: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def __post_init__(self) -> None:
+        self.idle.set()
+
+
+class ModelRegistry:
+    """Lazily loaded, LRU-evicted set of models."""
+
+    def __init__(self, max_models: int = 5, max_bytes: Optional[int] = None):
+        """Initialize the registry.
+
+        Args:
+            max_models: Most models kept resident
+            max_bytes: Optional budget for the summed model footprints
+        """
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self._loaders: Dict[ModelKey, ModelLoader] = {}
+        self._latest: Dict[str, str] = {}
+        self._default: Optional[str] = None
+        self._resident: "OrderedDict[ModelKey, _Entry]" = OrderedDict()
+        self._locks: Dict[ModelKey, asyncio.Lock] = {}
+        self._retiring: Set[asyncio.Task] = set()
+        self.loads = 0
+        self.evictions = 0
+
+    def register(
+        self,
+        name: str,
+        loader: ModelLoader,
+        version: str = DEFAULT_VERSION,
+        default: bool = False,
+    ) -> None:
+        """Register a model version; it is loaded on first use.
+
+        The most recently registered version of a name is the one used when a
+        caller does not ask for a version. The first registered name is the
+        default model unless another is registered with ``default=True``.
+        """
+        self._loaders[(name, version)] = loader
+        self._latest[name] = version
+        if default or self._default is None:
+            self._default = name
+
+    def resolve(self, model: Optional[str] = None) -> ModelKey:
+        """Turn "name", "name:version" or None into a registered key.
+
+        Raises:
+            KeyError: If the model is not registered
+        """
+        if not model:
+            if self._default is None:
+                raise KeyError("No models registered")
+            model = self._default
+        name, _, version = model.partition(":")
+        key = (name, version or self._latest.get(name, DEFAULT_VERSION))
+        if key not in self._loaders:
+            raise KeyError(f"Unknown model: {model}")
+        return key
+
+    @asynccontextmanager
+    async def use(self, model: Optional[str] = None) -> AsyncIterator[Any]:
+        """Hold a model, loading it if needed, for the duration of the block."""
+        entry = await self._acquire(self.resolve(model))
+        try:
+            yield entry.model
+        finally:
+            entry.refs -= 1
+            if entry.refs == 0:
+                entry.idle.set()
+
+    async def _acquire(self, key: ModelKey) -> _Entry:
+        """Get the resident entry for ``key`` with its reference taken."""
+        entry = self._resident.get(key)
+        if entry is None:
+            lock = self._locks.setdefault(key, asyncio.Lock())
+            async with lock:
+                entry = self._resident.get(key)
+                if entry is None:
+                    entry = await self._load(key)
+                    self._resident[key] = entry
+                    self._evict(keep=key)
+        self._resident.move_to_end(key)
+        entry.refs += 1
+        entry.idle.clear()
+        return entry
+
+    async def _load(self, key: ModelKey) -> _Entry:
+        """Run a model's loader."""
+        start_time = time.perf_counter()
+        model = await self._loaders[key]()
+        load_time_ms = (time.perf_counter() - start_time) * 1000
+        footprint = getattr(model, "memory_footprint", lambda: 0)()
+        self.loads += 1
+        logger.info(f"Loaded model {key[0]}:{key[1]}", load_time_ms=load_time_ms)
+        return _Entry(key, model, footprint, load_time_ms, datetime.utcnow())
+
+    def _evict(self, keep: ModelKey) -> None:
+        """Retire least recently used models until the budget is met."""
+        while len(self._resident) > 1 and (
+            len(self._resident) > self.max_models
+            or (self.max_bytes is not None and self.nbytes > self.max_bytes)
+        ):
+            key = next(k for k in self._resident if k != keep)
+            self.evictions += 1
+            logger.info(f"Evicting model {key[0]}:{key[1]}")
+            self._retire(self._resident.pop(key))
+
+    def _retire(self, entry: _Entry) -> asyncio.Task:
+        """Close a model once the requests using it have finished."""
+
+        async def drain_and_close() -> None:
+            await entry.idle.wait()
+            await entry.model.close()
+
+        task = asyncio.ensure_future(drain_and_close())
+        self._retiring.add(task)
+        task.add_done_callback(self._retiring.discard)
+        return task
+
+    async def reload(self, model: Optional[str] = None) -> List[str]:
+        """Reload one model, or every resident model when ``model`` is None.
+
+        The new instance is loaded while the old one keeps serving, then
+        swapped in; the old instance is closed after its requests drain.
+
+        Returns:
+            The "name:version" of each reloaded model
+        """
+        keys = [self.resolve(model)] if model else list(self._resident)
+        reloaded = []
+        for key in keys:
+            lock = self._locks.setdefault(key, asyncio.Lock())
+            async with lock:
+                entry = await self._load(key)
+                old = self._resident.get(key)
+                self._resident[key] = entry
+                self._evict(keep=key)
+            if old is not None:
+                await self._retire(old)
+            reloaded.append(f"{key[0]}:{key[1]}")
+        return reloaded
+
+    def peek(self, model: Optional[str] = None) -> Optional[Any]:
+        """Get a resident model without loading it or touching its LRU position."""
+        try:
+            entry = self._resident.get(self.resolve(model))
+        except KeyError:
+            return None
+        return entry.model if entry else None
+
+    @property
+    def nbytes(self) -> int:
+        """Summed footprint of the resident models."""
+        return sum(entry.footprint for entry in self._resident.values())
+
+    def list_models(self) -> List[Dict[str, Any]]:
+        """Describe every registered model version."""
+        models = []
+        for key in self._loaders:
+            entry = self._resident.get(key)
+            models.append({
+                "name": key[0],
+                "version": key[1],
+                "status": "loaded" if entry else "unloaded",
+                "size_mb": entry.footprint / (1024 * 1024) if entry else 0.0,
+                "load_time_ms": entry.load_time_ms if entry else 0.0,
+                "last_updated": entry.loaded_at if entry else None,
+                "in_flight": entry.refs if entry else 0,
+                "default": key[0] == self._default and key[1] == self._latest[key[0]],
+            })
+        return models
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get registry statistics."""
+        return {
+            "registered": len(self._loaders),
+            "resident": [f"{name}:{version}" for name, version in self._resident],
+            "max_models": self.max_models,
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "draining": len(self._retiring),
+        }
+
+    async def close(self) -> None:
+        """Close every model, waiting for in-flight requests to finish."""
+        while self._resident:
+            self._retire(self._resident.popitem()[1])
+        if self._retiring:
+            await asyncio.gather(*self._retiring, return_exceptions=True)
+
+
+__all__ = ["DEFAULT_VERSION", "ModelRegistry"]
@@ -0,0 +1,354 @@
+"""Shared metrics registry for the API and the inference engine.
+
+Histograms use fixed log-linear buckets, so recording a value is a single
+``math.log`` and a list increment, with no lock and no per-sample storage.
+Percentiles are read back from the bucket counts with a bounded relative
+error (5% by default). Updates rely on the GIL rather than explicit locks;
+under heavy thread contention an increment can very occasionally be lost,
+which is an acceptable trade for monitoring data.
+"""
+
+import math
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from prometheus_client.core import (
+    CollectorRegistry,
+    CounterMetricFamily,
+    GaugeMetricFamily,
+    HistogramMetricFamily,
+    Metric,
+)
+from prometheus_client.exposition import CONTENT_TYPE_LATEST, generate_latest
+
+# Prometheus bucket bounds used when exporting latency histograms (seconds)
+LATENCY_EXPORT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+EXPORT_QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """Log-linear bucketed histogram with O(1) record cost."""
+
+    def __init__(
+        self,
+        min_value: float = 1e-5,
+        max_value: float = 100.0,
+        precision: float = 0.05,
+        export_buckets: Sequence[float] = LATENCY_EXPORT_BUCKETS,
+    ):
+        """Initialize histogram.
+
+        Args:
+            min_value: Values at or below this share the first bucket
+            max_value: Values above this share the overflow bucket
+            precision: Relative width of each bucket
+            export_buckets: Bucket bounds used for Prometheus exposition
+        """
+        self.min_value = min_value
+        self.max_value = max_value
+        self._log_growth = math.log1p(precision)
+        self._num_buckets = int(math.ceil(math.log(max_value / min_value) / self._log_growth)) + 2
+        self.counts = [0] * self._num_buckets
+        self.count = 0
+        self.sum = 0.0
+        self.sum_squares = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+        self.export_buckets = tuple(export_buckets)
+        self._export_index = [
+            next(
+                (j for j, bound in enumerate(self.export_buckets) if self.upper_bound(i) <= bound),
+                len(self.export_buckets),
+            )
+            for i in range(self._num_buckets)
+        ]
+
+    def upper_bound(self, index: int) -> float:
+        """Upper bound of a bucket."""
+        if index >= self._num_buckets - 1:
+            return math.inf
+        return self.min_value * math.exp(index * self._log_growth)
+
+    def record(self, value: float) -> None:
+        """Record one observation."""
+        if value <= self.min_value:
+            index = 0
+        else:
+            index = min(
+                int(math.log(value / self.min_value) / self._log_growth) + 1,
+                self._num_buckets - 1,
+            )
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.sum_squares += value * value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> float:
+        """Estimate the q-th percentile (0-100)."""
+        if self.count == 0:
+            return 0.0
+        rank = max(1.0, q / 100.0 * self.count)
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                if index == 0:
+                    return self.min
+                if index == self._num_buckets - 1:
+                    return self.max
+                lower = self.upper_bound(index - 1)
+                upper = min(self.upper_bound(index), self.max)
+                # Geometric midpoint of the bucket, clamped to the observed range
+                return max(self.min, min(math.sqrt(lower * max(upper, lower)), self.max))
+        return self.max
+
+    def merge(self, other: "Histogram") -> None:
+        """Add another histogram with the same bucket layout into this one."""
+        if other._num_buckets != self._num_buckets or other.min_value != self.min_value:
+            raise ValueError("Cannot merge histograms with different bucket layouts")
+        for index, bucket_count in enumerate(other.counts):
+            if bucket_count:
+                self.counts[index] += bucket_count
+        self.count += other.count
+        self.sum += other.sum
+        self.sum_squares += other.sum_squares
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self) -> float:
+        """Mean of recorded values."""
+        return self.sum / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        """Standard deviation of recorded values."""
+        if not self.count:
+            return 0.0
+        return math.sqrt(max(0.0, self.sum_squares / self.count - self.mean ** 2))
+
+    def export_counts(self) -> List[int]:
+        """Counts per export bucket (non-cumulative, last entry is +Inf)."""
+        exported = [0] * (len(self.export_buckets) + 1)
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count:
+                exported[self._export_index[index]] += bucket_count
+        return exported
+
+    def snapshot(self, scale: float = 1.0) -> Dict[str, float]:
+        """Summary statistics, multiplied by ``scale`` (e.g. 1000 for ms)."""
+        return {
+            "count": self.count,
+            "mean": self.mean * scale,
+            "min": (self.min if self.count else 0.0) * scale,
+            "max": (self.max if self.count else 0.0) * scale,
+            "p50": self.percentile(50) * scale,
+            "p95": self.percentile(95) * scale,
+            "p99": self.percentile(99) * scale,
+        }
+
+
+class Counter:
+    """Monotonic counter."""
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment the counter."""
+        self.value += amount
+
+
+class Gauge:
+    """Value that can go up and down."""
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        """Set the gauge."""
+        self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment the gauge."""
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        """Decrement the gauge."""
+        self.value -= amount
+
+
+class MetricFamily:
+    """Named metric with one child per label combination."""
+
+    def __init__(
+        self,
+        kind: str,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        factory: Callable[[], Any],
+    ):
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._children: Dict[Tuple[str, ...], Any] = {}
+
+    def labels(self, *values: Any) -> Any:
+        """Get (or create) the child for a label combination."""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[key] = self._factory()
+        return child
+
+    def children(self) -> Iterable[Tuple[Tuple[str, ...], Any]]:
+        """Iterate over (label values, child) pairs."""
+        return list(self._children.items())
+
+    def clear(self) -> None:
+        """Drop all children; a child obtained earlier is no longer reported."""
+        self._children.clear()
+
+
+class MetricsRegistry:
+    """Registry of metric families with Prometheus text exposition."""
+
+    def __init__(self) -> None:
+        self._families: Dict[str, MetricFamily] = {}
+        self._prometheus_registry = CollectorRegistry(auto_describe=False)
+        self._prometheus_registry.register(self)
+
+    def _get_or_create(
+        self,
+        kind: str,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        factory: Callable[[], Any],
+    ) -> MetricFamily:
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = MetricFamily(
+                kind, name, documentation, labelnames, factory
+            )
+        elif family.kind != kind:
+            raise ValueError(f"Metric {name} already registered as a {family.kind}")
+        return family
+
+    def counter(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+    ) -> MetricFamily:
+        """Get or create a counter family."""
+        return self._get_or_create("counter", name, documentation, labelnames, Counter)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        """Get or create a gauge family."""
+        return self._get_or_create("gauge", name, documentation, labelnames, Gauge)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        **histogram_kwargs: Any,
+    ) -> MetricFamily:
+        """Get or create a histogram family."""
+        return self._get_or_create(
+            "histogram", name, documentation, labelnames, lambda: Histogram(**histogram_kwargs)
+        )
+
+    def get(self, name: str) -> Optional[MetricFamily]:
+        """Get a registered family by name."""
+        return self._families.get(name)
+
+    def collect(self) -> Iterable[Metric]:
+        """Yield Prometheus metric families (prometheus_client collector protocol)."""
+        for family in list(self._families.values()):
+            if family.kind == "counter":
+                metric = CounterMetricFamily(
+                    family.name, family.documentation, labels=family.labelnames
+                )
+                for labels, child in family.children():
+                    metric.add_metric(labels, child.value)
+                yield metric
+            elif family.kind == "gauge":
+                metric = GaugeMetricFamily(
+                    family.name, family.documentation, labels=family.labelnames
+                )
+                for labels, child in family.children():
+                    metric.add_metric(labels, child.value)
+                yield metric
+            else:
+                yield from self._collect_histogram(family)
+
+    def _collect_histogram(self, family: MetricFamily) -> Iterable[Metric]:
+        histogram = HistogramMetricFamily(
+            family.name, family.documentation, labels=family.labelnames
+        )
+        quantiles = Metric(
+            f"{family.name}_quantiles", f"{family.documentation} (quantiles)", "summary"
+        )
+        for labels, child in family.children():
+            cumulative = 0
+            buckets = []
+            for bound, bucket_count in zip(
+                list(child.export_buckets) + [math.inf], child.export_counts()
+            ):
+                cumulative += bucket_count
+                buckets.append(("+Inf" if bound == math.inf else repr(bound), cumulative))
+            histogram.add_metric(labels, buckets, child.sum)
+
+            label_dict = dict(zip(family.labelnames, labels))
+            for q in EXPORT_QUANTILES:
+                quantiles.add_sample(
+                    quantiles.name,
+                    {**label_dict, "quantile": str(q)},
+                    child.percentile(q * 100),
+                )
+            quantiles.add_sample(f"{quantiles.name}_count", label_dict, child.count)
+            quantiles.add_sample(f"{quantiles.name}_sum", label_dict, child.sum)
+        yield histogram
+        yield quantiles
+
+    def generate_latest(self) -> bytes:
+        """Render all metrics in Prometheus text format."""
+        return generate_latest(self._prometheus_registry)
+
+    def clear(self) -> None:
+        """Drop all registered families."""
+        self._families.clear()
+
+
+# Default registry shared by the API and the inference engine
+REGISTRY = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """Get the process-wide metrics registry."""
+    return REGISTRY
+
+
+__all__ = [
+    "CONTENT_TYPE_LATEST",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricFamily",
+    "MetricsRegistry",
+    "REGISTRY",
+    "get_registry",
+]
@@ -0,0 +1,413 @@
+"""Object detection models."""
+
+import asyncio
+import functools
+import hashlib
+import io
+import threading
+from pathlib import Path
+from typing import Any, AsyncIterable, Awaitable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import structlog
+
+from opencar.ml.inference import InferenceEngine
+from opencar.ml.inference.backends import create_backend
+from opencar.ml.inference.batching import MicroBatchScheduler
+from opencar.ml.inference.postprocess import (
+    detections_to_dicts,
+    filter_detections,
+    get_class_name,
+)
+from opencar.ml.inference.workers import InferenceWorkerPool
+from opencar.perception.processors.letterbox import (
+    LetterboxParams,
+    LetterboxProcessor,
+    scale_boxes,
+)
+
+logger = structlog.get_logger()
+
+
+def _weights_version(model_path: Optional[Path]) -> str:
+    """Identify the weights at ``model_path`` by their path, size and modification time."""
+    if model_path is None:
+        return "builtin"
+    try:
+        stat = model_path.stat()
+    except OSError:
+        return "missing"
+    identity = f"{model_path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.blake2b(identity.encode(), digest_size=8).hexdigest()
+
+
+class ObjectDetector:
+    """Object detector serving requests through the inference engine."""
+
+    def __init__(
+        self,
+        num_classes: int = 80,
+        confidence_threshold: float = 0.5,
+        device: str = "cpu",
+        model_path: Optional[Path] = None,
+        batch_size: int = 1,
+        max_batch_wait_ms: float = 5.0,
+        num_threads: int = 4,
+        use_onnx: bool = False,
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 0,
+        inference_workers: int = 0,
+    ):
+        """Initialize object detector.
+
+        With ``batch_size > 1`` concurrent ``detect`` calls are coalesced by a
+        ``MicroBatchScheduler`` into batched ``predict`` calls. Image
+        decoding, letterboxing, pre- and postprocessing run on
+        ``num_threads`` engine threads. With ``use_onnx`` the model at
+        ``model_path`` runs on ONNX Runtime.
+
+        With ``inference_workers > 0`` the model runs instead in that many
+        worker processes (see ``InferenceWorkerPool``), which batch queued
+        frames themselves.
+        """
+        self.num_classes = num_classes
+        self.confidence_threshold = confidence_threshold
+        self.device = device
+        self.batch_size = batch_size
+        self.model_path = model_path
+        # Weights identity, so cached results never outlive the weights they came from
+        self.model_version: Optional[str] = None
+
+        self.engine = InferenceEngine(
+            model_path=model_path,
+            device=device,
+            batch_size=batch_size,
+            use_onnx=use_onnx,
+            num_threads=num_threads,
+            intra_op_threads=intra_op_threads,
+            inter_op_threads=inter_op_threads,
+        )
+        self.worker_pool: Optional[InferenceWorkerPool] = None
+        if inference_workers > 0:
+            self.worker_pool = InferenceWorkerPool(
+                num_workers=inference_workers,
+                backend_factory=functools.partial(
+                    create_backend,
+                    model_path,
+                    device=device,
+                    use_onnx=use_onnx,
+                    intra_op_threads=intra_op_threads,
+                    inter_op_threads=inter_op_threads,
+                ),
+                max_batch_size=batch_size,
+            )
+        self.scheduler: Optional[MicroBatchScheduler] = None
+        if batch_size > 1 and self.worker_pool is None:
+            self.scheduler = MicroBatchScheduler(
+                self.engine, max_batch_size=batch_size, max_wait_ms=max_batch_wait_ms
+            )
+        # Letterbox processors keep a canvas, so each engine thread has its own
+        self._letterboxes = threading.local()
+        self.is_initialized = False
+
+    async def initialize(self) -> None:
+        """Load the underlying model."""
+        if self.is_initialized:
+            return
+        self.model_version = _weights_version(self.model_path)
+        if self.worker_pool is not None:
+            await self.worker_pool.start()
+        else:
+            await self.engine.load_model()
+        self.is_initialized = True
+        logger.info("Object detector initialized", device=self.device)
+
+    async def detect(
+        self,
+        image: Union[bytes, np.ndarray],
+        confidence_threshold: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """Detect objects in an encoded image or an HWC image array."""
+        if not self.is_initialized:
+            await self.initialize()
+
+        threshold = confidence_threshold
+        if threshold is None:
+            threshold = self.confidence_threshold
+        prepared = await self.engine.run_cpu(self._prepare_input, image)
+        if prepared is None:
+            return []
+        frame, params = prepared
+
+        if self.worker_pool is not None:
+            detections = await self.worker_pool.submit(frame, threshold)
+        elif self.scheduler is not None:
+            detections = await self.scheduler.submit(frame, threshold)
+        else:
+            results = await self.engine.predict(frame, conf_threshold=threshold, as_arrays=True)
+            detections = results["detections"][0]
+
+        return self._to_image_dicts(detections, params)
+
+    async def detect_batch(
+        self,
+        images: Sequence[Union[bytes, np.ndarray]],
+        confidence_threshold: Optional[float] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """Detect objects in several images at once.
+
+        Decodable images are run as one batch (or handed to the scheduler or
+        worker pool together); images that cannot be decoded get no detections.
+        """
+        if not self.is_initialized:
+            await self.initialize()
+
+        threshold = confidence_threshold
+        if threshold is None:
+            threshold = self.confidence_threshold
+        prepared = await asyncio.gather(
+            *(self.engine.run_cpu(self._prepare_input, image) for image in images)
+        )
+        valid = [item for item in prepared if item is not None]
+        if not valid:
+            return [[] for _ in images]
+
+        frames = [frame for frame, _ in valid]
+        if self.worker_pool is not None:
+            batch_detections = await asyncio.gather(
+                *(self.worker_pool.submit(frame, threshold) for frame in frames)
+            )
+        elif self.scheduler is not None:
+            batch_detections = await asyncio.gather(
+                *(self.scheduler.submit(frame, threshold) for frame in frames)
+            )
+        else:
+            results = await self.engine.predict(frames, conf_threshold=threshold, as_arrays=True)
+            batch_detections = results["detections"]
+
+        detections_by_image = iter(zip(batch_detections, valid))
+        results_per_image = []
+        for item in prepared:
+            if item is None:
+                results_per_image.append([])
+                continue
+            detections, (_, params) = next(detections_by_image)
+            results_per_image.append(self._to_image_dicts(detections, params))
+        return results_per_image
+
+    async def detect_stream(
+        self,
+        images: AsyncIterable[Union[bytes, np.ndarray]],
+        confidence_threshold: Optional[float] = None,
+        classes: Optional[Sequence[int]] = None,
+        max_detections: Optional[int] = None,
+    ) -> List[Optional[List[Dict[str, Any]]]]:
+        """Detect objects in images as they arrive from an async iterable.
+
+        Each image is decoded on an engine thread as soon as it arrives.
+        Every ``batch_size`` decodable images go to
+        ``InferenceEngine.batch_predict`` while the next ones are still
+        arriving, and at most one batch is in flight, so memory stays bounded
+        however many images are streamed.
+
+        Args:
+            images: Encoded images or HWC image arrays
+            confidence_threshold: Detection threshold (None: detector default)
+            classes: Class IDs to keep (None keeps every class)
+            max_detections: Most detections returned per image
+
+        Returns:
+            Detections per image, in arrival order; None for images that
+            could not be decoded
+        """
+        if not self.is_initialized:
+            await self.initialize()
+
+        threshold = confidence_threshold
+        if threshold is None:
+            threshold = self.confidence_threshold
+        results: List[Optional[List[Dict[str, Any]]]] = []
+        chunk: List[Tuple[int, np.ndarray, LetterboxParams]] = []
+        in_flight: Optional[asyncio.Future] = None
+
+        async def collect(batch: Awaitable[List[Tuple[int, List[Dict[str, Any]]]]]) -> None:
+            for index, detections in await batch:
+                results[index] = detections
+
+        try:
+            async for image in images:
+                results.append(None)
+                prepared = await self.engine.run_cpu(self._prepare_input, image)
+                if prepared is None:
+                    continue
+                chunk.append((len(results) - 1, *prepared))
+                if len(chunk) >= self.batch_size:
+                    if in_flight is not None:
+                        await collect(in_flight)
+                    in_flight = asyncio.ensure_future(
+                        self._detect_chunk(chunk, threshold, classes, max_detections)
+                    )
+                    chunk = []
+            if in_flight is not None:
+                await collect(in_flight)
+                in_flight = None
+            if chunk:
+                await collect(self._detect_chunk(chunk, threshold, classes, max_detections))
+        except BaseException:
+            if in_flight is not None:
+                in_flight.cancel()
+            raise
+        return results
+
+    async def _detect_chunk(
+        self,
+        chunk: List[Tuple[int, np.ndarray, LetterboxParams]],
+        threshold: float,
+        classes: Optional[Sequence[int]],
+        max_detections: Optional[int],
+    ) -> List[Tuple[int, List[Dict[str, Any]]]]:
+        """Run one batch of ``detect_stream`` and map boxes back to each image."""
+        frames = [frame for _, frame, _ in chunk]
+        if self.worker_pool is not None:
+            batch_detections = await asyncio.gather(
+                *(self.worker_pool.submit(frame, threshold) for frame in frames)
+            )
+            batch_detections = [
+                filter_detections(detections, classes, max_detections)
+                for detections in batch_detections
+            ]
+        else:
+            results = await self.engine.batch_predict(
+                frames,
+                batch_size=len(frames),
+                conf_threshold=threshold,
+                as_arrays=True,
+                classes=classes,
+                max_detections=max_detections,
+            )
+            batch_detections = [result["detections"] for result in results]
+
+        return [
+            (index, self._to_image_dicts(detections, params))
+            for (index, _, params), detections in zip(chunk, batch_detections)
+        ]
+
+    def _to_image_dicts(
+        self, detections: np.ndarray, params: LetterboxParams
+    ) -> List[Dict[str, Any]]:
+        """Map boxes from letterboxed input to image coordinates and convert to dicts.
+
+        Boxes left empty by clipping to the image (entirely in the padding)
+        are dropped.
+        """
+        bbox = scale_boxes(detections["bbox"], params, out=detections["bbox"])
+        visible = (bbox[:, 2] > bbox[:, 0]) & (bbox[:, 3] > bbox[:, 1])
+        return detections_to_dicts(detections if visible.all() else detections[visible])
+
+    def _prepare_input(
+        self, image: Union[bytes, np.ndarray]
+    ) -> Optional[Tuple[np.ndarray, LetterboxParams]]:
+        """Decode and letterbox an image to the model's CHW input shape.
+
+        Runs on the engine threads (``InferenceEngine.run_cpu``), so large
+        images are decoded without blocking the event loop.
+        """
+        from PIL import Image
+
+        try:
+            if isinstance(image, (bytes, bytearray)):
+                frame = np.asarray(Image.open(io.BytesIO(image)).convert("RGB"))
+            else:
+                frame = np.asarray(image, dtype=np.uint8)
+                if frame.ndim != 3 or frame.shape[2] != 3:
+                    frame = np.asarray(Image.fromarray(frame).convert("RGB"))
+        except Exception as e:
+            logger.warning(f"Could not decode image: {str(e)}")
+            return None
+
+        letterbox = getattr(self._letterboxes, "processor", None)
+        if letterbox is None:
+            input_shape = (
+                self.worker_pool.input_shape if self.worker_pool else self.engine.input_shape
+            )
+            letterbox = self._letterboxes.processor = LetterboxProcessor(
+                input_size=input_shape[1:]
+            )
+        batch, params = letterbox(frame, normalize=False)
+        return batch[0], params[0]
+
+    def _get_class_name(self, class_id: int) -> str:
+        """Get class name from ID."""
+        return get_class_name(class_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get serving statistics."""
+        return {
+            "model": self.engine.get_model_info(),
+            "performance": self.engine.get_performance_stats(),
+            "batching": self.scheduler.get_stats() if self.scheduler else None,
+            "workers": self.worker_pool.get_stats() if self.worker_pool else None,
+        }
+
+    async def warmup(self, num_iterations: int = 3) -> None:
+        """Load the model and detect a dummy frame so the first request is fast.
+
+        The frame is a JPEG that needs resizing, so decoding, letterboxing,
+        batching and inference are all exercised (and their lazy imports done).
+        """
+        from PIL import Image
+
+        await self.initialize()
+        encoded = io.BytesIO()
+        Image.new("RGB", (1280, 720)).save(encoded, format="JPEG")
+        for _ in range(num_iterations):
+            await self.detect(encoded.getvalue())
+
+    def prepare_fork(self) -> None:
+        """Stop the engine threads so the process can fork.
+
+        Threads do not survive ``fork()``; the engine starts new ones on the
+        next request, in the parent or in each child.
+        """
+        self.engine.close(wait=True)
+
+    def memory_footprint(self) -> int:
+        """Approximate bytes held by the loaded model."""
+        return self.engine.memory_footprint()
+
+    async def health_check(self) -> bool:
+        """Check whether the detector is ready to serve."""
+        if self.worker_pool is not None:
+            return self.is_initialized and self.worker_pool.is_healthy
+        return self.is_initialized and self.engine.is_loaded
+
+    async def reload(self) -> None:
+        """Reload the underlying model."""
+        if self.worker_pool is not None:
+            await self.worker_pool.close()
+        await self.engine.unload_model()
+        self.is_initialized = False
+        await self.initialize()
+
+    async def close(self) -> None:
+        """Stop batching and release the model."""
+        if self.scheduler is not None:
+            await self.scheduler.close()
+        if self.worker_pool is not None:
+            await self.worker_pool.close()
+        await self.engine.unload_model()
+        self.engine.close()
+        self.is_initialized = False
+
+
+class YOLODetector(ObjectDetector):
+    """YOLOv8 object detector."""
+
+    def __init__(self, model_size: str = "n", **kwargs: Any):
+        """Initialize YOLO detector."""
+        super().__init__(**kwargs)
+        self.model_size = model_size
+        self._mock_model = {"model_type": f"yolov8{model_size}"}
+
+
+__all__ = ["ObjectDetector", "YOLODetector"]
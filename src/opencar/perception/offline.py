@@ -0,0 +1,440 @@
+"""Offline bulk detection over image files.
+
+``detect_files`` runs detection over archived frames without the HTTP API.
+The work runs in three overlapping stages:
+- A thread pool reads files ahead of the model.
+- A process pool decodes and letterboxes the images outside the main process's GIL.
+- ``InferenceEngine.batch_predict`` runs full batches, pipelining pre- and
+  postprocessing with the model.
+
+Results are written incrementally. JSON Lines goes to one file; Parquet is a
+directory with one part file per checkpoint. The checkpoint records the
+number of images done, so an interrupted run resumes where it stopped.
+Images are processed in sorted path order so a resumed run sees the same
+sequence.
+"""
+
+import asyncio
+import glob
+import io
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+import structlog
+
+from opencar.ml.inference.postprocess import detections_to_dicts
+from opencar.perception.processors.letterbox import (
+    LetterboxParams,
+    LetterboxProcessor,
+    scale_boxes,
+)
+
+if TYPE_CHECKING:
+    from opencar.ml.inference import InferenceEngine
+
+logger = structlog.get_logger()
+
+IMAGE_SUFFIXES = (".bmp", ".jpeg", ".jpg", ".png", ".tif", ".tiff", ".webp")
+OUTPUT_FORMATS = ("jsonl", "parquet")
+
+# Batches handed to each batch_predict call, so it can pipeline them
+BATCHES_PER_CALL = 4
+
+# Letterbox processors of a decode process, by model input size
+_letterboxes: Dict[Tuple[int, int], LetterboxProcessor] = {}
+
+
+def find_images(source: str) -> List[Path]:
+    """Image files under a directory (recursively) or matching a glob, in sorted order."""
+    path = Path(source)
+    if path.is_dir():
+        candidates = path.rglob("*")
+    else:
+        candidates = (Path(match) for match in glob.iglob(source, recursive=True))
+    return sorted(
+        candidate
+        for candidate in candidates
+        if candidate.suffix.lower() in IMAGE_SUFFIXES and candidate.is_file()
+    )
+
+
+def decode_image(data: bytes, input_size: Tuple[int, int]) -> Tuple[np.ndarray, LetterboxParams]:
+    """Decode an encoded image and letterbox it into a CHW uint8 model input.
+
+    Runs in the decode processes; each keeps its own letterbox canvas.
+
+    Raises:
+        ValueError: If the data is not an image PIL can read
+    """
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        frame = np.asarray(Image.open(io.BytesIO(data)).convert("RGB"))
+    except UnidentifiedImageError:
+        raise ValueError("Unrecognized image format")
+    letterbox = _letterboxes.get(input_size)
+    if letterbox is None:
+        letterbox = _letterboxes[input_size] = LetterboxProcessor(input_size=input_size)
+    batch, params = letterbox(frame, normalize=False)
+    return batch[0], params[0]
+
+
+class JSONLResultWriter:
+    """Write one JSON object per image to a JSON Lines file."""
+
+    def __init__(self, path: Path, state: Optional[Dict[str, Any]] = None):
+        """Open the output file.
+
+        Args:
+            path: Output file
+            state: Checkpointed writer state to resume from; without it the
+                file is started over
+        """
+        self.path = path
+        if state is None:
+            self._file = open(path, "wb")
+        else:
+            # Lines written after the checkpoint are written again
+            self._file = open(path, "r+b")
+            self._file.truncate(state["offset"])
+            self._file.seek(state["offset"])
+
+    def write(self, records: List[Dict[str, Any]]) -> None:
+        """Append results."""
+        self._file.write(b"".join(json.dumps(record).encode() + b"\n" for record in records))
+
+    def checkpoint(self) -> Dict[str, Any]:
+        """Flush the results to disk and return the state to resume from."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return {"offset": self._file.tell()}
+
+    def close(self) -> None:
+        """Close the output file."""
+        self._file.close()
+
+
+class ParquetResultWriter:
+    """Write results as a directory of Parquet files, one per checkpoint.
+
+    Detections are stored without their (always empty) ``attributes``.
+    Requires ``pyarrow``.
+    """
+
+    def __init__(self, path: Path, state: Optional[Dict[str, Any]] = None):
+        """Create the output directory.
+
+        Args:
+            path: Output directory
+            state: Checkpointed writer state to resume from; without it
+                existing part files are replaced
+
+        Raises:
+            RuntimeError: If pyarrow is not installed
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError(
+                "pyarrow is not installed; install it with 'pip install opencar[parquet]'"
+            )
+        self._pa = pa
+        self._pq = pq
+        bbox = pa.struct([(name, pa.float32()) for name in ("x1", "y1", "x2", "y2")])
+        detection = pa.struct(
+            [("class_name", pa.string()), ("confidence", pa.float32()), ("bbox", bbox)]
+        )
+        self.schema = pa.schema([
+            ("path", pa.string()),
+            ("width", pa.int32()),
+            ("height", pa.int32()),
+            ("error", pa.string()),
+            ("detections", pa.list_(detection)),
+        ])
+
+        self.path = path
+        self.parts = state["parts"] if state is not None else 0
+        self._records: List[Dict[str, Any]] = []
+        path.mkdir(parents=True, exist_ok=True)
+        # Parts written after the checkpoint are written again
+        for part in path.glob("part-*.parquet"):
+            if int(part.stem.split("-")[1]) >= self.parts:
+                part.unlink()
+
+    def write(self, records: List[Dict[str, Any]]) -> None:
+        """Buffer results until the next checkpoint."""
+        for record in records:
+            detections = [
+                {key: detection[key] for key in ("class_name", "confidence", "bbox")}
+                for detection in record["detections"]
+            ]
+            self._records.append({**record, "detections": detections})
+
+    def checkpoint(self) -> Dict[str, Any]:
+        """Write the buffered results as a new part and return the state to resume from."""
+        if self._records:
+            table = self._pa.Table.from_pylist(self._records, schema=self.schema)
+            self._pq.write_table(table, self.path / f"part-{self.parts:05d}.parquet")
+            self.parts += 1
+            self._records = []
+        return {"parts": self.parts}
+
+    def close(self) -> None:
+        """Drop results not written by a checkpoint."""
+        self._records = []
+
+
+def create_writer(
+    path: Path, output_format: str, state: Optional[Dict[str, Any]] = None
+) -> Any:
+    """Create the result writer for ``output_format`` ("jsonl" or "parquet")."""
+    if output_format == "jsonl":
+        return JSONLResultWriter(path, state)
+    if output_format == "parquet":
+        return ParquetResultWriter(path, state)
+    raise ValueError(f"Unknown output format: {output_format}")
+
+
+def load_checkpoint(path: Path) -> Optional[Dict[str, Any]]:
+    """Read a checkpoint, or None if there is none."""
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def _save_checkpoint(path: Path, checkpoint: Dict[str, Any]) -> None:
+    """Replace the checkpoint atomically, so a crash leaves the previous one intact."""
+    temp_path = path.with_name(path.name + ".tmp")
+    temp_path.write_text(json.dumps(checkpoint))
+    os.replace(temp_path, path)
+
+
+def _to_image_dicts(detections: np.ndarray, params: LetterboxParams) -> List[Dict[str, Any]]:
+    """Map boxes back to image coordinates, dropping those left empty by clipping."""
+    bbox = scale_boxes(detections["bbox"], params, out=detections["bbox"])
+    visible = (bbox[:, 2] > bbox[:, 0]) & (bbox[:, 3] > bbox[:, 1])
+    return detections_to_dicts(detections if visible.all() else detections[visible])
+
+
+class BulkDetectionStats(NamedTuple):
+    """Outcome of a ``detect_files`` run."""
+
+    total: int
+    resumed: int
+    processed: int
+    failed: int
+    elapsed: float
+
+    @property
+    def images_per_second(self) -> float:
+        return self.processed / self.elapsed if self.elapsed > 0 else 0.0
+
+
+async def detect_files(
+    paths: Sequence[Path],
+    engine: "InferenceEngine",
+    output: Path,
+    output_format: str = "jsonl",
+    checkpoint_path: Optional[Path] = None,
+    checkpoint_every: int = 1000,
+    batch_size: int = 8,
+    confidence_threshold: float = 0.5,
+    decode_workers: Optional[int] = None,
+    read_workers: int = 4,
+    prefetch: Optional[int] = None,
+    start_method: str = "spawn",
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> BulkDetectionStats:
+    """Detect objects in image files and write one result per image.
+
+    Every result has the image ``path``, its ``width`` and ``height``, and
+    its ``detections`` in image coordinates (as returned by the API). An
+    image that cannot be read or decoded gets an ``error`` and no detections.
+
+    Results are flushed to disk every ``checkpoint_every`` images and at the
+    end; with ``checkpoint_path`` set, progress is recorded there each time.
+    If a checkpoint exists, the run resumes after the images it covers.
+    Otherwise any existing output is replaced.
+
+    Args:
+        paths: Image files, in the order to process them
+        engine: Inference engine (loaded on first use)
+        output: JSON Lines file or Parquet directory
+        output_format: "jsonl" or "parquet"
+        checkpoint_path: Checkpoint file (None disables resuming)
+        checkpoint_every: Images between flushes and checkpoints
+        batch_size: Images per model batch
+        confidence_threshold: Detection threshold
+        decode_workers: Decode processes (None: one per CPU)
+        read_workers: File reader threads
+        prefetch: Images read and decoded ahead of the model (None: two
+            batch_predict calls' worth)
+        start_method: Multiprocessing start method of the decode processes
+        on_progress: Called with the number of images finished after each call
+
+    Returns:
+        Counts and timing of the run
+
+    Raises:
+        ValueError: If the checkpoint does not match ``paths`` or the output format
+    """
+    checkpoint = load_checkpoint(checkpoint_path) if checkpoint_path is not None else None
+    start = 0
+    if checkpoint is not None:
+        start = checkpoint["completed"]
+        if checkpoint["format"] != output_format:
+            raise ValueError(
+                f"Checkpoint is for {checkpoint['format']} output, not {output_format}"
+            )
+        if start > len(paths) or (start and str(paths[start - 1]) != checkpoint["last_path"]):
+            raise ValueError("Input files changed since the checkpoint was written")
+    writer = create_writer(
+        output, output_format, checkpoint["writer"] if checkpoint is not None else None
+    )
+
+    if not engine.is_loaded:
+        await engine.load_model()
+    input_size = tuple(engine.input_shape[1:])
+    call_size = batch_size * BATCHES_PER_CALL
+    prefetch = prefetch or 2 * call_size
+
+    loop = asyncio.get_running_loop()
+    read_pool = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="opencar-reader")
+    decode_pool = ProcessPoolExecutor(
+        max_workers=decode_workers or os.cpu_count() or 1,
+        mp_context=multiprocessing.get_context(start_method),
+    )
+
+    async def load(path: Path) -> Tuple[np.ndarray, LetterboxParams]:
+        data = await loop.run_in_executor(read_pool, path.read_bytes)
+        return await loop.run_in_executor(decode_pool, decode_image, data, input_size)
+
+    async def detect(chunk: List[Tuple[Path, Any]]) -> List[Dict[str, Any]]:
+        """Run the decoded images of a chunk; ``chunk`` holds (frame, params) or an error."""
+        decoded = [item for _, item in chunk if not isinstance(item, str)]
+        detections = iter([])
+        if decoded:
+            results = await engine.batch_predict(
+                [frame for frame, _ in decoded],
+                batch_size=batch_size,
+                conf_threshold=confidence_threshold,
+                as_arrays=True,
+            )
+            detections = iter([
+                _to_image_dicts(result["detections"], params)
+                for result, (_, params) in zip(results, decoded)
+            ])
+        records = []
+        for path, item in chunk:
+            if isinstance(item, str):
+                records.append({
+                    "path": str(path), "width": None, "height": None,
+                    "error": item, "detections": [],
+                })
+            else:
+                params = item[1]
+                records.append({
+                    "path": str(path), "width": params.width, "height": params.height,
+                    "error": None, "detections": next(detections),
+                })
+        return records
+
+    def save(completed: int) -> None:
+        state = writer.checkpoint()
+        if checkpoint_path is not None:
+            _save_checkpoint(checkpoint_path, {
+                "format": output_format,
+                "completed": completed,
+                "last_path": str(paths[completed - 1]) if completed else None,
+                "writer": state,
+            })
+
+    remaining = iter(paths[start:])
+    pending: Deque[Tuple[Path, asyncio.Future]] = deque()
+
+    def fill() -> None:
+        while len(pending) < prefetch:
+            path = next(remaining, None)
+            if path is None:
+                return
+            pending.append((path, asyncio.ensure_future(load(path))))
+
+    completed = checkpointed = start
+    failed = 0
+    chunk: List[Tuple[Path, Any]] = []
+    decoded_in_chunk = 0
+    start_time = time.perf_counter()
+    try:
+        fill()
+        while pending:
+            path, future = pending.popleft()
+            fill()
+            try:
+                chunk.append((path, await future))
+                decoded_in_chunk += 1
+            except BrokenProcessPool:
+                raise
+            except Exception as e:
+                logger.warning(f"Could not decode {path}: {str(e)}")
+                chunk.append((path, str(e) or type(e).__name__))
+                failed += 1
+
+            if decoded_in_chunk >= call_size or not pending:
+                writer.write(await detect(chunk))
+                completed += len(chunk)
+                if on_progress is not None:
+                    on_progress(len(chunk))
+                chunk = []
+                decoded_in_chunk = 0
+                if completed - checkpointed >= checkpoint_every:
+                    save(completed)
+                    checkpointed = completed
+        save(completed)
+    finally:
+        for _, future in pending:
+            future.cancel()
+        writer.close()
+        read_pool.shutdown(wait=False, cancel_futures=True)
+        decode_pool.shutdown(wait=True, cancel_futures=True)
+
+    return BulkDetectionStats(
+        total=len(paths),
+        resumed=start,
+        processed=completed - start,
+        failed=failed,
+        elapsed=time.perf_counter() - start_time,
+    )
+
+
+__all__ = [
+    "BulkDetectionStats",
+    "IMAGE_SUFFIXES",
+    "JSONLResultWriter",
+    "OUTPUT_FORMATS",
+    "ParquetResultWriter",
+    "create_writer",
+    "decode_image",
+    "detect_files",
+    "find_images",
+    "load_checkpoint",
+]
@@ -0,0 +1,206 @@
+"""Letterbox preprocessing for detection models.
+
+Frames of any size are resized to fit the model input while keeping their
+aspect ratio, padded to the full input size, optionally channel-swapped and
+transposed from HWC to CHW. Each frame is resized straight into a padded HWC
+canvas; the channel swap, transpose, dtype conversion and normalization then
+happen in a single vectorized pass over the whole batch, written directly
+into the output array.
+"""
+
+import importlib.util
+from typing import List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# OpenCV is imported on the first resize rather than at API startup
+CV2_AVAILABLE = importlib.util.find_spec("cv2") is not None
+_cv2 = None
+
+_CV2_INTERPOLATION = {"linear": "INTER_LINEAR", "nearest": "INTER_NEAREST", "area": "INTER_AREA"}
+
+ImageBatch = Union[np.ndarray, Sequence[np.ndarray]]
+
+
+def _import_cv2():
+    """Import OpenCV on first use."""
+    global _cv2
+    if _cv2 is None:
+        import cv2
+
+        _cv2 = cv2
+    return _cv2
+
+
+class LetterboxParams(NamedTuple):
+    """Geometry of one letterboxed frame, used to map boxes back."""
+
+    scale: float
+    pad_x: int
+    pad_y: int
+    width: int
+    height: int
+
+
+class LetterboxProcessor:
+    """Letterbox resize, pad and HWC->CHW conversion for a batch of frames.
+
+    The processor keeps a reusable canvas, so use one instance per thread.
+    """
+
+    def __init__(
+        self,
+        input_size: Tuple[int, int] = (640, 640),
+        pad_value: int = 114,
+        swap_rb: bool = False,
+        scale_up: bool = True,
+        interpolation: str = "linear",
+    ):
+        """Initialize the processor.
+
+        Args:
+            input_size: Model input as (height, width)
+            pad_value: Value of the padding border
+            swap_rb: Swap the first and last channels (BGR <-> RGB)
+            scale_up: Enlarge frames smaller than the input size
+            interpolation: "linear", "nearest" or "area"
+        """
+        if interpolation not in ("linear", "nearest", "area"):
+            raise ValueError(f"Unsupported interpolation: {interpolation}")
+        self.input_size = tuple(input_size)
+        self.pad_value = pad_value
+        self.swap_rb = swap_rb
+        self.scale_up = scale_up
+        self.interpolation = interpolation
+        self._canvas: Optional[np.ndarray] = None
+
+    def get_params(self, height: int, width: int) -> LetterboxParams:
+        """Compute the resize scale and padding for a ``height`` x ``width`` frame."""
+        input_h, input_w = self.input_size
+        scale = min(input_h / height, input_w / width)
+        if not self.scale_up:
+            scale = min(scale, 1.0)
+        new_w, new_h = round(width * scale), round(height * scale)
+        return LetterboxParams(
+            scale, (input_w - new_w) // 2, (input_h - new_h) // 2, width, height
+        )
+
+    def __call__(
+        self,
+        images: ImageBatch,
+        out: Optional[np.ndarray] = None,
+        normalize: bool = True,
+    ) -> Tuple[np.ndarray, List[LetterboxParams]]:
+        """Letterbox a batch of HWC frames into an (N, 3, H, W) array.
+
+        Args:
+            images: One HWC frame, an NHWC array or a list of HWC frames of
+                any sizes
+            out: Output buffer of shape (N, 3, H, W), uint8 or floating point.
+                Allocated (float32 if ``normalize`` else uint8) when omitted.
+            normalize: Scale floating-point output to [0, 1]
+
+        Returns:
+            Tuple of (output array, geometry of each frame)
+        """
+        if isinstance(images, np.ndarray) and images.ndim == 3:
+            images = [images]
+        if any(image.ndim != 3 or image.shape[2] != 3 for image in images):
+            raise ValueError("Expected HWC frames with 3 channels")
+
+        batch_size = len(images)
+        input_h, input_w = self.input_size
+        if out is None:
+            dtype = np.float32 if normalize else np.uint8
+            out = np.empty((batch_size, 3, input_h, input_w), dtype=dtype)
+        elif out.shape != (batch_size, 3, input_h, input_w):
+            raise ValueError(f"Output buffer has shape {out.shape}")
+
+        canvas = self._get_canvas(batch_size)
+        params = [self._resize_into(image, canvas[i]) for i, image in enumerate(images)]
+
+        # One pass over the batch: channel swap and transpose are views
+        source = canvas.transpose(0, 3, 1, 2)
+        if self.swap_rb:
+            source = source[:, ::-1]
+        if normalize and np.issubdtype(out.dtype, np.floating):
+            np.multiply(source, out.dtype.type(1.0 / 255.0), out=out)
+        else:
+            np.copyto(out, source, casting="unsafe")
+
+        return out, params
+
+    def _get_canvas(self, batch_size: int) -> np.ndarray:
+        """Reusable NHWC uint8 canvas for at least ``batch_size`` frames."""
+        if self._canvas is None or len(self._canvas) < batch_size:
+            self._canvas = np.empty((batch_size, *self.input_size, 3), dtype=np.uint8)
+        return self._canvas[:batch_size]
+
+    def _resize_into(self, image: np.ndarray, canvas: np.ndarray) -> LetterboxParams:
+        """Resize ``image`` into the middle of ``canvas`` and fill the border."""
+        height, width = image.shape[:2]
+        params = self.get_params(height, width)
+        new_h = round(height * params.scale)
+        new_w = round(width * params.scale)
+        top, left = params.pad_y, params.pad_x
+        bottom, right = top + new_h, left + new_w
+
+        canvas[:top] = self.pad_value
+        canvas[bottom:] = self.pad_value
+        canvas[top:bottom, :left] = self.pad_value
+        canvas[top:bottom, right:] = self.pad_value
+
+        region = canvas[top:bottom, left:right]
+        if (new_h, new_w) == (height, width):
+            np.copyto(region, image, casting="unsafe")
+        elif CV2_AVAILABLE:
+            cv2 = _import_cv2()
+            cv2.resize(
+                np.ascontiguousarray(image, dtype=np.uint8),
+                (new_w, new_h),
+                dst=region,
+                interpolation=getattr(cv2, _CV2_INTERPOLATION[self.interpolation]),
+            )
+        else:
+            _resize_nearest(image, region)
+        return params
+
+    @staticmethod
+    def scale_boxes(
+        boxes: np.ndarray, params: LetterboxParams, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Map [x1, y1, x2, y2] boxes from model input back to frame coordinates."""
+        return scale_boxes(boxes, params, out)
+
+
+def _resize_nearest(image: np.ndarray, out: np.ndarray) -> None:
+    """Nearest-neighbour resize of ``image`` into ``out`` without OpenCV."""
+    height, width = image.shape[:2]
+    new_h, new_w = out.shape[:2]
+    rows = ((np.arange(new_h) + 0.5) * (height / new_h)).astype(np.intp)
+    cols = ((np.arange(new_w) + 0.5) * (width / new_w)).astype(np.intp)
+    np.copyto(out, image[rows[:, None], cols], casting="unsafe")
+
+
+def scale_boxes(
+    boxes: np.ndarray, params: LetterboxParams, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Undo letterboxing on boxes of shape (..., 4), clipping them to the frame.
+
+    Args:
+        boxes: [x1, y1, x2, y2] boxes in model input coordinates
+        params: Geometry returned by ``LetterboxProcessor``
+        out: Output array; may be ``boxes`` itself to convert in place
+
+    Returns:
+        Boxes in original frame coordinates
+    """
+    offset = np.array([params.pad_x, params.pad_y] * 2, dtype=boxes.dtype)
+    out = np.subtract(boxes, offset, out=out)
+    out /= params.scale
+    np.clip(out[..., 0::2], 0, params.width, out=out[..., 0::2])
+    np.clip(out[..., 1::2], 0, params.height, out=out[..., 1::2])
+    return out
+
+
+__all__ = ["CV2_AVAILABLE", "LetterboxParams", "LetterboxProcessor", "scale_boxes"]
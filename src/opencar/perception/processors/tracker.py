@@ -0,0 +1,519 @@
+"""Multi-object tracking by detection (SORT / ByteTrack style).
+
+Tracks are kept as arrays rather than objects: one row per track of Kalman
+state, covariance and bookkeeping. Each frame predicts every track at once,
+associates detections to tracks by IoU and runs one batched Kalman update
+for all matched tracks, so the per-frame cost stays in NumPy even with
+thousands of live tracks.
+
+Association follows ByteTrack: confident detections are matched first, then
+the remaining tracks get a second chance against low-confidence detections
+(usually occluded objects) before they are counted as missed. Assignment
+uses ``scipy.optimize.linear_sum_assignment`` when SciPy is installed and a
+greedy best-IoU-first matching otherwise.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+from opencar.perception.utils.nms import calculate_iou
+
+try:
+    from scipy.optimize import linear_sum_assignment
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    SCIPY_AVAILABLE = True
+except ImportError:
+    linear_sum_assignment = None
+    SCIPY_AVAILABLE = False
+
+# One confirmed track in a frame; bbox is the filtered [x1, y1, x2, y2] box
+TRACK_DTYPE = np.dtype([
+    ("track_id", np.int64),
+    ("class_id", np.int32),
+    ("confidence", np.float32),
+    ("bbox", np.float32, (4,)),
+])
+
+_EMPTY_PAIRS = (np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp))
+
+
+def xyxy_to_xyah(boxes: np.ndarray) -> np.ndarray:
+    """Convert [x1, y1, x2, y2] boxes to [center x, center y, aspect, height]."""
+    boxes = np.asarray(boxes, dtype=np.float64)
+    width = boxes[:, 2] - boxes[:, 0]
+    height = np.maximum(boxes[:, 3] - boxes[:, 1], 1e-6)
+    return np.stack([
+        boxes[:, 0] + width / 2,
+        boxes[:, 1] + height / 2,
+        width / height,
+        height,
+    ], axis=1)
+
+
+def xyah_to_xyxy(xyah: np.ndarray) -> np.ndarray:
+    """Convert [center x, center y, aspect, height] boxes to [x1, y1, x2, y2]."""
+    half_w = xyah[:, 2] * xyah[:, 3] / 2
+    half_h = xyah[:, 3] / 2
+    return np.stack([
+        xyah[:, 0] - half_w,
+        xyah[:, 1] - half_h,
+        xyah[:, 0] + half_w,
+        xyah[:, 1] + half_h,
+    ], axis=1)
+
+
+class KalmanBoxFilter:
+    """Constant-velocity Kalman filter over arrays of boxes.
+
+    The state of each box is [cx, cy, a, h, vcx, vcy, va, vh]; means are
+    (N, 8) and covariances (N, 8, 8). Noise scales with box height, as in
+    DeepSORT and ByteTrack.
+    """
+
+    def __init__(self, std_weight_position: float = 1 / 20, std_weight_velocity: float = 1 / 160):
+        """Initialize the filter.
+
+        Args:
+            std_weight_position: Position noise relative to box height
+            std_weight_velocity: Velocity noise relative to box height
+        """
+        self.std_weight_position = std_weight_position
+        self.std_weight_velocity = std_weight_velocity
+        self._motion = np.eye(8)
+        self._motion[:4, 4:] = np.eye(4)
+
+    def initiate(self, measurements: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Create tracks from (N, 4) xyah measurements."""
+        count = len(measurements)
+        mean = np.zeros((count, 8))
+        mean[:, :4] = measurements
+        height = measurements[:, 3]
+        std = np.stack([
+            2 * self.std_weight_position * height,
+            2 * self.std_weight_position * height,
+            np.full(count, 1e-2),
+            2 * self.std_weight_position * height,
+            10 * self.std_weight_velocity * height,
+            10 * self.std_weight_velocity * height,
+            np.full(count, 1e-5),
+            10 * self.std_weight_velocity * height,
+        ], axis=1)
+        return mean, _diag(std ** 2)
+
+    def predict(self, mean: np.ndarray, covariance: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Advance every track by one frame."""
+        height = mean[:, 3]
+        count = len(mean)
+        std = np.stack([
+            self.std_weight_position * height,
+            self.std_weight_position * height,
+            np.full(count, 1e-2),
+            self.std_weight_position * height,
+            self.std_weight_velocity * height,
+            self.std_weight_velocity * height,
+            np.full(count, 1e-5),
+            self.std_weight_velocity * height,
+        ], axis=1)
+        mean = mean @ self._motion.T
+        covariance = self._motion @ covariance @ self._motion.T + _diag(std ** 2)
+        return mean, covariance
+
+    def update(
+        self, mean: np.ndarray, covariance: np.ndarray, measurements: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Correct tracks with their matched (N, 4) xyah measurements."""
+        height = mean[:, 3]
+        std = np.stack([
+            self.std_weight_position * height,
+            self.std_weight_position * height,
+            np.full(len(mean), 1e-1),
+            self.std_weight_position * height,
+        ], axis=1)
+        # The measurement picks the first four state components, so the
+        # projected covariance and cross-covariance are plain slices
+        projected = covariance[:, :4, :4] + _diag(std ** 2)
+        cross = covariance[:, :4, :]
+        gain = np.linalg.solve(projected, cross).transpose(0, 2, 1)
+        innovation = measurements - mean[:, :4]
+        mean = mean + np.einsum("nij,nj->ni", gain, innovation)
+        covariance = covariance - gain @ cross
+        return mean, covariance
+
+
+def _diag(values: np.ndarray) -> np.ndarray:
+    """Stack rows of ``values`` into diagonal matrices."""
+    out = np.zeros(values.shape + values.shape[-1:])
+    idx = np.arange(values.shape[-1])
+    out[:, idx, idx] = values
+    return out
+
+
+def iou_pairs(
+    boxes_a: np.ndarray, boxes_b: np.ndarray, threshold: float, block_size: int = 64
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Find the box pairs whose IoU is at least ``threshold`` (> 0).
+
+    Rather than a full (M, N) IoU matrix, ``boxes_a`` is walked in blocks
+    ordered by x1, and each block is compared only with the boxes of
+    ``boxes_b`` that can overlap it horizontally. With boxes spread across
+    the frame this is far less work than the dense matrix.
+
+    Returns:
+        Tuple of (indices into ``boxes_a``, indices into ``boxes_b``, IoUs)
+    """
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return _EMPTY_PAIRS + (np.empty(0),)
+
+    areas_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    areas_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    order_a = np.argsort(boxes_a[:, 0], kind="stable")
+    order_b = np.argsort(boxes_b[:, 0], kind="stable")
+    sorted_x1_b = boxes_b[order_b, 0]
+    max_width_b = (boxes_b[:, 2] - boxes_b[:, 0]).max()
+
+    rows, cols, ious = [], [], []
+    for begin in range(0, len(order_a), block_size):
+        block = order_a[begin:begin + block_size]
+        # A box of b overlaps the block only if b.x1 < max(a.x2) and
+        # b.x2 > min(a.x1), which implies b.x1 > min(a.x1) - widest b
+        lo = np.searchsorted(sorted_x1_b, boxes_a[block, 0].min() - max_width_b, "right")
+        hi = np.searchsorted(sorted_x1_b, boxes_a[block, 2].max(), "left")
+        if lo >= hi:
+            continue
+        candidates = order_b[lo:hi]
+        iou = calculate_iou(
+            boxes_a[block, None], boxes_b[None, candidates],
+            areas_a[block, None], areas_b[None, candidates],
+        )
+        r, c = np.nonzero(iou >= threshold)
+        rows.append(block[r])
+        cols.append(candidates[c])
+        ious.append(iou[r, c])
+
+    if not rows:
+        return _EMPTY_PAIRS + (np.empty(0),)
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(ious)
+
+
+def assign(
+    rows: np.ndarray, cols: np.ndarray, scores: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Pick a one-to-one matching from candidate pairs, maximizing total score.
+
+    Pairs whose row and column appear in no other pair are taken as they
+    are; only the contested pairs go through ``linear_sum_assignment`` (or
+    the greedy fallback), which keeps the solve small in typical scenes.
+
+    Returns:
+        Tuple of (row indices, column indices) of the matched pairs
+    """
+    if len(rows) == 0:
+        return _EMPTY_PAIRS
+    row_counts = np.bincount(rows)
+    col_counts = np.bincount(cols)
+    unique = (row_counts[rows] == 1) & (col_counts[cols] == 1)
+    matched_rows, matched_cols = [rows[unique]], [cols[unique]]
+
+    contested = ~unique
+    if contested.any():
+        r, c = _solve(rows[contested], cols[contested], scores[contested])
+        matched_rows.append(r)
+        matched_cols.append(c)
+    return np.concatenate(matched_rows), np.concatenate(matched_cols)
+
+
+def _solve(
+    rows: np.ndarray, cols: np.ndarray, scores: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Optimal (SciPy) or greedy matching of contested candidate pairs."""
+    if SCIPY_AVAILABLE:
+        return _solve_optimal(rows, cols, scores)
+
+    order = np.argsort(-scores, kind="stable")
+    used_rows, used_cols = set(), set()
+    matched_rows, matched_cols = [], []
+    for r, c in zip(rows[order].tolist(), cols[order].tolist()):
+        if r not in used_rows and c not in used_cols:
+            used_rows.add(r)
+            used_cols.add(c)
+            matched_rows.append(r)
+            matched_cols.append(c)
+    return np.asarray(matched_rows, dtype=np.intp), np.asarray(matched_cols, dtype=np.intp)
+
+
+def _solve_optimal(
+    rows: np.ndarray, cols: np.ndarray, scores: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Solve each connected cluster of contested pairs on its own.
+
+    Clusters are independent, and many small solves are much cheaper than
+    one cubic-time ``linear_sum_assignment`` over every contested row and
+    column. Clusters with a single row or column, the common case, just take
+    their best pair.
+    """
+    row_ids, sub_rows = np.unique(rows, return_inverse=True)
+    col_ids, sub_cols = np.unique(cols, return_inverse=True)
+    num_rows, num_cols = len(row_ids), len(col_ids)
+    graph = coo_matrix(
+        (np.ones(len(rows)), (sub_rows, num_rows + sub_cols)),
+        shape=(num_rows + num_cols,) * 2,
+    )
+    num_clusters, labels = connected_components(graph, directed=False)
+    row_labels, col_labels = labels[:num_rows], labels[num_rows:]
+    rows_per = np.bincount(row_labels, minlength=num_clusters)
+    cols_per = np.bincount(col_labels, minlength=num_clusters)
+    pair_labels = row_labels[sub_rows]
+
+    # Single row or column: the best-scoring pair is the optimal matching
+    simple = (rows_per == 1) | (cols_per == 1)
+    order = np.lexsort((-scores, pair_labels))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = pair_labels[order[1:]] != pair_labels[order[:-1]]
+    best = order[first & simple[pair_labels[order]]]
+    matched_rows, matched_cols = [row_ids[sub_rows[best]]], [col_ids[sub_cols[best]]]
+
+    complex_clusters = np.flatnonzero(~simple)
+    if len(complex_clusters):
+        row_nodes, row_local = _group_by_label(row_labels, rows_per)
+        col_nodes, col_local = _group_by_label(col_labels, cols_per)
+        row_start = np.cumsum(rows_per) - rows_per
+        col_start = np.cumsum(cols_per) - cols_per
+        pair_order = np.argsort(pair_labels, kind="stable")
+        pair_start = np.searchsorted(pair_labels[pair_order], np.arange(num_clusters))
+        pair_count = np.bincount(pair_labels, minlength=num_clusters)
+        for k in complex_clusters.tolist():
+            pairs = pair_order[pair_start[k]:pair_start[k] + pair_count[k]]
+            sub = np.zeros((rows_per[k], cols_per[k]))
+            sub[row_local[sub_rows[pairs]], col_local[sub_cols[pairs]]] = scores[pairs]
+            r, c = linear_sum_assignment(sub, maximize=True)
+            # Unfilled cells are zero, so a positive score means a real candidate
+            keep = sub[r, c] > 0
+            matched_rows.append(row_ids[row_nodes[row_start[k] + r[keep]]])
+            matched_cols.append(col_ids[col_nodes[col_start[k] + c[keep]]])
+    return np.concatenate(matched_rows), np.concatenate(matched_cols)
+
+
+def _group_by_label(labels: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Order nodes by cluster label and give each its index within its cluster."""
+    nodes = np.argsort(labels, kind="stable")
+    local = np.empty(len(labels), dtype=np.intp)
+    local[nodes] = np.arange(len(labels)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return nodes, local
+
+
+class MultiObjectTracker:
+    """ByteTrack-style tracker over structured detection arrays."""
+
+    def __init__(
+        self,
+        high_threshold: float = 0.5,
+        low_threshold: float = 0.1,
+        new_track_threshold: float = 0.6,
+        match_iou: float = 0.2,
+        low_match_iou: float = 0.5,
+        max_age: int = 30,
+        min_hits: int = 3,
+        class_aware: bool = True,
+    ):
+        """Initialize the tracker.
+
+        Args:
+            high_threshold: Confidence of detections matched in the first pass
+            low_threshold: Lowest confidence considered at all
+            new_track_threshold: Confidence needed to start a track
+            match_iou: Minimum IoU for a first-pass match
+            low_match_iou: Minimum IoU for a low-confidence match
+            max_age: Frames a track survives without a match
+            min_hits: Matches before a track is reported
+            class_aware: Only match detections to tracks of the same class
+        """
+        self.high_threshold = high_threshold
+        self.low_threshold = low_threshold
+        self.new_track_threshold = new_track_threshold
+        self.match_iou = match_iou
+        self.low_match_iou = low_match_iou
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.class_aware = class_aware
+        self.kalman = KalmanBoxFilter()
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop every track and restart track IDs."""
+        self.frame_count = 0
+        self._next_id = 1
+        self._mean = np.zeros((0, 8))
+        self._covariance = np.zeros((0, 8, 8))
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._class_ids = np.zeros(0, dtype=np.int32)
+        self._scores = np.zeros(0, dtype=np.float32)
+        self._hits = np.zeros(0, dtype=np.int32)
+        self._misses = np.zeros(0, dtype=np.int32)
+        self._confirmed = np.zeros(0, dtype=bool)
+
+    @property
+    def num_tracks(self) -> int:
+        """Live tracks, including unconfirmed and currently missed ones."""
+        return len(self._ids)
+
+    def update(self, detections: np.ndarray) -> np.ndarray:
+        """Advance the tracker by one frame of detections.
+
+        Args:
+            detections: Structured array of ``postprocess.DETECTION_DTYPE``
+                for one frame
+
+        Returns:
+            Structured array of ``TRACK_DTYPE`` for the confirmed tracks matched
+            in this frame
+        """
+        self.frame_count += 1
+        detections = detections[detections["confidence"] >= self.low_threshold]
+        self._predict()
+
+        high = np.flatnonzero(detections["confidence"] >= self.high_threshold)
+        low = np.flatnonzero(detections["confidence"] < self.high_threshold)
+        track_boxes = xyah_to_xyxy(self._mean[:, :4])
+        det_boxes = detections["bbox"].astype(np.float64)
+
+        # First pass: every track against confident detections
+        tracks = np.arange(self.num_tracks)
+        rows, cols = self._associate(
+            tracks, high, track_boxes, det_boxes, detections, self.match_iou
+        )
+        matched_tracks, matched_dets = [tracks[rows]], [high[cols]]
+
+        # Second pass: tracks seen last frame against low-confidence detections
+        remaining = np.setdiff1d(tracks, tracks[rows], assume_unique=True)
+        remaining = remaining[self._misses[remaining] == 1]
+        rows, cols = self._associate(
+            remaining, low, track_boxes, det_boxes, detections, self.low_match_iou
+        )
+        matched_tracks.append(remaining[rows])
+        matched_dets.append(low[cols])
+
+        matched_tracks = np.concatenate(matched_tracks)
+        matched_dets = np.concatenate(matched_dets)
+        self._correct(matched_tracks, detections[matched_dets])
+
+        unmatched_high = np.setdiff1d(high, matched_dets, assume_unique=True)
+        self._remove_stale()
+        self._start(detections[unmatched_high])
+
+        return self._report()
+
+    def predict(self) -> np.ndarray:
+        """Advance the tracks through a frame that skipped detection.
+
+        The motion model runs as usual but tracks are not counted as missed,
+        so inference can be skipped on frames where little changes.
+
+        Returns:
+            Structured array of ``TRACK_DTYPE`` with the predicted boxes of the
+            confirmed tracks matched in the last detected frame
+        """
+        self._predict(count_miss=False)
+        return self._report()
+
+    def _predict(self, count_miss: bool = True) -> None:
+        """Run the motion model on every track."""
+        if self.num_tracks:
+            self._mean, self._covariance = self.kalman.predict(self._mean, self._covariance)
+        if count_miss:
+            self._misses += 1
+
+    def _associate(
+        self,
+        tracks: np.ndarray,
+        dets: np.ndarray,
+        track_boxes: np.ndarray,
+        det_boxes: np.ndarray,
+        detections: np.ndarray,
+        threshold: float,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Match a subset of tracks to a subset of detections by IoU.
+
+        Returns:
+            Positions within ``tracks`` and ``dets`` of the matched pairs
+        """
+        if len(tracks) == 0 or len(dets) == 0:
+            return _EMPTY_PAIRS
+        rows, cols, ious = iou_pairs(track_boxes[tracks], det_boxes[dets], threshold)
+        if self.class_aware:
+            same_class = self._class_ids[tracks[rows]] == detections["class_id"][dets[cols]]
+            rows, cols, ious = rows[same_class], cols[same_class], ious[same_class]
+        return assign(rows, cols, ious)
+
+    def _correct(self, tracks: np.ndarray, detections: np.ndarray) -> None:
+        """Apply matched detections to their tracks."""
+        if len(tracks) == 0:
+            return
+        mean, covariance = self.kalman.update(
+            self._mean[tracks], self._covariance[tracks], xyxy_to_xyah(detections["bbox"])
+        )
+        self._mean[tracks] = mean
+        self._covariance[tracks] = covariance
+        self._scores[tracks] = detections["confidence"]
+        self._hits[tracks] += 1
+        self._misses[tracks] = 0
+        self._confirmed[tracks] |= self._hits[tracks] >= self.min_hits
+
+    def _remove_stale(self) -> None:
+        """Drop tracks missed for too long and unconfirmed tracks that missed."""
+        keep = (self._misses <= self.max_age) & (self._confirmed | (self._misses == 0))
+        if keep.all():
+            return
+        self._mean = self._mean[keep]
+        self._covariance = self._covariance[keep]
+        self._ids = self._ids[keep]
+        self._class_ids = self._class_ids[keep]
+        self._scores = self._scores[keep]
+        self._hits = self._hits[keep]
+        self._misses = self._misses[keep]
+        self._confirmed = self._confirmed[keep]
+
+    def _start(self, detections: np.ndarray) -> None:
+        """Start tracks for unmatched confident detections."""
+        detections = detections[detections["confidence"] >= self.new_track_threshold]
+        count = len(detections)
+        if count == 0:
+            return
+        mean, covariance = self.kalman.initiate(xyxy_to_xyah(detections["bbox"]))
+        self._mean = np.concatenate([self._mean, mean])
+        self._covariance = np.concatenate([self._covariance, covariance])
+        self._ids = np.concatenate([
+            self._ids, np.arange(self._next_id, self._next_id + count, dtype=np.int64)
+        ])
+        self._next_id += count
+        self._class_ids = np.concatenate([self._class_ids, detections["class_id"]])
+        self._scores = np.concatenate([self._scores, detections["confidence"]])
+        self._hits = np.concatenate([self._hits, np.ones(count, dtype=np.int32)])
+        self._misses = np.concatenate([self._misses, np.zeros(count, dtype=np.int32)])
+        # Until min_hits frames have been seen, new tracks are reported at once
+        confirmed = np.full(count, self.frame_count <= self.min_hits)
+        self._confirmed = np.concatenate([self._confirmed, confirmed])
+
+    def _report(self) -> np.ndarray:
+        """Confirmed tracks matched in the latest detected frame."""
+        visible = np.flatnonzero(self._confirmed & (self._misses == 0))
+        tracks = np.empty(len(visible), dtype=TRACK_DTYPE)
+        tracks["track_id"] = self._ids[visible]
+        tracks["class_id"] = self._class_ids[visible]
+        tracks["confidence"] = self._scores[visible]
+        tracks["bbox"] = xyah_to_xyxy(self._mean[visible, :4])
+        return tracks
+
+
+__all__ = [
+    "KalmanBoxFilter",
+    "MultiObjectTracker",
+    "SCIPY_AVAILABLE",
+    "TRACK_DTYPE",
+    "assign",
+    "iou_pairs",
+    "xyah_to_xyxy",
+    "xyxy_to_xyah",
+]
@@ -1,7 +1,7 @@
 """Non-maximum suppression utilities."""
 
 import numpy as np
-from typing import List
+from typing import List, Optional
 
 
 def non_max_suppression(
@@ -47,6 +47,141 @@ def non_max_suppression(
     return keep
 
 
+def batched_non_max_suppression(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    class_ids: Optional[np.ndarray] = None,
+    iou_threshold: float = 0.4,
+    score_threshold: float = 0.0,
+    max_det: int = 300,
+    top_k: Optional[int] = 1000,
+    strategy: str = "per_class",
+) -> List[np.ndarray]:
+    """Apply class-aware non-maximum suppression to a batch of images at once.
+
+    Candidates are prefiltered by score and reduced to the ``top_k`` best per
+    image, then suppression runs for the whole batch in one vectorized pass.
+    Boxes of different classes never suppress each other: with
+    ``strategy="per_class"`` candidates are regrouped into padded
+    (image, class) blocks and IoU is only computed inside each block, with
+    ``strategy="offset"`` each class is shifted to its own coordinate region
+    and a single ``(B, K, K)`` IoU matrix is computed per image.
+
+    Args:
+        boxes: Array of bounding boxes [x1, y1, x2, y2] with shape (B, N, 4)
+        scores: Array of confidence scores with shape (B, N)
+        class_ids: Array of class ids with shape (B, N), or None for class-agnostic NMS
+        iou_threshold: IoU threshold for suppression
+        score_threshold: Candidates scoring at or below this are dropped up front
+        max_det: Maximum number of detections kept per image
+        top_k: Number of highest scoring candidates considered per image (None for all)
+        strategy: "per_class" or "offset"
+
+    Returns:
+        List with one array of kept indices into N per image, ordered by score
+    """
+    if strategy not in ("offset", "per_class"):
+        raise ValueError(f"Unknown NMS strategy: {strategy}")
+
+    boxes = np.asarray(boxes)
+    scores = np.asarray(scores)
+    if boxes.ndim == 2:
+        boxes = boxes[None]
+        scores = scores[None]
+        class_ids = None if class_ids is None else np.asarray(class_ids)[None]
+
+    batch_size, num_boxes = scores.shape
+    if num_boxes == 0 or max_det <= 0:
+        return [np.empty(0, dtype=np.int64) for _ in range(batch_size)]
+
+    # Score prefilter and per-image top-k selection
+    valid = scores > score_threshold
+    masked_scores = np.where(valid, scores, -np.inf)
+    k = num_boxes if top_k is None else min(top_k, num_boxes)
+    if k < num_boxes:
+        candidates = np.argpartition(-masked_scores, k - 1, axis=1)[:, :k]
+        candidate_scores = np.take_along_axis(masked_scores, candidates, axis=1)
+        order = np.take_along_axis(
+            candidates, np.argsort(-candidate_scores, axis=1, kind="stable"), axis=1
+        )
+    else:
+        order = np.argsort(-masked_scores, axis=1, kind="stable")
+
+    # Invalid candidates sort last, so trim the batch to the longest valid prefix
+    k = int(np.take_along_axis(valid, order, axis=1).sum(axis=1).max())
+    if k == 0:
+        return [np.empty(0, dtype=np.int64) for _ in range(batch_size)]
+    order = order[:, :k]
+
+    sorted_boxes = np.take_along_axis(boxes, order[..., None], axis=1)
+    valid = np.take_along_axis(valid, order, axis=1)
+
+    if class_ids is None:
+        keep = _cluster_nms(sorted_boxes, valid, iou_threshold)
+    elif strategy == "offset":
+        # Shift every class into a disjoint region so one IoU pass covers all
+        # classes; regions are a full coordinate span apart, so boxes with
+        # negative coordinates stay apart too
+        sorted_classes = np.take_along_axis(np.asarray(class_ids), order, axis=1)
+        min_coord = float(sorted_boxes.min())
+        span = float(sorted_boxes.max()) - min_coord + 1.0
+        offset_boxes = sorted_boxes + (sorted_classes * span - min_coord)[..., None]
+        keep = _cluster_nms(offset_boxes, valid, iou_threshold)
+    else:
+        # Regroup candidates into padded (image, class) blocks so IoU is only
+        # computed between boxes that can actually suppress each other
+        sorted_classes = np.take_along_axis(np.asarray(class_ids), order, axis=1)
+        class_stride = int(sorted_classes.max()) + 1
+        batch_idx, position = np.nonzero(valid)
+        group_key = batch_idx * class_stride + sorted_classes[batch_idx, position]
+        perm = np.argsort(group_key, kind="stable")
+        _, group, counts = np.unique(group_key[perm], return_inverse=True, return_counts=True)
+        rank = np.arange(len(perm)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+        grouped_boxes = np.zeros((len(counts), counts.max(), 4), dtype=sorted_boxes.dtype)
+        grouped_valid = np.zeros((len(counts), counts.max()), dtype=bool)
+        grouped_boxes[group, rank] = sorted_boxes[batch_idx[perm], position[perm]]
+        grouped_valid[group, rank] = True
+
+        grouped_keep = _cluster_nms(grouped_boxes, grouped_valid, iou_threshold)
+        keep = np.zeros_like(valid)
+        keep[batch_idx[perm], position[perm]] = grouped_keep[group, rank]
+
+    return [order[b][keep[b]][:max_det] for b in range(batch_size)]
+
+
+def _cluster_nms(boxes: np.ndarray, valid: np.ndarray, threshold: float) -> np.ndarray:
+    """Greedy NMS over independent, score-sorted groups of boxes.
+
+    Args:
+        boxes: Array of bounding boxes with shape (G, K, 4), sorted by descending score
+        valid: Mask of real (non-padding) boxes with shape (G, K)
+        threshold: IoU threshold for suppression
+
+    Returns:
+        Boolean keep mask with shape (G, K)
+    """
+    areas = (boxes[..., 2] - boxes[..., 0]) * (boxes[..., 3] - boxes[..., 1])
+    ious = calculate_iou(
+        boxes[:, :, None, :], boxes[:, None, :, :], areas[:, :, None], areas[:, None, :]
+    )
+
+    # suppress[g, i, j]: higher scoring box i would suppress box j
+    suppress = np.triu(ious > threshold, k=1).astype(np.float32)
+
+    # Cluster-NMS: iterate "suppressed by any kept box" to its fixed point, which
+    # equals the sequential greedy result but runs as batched matrix products
+    keep = valid
+    for _ in range(boxes.shape[1]):
+        suppressed = np.matmul(keep[:, None, :].astype(np.float32), suppress)[:, 0, :] > 0
+        new_keep = valid & ~suppressed
+        if np.array_equal(new_keep, keep):
+            break
+        keep = new_keep
+
+    return keep
+
+
 def calculate_iou(
     box: np.ndarray,
     boxes: np.ndarray,
@@ -55,6 +190,9 @@ def calculate_iou(
 ) -> np.ndarray:
     """Calculate Intersection over Union (IoU) between boxes.
     
+    Inputs broadcast against each other, so passing ``(M, 1, 4)`` and
+    ``(1, N, 4)`` boxes yields a full ``(M, N)`` IoU matrix.
+    
     Args:
         box: Single bounding box [x1, y1, x2, y2]
         boxes: Array of bounding boxes
@@ -65,10 +203,10 @@ def calculate_iou(
         Array of IoU values
     """
     # Find intersection coordinates
-    xx1 = np.maximum(box[0], boxes[:, 0])
-    yy1 = np.maximum(box[1], boxes[:, 1])
-    xx2 = np.minimum(box[2], boxes[:, 2])
-    yy2 = np.minimum(box[3], boxes[:, 3])
+    xx1 = np.maximum(box[..., 0], boxes[..., 0])
+    yy1 = np.maximum(box[..., 1], boxes[..., 1])
+    xx2 = np.minimum(box[..., 2], boxes[..., 2])
+    yy2 = np.minimum(box[..., 3], boxes[..., 3])
     
     # Calculate intersection area
     w = np.maximum(0.0, xx2 - xx1)
@@ -81,4 +219,4 @@ def calculate_iou(
     # Avoid division by zero
     union = np.maximum(union, 1e-8)
     
-    return intersection / union 
\ No newline at end of file
+    return intersection / union 
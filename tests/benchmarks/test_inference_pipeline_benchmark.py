@@ -0,0 +1,109 @@
+"""Benchmark event-loop responsiveness while the inference engine is busy.
+
+A ticker coroutine sleeps 1 ms in a loop and records how late it wakes up
+while concurrent ``predict`` calls run on large frames, or concurrent
+``ObjectDetector.detect`` calls decode and letterbox 1080p JPEGs. With
+``num_threads=0`` this work runs on the event loop and delays every other
+coroutine; with a thread pool the loop stays responsive. Run with
+``pytest tests/benchmarks/test_inference_pipeline_benchmark.py --benchmark-only``.
+"""
+
+import asyncio
+import io
+import time
+from typing import Awaitable, Callable
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from opencar.ml.inference import InferenceEngine
+from opencar.perception.models.detector import ObjectDetector
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.slow
+
+CONCURRENCY = 8
+ROUNDS = 4
+
+
+async def _ticker_lag(load: Callable[[], Awaitable[None]]) -> float:
+    """Return the p99 ticker lag in milliseconds while ``load`` runs."""
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append((time.perf_counter() - start - 0.001) * 1000)
+
+    async def run_load():
+        try:
+            for _ in range(ROUNDS):
+                await load()
+        finally:
+            done.set()
+
+    await asyncio.gather(ticker(), run_load())
+    return float(np.percentile(lags, 99))
+
+
+async def _measure_lag(num_threads: int) -> float:
+    """Ticker lag under concurrent ``predict`` calls on pre-decoded frames."""
+    engine = InferenceEngine(device="cpu", num_threads=num_threads)
+    await engine.load_model()
+    frame = np.random.default_rng(0).random((3, 1080, 1920), dtype=np.float32) * 255
+
+    async def load():
+        await asyncio.gather(
+            *(engine.predict(frame, input_max=255.0) for _ in range(CONCURRENCY))
+        )
+
+    try:
+        return await _ticker_lag(load)
+    finally:
+        engine.close()
+
+
+async def _measure_detect_lag(num_threads: int) -> float:
+    """Ticker lag under concurrent ``detect`` calls on encoded 1080p JPEGs."""
+    detector = ObjectDetector(device="cpu", num_threads=num_threads)
+    await detector.initialize()
+    rng = np.random.default_rng(0)
+    encoded = io.BytesIO()
+    Image.fromarray(rng.integers(0, 256, (1080, 1920, 3), dtype=np.uint8)).save(
+        encoded, format="JPEG", quality=90
+    )
+    image = encoded.getvalue()
+
+    async def load():
+        await asyncio.gather(*(detector.detect(image) for _ in range(CONCURRENCY)))
+
+    try:
+        return await _ticker_lag(load)
+    finally:
+        await detector.close()
+
+
+@pytest.mark.parametrize("num_threads", [0, 4])
+def test_event_loop_lag(benchmark, num_threads):
+    """Ticker lag with processing inline (0) and on a thread pool (4)."""
+    lag = benchmark.pedantic(
+        lambda: asyncio.run(_measure_lag(num_threads)), rounds=3, iterations=1
+    )
+    benchmark.extra_info["num_threads"] = num_threads
+    benchmark.extra_info["p99_loop_lag_ms"] = lag
+    assert lag >= 0
+
+
+@pytest.mark.parametrize("num_threads", [0, 4])
+def test_detect_event_loop_lag(benchmark, num_threads):
+    """Ticker lag while ``detect`` decodes JPEGs inline (0) and on a thread pool (4)."""
+    lag = benchmark.pedantic(
+        lambda: asyncio.run(_measure_detect_lag(num_threads)), rounds=3, iterations=1
+    )
+    benchmark.extra_info["num_threads"] = num_threads
+    benchmark.extra_info["p99_loop_lag_ms"] = lag
+    assert lag >= 0
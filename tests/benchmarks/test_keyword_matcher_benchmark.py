@@ -0,0 +1,101 @@
+"""Benchmark analysis parsing on long (about 8k-token) analysis texts.
+
+Compares the single-pass ``KeywordMatcher`` behind
+``OpenAIClient._parse_analysis`` with the previous approach of lowercasing
+the text once per field and scanning it once per keyword. Run with
+``pytest tests/benchmarks/test_keyword_matcher_benchmark.py --benchmark-only``.
+"""
+
+import random
+
+import pytest
+
+from opencar.integrations.openai_client import OpenAIClient
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.slow
+
+NUM_TOKENS = 8000
+
+VOCABULARY = (
+    "the a vehicle is moving ahead in heavy traffic near an intersection with "
+    "pedestrians crossing and cyclists on the right lane while weather is cloudy and "
+    "visibility reduced so drivers should reduce speed and maintain distance from the "
+    "truck parked beside construction cones on this residential street"
+).split()
+
+
+def _analysis_text() -> str:
+    rng = random.Random(0)
+    words = [rng.choice(VOCABULARY) for _ in range(NUM_TOKENS)]
+    for i in range(12, NUM_TOKENS, 13):
+        words[i] += "."
+    return " ".join(words)
+
+
+def _legacy_parse(analysis: str) -> dict:
+    """Per-keyword substring scans, as analysis parsing used to work."""
+
+    def first(keywords, default):
+        lowered = analysis.lower()
+        return next((k for k in keywords if k in lowered), default)
+
+    def every(keywords):
+        lowered = analysis.lower()
+        return [k for k in keywords if k in lowered or k.replace("_", " ") in lowered]
+
+    lowered = analysis.lower()
+    score = 0.8
+    for word in ["danger", "hazard", "risk", "caution", "warning", "unsafe"]:
+        if word in lowered:
+            score -= 0.1
+    lowered = analysis.lower()
+    for word in ["safe", "clear", "normal", "good", "optimal"]:
+        if word in lowered:
+            score += 0.05
+    return {
+        "scene_type": first(
+            ["urban", "highway", "rural", "intersection", "parking", "residential"], "general"
+        ),
+        "objects": every(
+            ["vehicle", "pedestrian", "bicycle", "traffic_light", "stop_sign", "building"]
+        ),
+        "hazards": every(
+            ["pedestrian", "vehicle", "weather", "visibility", "construction", "debris"]
+        ),
+        "recommendations": every([
+            "reduce_speed", "maintain_distance", "check_blind_spots",
+            "signal_early", "prepare_to_stop", "increase_following_distance",
+        ]) or ["proceed_normally"],
+        "safety_score": max(0.0, min(1.0, score)),
+        "weather_conditions": first(
+            ["clear", "cloudy", "rainy", "foggy", "snowy", "stormy"], "clear"
+        ),
+        "traffic_situation": first(
+            ["heavy", "moderate", "light", "congested", "flowing", "stopped"], "normal"
+        ),
+    }
+
+
+@pytest.fixture(scope="module")
+def text():
+    return _analysis_text()
+
+
+def test_legacy_substring_scans(benchmark, text):
+    """Baseline: seven lowercased copies and one scan per keyword."""
+    result = benchmark(_legacy_parse, text)
+    benchmark.extra_info["tokens"] = NUM_TOKENS
+    assert result["traffic_situation"] == "heavy"
+
+
+def test_keyword_matcher(benchmark, text):
+    """Single tokenization pass shared by every field."""
+    client = OpenAIClient(api_key="sk-bench")
+    result = benchmark(client._parse_analysis, text)
+    benchmark.extra_info["tokens"] = NUM_TOKENS
+
+    legacy = _legacy_parse(text)
+    for field in ("scene_type", "objects", "hazards", "recommendations", "traffic_situation"):
+        assert result[field] == legacy[field]
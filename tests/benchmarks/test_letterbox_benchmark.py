@@ -0,0 +1,65 @@
+"""Benchmark letterbox preprocessing of 1080p and 4K frames into a 640x640 batch.
+
+Compares ``LetterboxProcessor`` writing into a reused float32 buffer with the
+straightforward resize, pad, swap, transpose and normalize sequence, which
+makes a new array at every step. Run with
+``pytest tests/benchmarks/test_letterbox_benchmark.py --benchmark-only``.
+"""
+
+import numpy as np
+import pytest
+
+from opencar.perception.processors.letterbox import LetterboxProcessor
+
+pytest.importorskip("pytest_benchmark")
+cv2 = pytest.importorskip("cv2")
+
+pytestmark = pytest.mark.slow
+
+BATCH_SIZE = 4
+RESOLUTIONS = {"1080p": (1080, 1920), "4k": (2160, 3840)}
+
+
+def _frames(resolution):
+    height, width = RESOLUTIONS[resolution]
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(BATCH_SIZE)]
+
+
+def _naive_letterbox(frames, size=640):
+    batch = []
+    for frame in frames:
+        height, width = frame.shape[:2]
+        scale = min(size / height, size / width)
+        new_w, new_h = round(width * scale), round(height * scale)
+        resized = cv2.resize(frame, (new_w, new_h))
+        top, left = (size - new_h) // 2, (size - new_w) // 2
+        padded = cv2.copyMakeBorder(
+            resized, top, size - new_h - top, left, size - new_w - left,
+            cv2.BORDER_CONSTANT, value=(114, 114, 114),
+        )
+        rgb = padded[..., ::-1]
+        chw = np.ascontiguousarray(rgb.transpose(2, 0, 1)).astype(np.float32) / 255.0
+        batch.append(chw)
+    return np.stack(batch)
+
+
+@pytest.mark.parametrize("resolution", list(RESOLUTIONS))
+def test_naive_letterbox(benchmark, resolution):
+    """Baseline: one new array per step and per frame."""
+    frames = _frames(resolution)
+    batch = benchmark(_naive_letterbox, frames)
+    benchmark.extra_info["resolution"] = resolution
+    assert batch.shape == (BATCH_SIZE, 3, 640, 640)
+
+
+@pytest.mark.parametrize("resolution", list(RESOLUTIONS))
+def test_letterbox_processor(benchmark, resolution):
+    """Resize into a reused canvas, then one fused pass into the output buffer."""
+    frames = _frames(resolution)
+    processor = LetterboxProcessor(input_size=(640, 640), swap_rb=True)
+    out = np.empty((BATCH_SIZE, 3, 640, 640), dtype=np.float32)
+
+    batch, _ = benchmark(processor, frames, out=out)
+    benchmark.extra_info["resolution"] = resolution
+    np.testing.assert_allclose(batch, _naive_letterbox(frames), atol=1e-6)
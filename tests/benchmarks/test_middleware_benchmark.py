@@ -0,0 +1,90 @@
+"""Benchmarks for the BaseHTTPMiddleware and pure ASGI middleware stacks.
+
+Each round fires a burst of concurrent requests through the full app and
+records requests/sec and p99 latency in the benchmark's extra info. Run with
+``pytest tests/benchmarks/test_middleware_benchmark.py --benchmark-only``.
+"""
+
+import asyncio
+import io
+import time
+
+import httpx
+import numpy as np
+import pytest
+from PIL import Image
+
+from opencar.api.app import create_app
+from opencar.api.routes import get_detector
+from opencar.config.settings import Settings
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.slow
+
+NUM_REQUESTS = 400
+CONCURRENCY = 16
+
+
+class _StubDetector:
+    """Detector that answers immediately so only the HTTP stack is measured."""
+
+    async def detect(self, image_data, confidence_threshold=0.5):
+        return [{
+            "class_name": "car",
+            "confidence": 0.9,
+            "bbox": {"x1": 0.0, "y1": 0.0, "x2": 10.0, "y2": 10.0},
+            "attributes": {},
+        }]
+
+
+def _jpeg() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), color="red").save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+async def _burst(app, method: str, path: str, **kwargs):
+    """Send NUM_REQUESTS requests with CONCURRENCY in flight; return (rps, p99 ms)."""
+    latencies = []
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.request(method, path, **kwargs)
+                latencies.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*[one() for _ in range(NUM_REQUESTS)])
+        elapsed = time.perf_counter() - start
+
+    return NUM_REQUESTS / elapsed, float(np.percentile(latencies, 99))
+
+
+@pytest.mark.parametrize("stack", ["base", "asgi"])
+@pytest.mark.parametrize("endpoint", ["health", "detect"])
+def test_middleware_stack(benchmark, stack, endpoint):
+    """Requests/sec and p99 for /health and /detect per middleware stack."""
+    app = create_app(Settings(middleware_stack=stack, rate_limit_per_minute=10**9))
+    app.dependency_overrides[get_detector] = lambda: _StubDetector()
+
+    if endpoint == "health":
+        request = ("GET", "/health", {})
+    else:
+        files = {"file": ("frame.jpg", _jpeg(), "image/jpeg")}
+        request = ("POST", "/api/v1/perception/detect", {"files": files})
+
+    runs = []
+
+    def run():
+        runs.append(asyncio.run(_burst(app, request[0], request[1], **request[2])))
+
+    benchmark.group = f"middleware-{endpoint}"
+    benchmark.pedantic(run, rounds=5, iterations=1)
+
+    benchmark.extra_info["requests_per_second"] = round(float(np.median([r[0] for r in runs])), 1)
+    benchmark.extra_info["p99_ms"] = round(float(np.median([r[1] for r in runs])), 2)
@@ -0,0 +1,90 @@
+"""Benchmarks for non-maximum suppression.
+
+Run with ``pytest tests/benchmarks --benchmark-only``.
+"""
+
+import numpy as np
+import pytest
+
+from opencar.perception.utils.nms import batched_non_max_suppression, non_max_suppression
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.slow
+
+NUM_CLASSES = 80
+BOX_COUNTS = [1_000, 10_000, 50_000]
+
+# Candidate filtering shared by the baseline and the batched cases
+SCORE_THRESHOLD = 0.25
+TOP_K = 1000
+MAX_DET = 300
+
+
+def _frame(num_boxes: int, seed: int = 0):
+    """Create one frame worth of candidate boxes spread over 80 classes."""
+    rng = np.random.default_rng(seed)
+    xy = rng.uniform(0, 600, (num_boxes, 2))
+    wh = rng.uniform(10, 120, (num_boxes, 2))
+    boxes = np.concatenate([xy, xy + wh], axis=-1).astype(np.float32)
+    scores = rng.uniform(0.0, 1.0, num_boxes).astype(np.float32)
+    class_ids = rng.integers(0, NUM_CLASSES, num_boxes)
+    return boxes, scores, class_ids
+
+
+def _per_class_loop(boxes, scores, class_ids, threshold=0.45):
+    """Baseline: one single-image NMS call per class.
+
+    Applies the same score prefilter, top-k and detection cap as the batched
+    cases, so both sides suppress the same candidates.
+    """
+    candidates = np.flatnonzero(scores > SCORE_THRESHOLD)
+    candidates = candidates[np.argsort(-scores[candidates], kind="stable")[:TOP_K]]
+    keep = []
+    for class_id in range(NUM_CLASSES):
+        members = candidates[class_ids[candidates] == class_id]
+        if len(members):
+            keep.extend(members[non_max_suppression(boxes[members], scores[members], threshold)])
+    keep = np.asarray(keep, dtype=np.int64)
+    return keep[np.argsort(-scores[keep], kind="stable")][:MAX_DET]
+
+
+@pytest.mark.parametrize("num_boxes", BOX_COUNTS)
+def test_per_class_loop(benchmark, num_boxes):
+    """Baseline: Python loop over classes with the single-image function."""
+    boxes, scores, class_ids = _frame(num_boxes)
+    benchmark.group = f"nms-{num_boxes}"
+    keep = benchmark(_per_class_loop, boxes, scores, class_ids)
+    batched = batched_non_max_suppression(
+        boxes[None], scores[None], class_ids[None], iou_threshold=0.45,
+        score_threshold=SCORE_THRESHOLD, top_k=TOP_K, max_det=MAX_DET,
+    )[0]
+    assert keep.tolist() == batched.tolist()
+
+
+@pytest.mark.parametrize("strategy", ["offset", "per_class"])
+@pytest.mark.parametrize("num_boxes", BOX_COUNTS)
+def test_batched(benchmark, num_boxes, strategy):
+    """Batched engine with the same prefilter, top-k and detection cap."""
+    boxes, scores, class_ids = _frame(num_boxes)
+    benchmark.group = f"nms-{num_boxes}"
+    benchmark(
+        batched_non_max_suppression,
+        boxes[None], scores[None], class_ids[None], iou_threshold=0.45,
+        score_threshold=SCORE_THRESHOLD, top_k=TOP_K, max_det=MAX_DET, strategy=strategy,
+    )
+
+
+@pytest.mark.parametrize("num_boxes", BOX_COUNTS)
+def test_batched_batch_of_8(benchmark, num_boxes):
+    """Batched engine over eight frames in one call."""
+    frames = [_frame(num_boxes, seed) for seed in range(8)]
+    boxes = np.stack([f[0] for f in frames])
+    scores = np.stack([f[1] for f in frames])
+    class_ids = np.stack([f[2] for f in frames])
+    benchmark.group = f"nms-{num_boxes}-batch8"
+    benchmark(
+        batched_non_max_suppression,
+        boxes, scores, class_ids, iou_threshold=0.45,
+        score_threshold=SCORE_THRESHOLD, top_k=TOP_K, max_det=MAX_DET,
+    )
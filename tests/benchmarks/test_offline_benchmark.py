@@ -0,0 +1,58 @@
+"""Benchmark offline bulk detection as decode processes are added.
+
+Runs ``detect_files`` over a directory of 1280x720 JPEG frames with 1 up to
+``os.cpu_count()`` decode processes (at most 4). Decoding and letterboxing
+dominate with the mock model, so images per second should scale with the
+number of cores. Run with
+``pytest tests/benchmarks/test_offline_benchmark.py --benchmark-only``.
+"""
+
+import asyncio
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from opencar.ml.inference import InferenceEngine
+from opencar.perception.offline import detect_files, find_images
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.slow
+
+NUM_IMAGES = 96
+WORKER_COUNTS = sorted({1, 2, 4} & set(range(1, min(os.cpu_count() or 1, 4) + 1)))
+
+
+@pytest.fixture(scope="module")
+def image_dir(tmp_path_factory):
+    """Directory of 1280x720 JPEG frames."""
+    path = tmp_path_factory.mktemp("frames")
+    rng = np.random.default_rng(0)
+    for i in range(NUM_IMAGES):
+        pixels = rng.integers(0, 256, (720, 1280, 3), dtype=np.uint8)
+        Image.fromarray(pixels).save(path / f"{i:04d}.jpg", quality=90)
+    return path
+
+
+@pytest.mark.parametrize("decode_workers", WORKER_COUNTS)
+def test_detect_files_throughput(benchmark, image_dir, tmp_path, decode_workers):
+    """Images per second with ``decode_workers`` decode processes."""
+    paths = find_images(str(image_dir))
+    engine = InferenceEngine(device="cpu", batch_size=8)
+
+    def run():
+        return asyncio.run(
+            detect_files(
+                paths, engine, tmp_path / "out.jsonl", batch_size=8, decode_workers=decode_workers
+            )
+        )
+
+    try:
+        stats = benchmark.pedantic(run, rounds=3, warmup_rounds=1)
+    finally:
+        engine.close()
+    benchmark.extra_info["decode_workers"] = decode_workers
+    benchmark.extra_info["images_per_second"] = stats.images_per_second
+    assert stats.processed == NUM_IMAGES
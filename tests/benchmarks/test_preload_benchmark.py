@@ -0,0 +1,116 @@
+"""Compare ``opencar serve`` with and without ``--preload``.
+
+Each mode starts a real server with two workers and measures the time until
+``/health/ready`` answers, the latency of the first detection request, and
+the resident (RSS) and proportional (PSS, shared pages split between the
+processes sharing them) memory of every process. Run with
+``pytest tests/benchmarks/test_preload_benchmark.py -s``; Linux only.
+"""
+
+import io
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+import pytest
+from PIL import Image
+
+pytestmark = [
+    pytest.mark.slow,
+    pytest.mark.skipif(not Path("/proc/self/smaps_rollup").exists(), reason="requires Linux /proc"),
+]
+
+WORKERS = 2
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _descendants(pid: int) -> List[int]:
+    children = Path(f"/proc/{pid}/task/{pid}/children").read_text().split()
+    return [p for child in children for p in [int(child), *_descendants(int(child))]]
+
+
+def _memory_kb(pid: int) -> Dict[str, int]:
+    """RSS and PSS of a process in kB."""
+    fields = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines():
+        name, _, value = line.partition(":")
+        if name in ("Rss", "Pss"):
+            fields[name.lower()] = int(value.split()[0])
+    return fields
+
+
+def _serve(preload: bool) -> Dict[str, float]:
+    """Start a server, measure it and shut it down."""
+    port = _free_port()
+    command = [
+        sys.executable, "-c", "from opencar.cli.main import app; app()",
+        "serve", "--workers", str(WORKERS), "--host", "127.0.0.1", "--port", str(port),
+    ]
+    if preload:
+        command.append("--preload")
+    image = io.BytesIO()
+    Image.new("RGB", (640, 480), "gray").save(image, format="JPEG")
+
+    start_time = time.perf_counter()
+    process = subprocess.Popen(
+        command,
+        env={**os.environ, "DEVICE": "cpu"},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://localhost:{port}"
+    try:
+        while True:
+            try:
+                if httpx.get(f"{base_url}/api/v1/health/ready").status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            assert process.poll() is None, "server exited"
+            assert time.perf_counter() - start_time < 60, "server did not become ready"
+            time.sleep(0.02)
+        ready_s = time.perf_counter() - start_time
+
+        request_start = time.perf_counter()
+        response = httpx.post(
+            f"{base_url}/api/v1/perception/detect",
+            files={"file": ("frame.jpg", image.getvalue(), "image/jpeg")},
+        )
+        first_request_ms = (time.perf_counter() - request_start) * 1000
+        assert response.status_code == 200
+
+        processes = [process.pid, *_descendants(process.pid)]
+        memory = {pid: _memory_kb(pid) for pid in processes}
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    mode = "preload" if preload else "uvicorn"
+    print(f"\n{mode}: ready after {ready_s:.2f}s, first request {first_request_ms:.1f}ms")
+    for pid, fields in memory.items():
+        role = "master" if pid == process.pid else "child"
+        print(f"  {role} {pid}: RSS {fields['rss'] / 1024:.1f} MB, PSS {fields['pss'] / 1024:.1f} MB")
+    total_pss_mb = sum(fields["pss"] for fields in memory.values()) / 1024
+    print(f"  total PSS {total_pss_mb:.1f} MB")
+    return {"ready_s": ready_s, "first_request_ms": first_request_ms, "total_pss_mb": total_pss_mb}
+
+
+def test_preload_shares_memory():
+    """Test forked workers use less memory in total than independently started ones."""
+    uvicorn_stats = _serve(preload=False)
+    preload_stats = _serve(preload=True)
+    assert preload_stats["total_pss_mb"] < uvicorn_stats["total_pss_mb"]
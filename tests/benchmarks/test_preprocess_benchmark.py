@@ -0,0 +1,56 @@
+"""Benchmark batch preprocessing of 640x640 uint8 frames.
+
+Compares normalizing into a pooled float32 buffer with the previous
+``astype`` / ``max()`` / ``/ 255`` / ``np.stack`` path, which allocated four
+arrays per frame. Run with
+``pytest tests/benchmarks/test_preprocess_benchmark.py --benchmark-only``.
+"""
+
+import numpy as np
+import pytest
+
+from opencar.ml.inference import InferenceEngine
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.slow
+
+BATCH_SIZE = 8
+
+
+@pytest.fixture(scope="module")
+def frames():
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, (3, 640, 640), dtype=np.uint8) for _ in range(BATCH_SIZE)]
+
+
+def _legacy_preprocess(frames):
+    def normalize(frame):
+        frame = frame.astype(np.float32)
+        if frame.max() > 1.0:
+            frame = frame / 255.0
+        return frame
+
+    return np.stack([normalize(frame) for frame in frames])
+
+
+def test_legacy_preprocess(benchmark, frames):
+    """Baseline: fresh arrays per frame plus a max() probe."""
+    batch = benchmark(_legacy_preprocess, frames)
+    benchmark.extra_info["batch_size"] = BATCH_SIZE
+    assert batch.dtype == np.float32
+
+
+def test_pooled_preprocess(benchmark, frames):
+    """Scale in place into a reused buffer."""
+    engine = InferenceEngine(device="cpu")
+
+    def run():
+        batch = engine._preprocess(frames)
+        engine.buffers.release(batch)
+        return batch
+
+    batch = benchmark(run)
+    benchmark.extra_info["batch_size"] = BATCH_SIZE
+    np.testing.assert_allclose(batch, _legacy_preprocess(frames), rtol=1e-6)
+    assert engine.buffers.get_stats()["allocations"] == 1
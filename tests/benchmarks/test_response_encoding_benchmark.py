@@ -0,0 +1,68 @@
+"""Benchmark detection response encodings.
+
+Compares FastAPI's default path for a returned dict (``jsonable_encoder``
+then ``JSONResponse``) with each negotiable encoding, for frames with few and
+with hundreds of detections. The encoded size is recorded in
+``extra_info["bytes"]``. Run with
+``pytest tests/benchmarks/test_response_encoding_benchmark.py --benchmark-only``.
+"""
+
+import numpy as np
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from opencar.api.encoding import (
+    COLUMNAR_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    MSGPACK_AVAILABLE,
+    MSGPACK_MEDIA_TYPE,
+    encode_detections,
+)
+from opencar.ml.inference.postprocess import DETECTION_DTYPE, detections_to_dicts
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.slow
+
+DETECTION_COUNTS = [10, 300]
+MEDIA_TYPES = [JSON_MEDIA_TYPE, COLUMNAR_MEDIA_TYPE]
+if MSGPACK_AVAILABLE:
+    MEDIA_TYPES.append(MSGPACK_MEDIA_TYPE)
+
+
+def _body(num_detections: int) -> dict:
+    """A /detect response body with ``num_detections`` detections."""
+    rng = np.random.default_rng(0)
+    detections = np.zeros(num_detections, dtype=DETECTION_DTYPE)
+    detections["class_id"] = rng.integers(0, 80, num_detections)
+    detections["confidence"] = rng.uniform(0.25, 1.0, num_detections)
+    xy = rng.uniform(0, 1200, (num_detections, 2))
+    detections["bbox"] = np.concatenate([xy, xy + rng.uniform(10, 200, (num_detections, 2))], 1)
+    return {
+        "request_id": "9b2f6a9e-3c1d-4d5e-8f7a-0b1c2d3e4f50",
+        "timestamp": "2026-01-01T00:00:00",
+        "detections": detections_to_dicts(detections),
+        "image_info": {"filename": "frame.jpg", "size": 183456, "content_type": "image/jpeg"},
+    }
+
+
+@pytest.mark.parametrize("num_detections", DETECTION_COUNTS)
+def test_fastapi_default(benchmark, num_detections):
+    """Baseline: the dict returned by the route, encoded by FastAPI."""
+    body = _body(num_detections)
+    benchmark.group = f"encode-{num_detections}"
+    encoded = benchmark(lambda: JSONResponse(jsonable_encoder(body)).body)
+    benchmark.extra_info["bytes"] = len(encoded)
+
+
+@pytest.mark.parametrize("media_type", MEDIA_TYPES)
+@pytest.mark.parametrize("num_detections", DETECTION_COUNTS)
+def test_encoding(benchmark, num_detections, media_type):
+    """Each negotiable encoding of the same body."""
+    body = _body(num_detections)
+    benchmark.group = f"encode-{num_detections}"
+    encoded = benchmark(encode_detections, body, media_type)
+    benchmark.extra_info["bytes"] = len(encoded)
+    if media_type != JSON_MEDIA_TYPE:
+        assert len(encoded) < len(encode_detections(body, JSON_MEDIA_TYPE))
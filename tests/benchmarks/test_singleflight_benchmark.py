@@ -0,0 +1,55 @@
+"""Benchmark upstream calls made by OpenAIClient under concurrent identical requests.
+
+A local ``httpx.MockTransport`` stands in for the API with a fixed latency.
+Each round fires N identical ``analyze_image`` calls at once and records the
+number of upstream requests in the benchmark's extra info; with coalescing it
+stays at one regardless of N. Run with
+``pytest tests/benchmarks/test_singleflight_benchmark.py --benchmark-only``.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from opencar.cache.result_cache import ResultCache
+from opencar.integrations.openai_client import OpenAIClient
+from opencar.monitoring.metrics import MetricsRegistry
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.slow
+
+UPSTREAM_LATENCY_S = 0.05
+
+
+async def _round(concurrency: int) -> int:
+    """Fire ``concurrency`` identical analyses; return upstream request count."""
+    calls = 0
+
+    async def handler(request):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(UPSTREAM_LATENCY_S)
+        return httpx.Response(200, json={"choices": [{"message": {"content": "Clear road."}}]})
+
+    # Fresh cache per round so every round exercises coalescing, not cache hits
+    client = OpenAIClient(api_key="sk-bench", cache=ResultCache(registry=MetricsRegistry()))
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    try:
+        await asyncio.gather(*(client.analyze_image(b"frame") for _ in range(concurrency)))
+    finally:
+        await client.close()
+    return calls
+
+
+@pytest.mark.parametrize("concurrency", [1, 16, 128])
+def test_concurrent_identical_analyses(benchmark, concurrency):
+    """Upstream calls and wall time for N concurrent identical requests."""
+    upstream_calls = benchmark.pedantic(
+        lambda: asyncio.run(_round(concurrency)), rounds=5, iterations=1
+    )
+
+    benchmark.extra_info["concurrency"] = concurrency
+    benchmark.extra_info["upstream_calls"] = upstream_calls
+    assert upstream_calls == 1
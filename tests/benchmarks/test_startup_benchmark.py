@@ -0,0 +1,61 @@
+"""Cold-start budget for the ``opencar`` entry points.
+
+Each entry point is imported in a fresh interpreter under ``python -X importtime``
+and its cumulative import time is checked against a budget, so a module-level
+import of torch, OpenCV or the OpenAI stack fails here instead of showing up as
+slow pod restarts. Run with ``pytest tests/benchmarks/test_startup_benchmark.py -s``; it
+needs no pytest-benchmark and is deselected by ``-m "not slow"``.
+"""
+
+import subprocess
+import sys
+import time
+
+import pytest
+
+pytestmark = pytest.mark.slow
+
+# Cumulative import time budgets in seconds. Both are several times the
+# measured cold start; importing torch alone takes longer than either.
+IMPORT_BUDGETS = {
+    "opencar.cli.main": 0.6,
+    "opencar.api.app": 2.0,
+}
+VERSION_BUDGET = 1.0
+ROUNDS = 3
+
+
+def _import_time(module: str) -> float:
+    """Cumulative import time of ``module`` in seconds, from ``-X importtime``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1e6
+    raise AssertionError(f"{module} missing from -X importtime output")
+
+
+@pytest.mark.parametrize("module", list(IMPORT_BUDGETS))
+def test_import_time_budget(module):
+    """Test the best of a few cold imports stays within the budget."""
+    seconds = min(_import_time(module) for _ in range(ROUNDS))
+    print(f"\n{module}: {seconds * 1000:.0f} ms (budget {IMPORT_BUDGETS[module] * 1000:.0f} ms)")
+    assert seconds <= IMPORT_BUDGETS[module]
+
+
+def test_version_command_budget():
+    """Test ``opencar --version`` end to end, interpreter start included."""
+    command = [sys.executable, "-c", "from opencar.cli.main import app; app()", "--version"]
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        subprocess.run(command, capture_output=True, check=True)
+        timings.append(time.perf_counter() - start)
+    seconds = min(timings)
+    print(f"\nopencar --version: {seconds * 1000:.0f} ms (budget {VERSION_BUDGET * 1000:.0f} ms)")
+    assert seconds <= VERSION_BUDGET
@@ -0,0 +1,55 @@
+"""Benchmark per-frame tracker cost against the number of live tracks.
+
+Objects drift across a 4K-sized scene; each benchmarked call is one
+``MultiObjectTracker.update`` with a fresh, jittered detection for every
+object. Run with ``pytest tests/benchmarks/test_tracker_benchmark.py --benchmark-only``.
+"""
+
+import numpy as np
+import pytest
+
+from opencar.ml.inference.postprocess import DETECTION_DTYPE
+from opencar.perception.processors.tracker import SCIPY_AVAILABLE, MultiObjectTracker
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.slow
+
+SCENE_SIZE = (3840, 2160)
+NUM_CLASSES = 3
+
+
+class _Scene:
+    """Objects moving at constant speed, observed with detector jitter."""
+
+    def __init__(self, num_objects, seed=0):
+        self.rng = np.random.default_rng(seed)
+        self.xy = self.rng.uniform(0, 1, (num_objects, 2)) * SCENE_SIZE
+        self.size = self.rng.uniform(20, 80, (num_objects, 2))
+        self.velocity = self.rng.normal(0, 2, (num_objects, 2))
+        self.detections = np.zeros(num_objects, dtype=DETECTION_DTYPE)
+        self.detections["class_id"] = np.arange(num_objects) % NUM_CLASSES
+
+    def step(self):
+        self.xy += self.velocity
+        jitter = self.rng.normal(0, 0.5, self.xy.shape)
+        self.detections["bbox"][:, :2] = self.xy + jitter
+        self.detections["bbox"][:, 2:] = self.xy + jitter + self.size
+        self.detections["confidence"] = self.rng.uniform(0.3, 1.0, len(self.xy))
+        return self.detections
+
+
+@pytest.mark.parametrize("num_tracks", [10, 100, 1000, 5000])
+def test_tracker_update(benchmark, num_tracks):
+    """One tracker update with ``num_tracks`` objects in view."""
+    scene = _Scene(num_tracks)
+    tracker = MultiObjectTracker()
+    for _ in range(5):
+        tracker.update(scene.step())
+
+    tracks = benchmark(lambda: tracker.update(scene.step()))
+    benchmark.extra_info["num_tracks"] = num_tracks
+    benchmark.extra_info["scipy"] = SCIPY_AVAILABLE
+    # Confirmed tracks keep their IDs; low-confidence detections keep them alive
+    assert tracker.num_tracks <= num_tracks * 1.05
+    assert len(tracks) >= num_tracks * 0.9
@@ -0,0 +1,55 @@
+"""Benchmark inference throughput as worker processes are added.
+
+Runs batches of 640x640 frames through ``InferenceWorkerPool`` with 1 up to
+``os.cpu_count()`` workers (at most 4). The mock backend generates and the
+workers decode full-size YOLO outputs, so the work is CPU-bound and should
+scale with the number of cores. Frames travel through shared memory. Run with
+``pytest tests/benchmarks/test_worker_pool_benchmark.py --benchmark-only``.
+"""
+
+import asyncio
+import functools
+import os
+
+import numpy as np
+import pytest
+
+from opencar.ml.inference.backends import MockBackend
+from opencar.ml.inference.workers import InferenceWorkerPool
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.slow
+
+NUM_FRAMES = 64
+WORKER_COUNTS = sorted({1, 2, 4} & set(range(1, min(os.cpu_count() or 1, 4) + 1)))
+
+
+@pytest.mark.parametrize("num_workers", WORKER_COUNTS)
+def test_worker_pool_throughput(benchmark, num_workers):
+    """Frames per second with ``num_workers`` inference processes."""
+    loop = asyncio.new_event_loop()
+    pool = InferenceWorkerPool(
+        num_workers=num_workers,
+        backend_factory=functools.partial(MockBackend, latency=0),
+        max_batch_size=4,
+    )
+    loop.run_until_complete(pool.start())
+    frame = np.random.default_rng(0).integers(0, 256, (3, 640, 640), dtype=np.uint8)
+
+    async def run():
+        return await asyncio.gather(*(pool.submit(frame) for _ in range(NUM_FRAMES)))
+
+    try:
+        results = benchmark.pedantic(
+            lambda: loop.run_until_complete(run()), rounds=5, warmup_rounds=1
+        )
+    finally:
+        loop.run_until_complete(pool.close())
+        loop.close()
+
+    benchmark.extra_info["num_workers"] = num_workers
+    benchmark.extra_info["cpu_count"] = os.cpu_count()
+    if benchmark.enabled:
+        benchmark.extra_info["frames_per_second"] = NUM_FRAMES / benchmark.stats["mean"]
+    assert len(results) == NUM_FRAMES
@@ -9,6 +9,7 @@ from PIL import Image
 import numpy as np
 
 from opencar.api.app import create_app
+from opencar.config.settings import Settings
 
 
 @pytest.fixture
@@ -29,6 +30,14 @@ def sample_image_bytes():
     return img_bytes.getvalue()
 
 
+async def _wait_for_warmup():
+    """Wait for the startup warmup task, if any."""
+    from opencar.api import routes
+
+    if routes._warmup_task is not None:
+        await routes._warmup_task
+
+
 class TestHealthEndpoints:
     """Test health check endpoints."""
 
@@ -71,6 +80,42 @@ class TestHealthEndpoints:
         assert data["status"] == "ready"
         assert "checks" in data
 
+    def test_readiness_waits_for_warmup(self):
+        """Test the readiness probe fails until the startup warmup has finished."""
+        from opencar.api import routes
+
+        warmed_up = asyncio.Event()
+
+        async def slow_warmup(iterations):
+            await warmed_up.wait()
+            await original_warmup(iterations)
+
+        original_warmup = routes.warmup_models
+        with patch("opencar.api.routes.warmup_models", slow_warmup), \
+             patch("opencar.api.routes._model_registry", None):
+            with TestClient(create_app()) as client:
+                response = client.get("/api/v1/health/ready")
+                assert response.status_code == 503
+                assert "warming up" in response.json()["detail"]
+
+                client.portal.call(warmed_up.set)
+                client.portal.call(_wait_for_warmup)
+
+                response = client.get("/api/v1/health/ready")
+                assert response.status_code == 200
+                assert response.json()["checks"]["detector"] is True
+
+    def test_startup_warmup_loads_detector(self):
+        """Test the default detector is loaded and warmed up on startup."""
+        from opencar.api import routes
+
+        with patch("opencar.api.routes._model_registry", None), \
+             TestClient(create_app()) as client:
+            client.portal.call(_wait_for_warmup)
+            detector = routes.get_model_registry().peek()
+            assert detector is not None
+            assert detector.engine.total_inferences > 0
+
     def test_metrics_endpoint(self, client):
         """Test metrics endpoint."""
         response = client.get("/api/v1/health/metrics")
@@ -79,6 +124,32 @@ class TestHealthEndpoints:
         assert "metrics" in data
         assert "timestamp" in data
 
+    def test_metrics_count_requests(self, client):
+        """Test JSON metrics reflect served requests."""
+        before = client.get("/api/v1/health/metrics").json()["metrics"]["total_requests"]
+        client.get("/health")
+        client.get("/health")
+
+        metrics = client.get("/api/v1/health/metrics").json()["metrics"]
+
+        assert metrics["total_requests"] >= before + 3
+        assert metrics["requests"]["latency_by_route_ms"]["GET /health"]["count"] >= 2
+
+    def test_prometheus_metrics(self, client):
+        """Test Prometheus exposition labels requests by route template."""
+        client.get("/health")
+        client.get("/nonexistent")
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        text = response.text
+        assert 'opencar_http_requests_total{method="GET",route="/health",status="200"}' in text
+        assert 'route="unmatched",status="404"' in text
+        assert "opencar_http_request_duration_seconds_bucket" in text
+        assert 'opencar_http_request_duration_seconds_quantiles{method="GET",quantile="0.99"' in text
+
 
 class TestPerceptionEndpoints:
     """Test perception API endpoints."""
@@ -112,6 +183,158 @@ class TestPerceptionEndpoints:
         car_detections = [d for d in data["detections"] if d["class_name"] == "car"]
         assert len(car_detections) >= 1
 
+    def test_detection_cache(self):
+        """Test a resent frame is answered from the result cache."""
+        from opencar.api.routes import get_detector
+
+        class CountingDetector:
+            calls = 0
+            model_version = "v1"
+
+            async def detect(self, image, confidence_threshold=None):
+                CountingDetector.calls += 1
+                return [{"class_name": "car", "confidence": 0.9}]
+
+        app = create_app()
+        app.dependency_overrides[get_detector] = CountingDetector
+        client = TestClient(app)
+        frame = io.BytesIO()
+        Image.new('RGB', (64, 48), color=(1, 2, 3)).save(frame, format='PNG')
+        files = {"file": ("frame.png", frame.getvalue(), "image/png")}
+
+        first = client.post("/api/v1/perception/detect", files=files)
+        second = client.post("/api/v1/perception/detect", files=files)
+        client.post("/api/v1/perception/detect?confidence_threshold=0.7", files=files)
+
+        assert first.json()["detections"] == second.json()["detections"]
+        assert CountingDetector.calls == 2
+        cache_stats = client.get("/api/v1/health/metrics").json()["metrics"]["result_cache"]
+        assert cache_stats["hits"] >= 1
+
+    def test_detection_cache_shared_by_model_aliases(self):
+        """Test every spelling of the default model shares cache entries."""
+        from opencar.api.routes import get_detector
+
+        class CountingDetector:
+            calls = 0
+            model_version = "v1"
+
+            async def detect(self, image, confidence_threshold=None):
+                CountingDetector.calls += 1
+                return []
+
+        app = create_app()
+        app.dependency_overrides[get_detector] = CountingDetector
+        client = TestClient(app)
+        frame = io.BytesIO()
+        Image.new('RGB', (64, 48), color=(7, 8, 9)).save(frame, format='PNG')
+        files = {"file": ("frame.png", frame.getvalue(), "image/png")}
+
+        for query in ("", "?model=detector", "?model=detector:latest"):
+            response = client.post(f"/api/v1/perception/detect{query}", files=files)
+            assert response.status_code == 200
+        assert CountingDetector.calls == 1
+
+        CountingDetector.model_version = "v2"
+        client.post("/api/v1/perception/detect", files=files)
+        assert CountingDetector.calls == 2
+
+    def test_unversioned_detector_is_not_cached(self):
+        """Test a detector without a model_version is served, uncached."""
+        from opencar.api.routes import get_detector
+
+        class UnversionedDetector:
+            calls = 0
+
+            async def detect(self, image, confidence_threshold=None):
+                UnversionedDetector.calls += 1
+                return []
+
+        app = create_app()
+        app.dependency_overrides[get_detector] = UnversionedDetector
+        client = TestClient(app)
+        frame = io.BytesIO()
+        Image.new('RGB', (64, 48), color=(1, 2, 3)).save(frame, format='PNG')
+        files = {"file": ("frame.png", frame.getvalue(), "image/png")}
+
+        for _ in range(2):
+            response = client.post("/api/v1/perception/detect", files=files)
+            assert response.status_code == 200
+        assert UnversionedDetector.calls == 2
+
+    def test_detection_response_formats(self):
+        """Test /detect encodes its response as negotiated with the Accept header."""
+        from opencar.api.encoding import COLUMNAR_MEDIA_TYPE, MSGPACK_AVAILABLE, MSGPACK_MEDIA_TYPE
+        from opencar.api.routes import get_detector
+
+        class FixedDetector:
+            model_version = "v1"
+
+            async def detect(self, image, confidence_threshold=None):
+                return [{
+                    "class_name": "car",
+                    "confidence": 0.5,
+                    "bbox": {"x1": 1.0, "y1": 2.0, "x2": 3.0, "y2": 4.0},
+                    "attributes": {},
+                }]
+
+        app = create_app()
+        app.dependency_overrides[get_detector] = FixedDetector
+        client = TestClient(app)
+        frame = io.BytesIO()
+        Image.new('RGB', (32, 24), color=(4, 5, 6)).save(frame, format='PNG')
+        files = {"file": ("frame.png", frame.getvalue(), "image/png")}
+
+        default = client.post("/api/v1/perception/detect", files=files)
+        assert default.headers["content-type"] == "application/json"
+        assert "Accept" in default.headers["vary"]
+        assert default.json()["detections"][0]["bbox"]["x2"] == 3.0
+
+        columnar = client.post(
+            "/api/v1/perception/detect", files=files, headers={"Accept": COLUMNAR_MEDIA_TYPE}
+        )
+        assert columnar.headers["content-type"] == COLUMNAR_MEDIA_TYPE
+        assert columnar.json()["detections"]["bbox"] == [[1.0, 2.0, 3.0, 4.0]]
+
+        if MSGPACK_AVAILABLE:
+            import msgpack
+
+            packed = client.post(
+                "/api/v1/perception/detect", files=files, headers={"Accept": MSGPACK_MEDIA_TYPE}
+            )
+            assert packed.headers["content-type"] == MSGPACK_MEDIA_TYPE
+            assert msgpack.unpackb(packed.content)["detections"]["count"] == 1
+
+        html = client.post("/api/v1/perception/detect", files=files, headers={"Accept": "text/html"})
+        assert html.status_code == 406
+        assert COLUMNAR_MEDIA_TYPE in html.json()["detail"]
+
+    def test_detection_encoding_error_not_reported_as_detection_failure(self, monkeypatch):
+        """Test a failure to encode the response is not reported as "Detection failed"."""
+        from opencar.api import routes
+        from opencar.api.routes import get_detector
+
+        class FixedDetector:
+            model_version = "v1"
+
+            async def detect(self, image, confidence_threshold=None):
+                return []
+
+        def broken_response(body, media_type):
+            raise RuntimeError("encoder unavailable")
+
+        monkeypatch.setattr(routes, "detection_response", broken_response)
+        app = create_app()
+        app.dependency_overrides[get_detector] = FixedDetector
+        client = TestClient(app, raise_server_exceptions=False)
+        frame = io.BytesIO()
+        Image.new('RGB', (8, 8)).save(frame, format='PNG')
+        files = {"file": ("frame.png", frame.getvalue(), "image/png")}
+
+        response = client.post("/api/v1/perception/detect", files=files)
+        assert response.status_code == 500
+        assert "Detection failed" not in response.text
+
     def test_detection_invalid_file(self, client):
         """Test detection with invalid file."""
         files = {"file": ("test.txt", b"not an image", "text/plain")}
@@ -146,12 +369,74 @@ class TestPerceptionEndpoints:
         assert "request_id" in data
         assert "analysis_type" in data
 
+    def test_lifespan_closes_openai_client(self):
+        """Test the shared OpenAI client is closed on application shutdown."""
+        from opencar.api import routes
+
+        with TestClient(create_app()) as client:
+            client.get("/health")
+            openai_client = asyncio.run(routes.get_openai_client())
+
+        assert openai_client._client.is_closed
+        assert routes._openai_client is None
+
     def test_analysis_invalid_file(self, client):
         """Test analysis with invalid file."""
         files = {"file": ("test.txt", b"not an image", "text/plain")}
         response = client.post("/api/v1/perception/analyze", files=files)
         assert response.status_code == 400
 
+    def test_batch_detection(self, client, sample_image_bytes):
+        """Test one multipart request detects objects in every image."""
+        files = [("files", (f"{i}.jpg", sample_image_bytes, "image/jpeg")) for i in range(3)]
+        files.append(("files", ("notes.txt", b"hello", "text/plain")))
+        response = client.post(
+            "/api/v1/perception/detect/batch?max_detections=5&classes=car&classes=person",
+            files=files,
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "success"
+        assert data["total_processed"] == 4
+        assert [r["status"] for r in data["results"]] == ["success"] * 3 + ["failed"]
+        assert [r["image_info"]["filename"] for r in data["results"]][0] == "0.jpg"
+        for result in data["results"]:
+            assert len(result["detections"]) <= 5
+            assert {d["class_name"] for d in result["detections"]} <= {"car", "person"}
+
+    def test_batch_detection_rejects_bad_requests(self, client, sample_image_bytes):
+        """Test unknown classes, missing files and non-multipart bodies."""
+        files = [("files", ("a.jpg", sample_image_bytes, "image/jpeg"))]
+        url = "/api/v1/perception/detect/batch"
+        assert client.post(f"{url}?classes=dragon", files=files).status_code == 400
+        assert client.post(f"{url}?max_detections=0", files=files).status_code == 422
+        assert client.post(url, data={"field": "value"}).status_code == 400
+        assert client.post(url, json={}).status_code == 400
+
+    def test_stream_detections(self, client, sample_image_bytes):
+        """Test frames sent over the WebSocket are answered in order."""
+        with client.websocket_connect("/api/v1/perception/stream?drop_policy=block") as ws:
+            ws.send_text('{"confidence_threshold": 0.9}')
+            for _ in range(3):
+                ws.send_bytes(sample_image_bytes)
+            messages = [ws.receive_json() for _ in range(3)]
+
+        assert [m["frame_id"] for m in messages] == [0, 1, 2]
+        for message in messages:
+            assert message["dropped"] == 0
+            assert message["latency_ms"] > 0
+            assert all(d["confidence"] >= 0.9 for d in message["detections"])
+
+    def test_stream_rejects_invalid_options(self, client):
+        """Test unknown models and drop policies close the socket."""
+        from starlette.websockets import WebSocketDisconnect
+
+        for query in ("model=missing", "drop_policy=sometimes"):
+            with pytest.raises(WebSocketDisconnect) as exc_info:
+                with client.websocket_connect(f"/api/v1/perception/stream?{query}") as ws:
+                    ws.receive_json()
+            assert exc_info.value.code == 1008
+
 
 class TestAdminEndpoints:
     """Test admin API endpoints."""
@@ -175,6 +460,22 @@ class TestAdminEndpoints:
         assert data["status"] == "success"
         assert "message" in data
 
+    def test_list_models(self, client):
+        """Test registered models are listed with their load state."""
+        client.get("/api/v1/health/ready")
+        response = client.get("/api/v1/admin/models")
+        assert response.status_code == 200
+        models = {m["name"]: m for m in response.json()["models"]}
+        assert models["detector"]["status"] == "loaded"
+        assert models["detector"]["default"] is True
+
+    def test_unknown_model(self, client, sample_image_bytes):
+        """Test selecting an unregistered model is a 404."""
+        files = {"file": ("test.jpg", sample_image_bytes, "image/jpeg")}
+        response = client.post("/api/v1/perception/detect?model=missing", files=files)
+        assert response.status_code == 404
+        assert client.post("/api/v1/admin/models/reload?model=missing").status_code == 404
+
 
 class TestMiddleware:
     """Test middleware functionality."""
@@ -293,4 +594,79 @@ class TestAsyncEndpoints:
         response2 = client.post("/api/v1/perception/detect", files=files)
         
         assert response1.status_code == 200
-        assert response2.status_code == 200 
\ No newline at end of file
+        assert response2.status_code == 200 
+
+class TestMiddlewareStacks:
+    """Test the BaseHTTPMiddleware and pure ASGI middleware stacks behave alike."""
+
+    @pytest.fixture(params=["asgi", "base"])
+    def stack_client(self, request):
+        """Create a test client for each middleware stack."""
+        settings = Settings(middleware_stack=request.param, rate_limit_per_minute=3)
+        return TestClient(create_app(settings))
+
+    def test_headers(self, stack_client):
+        """Test request ID, timing and security headers on every stack."""
+        response = stack_client.get("/health")
+        assert response.status_code == 200
+        assert "X-Request-ID" in response.headers
+        assert "X-Process-Time" in response.headers
+        assert response.headers["X-Frame-Options"] == "DENY"
+        assert response.headers["Content-Security-Policy"] == "default-src 'self'"
+
+    def test_request_ids_unique(self, stack_client):
+        """Test each request gets its own request ID."""
+        ids = {stack_client.get("/health").headers["X-Request-ID"] for _ in range(3)}
+        assert len(ids) == 3
+
+    @pytest.mark.parametrize("stack", ["asgi", "base"])
+    def test_rate_limit(self, stack):
+        """Test the rate limiter answers 429 with Retry-After."""
+        settings = Settings(middleware_stack=stack, rate_limit_per_minute=2)
+        client = TestClient(create_app(settings))
+
+        statuses = [client.get("/health").status_code for _ in range(3)]
+
+        assert statuses == [200, 200, 429]
+        response = client.get("/health")
+        assert int(response.headers["Retry-After"]) >= 1
+        assert "Rate limit exceeded" in response.json()["detail"]
+
+    def test_asgi_error_mapping(self):
+        """Test unexpected errors become a generic 500 on the ASGI stack."""
+        app = create_app(Settings(middleware_stack="asgi"))
+
+        @app.get("/boom")
+        async def boom():
+            raise RuntimeError("secret details")
+
+        client = TestClient(app, raise_server_exceptions=False)
+        response = client.get("/boom")
+
+        assert response.status_code == 500
+        assert response.json() == {"detail": "Internal server error occurred"}
+        assert "X-Request-ID" in response.headers
+
+    def test_asgi_streaming_passthrough(self):
+        """Test streaming bodies pass through the ASGI stack unbuffered."""
+        from fastapi.responses import StreamingResponse
+
+        app = create_app(Settings(middleware_stack="asgi"))
+
+        @app.get("/stream")
+        async def stream():
+            async def chunks():
+                for i in range(3):
+                    yield f"chunk-{i}\n".encode()
+            return StreamingResponse(chunks(), media_type="text/plain")
+
+        response = TestClient(app).get("/stream")
+
+        assert response.status_code == 200
+        assert response.text == "chunk-0\nchunk-1\nchunk-2\n"
+        assert "X-Request-ID" in response.headers
+
+    def test_invalid_stack(self):
+        """Test unknown middleware stack names are rejected."""
+        with pytest.raises(ValueError):
+            Settings(middleware_stack="fast")
@@ -217,6 +217,173 @@ class TestServeCommand:
         assert "Server stopped by user" in result.stdout
 
 
+    @patch('opencar.api.server.serve_preloaded')
+    @patch('opencar.cli.main.uvicorn')
+    def test_serve_preload(self, mock_uvicorn, mock_serve_preloaded, runner):
+        """Test --preload serves from forked workers instead of uvicorn.run."""
+        result = runner.invoke(app, ["serve", "--preload", "--workers", "3", "--port", "9000"])
+        assert result.exit_code == 0
+
+        mock_uvicorn.run.assert_not_called()
+        call_args = mock_serve_preloaded.call_args
+        assert call_args[1]["workers"] == 3
+        assert call_args[1]["port"] == 9000
+
+    @patch('opencar.api.server.serve_preloaded')
+    @patch('opencar.cli.main.uvicorn')
+    def test_serve_preload_unsupported(self, mock_uvicorn, mock_serve_preloaded, runner):
+        """Test --preload reports settings it cannot fork with."""
+        mock_serve_preloaded.side_effect = ValueError("Preloading is not supported on CUDA")
+        result = runner.invoke(app, ["serve", "--preload"])
+        assert result.exit_code == 1
+        assert "not supported on CUDA" in result.stdout
+
+    @patch('opencar.cli.main.uvicorn')
+    def test_serve_preload_with_reload(self, mock_uvicorn, runner):
+        """Test --preload cannot be combined with --reload."""
+        result = runner.invoke(app, ["serve", "--preload", "--reload"])
+        assert result.exit_code == 1
+        assert "--reload" in result.stdout
+
+
+class TestBenchCommand:
+    """Test the bench command group."""
+
+    RESULT_FIELDS = {"iterations", "throughput", "p50_ms", "p95_ms", "p99_ms", "peak_rss_mb"}
+
+    def _report(self, path):
+        import json
+
+        report = json.loads(path.read_text())
+        for result in report["results"]:
+            assert self.RESULT_FIELDS <= set(result)
+            assert result["throughput"] > 0
+            assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+        return report
+
+    def test_bench_help(self, runner):
+        """Test the bench group lists its subcommands."""
+        result = runner.invoke(app, ["bench", "--help"])
+        assert result.exit_code == 0
+        for command in ("engine", "nms", "api"):
+            assert command in result.stdout
+
+    def test_bench_engine(self, runner, temp_dir):
+        """Test the engine benchmark covers both modes for every batch size."""
+        output = temp_dir / "engine.json"
+        result = runner.invoke(
+            app,
+            ["bench", "engine", "-b", "1", "-b", "2", "-n", "2", "--warmup", "0",
+             "--batches", "2", "-o", str(output)],
+        )
+        assert result.exit_code == 0
+        assert "opencar bench engine" in result.stdout
+
+        report = self._report(output)
+        assert report["benchmark"] == "engine"
+        assert report["throughput_unit"] == "images/s"
+        assert [(r["mode"], r["batch_size"]) for r in report["results"]] == [
+            ("predict", 1), ("batch_predict", 1), ("predict", 2), ("batch_predict", 2),
+        ]
+
+    def test_bench_nms(self, runner, temp_dir):
+        """Test the NMS benchmark runs every box count and IoU threshold."""
+        output = temp_dir / "nms.json"
+        result = runner.invoke(
+            app,
+            ["bench", "nms", "--boxes", "100", "--boxes", "500", "--iou", "0.5",
+             "-n", "3", "-o", str(output)],
+        )
+        assert result.exit_code == 0
+
+        report = self._report(output)
+        assert [(r["boxes"], r["iou_threshold"]) for r in report["results"]] == [
+            (100, 0.5), (500, 0.5),
+        ]
+        assert report["parameters"]["strategy"] == "per_class"
+
+    def test_bench_nms_unknown_strategy(self, runner):
+        """Test an unknown NMS strategy is rejected."""
+        result = runner.invoke(app, ["bench", "nms", "--strategy", "fastest"])
+        assert result.exit_code == 1
+        assert "Unknown NMS strategy" in result.stdout
+
+    def test_bench_api(self, runner, temp_dir):
+        """Test the API benchmark serves every request at each concurrency."""
+        output = temp_dir / "api.json"
+        result = runner.invoke(
+            app,
+            ["bench", "api", "-n", "4", "-c", "1", "-c", "2", "--warmup", "1",
+             "--width", "64", "--height", "48", "-o", str(output)],
+        )
+        assert result.exit_code == 0
+
+        report = self._report(output)
+        assert report["throughput_unit"] == "requests/s"
+        assert [r["concurrency"] for r in report["results"]] == [1, 2]
+        assert all(r["errors"] == 0 and r["iterations"] == 4 for r in report["results"])
+
+
+class TestDetectCommand:
+    """Test offline detection over image files."""
+
+    @pytest.fixture
+    def image_dir(self, temp_dir):
+        import numpy as np
+        from PIL import Image
+
+        images = temp_dir / "images"
+        images.mkdir()
+        rng = np.random.default_rng(0)
+        for i in range(5):
+            pixels = rng.integers(0, 256, (48, 64, 3), dtype=np.uint8)
+            Image.fromarray(pixels).save(images / f"{i}.jpg")
+        return images
+
+    def _invoke(self, runner, *args):
+        return runner.invoke(
+            app, ["detect", *args, "-b", "2", "-j", "1", "--device", "cpu"]
+        )
+
+    def test_detect_directory(self, runner, image_dir, temp_dir):
+        """Test detect writes a result per image and a checkpoint."""
+        output = temp_dir / "out.jsonl"
+        result = self._invoke(runner, str(image_dir), "-o", str(output))
+        assert result.exit_code == 0
+        assert "Processed 5 images" in result.stdout
+
+        assert len(output.read_text().splitlines()) == 5
+        assert (temp_dir / "out.jsonl.checkpoint.json").exists()
+
+    def test_detect_rerun_resumes(self, runner, image_dir, temp_dir):
+        """Test running again after completion processes nothing new."""
+        output = temp_dir / "out.jsonl"
+        self._invoke(runner, str(image_dir), "-o", str(output))
+        result = self._invoke(runner, str(image_dir), "-o", str(output))
+        assert result.exit_code == 0
+        assert "Resuming after 5 of 5 images" in result.stdout
+        assert "Processed 0 images" in result.stdout
+        assert len(output.read_text().splitlines()) == 5
+
+    def test_detect_existing_output(self, runner, image_dir, temp_dir):
+        """Test output without a checkpoint is only replaced with --overwrite."""
+        output = temp_dir / "out.jsonl"
+        output.write_text("previous results\n")
+        result = self._invoke(runner, str(image_dir), "-o", str(output))
+        assert result.exit_code == 1
+        assert "--overwrite" in result.stdout
+
+        result = self._invoke(runner, str(image_dir), "-o", str(output), "--overwrite")
+        assert result.exit_code == 0
+        assert "previous results" not in output.read_text()
+
+    def test_detect_no_images(self, runner, temp_dir):
+        """Test a source without images is an error."""
+        result = self._invoke(runner, str(temp_dir / "*.png"), "-o", str(temp_dir / "out.jsonl"))
+        assert result.exit_code == 1
+        assert "No images found" in result.stdout
+
+
 class TestHealthCheckFunctions:
     """Test health check helper functions."""
 
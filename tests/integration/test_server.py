@@ -0,0 +1,152 @@
+"""Integration tests for preload-and-fork serving."""
+
+import io
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+from PIL import Image
+
+from opencar.api.server import check_preload_supported
+from opencar.config.settings import Settings
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork()")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _children(pid: int) -> list:
+    """PIDs of a process's children (Linux only)."""
+    path = Path(f"/proc/{pid}/task/{pid}/children")
+    if not path.exists():
+        pytest.skip("requires /proc")
+    return [int(child) for child in path.read_text().split()]
+
+
+def _encode(image) -> bytes:
+    buffer = io.BytesIO()
+    Image.fromarray(image).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def preloaded_server():
+    """Run ``opencar serve --preload`` with two workers until the test ends."""
+    port = _free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable, "-c", "from opencar.cli.main import app; app()",
+            "serve", "--preload", "--workers", "2", "--host", "127.0.0.1", "--port", str(port),
+        ],
+        env={**os.environ, "DEVICE": "cpu"},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://localhost:{port}"
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            if httpx.get(f"{base_url}/api/v1/health/ready").status_code == 200:
+                break
+        except httpx.TransportError:
+            pass
+        if process.poll() is not None or time.monotonic() > deadline:
+            process.kill()
+            pytest.fail("Preloaded server did not become ready")
+        time.sleep(0.1)
+
+    yield process, base_url
+
+    if process.poll() is None:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+class TestPreloadSupport:
+    """Test which settings can be preloaded."""
+
+    def test_cpu_supported(self):
+        """Test in-process CPU models can be preloaded."""
+        check_preload_supported(Settings(device="cpu"))
+
+    @pytest.mark.parametrize(
+        "overrides", [{"device": "cuda:0"}, {"device": "cpu", "inference_workers": 2}]
+    )
+    def test_unsupported(self, overrides):
+        """Test CUDA and inference worker processes are rejected."""
+        with pytest.raises(ValueError, match="not supported"):
+            check_preload_supported(Settings(**overrides))
+
+
+class TestPreforkServer:
+    """Test serving from forked workers."""
+
+    def test_workers_serve_preloaded_model(self, preloaded_server, sample_image_data):
+        """Test every worker starts with the model loaded and serves detections."""
+        process, base_url = preloaded_server
+        assert len(_children(process.pid)) == 2
+
+        with httpx.Client(base_url=base_url) as client:
+            for _ in range(4):
+                # Fresh connections spread over both workers
+                models = httpx.get(f"{base_url}/api/v1/admin/models").json()["models"]
+                assert models[0]["status"] == "loaded"
+
+            response = client.post(
+                "/api/v1/perception/detect",
+                files={"file": ("frame.jpg", _encode(sample_image_data), "image/jpeg")},
+            )
+            assert response.status_code == 200
+
+    def test_replaces_dead_worker(self, preloaded_server):
+        """Test a worker that dies is replaced by a new fork."""
+        process, base_url = preloaded_server
+        time.sleep(1.0)  # past the startup crash window
+        victim = _children(process.pid)[0]
+        os.kill(victim, signal.SIGKILL)
+
+        deadline = time.monotonic() + 10
+        while True:
+            children = _children(process.pid)
+            if len(children) == 2 and victim not in children:
+                break
+            assert time.monotonic() < deadline, "worker was not replaced"
+            time.sleep(0.1)
+        assert httpx.get(f"{base_url}/api/v1/health/ready").status_code == 200
+
+    def test_workers_exit_with_master(self, preloaded_server):
+        """Test workers shut down when the master is killed."""
+        process, _ = preloaded_server
+        workers = _children(process.pid)
+
+        process.kill()
+        process.wait()
+        deadline = time.monotonic() + 10
+        while any(Path(f"/proc/{pid}").exists() for pid in workers):
+            assert time.monotonic() < deadline, "orphaned workers kept running"
+            time.sleep(0.1)
+
+    def test_sigterm_stops_all_workers(self, preloaded_server):
+        """Test SIGTERM shuts down the workers and the master cleanly."""
+        process, _ = preloaded_server
+        workers = _children(process.pid)
+
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=15) == 0
+        for pid in workers:
+            assert not Path(f"/proc/{pid}").exists()
+
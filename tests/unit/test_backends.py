@@ -0,0 +1,137 @@
+"""Test model execution backends."""
+
+import numpy as np
+import pytest
+
+from opencar.ml.inference import InferenceEngine
+from opencar.ml.inference.backends import (
+    MockBackend,
+    ONNXRuntimeBackend,
+    TorchBackend,
+    create_backend,
+)
+
+
+def _export_model(path, batch_dim="batch"):
+    """Write a tiny ONNX model computing 2 * x reshaped to (N, 3, 64)."""
+    onnx = pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    from onnx import TensorProto, helper
+
+    graph = helper.make_graph(
+        [
+            helper.make_node("Reshape", ["images", "shape"], ["flat"]),
+            helper.make_node("Mul", ["flat", "two"], ["output"]),
+        ],
+        "tiny",
+        [helper.make_tensor_value_info("images", TensorProto.FLOAT, [batch_dim, 3, 8, 8])],
+        [helper.make_tensor_value_info("output", TensorProto.FLOAT, [batch_dim, 3, 64])],
+        initializer=[
+            helper.make_tensor("shape", TensorProto.INT64, [3], [-1, 3, 64]),
+            helper.make_tensor("two", TensorProto.FLOAT, [], [2.0]),
+        ],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+    return path
+
+
+@pytest.fixture
+def onnx_model(tmp_path):
+    """Tiny model with a dynamic batch dimension."""
+    return _export_model(tmp_path / "tiny.onnx")
+
+
+class TestCreateBackend:
+    """Test backend selection."""
+
+    def test_selection(self, tmp_path):
+        """Test the engine flags and model suffix pick the backend."""
+        assert isinstance(create_backend(), MockBackend)
+        assert isinstance(create_backend(tmp_path / "m.onnx", use_onnx=True), ONNXRuntimeBackend)
+        assert isinstance(create_backend(tmp_path / "m.pt"), TorchBackend)
+        with pytest.raises(ValueError):
+            create_backend(use_onnx=True)
+
+    def test_mock_outputs(self):
+        """Test the mock backend keeps the YOLO output layout."""
+        outputs = MockBackend(latency=0).run(np.zeros((2, 3, 640, 640), np.float32))
+        assert outputs.shape == (2, 85, 8400)
+
+
+class TestONNXRuntimeBackend:
+    """Test the ONNX Runtime backend on a tiny exported model."""
+
+    def test_dynamic_batch(self, onnx_model):
+        """Test any batch size runs and matches the model's math."""
+        backend = ONNXRuntimeBackend(onnx_model, intra_op_threads=1, inter_op_threads=1)
+        backend.load()
+
+        assert backend.input_shape == (3, 8, 8)
+        assert backend.output_shape == (3, 64)
+        for batch_size in (1, 3):
+            inputs = np.random.rand(batch_size, 3, 8, 8).astype(np.float32)
+            outputs = backend.run(inputs)
+            np.testing.assert_allclose(outputs, 2 * inputs.reshape(batch_size, 3, 64))
+            backend.release(outputs)
+
+    def test_io_binding_reuses_buffers(self, onnx_model):
+        """Test bound outputs come from the pool once released."""
+        backend = ONNXRuntimeBackend(onnx_model)
+        backend.load()
+        backend.warmup([2])
+
+        outputs = backend.run(np.ones((2, 3, 8, 8), np.float32))
+        backend.release(outputs)
+
+        assert backend.run(np.ones((2, 3, 8, 8), np.float32)) is outputs
+        assert backend.get_info()["output_buffers"]["allocations"] == 1
+
+    def test_without_io_binding(self, onnx_model):
+        """Test the plain session path."""
+        backend = ONNXRuntimeBackend(onnx_model, io_binding=False)
+        backend.load()
+        outputs = backend.run(np.ones((1, 3, 8, 8), np.float32))
+
+        np.testing.assert_allclose(outputs, 2.0)
+
+    def test_fixed_batch_chunks(self, tmp_path):
+        """Test a fixed-batch model is fed in padded chunks."""
+        backend = ONNXRuntimeBackend(_export_model(tmp_path / "fixed.onnx", batch_dim=2))
+        backend.load()
+        inputs = np.random.rand(3, 3, 8, 8).astype(np.float32)
+
+        outputs = backend.run(inputs)
+
+        assert backend.fixed_batch_size == 2
+        np.testing.assert_allclose(outputs, 2 * inputs.reshape(3, 3, 64))
+
+    def test_model_directory(self, onnx_model):
+        """Test a directory resolves to the model file inside it."""
+        backend = ONNXRuntimeBackend(onnx_model.parent)
+        backend.load()
+        assert backend.session is not None
+
+    def test_missing_model(self, tmp_path):
+        """Test a missing model fails to load."""
+        pytest.importorskip("onnxruntime")
+        with pytest.raises(FileNotFoundError):
+            ONNXRuntimeBackend(tmp_path).load()
+
+    @pytest.mark.asyncio
+    async def test_engine_uses_onnx(self, onnx_model):
+        """Test InferenceEngine runs the model when use_onnx is set."""
+        engine = InferenceEngine(
+            model_path=onnx_model, use_onnx=True, batch_size=2, intra_op_threads=1
+        )
+        await engine.load_model()
+        frame = np.full((3, 8, 8), 255, dtype=np.uint8)
+
+        results = await engine.predict([frame, frame], return_raw=True)
+
+        assert engine.input_shape == (3, 8, 8)
+        assert engine.get_model_info()["backend"]["backend"] == "onnxruntime"
+        np.testing.assert_allclose(results["raw_outputs"], 2.0)
+        await engine.unload_model()
+        engine.close()
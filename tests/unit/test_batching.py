@@ -0,0 +1,148 @@
+"""Test dynamic micro-batching scheduler."""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from opencar.ml.inference import InferenceEngine
+from opencar.ml.inference.batching import MicroBatchScheduler
+from opencar.ml.inference.postprocess import DETECTION_DTYPE
+
+
+class RecordingEngine:
+    """Engine double that echoes one detection per input."""
+
+    def __init__(self, fail: bool = False):
+        self.batch_sizes = []
+        self.fail = fail
+
+    async def predict(self, inputs, conf_threshold=0.5, as_arrays=False):
+        self.batch_sizes.append(len(inputs))
+        await asyncio.sleep(0.001)
+        if self.fail:
+            raise RuntimeError("model crashed")
+        detections = []
+        for inp in inputs:
+            dets = np.zeros(2, dtype=DETECTION_DTYPE)
+            dets["class_id"] = int(inp.flat[0])
+            dets["confidence"] = [0.3, 0.9]
+            detections.append(dets)
+        return {"detections": detections, "batch_size": len(inputs)}
+
+
+class TestMicroBatchScheduler:
+    """Test request coalescing."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_a_batch(self):
+        """Test concurrent submits run as one predict and get their own results."""
+        engine = RecordingEngine()
+        scheduler = MicroBatchScheduler(engine, max_batch_size=8, max_wait_ms=50)
+
+        results = await asyncio.gather(
+            *[scheduler.submit(np.full((3, 4, 4), i, dtype=np.uint8)) for i in range(5)]
+        )
+
+        assert engine.batch_sizes == [5]
+        assert [int(r["class_id"][0]) for r in results] == [0, 1, 2, 3, 4]
+        await scheduler.close()
+
+    @pytest.mark.asyncio
+    async def test_batches_capped_at_max_size(self):
+        """Test batches never exceed max_batch_size."""
+        engine = RecordingEngine()
+        scheduler = MicroBatchScheduler(engine, max_batch_size=4, max_wait_ms=50)
+
+        await asyncio.gather(*[scheduler.submit(np.zeros((3, 4, 4))) for _ in range(10)])
+
+        assert sum(engine.batch_sizes) == 10
+        assert max(engine.batch_sizes) == 4
+        await scheduler.close()
+
+    @pytest.mark.asyncio
+    async def test_deadline_dispatches_partial_batch(self):
+        """Test a lone request is dispatched once max_wait_ms expires."""
+        engine = RecordingEngine()
+        scheduler = MicroBatchScheduler(engine, max_batch_size=32, max_wait_ms=5)
+
+        await asyncio.wait_for(scheduler.submit(np.zeros((3, 4, 4))), timeout=1.0)
+
+        assert engine.batch_sizes == [1]
+        stats = scheduler.get_stats()
+        assert stats["total_batches"] == 1
+        assert stats["batch_size_histogram"] == {"1": 1}
+        assert stats["max_wait_time_ms"] >= 4.0
+        await scheduler.close()
+
+    @pytest.mark.asyncio
+    async def test_per_caller_threshold(self):
+        """Test each caller's detections are filtered by its own threshold."""
+        scheduler = MicroBatchScheduler(RecordingEngine(), max_batch_size=8, max_wait_ms=20)
+
+        low, high = await asyncio.gather(
+            scheduler.submit(np.zeros((3, 4, 4)), conf_threshold=0.1),
+            scheduler.submit(np.zeros((3, 4, 4)), conf_threshold=0.5),
+        )
+
+        assert len(low) == 2
+        assert len(high) == 1
+        await scheduler.close()
+
+    @pytest.mark.asyncio
+    async def test_failure_propagates_to_callers(self):
+        """Test a failing predict raises in every waiting caller."""
+        scheduler = MicroBatchScheduler(RecordingEngine(fail=True), max_batch_size=8, max_wait_ms=5)
+
+        results = await asyncio.gather(
+            scheduler.submit(np.zeros((3, 4, 4))),
+            scheduler.submit(np.zeros((3, 4, 4))),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        await scheduler.close()
+
+    @pytest.mark.asyncio
+    async def test_close_cancels_batch_in_progress(self):
+        """Test close cancels requests being collected or dispatched, not just queued ones."""
+        started = asyncio.Event()
+
+        class StuckEngine:
+            async def predict(self, inputs, conf_threshold=0.5, as_arrays=False):
+                started.set()
+                await asyncio.Event().wait()
+
+        dispatching = MicroBatchScheduler(StuckEngine(), max_batch_size=8, max_wait_ms=1)
+        in_dispatch = asyncio.ensure_future(dispatching.submit(np.zeros((3, 4, 4))))
+        await asyncio.wait_for(started.wait(), 1.0)
+        await dispatching.close()
+
+        collecting = MicroBatchScheduler(RecordingEngine(), max_batch_size=8, max_wait_ms=60_000)
+        in_collection = asyncio.ensure_future(collecting.submit(np.zeros((3, 4, 4))))
+        await asyncio.sleep(0.01)
+        await collecting.close()
+
+        for request in (in_dispatch, in_collection):
+            with pytest.raises(asyncio.CancelledError):
+                await asyncio.wait_for(request, 1.0)
+
+    @pytest.mark.asyncio
+    async def test_with_inference_engine(self):
+        """Test scheduling against the real engine."""
+        engine = InferenceEngine(device="cpu", batch_size=4)
+        scheduler = MicroBatchScheduler(engine, max_batch_size=4, max_wait_ms=10)
+
+        results = await asyncio.gather(
+            *[scheduler.submit(np.zeros((3, 32, 32), dtype=np.float32)) for _ in range(4)]
+        )
+
+        assert len(results) == 4
+        assert engine.total_inferences == 1
+        assert all(r.dtype == DETECTION_DTYPE for r in results)
+        await scheduler.close()
+
+    def test_invalid_batch_size(self):
+        """Test max_batch_size validation."""
+        with pytest.raises(ValueError):
+            MicroBatchScheduler(RecordingEngine(), max_batch_size=0)
@@ -0,0 +1,78 @@
+"""Test pooled inference input buffers."""
+
+import threading
+
+import numpy as np
+
+from opencar.ml.inference.buffers import BufferPool, normalize_into
+
+
+class TestBufferPool:
+    """Test the shape-keyed pool."""
+
+    def test_reuse_by_shape(self):
+        """Test released buffers are handed out again for the same shape only."""
+        pool = BufferPool()
+        buffer = pool.acquire((1, 3, 4, 4))
+        pool.release(buffer)
+
+        assert pool.acquire((2, 3, 4, 4)) is not buffer
+        assert pool.acquire((1, 3, 4, 4)) is buffer
+        assert pool.get_stats()["allocations"] == 2
+        assert pool.get_stats()["reuses"] == 1
+
+    def test_bounded(self):
+        """Test free lists and shapes are capped."""
+        pool = BufferPool(max_per_shape=1, max_shapes=2)
+        for shape in [(1,), (1,), (2,), (3,)]:
+            pool.release(np.empty(shape, dtype=np.float32))
+
+        assert pool.get_stats()["shapes"] == 2
+        assert pool.nbytes == (2 + 3) * 4
+
+    def test_thread_safe(self):
+        """Test concurrent acquire/release never hands one buffer to two threads."""
+        pool = BufferPool()
+        in_use = set()
+        errors = []
+        lock = threading.Lock()
+
+        def worker():
+            for _ in range(500):
+                buffer = pool.acquire((4,))
+                with lock:
+                    if id(buffer) in in_use:
+                        errors.append(buffer)
+                    in_use.add(id(buffer))
+                with lock:
+                    in_use.discard(id(buffer))
+                pool.release(buffer)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors
+
+
+class TestNormalizeInto:
+    """Test in-place normalization."""
+
+    def test_integer_defaults_to_255(self):
+        """Test integer input is scaled by 1/255 without a new array."""
+        out = np.empty((2, 2), dtype=np.float32)
+        result = normalize_into(np.array([[0, 255], [51, 102]], dtype=np.uint8), out)
+
+        assert result is out
+        np.testing.assert_allclose(out, [[0.0, 1.0], [0.2, 0.4]], rtol=1e-6)
+
+    def test_float_copied_as_is(self):
+        """Test float input is assumed normalized unless a range is given."""
+        out = np.empty(3, dtype=np.float32)
+        normalize_into(np.array([0.0, 0.5, 2.0]), out)
+        np.testing.assert_allclose(out, [0.0, 0.5, 2.0])
+
+        normalize_into(np.array([0.0, 50.0, 100.0]), out, input_max=100.0)
+        np.testing.assert_allclose(out, [0.0, 0.5, 1.0])
@@ -1,5 +1,7 @@
 """Test configuration module."""
 
+import sys
+
 import pytest
 
 from opencar.config.settings import Settings, get_settings
@@ -33,6 +35,13 @@ class TestSettings:
         # Should not raise an error and handle gracefully
         assert settings.device in ["cuda", "cpu"]
 
+    def test_device_fallback_without_visible_gpus(self, monkeypatch):
+        """Test CUDA falls back to CPU when no GPU is visible."""
+        monkeypatch.delitem(sys.modules, "torch", raising=False)
+        monkeypatch.setenv("CUDA_VISIBLE_DEVICES", "")
+        assert Settings(device="cuda").device == "cpu"
+        assert "torch" not in sys.modules
+
     def test_database_settings(self):
         """Test database settings property."""
         settings = Settings(
@@ -0,0 +1,124 @@
+"""Test negotiable detection response encodings."""
+
+import json
+
+import numpy as np
+import pytest
+
+from opencar.api.encoding import (
+    COLUMNAR_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    MSGPACK_AVAILABLE,
+    MSGPACK_MEDIA_TYPE,
+    detection_response,
+    encode_detections,
+    negotiate,
+    to_columns,
+)
+
+DETECTIONS = [
+    {
+        "class_name": "car",
+        "confidence": 0.9,
+        "bbox": {"x1": 1.0, "y1": 2.0, "x2": 30.5, "y2": 40.0},
+        "attributes": {},
+    },
+    {
+        "class_name": "person",
+        "confidence": 0.75,
+        "bbox": {"x1": 5.0, "y1": 6.0, "x2": 7.0, "y2": 8.0},
+        "attributes": {},
+    },
+]
+BODY = {"request_id": "abc", "detections": DETECTIONS, "image_info": {"size": 10}}
+
+
+class TestNegotiate:
+    """Test choosing the response format from the Accept header."""
+
+    @pytest.mark.parametrize("accept", [None, "", "*/*", "application/json", "text/html, */*"])
+    def test_defaults_to_json(self, accept):
+        """Test missing, wildcard and JSON Accept headers get JSON."""
+        assert negotiate(accept) == JSON_MEDIA_TYPE
+
+    @pytest.mark.parametrize("accept", ["text/html", "text/csv, image/*", "application/json;q=0"])
+    def test_not_acceptable(self, accept):
+        """Test a header accepting no supported type is rejected."""
+        assert negotiate(accept) is None
+
+    def test_columnar(self):
+        """Test the columnar media type is selected by name."""
+        assert negotiate(COLUMNAR_MEDIA_TYPE) == COLUMNAR_MEDIA_TYPE
+
+    def test_quality(self):
+        """Test the highest quality supported type wins."""
+        accept = f"application/json;q=0.5, {COLUMNAR_MEDIA_TYPE};q=0.9, text/html"
+        assert negotiate(accept) == COLUMNAR_MEDIA_TYPE
+        assert negotiate(f"{COLUMNAR_MEDIA_TYPE};q=0, */*") == JSON_MEDIA_TYPE
+
+    def test_specific_type_beats_wildcard(self):
+        """Test a specific type wins a tie with a wildcard."""
+        assert negotiate(f"*/*, {COLUMNAR_MEDIA_TYPE}") == COLUMNAR_MEDIA_TYPE
+
+    @pytest.mark.skipif(not MSGPACK_AVAILABLE, reason="msgpack not installed")
+    @pytest.mark.parametrize(
+        "accept", [MSGPACK_MEDIA_TYPE, "application/msgpack", "application/vnd.msgpack"]
+    )
+    def test_msgpack(self, accept):
+        """Test every msgpack media type is accepted."""
+        assert negotiate(accept) == MSGPACK_MEDIA_TYPE
+
+
+class TestEncodeDetections:
+    """Test encoding detection bodies."""
+
+    def test_json(self):
+        """Test JSON keeps the nested detection layout."""
+        assert json.loads(encode_detections(BODY, JSON_MEDIA_TYPE)) == BODY
+
+    def test_columnar(self):
+        """Test columnar JSON holds parallel arrays and the rest of the body."""
+        decoded = json.loads(encode_detections(BODY, COLUMNAR_MEDIA_TYPE))
+        assert decoded["request_id"] == "abc"
+        assert decoded["detections"] == {
+            "count": 2,
+            "class_name": ["car", "person"],
+            "confidence": [0.9, 0.75],
+            "bbox": [[1.0, 2.0, 30.5, 40.0], [5.0, 6.0, 7.0, 8.0]],
+        }
+
+    def test_columnar_keeps_attributes(self):
+        """Test attributes are included only when a detection has any."""
+        detections = [dict(DETECTIONS[0], attributes={"color": "red"}), DETECTIONS[1]]
+        assert to_columns(detections)["attributes"] == [{"color": "red"}, {}]
+
+    def test_columnar_empty(self):
+        """Test a frame without detections encodes empty arrays."""
+        assert to_columns([]) == {"count": 0, "class_name": [], "confidence": [], "bbox": []}
+
+    @pytest.mark.skipif(not MSGPACK_AVAILABLE, reason="msgpack not installed")
+    def test_msgpack(self):
+        """Test msgpack carries confidences and boxes as float32 buffers."""
+        import msgpack
+
+        decoded = msgpack.unpackb(encode_detections(BODY, MSGPACK_MEDIA_TYPE), raw=False)
+        detections = decoded["detections"]
+        assert detections["class_name"] == ["car", "person"]
+        bbox = detections["bbox"]
+        boxes = np.frombuffer(bbox["data"], bbox["dtype"]).reshape(bbox["shape"])
+        np.testing.assert_array_equal(boxes, [[1.0, 2.0, 30.5, 40.0], [5.0, 6.0, 7.0, 8.0]])
+        confidence = detections["confidence"]
+        np.testing.assert_allclose(
+            np.frombuffer(confidence["data"], confidence["dtype"]), [0.9, 0.75], rtol=1e-6
+        )
+
+    def test_unsupported_media_type(self):
+        """Test an unknown media type is rejected."""
+        with pytest.raises(ValueError, match="Unsupported media type"):
+            encode_detections(BODY, "text/csv")
+
+    def test_response_varies_on_accept(self):
+        """Test responses name their media type and vary on Accept."""
+        response = detection_response(BODY, COLUMNAR_MEDIA_TYPE)
+        assert response.media_type == COLUMNAR_MEDIA_TYPE
+        assert response.headers["vary"] == "Accept"
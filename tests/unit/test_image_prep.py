@@ -0,0 +1,156 @@
+"""Test image preparation for vision requests."""
+
+import asyncio
+import base64
+import io
+import json
+
+import httpx
+import numpy as np
+import pytest
+from PIL import Image
+
+from opencar.cache.result_cache import ResultCache
+from opencar.integrations.image_prep import (
+    ANALYSIS_PRESETS,
+    IMAGE_PLACEHOLDER,
+    ImagePreset,
+    get_preset,
+    prepare_image,
+    streamed_json_body,
+)
+from opencar.integrations.openai_client import OpenAIClient
+from opencar.monitoring.metrics import MetricsRegistry, get_registry
+
+
+def _encode(size, fmt="JPEG", quality=95):
+    """Encode a noisy image so compression has real work to do."""
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 255, (size[1], size[0], 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format=fmt, quality=quality)
+    return buffer.getvalue()
+
+
+class TestPrepareImage:
+    """Test decode, downscale and re-encode."""
+
+    def test_downscales_to_preset(self):
+        """Test large frames shrink to the preset's long side."""
+        data = _encode((3840, 2160))
+        prepared = prepare_image(data, ImagePreset(max_side=1024, quality=80))
+
+        assert (prepared.width, prepared.height) == (1024, 576)
+        assert prepared.mime_type == "image/jpeg"
+        assert prepared.bytes_saved > 0.8 * len(data)
+        assert Image.open(io.BytesIO(prepared.data)).size == (1024, 576)
+
+    def test_presets_per_analysis_type(self):
+        """Test analysis types get their own sizes, capped by max_side."""
+        assert get_preset("weather").max_side < get_preset("traffic").max_side
+        assert get_preset("unknown") == ANALYSIS_PRESETS["comprehensive"]
+        assert get_preset("traffic", max_side=640).max_side == 640
+        assert get_preset("weather", max_side=4096).max_side == 512
+
+    def test_small_jpeg_kept(self):
+        """Test small JPEGs are sent as is when re-encoding does not help."""
+        data = _encode((320, 240), quality=70)
+        prepared = prepare_image(data, ImagePreset(max_side=1024, quality=95))
+
+        assert prepared.data == data
+        assert prepared.bytes_saved == 0
+
+    def test_png_reencoded(self):
+        """Test lossless uploads are re-encoded as JPEG."""
+        data = _encode((800, 600), fmt="PNG")
+        prepared = prepare_image(data, ImagePreset(max_side=1024, quality=80))
+
+        assert prepared.mime_type == "image/jpeg"
+        assert len(prepared.data) < len(data)
+
+    def test_webp(self):
+        """Test WebP output."""
+        prepared = prepare_image(_encode((2000, 1000)), ImagePreset(512, 75), "webp")
+
+        assert prepared.mime_type == "image/webp"
+        assert Image.open(io.BytesIO(prepared.data)).format == "WEBP"
+
+    def test_undecodable_sent_as_is(self):
+        """Test bytes PIL cannot decode pass through unchanged."""
+        prepared = prepare_image(b"not an image", ImagePreset(1024, 85))
+        assert prepared.data == b"not an image"
+        assert prepared.mime_type == "application/octet-stream"
+
+    def test_truncated_image_keeps_its_type(self):
+        """Test an image that fails to decode is labelled with its own format."""
+        truncated = _encode((640, 480), fmt="PNG")[:2000]
+        prepared = prepare_image(truncated, ImagePreset(256, 85))
+        assert prepared.data == truncated
+        assert prepared.mime_type == "image/png"
+
+    def test_metrics(self):
+        """Test bytes saved and preparation time are recorded."""
+        registry = get_registry()
+        saved = registry.counter(
+            "opencar_vision_image_bytes_saved_total", "Upload bytes saved by image preparation"
+        ).labels()
+        before = saved.value
+
+        prepare_image(_encode((2048, 2048)), ImagePreset(512, 75))
+
+        assert saved.value > before
+        assert registry.get("opencar_vision_image_prep_seconds") is not None
+
+
+class TestStreamedBody:
+    """Test the streamed JSON body."""
+
+    @pytest.mark.asyncio
+    async def test_matches_json(self):
+        """Test the streamed body is the JSON document with base64 filled in."""
+        data = bytes(range(256)) * 1000
+        payload = {"url": f"data:image/jpeg;base64,{IMAGE_PLACEHOLDER}", "n": 1}
+        length, chunks = streamed_json_body(payload, data)
+
+        body = b"".join([chunk async for chunk in chunks()])
+        # The factory can be replayed for retries
+        replay = b"".join([chunk async for chunk in chunks()])
+
+        assert len(body) == length
+        assert body == replay
+        decoded = json.loads(body)
+        assert decoded["n"] == 1
+        assert base64.b64decode(decoded["url"].split(",", 1)[1]) == data
+
+
+class TestOpenAIClientUpload:
+    """Test analyze_image sends the prepared image."""
+
+    @pytest.mark.asyncio
+    async def test_sends_downscaled_image(self):
+        """Test the uploaded image is downscaled for its analysis type."""
+        sent = []
+
+        def handler(request):
+            body = json.loads(request.read())
+            url = body["messages"][0]["content"][1]["image_url"]["url"]
+            sent.append((url.split(";")[0], base64.b64decode(url.split(",", 1)[1])))
+            assert int(request.headers["Content-Length"]) == len(request.content)
+            return httpx.Response(200, json={"choices": [{"message": {"content": "Clear."}}]})
+
+        client = OpenAIClient(
+            api_key="sk-test",
+            cache=ResultCache(registry=MetricsRegistry()),
+            image_format="webp",
+            transport=httpx.MockTransport(handler),
+        )
+        frame = _encode((3000, 2000))
+
+        await asyncio.gather(
+            client.analyze_image(frame, "weather"), client.analyze_image(frame, "traffic")
+        )
+
+        sizes = {Image.open(io.BytesIO(data)).size for _, data in sent}
+        assert sizes == {(512, 341), (1280, 853)}
+        assert {mime for mime, _ in sent} == {"data:image/webp"}
+        await client.close()
@@ -0,0 +1,198 @@
+"""Test ML inference engine."""
+
+import threading
+
+import numpy as np
+import pytest
+
+from opencar.ml.inference import InferenceEngine
+from opencar.ml.inference.postprocess import (
+    DETECTION_DTYPE,
+    decode_yolo_output,
+    detections_to_dicts,
+    filter_detections,
+    split_detections,
+)
+
+
+def _reference_extract(output, conf_threshold=0.5):
+    """Per-candidate decode loop the vectorized path replaces."""
+    detections = []
+    for a in np.flatnonzero(output[4] > conf_threshold):
+        class_id = int(np.argmax(output[5:, a]))
+        final_conf = output[4, a] * output[5 + class_id, a]
+        if final_conf > conf_threshold:
+            cx, cy, w, h = output[:4, a]
+            detections.append((class_id, final_conf, [cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2]))
+    return detections
+
+
+@pytest.fixture
+def raw_outputs():
+    """Create a batch of YOLO-style raw outputs."""
+    rng = np.random.default_rng(0)
+    outputs = rng.random((3, 85, 400), dtype=np.float32)
+    outputs[:, :4] *= 640
+    outputs[1, 4] = 0.0  # An image without detections
+    return outputs
+
+
+class TestDecode:
+    """Test vectorized YOLO decoding."""
+
+    def test_matches_reference_loop(self, raw_outputs):
+        """Test decode equals the per-candidate loop."""
+        per_image = split_detections(decode_yolo_output(raw_outputs, 0.3), len(raw_outputs))
+
+        assert len(per_image) == 3
+        assert len(per_image[1]) == 0
+        for output, detections in zip(raw_outputs, per_image):
+            expected = _reference_extract(output, 0.3)
+            assert detections["class_id"].tolist() == [e[0] for e in expected]
+            np.testing.assert_allclose(detections["confidence"], [e[1] for e in expected], rtol=1e-6)
+            np.testing.assert_allclose(
+                detections["bbox"], np.array([e[2] for e in expected]).reshape(-1, 4), rtol=1e-5
+            )
+
+    def test_empty_result(self, raw_outputs):
+        """Test decode with no candidate above threshold."""
+        detections = decode_yolo_output(raw_outputs, 1.0)
+        assert detections.dtype == DETECTION_DTYPE
+        assert len(detections) == 0
+        assert [len(d) for d in split_detections(detections, 3)] == [0, 0, 0]
+
+    def test_class_and_count_selection(self, raw_outputs):
+        """Test class filtering and per-image top-k happen during decode."""
+        everything = decode_yolo_output(raw_outputs, 0.3)
+        selected = decode_yolo_output(raw_outputs, 0.3, classes=[1, 2, 3], max_detections=2)
+
+        for image, (all_dets, dets) in enumerate(
+            zip(split_detections(everything, 3), split_detections(selected, 3))
+        ):
+            candidates = all_dets[np.isin(all_dets["class_id"], [1, 2, 3])]
+            top = np.sort(candidates["confidence"])[::-1][:2]
+            assert len(dets) == len(top)
+            assert set(dets["class_id"].tolist()) <= {1, 2, 3}
+            np.testing.assert_allclose(np.sort(dets["confidence"])[::-1], top)
+        # Order within an image is unchanged (by anchor)
+        np.testing.assert_array_equal(selected["batch_index"], np.sort(selected["batch_index"]))
+
+    def test_filter_decoded_detections(self, raw_outputs):
+        """Test the same selection applies to already decoded detections."""
+        everything = decode_yolo_output(raw_outputs, 0.3)
+        filtered = filter_detections(everything, classes=[1, 2, 3], max_detections=2)
+        expected = decode_yolo_output(raw_outputs, 0.3, classes=[1, 2, 3], max_detections=2)
+
+        np.testing.assert_array_equal(filtered, expected)
+        assert filter_detections(everything) is everything
+
+    def test_dicts_at_api_boundary(self, raw_outputs):
+        """Test conversion to API detection dicts."""
+        detections = decode_yolo_output(raw_outputs[:1], 0.3)
+        dicts = detections_to_dicts(detections)
+
+        assert len(dicts) == len(detections)
+        for detection in dicts:
+            assert set(detection) == {"class_name", "confidence", "bbox", "attributes"}
+            assert set(detection["bbox"]) == {"x1", "y1", "x2", "y2"}
+            assert isinstance(detection["confidence"], float)
+
+
+class TestInferenceEngine:
+    """Test inference engine."""
+
+    @pytest.mark.asyncio
+    async def test_predict_dicts(self):
+        """Test predict returns per-image detection dicts."""
+        engine = InferenceEngine(device="cpu")
+        results = await engine.predict(np.zeros((3, 64, 64), dtype=np.float32))
+
+        assert results["batch_size"] == 1
+        assert len(results["detections"]) == 1
+        assert results["num_detections"] == [len(results["detections"][0])]
+
+    @pytest.mark.asyncio
+    async def test_predict_arrays(self):
+        """Test predict can return structured arrays."""
+        engine = InferenceEngine(device="cpu")
+        batch = [np.zeros((3, 64, 64), dtype=np.float32)] * 2
+        results = await engine.predict(batch, conf_threshold=0.2, as_arrays=True)
+
+        assert results["batch_size"] == 2
+        for detections in results["detections"]:
+            assert detections.dtype == DETECTION_DTYPE
+            assert (detections["confidence"] > 0.2).all()
+
+    @pytest.mark.asyncio
+    async def test_cpu_steps_run_off_event_loop(self):
+        """Test pre/post-processing run on the engine's threads."""
+        engine = InferenceEngine(device="cpu", num_threads=2)
+        threads = []
+        preprocess = engine._preprocess
+
+        def recording_preprocess(*args):
+            threads.append(threading.current_thread().name)
+            return preprocess(*args)
+
+        engine._preprocess = recording_preprocess
+        await engine.predict(np.zeros((3, 64, 64), dtype=np.float32))
+        engine.close()
+
+        assert threads and threads[0].startswith("opencar-inference")
+
+    @pytest.mark.asyncio
+    async def test_inline_without_threads(self):
+        """Test num_threads=0 runs every step on the event loop thread."""
+        engine = InferenceEngine(device="cpu", num_threads=0)
+        await engine.predict(np.zeros((3, 64, 64), dtype=np.float32))
+
+        assert engine._executor is None
+
+    @pytest.mark.asyncio
+    async def test_batch_predict_pipelined(self):
+        """Test pipelined batch inference keeps input order and counts batches."""
+        engine = InferenceEngine(device="cpu", num_threads=2)
+        inputs = [np.zeros((3, 64, 64), dtype=np.float32)] * 5
+        results = await engine.batch_predict(inputs, batch_size=2)
+        engine.close()
+
+        assert [r["batch_index"] for r in results] == [0, 1, 2, 3, 4]
+        assert engine.total_inferences == 3
+        assert await engine.batch_predict([]) == []
+
+    def test_preprocess_normalizes_into_pooled_buffer(self):
+        """Test uint8 input is scaled into a reused float32 buffer."""
+        engine = InferenceEngine(device="cpu")
+        frame = np.full((3, 8, 8), 255, dtype=np.uint8)
+
+        batch = engine._preprocess([frame, frame // 5])
+        assert batch.dtype == np.float32 and batch.shape == (2, 3, 8, 8)
+        np.testing.assert_allclose(batch[0], 1.0)
+        np.testing.assert_allclose(batch[1], 51 / 255, rtol=1e-6)
+
+        engine.buffers.release(batch)
+        assert engine._preprocess([frame, frame]) is batch
+        assert engine.buffers.get_stats()["reuses"] == 1
+
+    def test_preprocess_declared_range(self):
+        """Test float input is taken as normalized unless a range is declared."""
+        engine = InferenceEngine(device="cpu")
+        frame = np.full((3, 4, 4), 127.5, dtype=np.float32)
+
+        np.testing.assert_allclose(engine._preprocess(frame), 127.5)
+        np.testing.assert_allclose(engine._preprocess(frame, 255.0), 0.5)
+
+    def test_preprocess_rejects_mixed_shapes(self):
+        """Test a batch must share one shape."""
+        engine = InferenceEngine(device="cpu")
+        with pytest.raises(ValueError):
+            engine._preprocess([np.zeros((3, 4, 4)), np.zeros((3, 8, 8))])
+
+    def test_extract_detections(self, raw_outputs):
+        """Test single-image extraction keeps its dict format."""
+        engine = InferenceEngine(device="cpu")
+        detections = engine._extract_detections(raw_outputs[0], 0.3)
+
+        assert len(detections) == len(_reference_extract(raw_outputs[0], 0.3))
+        assert engine._get_class_name(2) == "car"
+        assert engine._get_class_name(999) == "class_999"
@@ -0,0 +1,95 @@
+"""Test single-pass keyword matching."""
+
+import pytest
+
+from opencar.integrations.keyword_matcher import KeywordMatcher
+from opencar.integrations.openai_client import OpenAIClient
+
+
+@pytest.fixture
+def matcher():
+    """Matcher with single-word and phrase keywords."""
+    return KeywordMatcher({
+        "weather": {"clear": ("clear",), "rainy": ("rainy", "rain")},
+        "actions": {
+            "reduce_speed": ("reduce speed",),
+            "stop_sign": ("stop sign", "stop signs"),
+        },
+    })
+
+
+class TestKeywordMatcher:
+    """Test the matcher."""
+
+    def test_word_boundaries(self, matcher):
+        """Test keywords only match whole words."""
+        assert matcher.match("Visibility is unclear")["weather"] == []
+        assert matcher.match("Roads are CLEAR.")["weather"] == ["clear"]
+        assert matcher.match("raining hard")["weather"] == []
+
+    def test_declared_order(self, matcher):
+        """Test labels come back in declaration order, not text order."""
+        assert matcher.match("Rain now, clear later")["weather"] == ["clear", "rainy"]
+
+    def test_phrases(self, matcher):
+        """Test phrases match across whitespace, underscores and hyphens only."""
+        assert matcher.match("Please reduce\n  speed")["actions"] == ["reduce_speed"]
+        assert matcher.match("stop_sign ahead")["actions"] == ["stop_sign"]
+        assert matcher.match("two stop-signs")["actions"] == ["stop_sign"]
+        assert matcher.match("reduce. Speed is fine")["actions"] == []
+        assert matcher.match("reduce speedily")["actions"] == []
+
+    def test_all_categories_from_one_scan(self, matcher):
+        """Test every category is reported, including empty ones."""
+        assert matcher.match("") == {"weather": [], "actions": []}
+
+    def test_non_ascii(self, matcher):
+        """Test non-ASCII letters count as part of a word."""
+        assert matcher.match("clearé rain")["weather"] == ["rainy"]
+
+    def test_empty_keyword(self):
+        """Test keywords without letters are rejected."""
+        with pytest.raises(ValueError):
+            KeywordMatcher({"c": {"label": ("123",)}})
+
+
+class TestAnalysisParsing:
+    """Test OpenAIClient analysis parsing."""
+
+    def test_parse_analysis(self):
+        """Test structured fields come from one scan of the text."""
+        client = OpenAIClient(api_key="sk-test")
+        text = (
+            "Urban intersection with heavy traffic. Two vehicles and pedestrians near a "
+            "traffic light. Weather is rainy with a hazardous, wet road. Reduce speed and "
+            "check blind spots."
+        )
+
+        parsed = client._parse_analysis(text)
+
+        assert parsed["scene_type"] == "urban"
+        assert parsed["objects"] == ["vehicle", "pedestrian", "traffic_light"]
+        assert parsed["hazards"] == ["pedestrian", "vehicle", "weather"]
+        assert parsed["recommendations"] == ["reduce_speed", "check_blind_spots"]
+        assert parsed["weather_conditions"] == "rainy"
+        assert parsed["traffic_situation"] == "heavy"
+        assert parsed["safety_score"] == pytest.approx(0.7)
+
+    def test_defaults(self):
+        """Test defaults when nothing is recognized."""
+        parsed = OpenAIClient(api_key="sk-test")._parse_analysis("Nothing to report.")
+
+        assert parsed["scene_type"] == "general"
+        assert parsed["recommendations"] == ["proceed_normally"]
+        assert parsed["weather_conditions"] == "clear"
+        assert parsed["traffic_situation"] == "normal"
+        assert parsed["safety_score"] == pytest.approx(0.8)
+
+    def test_no_substring_false_positives(self):
+        """Test words containing keywords are not counted."""
+        parsed = OpenAIClient(api_key="sk-test")._parse_analysis(
+            "Unsafe merge; overall safety unclear."
+        )
+
+        # "unsafe" is a risk term; "safe" and "clear" are not present as words
+        assert parsed["safety_score"] == pytest.approx(0.7)
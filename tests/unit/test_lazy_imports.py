@@ -0,0 +1,42 @@
+"""Test that heavy dependencies load on first use, not at import time."""
+
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = ("torch", "cv2", "httpx", "openai", "PIL")
+
+
+def _loaded_after_import(module, candidates=HEAVY_MODULES):
+    """Import ``module`` in a fresh interpreter and list which ``candidates`` it loaded."""
+    code = (
+        f"import sys, {module}; "
+        f"print(' '.join(m for m in {tuple(candidates)!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return result.stdout.split()
+
+
+class TestLazyImports:
+    """Test cold-start imports stay light."""
+
+    @pytest.mark.parametrize(
+        "module", ["opencar.cli.main", "opencar.api.app", "opencar.ml.inference"]
+    )
+    def test_no_heavy_imports(self, module):
+        """Test importing an entry point loads none of the heavy dependencies."""
+        assert _loaded_after_import(module) == []
+
+    def test_cli_defers_server_stack(self):
+        """Test the CLI imports uvicorn and the settings only for commands that need them."""
+        assert _loaded_after_import("opencar.cli.main", ("uvicorn", "pydantic_settings")) == []
+
+    def test_torch_attribute_loads_torch(self):
+        """Test ``opencar.ml.inference.torch`` still resolves on demand."""
+        torch = pytest.importorskip("torch")
+        from opencar.ml import inference
+
+        assert inference.torch is torch
@@ -0,0 +1,85 @@
+"""Test letterbox preprocessing."""
+
+import numpy as np
+import pytest
+
+from opencar.perception.processors import letterbox
+from opencar.perception.processors.letterbox import LetterboxProcessor, scale_boxes
+
+
+@pytest.fixture
+def frame():
+    """1280x720 HWC frame with distinct channel values."""
+    image = np.empty((720, 1280, 3), dtype=np.uint8)
+    image[..., 0], image[..., 1], image[..., 2] = 10, 20, 30
+    return image
+
+
+class TestLetterboxProcessor:
+    """Test letterbox resize, padding and layout."""
+
+    def test_geometry(self):
+        """Test aspect ratio is kept and padding is centered."""
+        processor = LetterboxProcessor(input_size=(640, 640))
+        params = processor.get_params(720, 1280)
+
+        assert params.scale == pytest.approx(0.5)
+        assert (params.pad_x, params.pad_y) == (0, 140)
+
+    def test_output_layout(self, frame):
+        """Test CHW output with padding rows and unchanged channel order."""
+        processor = LetterboxProcessor(input_size=(640, 640))
+        batch, params = processor(frame, normalize=False)
+
+        assert batch.shape == (1, 3, 640, 640) and batch.dtype == np.uint8
+        assert (batch[0, :, :140] == 114).all()
+        assert (batch[0, :, 500:] == 114).all()
+        assert list(batch[0, :, 320, 320]) == [10, 20, 30]
+
+    def test_swap_and_normalize_into_buffer(self, frame):
+        """Test BGR swap and [0, 1] scaling written into a caller's buffer."""
+        processor = LetterboxProcessor(input_size=(320, 320), swap_rb=True)
+        out = np.zeros((2, 3, 320, 320), dtype=np.float32)
+        result, params = processor([frame, frame[:360, :360]], out=out)
+
+        assert result is out
+        np.testing.assert_allclose(out[:, :, 160, 160], [[30 / 255, 20 / 255, 10 / 255]] * 2)
+        assert params[1].scale == pytest.approx(320 / 360)
+
+    def test_rejects_bad_input(self, frame):
+        """Test wrong channel counts and buffer shapes are rejected."""
+        processor = LetterboxProcessor(input_size=(64, 64))
+        with pytest.raises(ValueError):
+            processor(frame[..., :2])
+        with pytest.raises(ValueError):
+            processor(frame, out=np.empty((1, 3, 32, 32), dtype=np.float32))
+
+    def test_numpy_fallback(self, frame, monkeypatch):
+        """Test frames are resized without OpenCV."""
+        monkeypatch.setattr(letterbox, "CV2_AVAILABLE", False)
+        batch, _ = LetterboxProcessor(input_size=(640, 640))(frame, normalize=False)
+
+        assert list(batch[0, :, 320, 320]) == [10, 20, 30]
+        assert (batch[0, :, 0] == 114).all()
+
+
+class TestScaleBoxes:
+    """Test mapping boxes back to the frame."""
+
+    def test_round_trip(self):
+        """Test boxes map back to original coordinates and are clipped."""
+        processor = LetterboxProcessor(input_size=(640, 640))
+        params = processor.get_params(720, 1280)
+        boxes = np.array([[50.0, 190.0, 150.0, 290.0], [-10.0, 100.0, 700.0, 600.0]], np.float32)
+
+        scaled = scale_boxes(boxes, params)
+
+        np.testing.assert_allclose(scaled[0], [100, 100, 300, 300])
+        np.testing.assert_allclose(scaled[1], [0, 0, 1280, 720])
+
+    def test_in_place(self):
+        """Test boxes can be converted in place."""
+        params = LetterboxProcessor(input_size=(640, 640)).get_params(640, 640)
+        boxes = np.array([[1.0, 2.0, 3.0, 4.0]], np.float32)
+
+        assert LetterboxProcessor.scale_boxes(boxes, params, out=boxes) is boxes
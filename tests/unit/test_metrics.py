@@ -0,0 +1,136 @@
+"""Unit tests for the metrics registry and histograms."""
+
+import numpy as np
+import pytest
+
+from opencar.api.middleware.metrics import RequestMetrics
+from opencar.monitoring.metrics import Histogram, MetricsRegistry
+
+
+class TestHistogram:
+    """Test log-linear histogram."""
+
+    def test_percentiles_within_precision(self):
+        """Test percentile estimates stay within the bucket precision."""
+        rng = np.random.default_rng(0)
+        values = rng.lognormal(mean=-4.0, sigma=1.0, size=10000)
+        histogram = Histogram(precision=0.05)
+        for value in values:
+            histogram.record(float(value))
+
+        for q in (50, 95, 99):
+            exact = np.percentile(values, q)
+            assert histogram.percentile(q) == pytest.approx(exact, rel=0.06)
+
+        assert histogram.count == len(values)
+        assert histogram.mean == pytest.approx(values.mean())
+        assert histogram.std == pytest.approx(values.std(), rel=1e-6)
+        assert histogram.min == values.min()
+        assert histogram.max == values.max()
+
+    def test_empty(self):
+        """Test empty histogram reports zeros."""
+        histogram = Histogram()
+        assert histogram.percentile(99) == 0.0
+        assert histogram.mean == 0.0
+        assert histogram.snapshot()["max"] == 0.0
+
+    def test_out_of_range_values(self):
+        """Test values outside the tracked range are clamped into edge buckets."""
+        histogram = Histogram(min_value=1e-3, max_value=1.0)
+        histogram.record(0.0)
+        histogram.record(50.0)
+
+        assert histogram.count == 2
+        assert histogram.percentile(100) == 50.0
+        assert histogram.percentile(1) == 0.0
+
+    def test_merge(self):
+        """Test merging histograms adds their counts."""
+        a, b = Histogram(), Histogram()
+        a.record(0.01)
+        b.record(0.1)
+        b.record(0.2)
+
+        a.merge(b)
+
+        assert a.count == 3
+        assert a.max == 0.2
+        assert a.sum == pytest.approx(0.31)
+
+        with pytest.raises(ValueError):
+            a.merge(Histogram(min_value=1e-3))
+
+    def test_export_counts(self):
+        """Test observations land in the right Prometheus buckets."""
+        histogram = Histogram(export_buckets=(0.01, 0.1, 1.0))
+        for value in (0.005, 0.05, 0.5, 5.0):
+            histogram.record(value)
+
+        assert histogram.export_counts() == [1, 1, 1, 1]
+
+
+class TestMetricsRegistry:
+    """Test metrics registry and Prometheus exposition."""
+
+    def test_get_or_create(self):
+        """Test families are shared by name and checked for consistency."""
+        registry = MetricsRegistry()
+        counter = registry.counter("requests_total", "Requests", ["route"])
+
+        assert registry.counter("requests_total", "Requests", ["route"]) is counter
+        with pytest.raises(ValueError):
+            registry.gauge("requests_total", "Requests", ["route"])
+        with pytest.raises(ValueError):
+            counter.labels("a", "b")
+
+    def test_prometheus_exposition(self):
+        """Test counters, gauges and histograms render in text format."""
+        registry = MetricsRegistry()
+        registry.counter("jobs_total", "Jobs", ["status"]).labels("ok").inc(3)
+        registry.gauge("queue_depth", "Queue depth").labels().set(7)
+        latency = registry.histogram("job_seconds", "Job latency", ["status"]).labels("ok")
+        for value in (0.002, 0.02, 0.2):
+            latency.record(value)
+
+        text = registry.generate_latest().decode()
+
+        assert 'jobs_total{status="ok"} 3.0' in text
+        assert "queue_depth 7.0" in text
+        assert 'job_seconds_bucket{le="+Inf",status="ok"} 3.0' in text
+        assert 'job_seconds_count{status="ok"} 3.0' in text
+        assert 'job_seconds_quantiles{quantile="0.99",status="ok"}' in text
+
+
+class TestRequestMetrics:
+    """Test request metrics JSON view."""
+
+    def test_get_metrics(self):
+        """Test JSON metrics aggregate counters and latency by route."""
+        metrics = RequestMetrics(MetricsRegistry())
+        metrics.observe("GET", "/health", 200, 0.002)
+        metrics.observe("GET", "/health", 200, 0.004)
+        metrics.observe("POST", "/detect", 400, 0.05)
+        metrics.error("POST", "/detect")
+
+        data = metrics.get_metrics()
+
+        assert data["total_requests"] == 3
+        assert data["requests_by_method"] == {"GET": 2, "POST": 1}
+        assert data["requests_by_status"] == {"200": 2, "400": 1}
+        assert data["errors"] == 1
+        assert data["latency_ms"]["max"] == pytest.approx(50.0)
+        assert data["latency_by_route_ms"]["GET /health"]["count"] == 2
+
+    def test_reset(self):
+        """Test reset forgets completed requests."""
+        metrics = RequestMetrics(MetricsRegistry())
+        metrics.observe("GET", "/health", 200, 0.002)
+        metrics.error("GET", "/health")
+        metrics.reset()
+
+        data = metrics.get_metrics()
+        assert data["total_requests"] == 0
+        assert data["errors"] == 0
+        metrics.observe("GET", "/health", 200, 0.002)
+        assert metrics.get_metrics()["total_requests"] == 1
@@ -0,0 +1,85 @@
+"""Test incremental multipart parsing."""
+
+import pytest
+from starlette.requests import Request
+
+from opencar.api.multipart import MultipartError, UploadLimitError, iter_file_parts
+
+BOUNDARY = "testboundary"
+
+
+def _body(parts):
+    body = b""
+    for name, filename, content_type, data in parts:
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        body += f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n".encode()
+        if content_type:
+            body += f"Content-Type: {content_type}\r\n".encode()
+        body += b"\r\n" + data + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+def _request(
+    body, chunk_size=16, received=None, content_type=f"multipart/form-data; boundary={BOUNDARY}"
+):
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+
+    async def receive():
+        chunk = chunks.pop(0)
+        if received is not None:
+            received.append(len(chunk))
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "headers": [(b"content-type", content_type.encode())],
+    }
+    return Request(scope, receive)
+
+
+class TestIterFileParts:
+    """Test file parts are yielded as they arrive."""
+
+    @pytest.mark.asyncio
+    async def test_yields_parts_before_body_ends(self):
+        """Test each file is available once its own part is complete."""
+        body = _body([
+            ("files", "a.jpg", "image/jpeg", b"A" * 100),
+            ("note", None, None, b"skipped"),
+            ("files", "b.png", "image/png", b"B" * 100),
+        ])
+        received = []
+        parts = []
+        async for part in iter_file_parts(_request(body, received=received)):
+            parts.append((part, sum(received)))
+
+        assert [(p.filename, p.content_type, p.data) for p, _ in parts] == [
+            ("a.jpg", "image/jpeg", b"A" * 100),
+            ("b.png", "image/png", b"B" * 100),
+        ]
+        assert parts[0][1] < len(body)
+
+    @pytest.mark.asyncio
+    async def test_limits(self):
+        """Test file count and body size limits."""
+        body = _body([("files", f"{i}.jpg", "image/jpeg", b"x" * 50) for i in range(3)])
+
+        with pytest.raises(UploadLimitError):
+            async for _ in iter_file_parts(_request(body), max_files=2):
+                pass
+        with pytest.raises(UploadLimitError):
+            async for _ in iter_file_parts(_request(body), max_size=len(body) - 1):
+                pass
+
+    @pytest.mark.asyncio
+    async def test_rejects_non_multipart(self):
+        """Test other content types and malformed bodies are rejected."""
+        with pytest.raises(MultipartError):
+            async for _ in iter_file_parts(_request(b"{}", content_type="application/json")):
+                pass
+        with pytest.raises(MultipartError):
+            async for _ in iter_file_parts(_request(b"--wrong\r\ngarbage" * 4)):
+                pass
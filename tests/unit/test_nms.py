@@ -0,0 +1,137 @@
+"""Test non-maximum suppression utilities."""
+
+import numpy as np
+import pytest
+
+from opencar.perception.utils.nms import (
+    batched_non_max_suppression,
+    calculate_iou,
+    non_max_suppression,
+)
+
+
+def _random_detections(rng, batch_size, num_boxes, num_classes=5):
+    """Create random xyxy boxes, scores and class ids."""
+    xy = rng.uniform(0, 600, (batch_size, num_boxes, 2))
+    wh = rng.uniform(10, 80, (batch_size, num_boxes, 2))
+    boxes = np.concatenate([xy, xy + wh], axis=-1).astype(np.float32)
+    scores = rng.uniform(0.01, 1.0, (batch_size, num_boxes)).astype(np.float32)
+    class_ids = rng.integers(0, num_classes, (batch_size, num_boxes))
+    return boxes, scores, class_ids
+
+
+def _reference_nms(boxes, scores, class_ids, threshold):
+    """Per-class NMS using the single-image implementation."""
+    keep = []
+    for class_id in np.unique(class_ids):
+        members = np.flatnonzero(class_ids == class_id)
+        keep.extend(members[non_max_suppression(boxes[members], scores[members], threshold)])
+    return sorted(keep, key=lambda i: -scores[i])
+
+
+class TestNonMaxSuppression:
+    """Test non-maximum suppression."""
+
+    def test_overlapping_boxes_suppressed(self):
+        """Test that the lower scoring overlapping box is dropped."""
+        boxes = np.array([[0, 0, 10, 10], [1, 1, 10, 10], [20, 20, 30, 30]], dtype=np.float32)
+        scores = np.array([0.9, 0.8, 0.7])
+
+        assert non_max_suppression(boxes, scores, 0.5) == [0, 2]
+
+    def test_iou_matrix_broadcasting(self):
+        """Test calculate_iou broadcasts to a pairwise matrix."""
+        boxes = np.array([[0, 0, 10, 10], [5, 0, 15, 10]], dtype=np.float32)
+        areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+
+        ious = calculate_iou(boxes[:, None], boxes[None], areas[:, None], areas[None])
+
+        assert ious.shape == (2, 2)
+        np.testing.assert_allclose(np.diag(ious), 1.0)
+        np.testing.assert_allclose(ious[0, 1], 50 / 150)
+
+
+class TestBatchedNonMaxSuppression:
+    """Test batched, class-aware non-maximum suppression."""
+
+    @pytest.mark.parametrize("strategy", ["offset", "per_class"])
+    def test_matches_per_class_reference(self, strategy):
+        """Test batched result equals looping the single-image function per class."""
+        rng = np.random.default_rng(0)
+        boxes, scores, class_ids = _random_detections(rng, 3, 400)
+
+        results = batched_non_max_suppression(
+            boxes, scores, class_ids, iou_threshold=0.45, max_det=1000, top_k=None,
+            strategy=strategy,
+        )
+
+        assert len(results) == 3
+        for b, keep in enumerate(results):
+            expected = _reference_nms(boxes[b], scores[b], class_ids[b], 0.45)
+            assert keep.tolist() == [int(i) for i in expected]
+
+    @pytest.mark.parametrize("strategy", ["offset", "per_class"])
+    def test_negative_coordinates_keep_classes_apart(self, strategy):
+        """Test boxes of different classes never suppress each other below the origin."""
+        boxes = np.array([[[0, 0, 10, 10], [-10, -10, 0, 0]]], dtype=np.float32)
+        scores = np.array([[0.9, 0.8]], dtype=np.float32)
+        class_ids = np.array([[0, 1]])
+
+        keep = batched_non_max_suppression(
+            boxes, scores, class_ids, iou_threshold=0.5, strategy=strategy
+        )[0]
+
+        assert keep.tolist() == [0, 1]
+
+    def test_class_agnostic(self):
+        """Test class-agnostic suppression matches the single-image function."""
+        rng = np.random.default_rng(1)
+        boxes, scores, _ = _random_detections(rng, 1, 300)
+
+        keep = batched_non_max_suppression(boxes, scores, max_det=1000, top_k=None)[0]
+
+        assert keep.tolist() == [int(i) for i in non_max_suppression(boxes[0], scores[0])]
+
+    def test_max_det_and_score_threshold(self):
+        """Test detection cap and score prefilter."""
+        rng = np.random.default_rng(2)
+        boxes, scores, class_ids = _random_detections(rng, 2, 500)
+
+        results = batched_non_max_suppression(
+            boxes, scores, class_ids, score_threshold=0.5, max_det=10
+        )
+
+        for b, keep in enumerate(results):
+            assert len(keep) == 10
+            assert (scores[b, keep] > 0.5).all()
+            assert (np.diff(scores[b, keep]) <= 0).all()
+
+    def test_top_k_limits_candidates(self):
+        """Test only the top-k scoring candidates can be kept."""
+        rng = np.random.default_rng(3)
+        boxes, scores, class_ids = _random_detections(rng, 1, 1000)
+
+        keep = batched_non_max_suppression(boxes, scores, class_ids, top_k=50)[0]
+
+        top_50 = set(np.argsort(-scores[0])[:50].tolist())
+        assert set(keep.tolist()) <= top_50
+
+    def test_single_image_input(self):
+        """Test (N, 4) input is treated as a batch of one."""
+        boxes = np.array([[0, 0, 10, 10], [1, 1, 10, 10]], dtype=np.float32)
+        scores = np.array([0.6, 0.9])
+
+        results = batched_non_max_suppression(boxes, scores)
+
+        assert len(results) == 1
+        assert results[0].tolist() == [1]
+
+    def test_empty_input(self):
+        """Test empty batch rows."""
+        results = batched_non_max_suppression(np.zeros((2, 0, 4)), np.zeros((2, 0)))
+        assert [len(keep) for keep in results] == [0, 0]
+
+    def test_invalid_strategy(self):
+        """Test unknown strategy is rejected."""
+        with pytest.raises(ValueError):
+            batched_non_max_suppression(np.zeros((1, 1, 4)), np.ones((1, 1)), strategy="soft")
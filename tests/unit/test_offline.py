@@ -0,0 +1,178 @@
+"""Test offline bulk detection over image files."""
+
+import json
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from opencar.ml.inference import InferenceEngine
+from opencar.perception.offline import (
+    JSONLResultWriter,
+    decode_image,
+    detect_files,
+    find_images,
+    load_checkpoint,
+)
+
+
+@pytest.fixture
+def image_dir(tmp_path):
+    """Directory with 12 JPEG frames of mixed sizes, some in a subdirectory."""
+    rng = np.random.default_rng(0)
+    (tmp_path / "images" / "day").mkdir(parents=True)
+    for i in range(12):
+        folder = tmp_path / "images" / ("day" if i % 3 == 0 else "")
+        size = (48, 64, 3) if i % 2 else (96, 64, 3)
+        Image.fromarray(rng.integers(0, 256, size, dtype=np.uint8)).save(folder / f"{i:02d}.jpg")
+    (tmp_path / "images" / "notes.txt").write_text("not an image")
+    return tmp_path / "images"
+
+
+async def _run(paths, output, **kwargs):
+    engine = InferenceEngine(device="cpu", num_threads=1)
+    try:
+        return await detect_files(
+            paths, engine, output, batch_size=2, decode_workers=1, **kwargs
+        )
+    finally:
+        engine.close()
+
+
+def _records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+class TestFindImages:
+    """Test collecting input images."""
+
+    def test_directory_is_searched_recursively(self, image_dir):
+        """Test every image under a directory is found, in sorted order."""
+        paths = find_images(str(image_dir))
+        assert len(paths) == 12
+        assert paths == sorted(paths)
+        assert all(path.suffix == ".jpg" for path in paths)
+
+    def test_glob(self, image_dir):
+        """Test a glob pattern selects matching images only."""
+        paths = find_images(str(image_dir / "day" / "*.jpg"))
+        assert [path.name for path in paths] == ["00.jpg", "03.jpg", "06.jpg", "09.jpg"]
+
+
+class TestDecodeImage:
+    """Test decoding in the decode processes."""
+
+    def test_letterboxes_to_model_input(self, image_dir):
+        """Test an image is decoded into a CHW uint8 frame with its geometry."""
+        data = (image_dir / "01.jpg").read_bytes()
+        frame, params = decode_image(data, (64, 64))
+        assert frame.shape == (3, 64, 64)
+        assert frame.dtype == np.uint8
+        assert (params.width, params.height) == (64, 48)
+
+    def test_rejects_non_images(self):
+        """Test undecodable data raises a ValueError."""
+        with pytest.raises(ValueError, match="Unrecognized image format"):
+            decode_image(b"not an image", (64, 64))
+
+
+class TestDetectFiles:
+    """Test running detection over files."""
+
+    @pytest.mark.asyncio
+    async def test_writes_one_result_per_image(self, image_dir, tmp_path):
+        """Test every image gets a result in input order, with image-space boxes."""
+        paths = find_images(str(image_dir))
+        output = tmp_path / "out.jsonl"
+        stats = await _run(paths, output)
+
+        records = _records(output)
+        assert [record["path"] for record in records] == [str(path) for path in paths]
+        assert (stats.processed, stats.failed, stats.resumed) == (12, 0, 0)
+        for record in records:
+            assert record["error"] is None
+            for detection in record["detections"]:
+                assert 0 <= detection["bbox"]["x2"] <= record["width"]
+                assert 0 <= detection["bbox"]["y2"] <= record["height"]
+
+    @pytest.mark.asyncio
+    async def test_undecodable_image_is_recorded(self, image_dir, tmp_path):
+        """Test an image that cannot be decoded gets an error and no detections."""
+        (image_dir / "broken.jpg").write_bytes(b"not a jpeg")
+        output = tmp_path / "out.jsonl"
+        stats = await _run(find_images(str(image_dir)), output)
+
+        broken = [r for r in _records(output) if r["path"].endswith("broken.jpg")]
+        assert broken == [{
+            "path": str(image_dir / "broken.jpg"), "width": None, "height": None,
+            "error": "Unrecognized image format", "detections": [],
+        }]
+        assert (stats.processed, stats.failed) == (13, 1)
+
+    @pytest.mark.asyncio
+    async def test_resumes_from_checkpoint(self, image_dir, tmp_path):
+        """Test an interrupted run resumes after its checkpoint without duplicates."""
+        paths = find_images(str(image_dir))
+        output = tmp_path / "out.jsonl"
+        checkpoint = tmp_path / "out.checkpoint.json"
+        calls = []
+
+        def interrupt(count):
+            calls.append(count)
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+
+        with pytest.raises(KeyboardInterrupt):
+            await _run(
+                paths, output, checkpoint_path=checkpoint, checkpoint_every=8,
+                prefetch=8, on_progress=interrupt,
+            )
+        assert load_checkpoint(checkpoint)["completed"] == 8
+        # Results written after the checkpoint are in the file but not covered by it
+        assert len(_records(output)) == 12
+
+        stats = await _run(paths, output, checkpoint_path=checkpoint, checkpoint_every=8)
+        assert (stats.resumed, stats.processed) == (8, 4)
+        assert [record["path"] for record in _records(output)] == [str(path) for path in paths]
+        assert load_checkpoint(checkpoint)["completed"] == 12
+
+    @pytest.mark.asyncio
+    async def test_rejects_changed_inputs(self, image_dir, tmp_path):
+        """Test resuming with a different file list fails instead of mixing results."""
+        paths = find_images(str(image_dir))
+        output = tmp_path / "out.jsonl"
+        checkpoint = tmp_path / "out.checkpoint.json"
+        await _run(paths[:4], output, checkpoint_path=checkpoint)
+
+        with pytest.raises(ValueError, match="changed since the checkpoint"):
+            await _run(paths[1:], output, checkpoint_path=checkpoint)
+
+    @pytest.mark.asyncio
+    async def test_parquet_output(self, image_dir, tmp_path):
+        """Test Parquet output is written as one part per checkpoint."""
+        pq = pytest.importorskip("pyarrow.parquet")
+        paths = find_images(str(image_dir))
+        output = tmp_path / "out.parquet"
+        await _run(paths, output, output_format="parquet", checkpoint_every=8)
+
+        assert len(list(output.glob("part-*.parquet"))) == 2
+        table = pq.read_table(output)
+        assert table.column("path").to_pylist() == [str(path) for path in paths]
+
+
+class TestJSONLResultWriter:
+    """Test the JSON Lines writer."""
+
+    def test_resume_truncates_after_checkpoint(self, tmp_path):
+        """Test lines written after the checkpoint are dropped on resume."""
+        path = tmp_path / "out.jsonl"
+        writer = JSONLResultWriter(path)
+        writer.write([{"path": "a"}])
+        state = writer.checkpoint()
+        writer.write([{"path": "b"}])
+        writer.close()
+
+        writer = JSONLResultWriter(path, state)
+        writer.write([{"path": "c"}])
+        writer.close()
+        assert [record["path"] for record in _records(path)] == ["a", "c"]
@@ -0,0 +1,191 @@
+"""Test OpenAIClient transport: pooling, concurrency limits and retries."""
+
+import asyncio
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from opencar.config.settings import Settings
+from opencar.integrations.openai_client import OpenAIClient, parse_retry_after
+
+COMPLETION = {"choices": [{"message": {"content": "ok"}}]}
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff sleeps instead of waiting."""
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay, *args, **kwargs):
+        delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr("opencar.integrations.openai_client.asyncio.sleep", fake_sleep)
+    return delays
+
+
+def _client(handler, **kwargs):
+    return OpenAIClient(api_key="sk-test", transport=httpx.MockTransport(handler), **kwargs)
+
+
+class TestRetryAfter:
+    """Test Retry-After parsing."""
+
+    def test_seconds(self):
+        """Test delta-seconds values."""
+        assert parse_retry_after("3") == 3.0
+        assert parse_retry_after("0.5") == 0.5
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("soon") is None
+
+    def test_http_date(self):
+        """Test HTTP-date values become a delay from now."""
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+        assert 28 <= parse_retry_after(format_datetime(retry_at, usegmt=True)) <= 30
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+class TestTransport:
+    """Test the pooled, rate-aware transport."""
+
+    def test_from_settings(self):
+        """Test timeout and pool settings are applied."""
+        settings = Settings(
+            openai_timeout=7,
+            openai_max_concurrency=3,
+            openai_max_retries=5,
+            openai_retry_after_max=30,
+        )
+        client = OpenAIClient.from_settings(settings)
+
+        assert client._client.timeout.read == 7
+        assert client.max_concurrency == 3
+        assert client.max_retries == 5
+        assert client.retry_after_max == 30
+        assert client.api_key == settings.openai_api_key.get_secret_value()
+
+    def test_http2_falls_back_without_h2(self, monkeypatch):
+        """Test HTTP/2 is only enabled when h2 is importable."""
+        monkeypatch.setattr(
+            "opencar.integrations.openai_client._http2_available", lambda: False
+        )
+        assert OpenAIClient(api_key="sk-test", http2=True).http2 is False
+
+    @pytest.mark.asyncio
+    async def test_concurrency_cap(self):
+        """Test in-flight upstream requests never exceed max_concurrency."""
+        in_flight = 0
+        peak = 0
+
+        async def handler(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200, json=COMPLETION)
+
+        client = _client(handler, max_concurrency=3)
+        await asyncio.gather(*(client.generate_completion(f"prompt {i}") for i in range(12)))
+
+        assert peak == 3
+        assert client.upstream_requests == 12
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_honors_retry_after(self, sleeps):
+        """Test a 429 is retried after the delay the upstream asked for."""
+        responses = iter([
+            httpx.Response(429, headers={"Retry-After": "2"}),
+            httpx.Response(200, json=COMPLETION),
+        ])
+        client = _client(lambda request: next(responses))
+
+        assert await client.generate_completion("prompt") == "ok"
+        assert 2 in [round(delay) for delay in sleeps]
+        assert client.retries == 1
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_retry_after_not_shortened(self, sleeps):
+        """Test a Retry-After longer than the backoff cap is waited out in full."""
+        responses = iter([
+            httpx.Response(503, headers={"Retry-After": "20"}),
+            httpx.Response(200, json=COMPLETION),
+        ])
+        client = _client(lambda request: next(responses), backoff_max=8.0)
+
+        assert await client.generate_completion("prompt") == "ok"
+        assert 20 in [round(delay) for delay in sleeps]
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_long_retry_after_fails_fast(self, sleeps):
+        """Test a Retry-After beyond retry_after_max is returned instead of retried early."""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(429, headers={"Retry-After": "3600"})
+
+        client = _client(handler, retry_after_max=60.0)
+        result = await client.generate_completion("prompt")
+
+        assert "API unavailable" in result
+        assert len(calls) == 1
+        assert client.retries == 0
+        assert all(delay < 60 for delay in sleeps)
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_backoff_without_retry_after(self, sleeps):
+        """Test 5xx responses back off with bounded jitter, then give up."""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(503)
+
+        client = _client(handler, max_retries=2, backoff_base=1.0)
+        result = await client.generate_completion("prompt")
+
+        assert "API unavailable" in result
+        assert len(calls) == 3
+        assert 0 <= sleeps[0] <= 1.0 and 0 <= sleeps[1] <= 2.0
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_client_errors_not_retried(self, sleeps):
+        """Test non-retryable statuses are returned immediately."""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(400)
+
+        client = _client(handler)
+        await client.moderate_content("text")
+
+        assert len(calls) == 1
+        assert sleeps == []
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_transport_errors_retried(self, sleeps):
+        """Test connection errors are retried before falling back."""
+        attempts = []
+
+        def handler(request):
+            attempts.append(request)
+            if len(attempts) < 2:
+                raise httpx.ConnectError("connection refused", request=request)
+            return httpx.Response(200, json={"data": [{"embedding": [1.0, 2.0]}]})
+
+        client = _client(handler)
+
+        assert await client.generate_embeddings(["text"]) == [[1.0, 2.0]]
+        assert len(attempts) == 2
+        await client.close()
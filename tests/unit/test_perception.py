@@ -2,9 +2,10 @@
 
 import pytest
 import asyncio
+import threading
 import numpy as np
 
-from opencar.perception.models.detector import ObjectDetector, YOLODetector
+from opencar.perception.models.detector import ObjectDetector, YOLODetector, _weights_version
 
 
 class TestObjectDetector:
@@ -53,6 +54,80 @@ class TestObjectDetector:
             assert 0 <= detection["confidence"] <= 1
             assert isinstance(detection["class_name"], str)
 
+    @pytest.mark.asyncio
+    async def test_detect_batch(self, detector, sample_image_data):
+        """Test batch detection keeps one result per input, in order."""
+        results = await detector.detect_batch(
+            [sample_image_data, b"not an image", sample_image_data[:320]],
+            confidence_threshold=0.9,
+        )
+
+        assert len(results) == 3
+        assert results[1] == []
+        for detection in results[0] + results[2]:
+            assert detection["confidence"] >= 0.9
+        for detection in results[2]:
+            assert detection["bbox"]["y2"] <= 320
+
+    @pytest.mark.asyncio
+    async def test_detect_stream(self, detector, sample_image_data):
+        """Test streamed images are batched and answered in arrival order."""
+        detector.batch_size = 2
+        calls = []
+        batch_predict = detector.engine.batch_predict
+
+        async def recording_batch_predict(frames, **kwargs):
+            calls.append(len(frames))
+            return await batch_predict(frames, **kwargs)
+
+        detector.engine.batch_predict = recording_batch_predict
+
+        async def images():
+            for image in (sample_image_data, b"not an image", sample_image_data, sample_image_data):
+                yield image
+
+        results = await detector.detect_stream(images(), classes=[0, 2], max_detections=5)
+
+        assert calls == [2, 1]
+        assert len(results) == 4
+        assert results[1] is None
+        for detections in (results[0], results[2], results[3]):
+            assert len(detections) <= 5
+            assert {d["class_name"] for d in detections} <= {"person", "car"}
+
+    @pytest.mark.asyncio
+    async def test_decodes_on_engine_threads(self, detector, sample_image_data):
+        """Test images are decoded and letterboxed off the event loop."""
+        threads = []
+        prepare_input = detector._prepare_input
+
+        def recording_prepare_input(image):
+            threads.append(threading.get_ident())
+            return prepare_input(image)
+
+        detector._prepare_input = recording_prepare_input
+
+        async def images():
+            yield sample_image_data
+
+        await detector.detect(sample_image_data)
+        await detector.detect_batch([sample_image_data, sample_image_data])
+        await detector.detect_stream(images())
+
+        assert len(threads) == 4
+        assert threading.get_ident() not in threads
+
+    def test_weights_version(self, tmp_path):
+        """Test the weights version changes when the weights file is replaced."""
+        weights = tmp_path / "model.onnx"
+        weights.write_bytes(b"weights v1")
+        version = _weights_version(weights)
+
+        assert _weights_version(weights) == version
+        assert _weights_version(None) == "builtin"
+        weights.write_bytes(b"weights v2 (retrained)")
+        assert _weights_version(weights) != version
+
     def test_class_name_lookup(self, detector):
         """Test class name lookup."""
         # Test known class
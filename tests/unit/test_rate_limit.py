@@ -0,0 +1,124 @@
+"""Test rate limiting backends."""
+
+import pytest
+
+from opencar.api.middleware.ratelimit import (
+    InMemoryRateLimitBackend,
+    RateLimiter,
+    RateLimitResult,
+    RedisRateLimitBackend,
+    create_rate_limit_backend,
+)
+from opencar.config.settings import Settings
+
+
+async def _drain(backend, key, requests_per_minute, now):
+    """Send requests at one instant until the first is rejected."""
+    results = []
+    while True:
+        result = await backend.acquire(key, requests_per_minute, now=now)
+        results.append(result)
+        if not result.allowed:
+            return results
+
+
+class TestInMemoryBackend:
+    """Test the in-process GCRA backend."""
+
+    @pytest.mark.asyncio
+    async def test_burst_then_reject(self):
+        """Test a full minute's budget is available as a burst."""
+        backend = InMemoryRateLimitBackend()
+
+        results = await _drain(backend, "client", 10, now=1000.0)
+
+        assert len(results) == 11
+        assert [r.remaining for r in results[:3]] == [9, 8, 7]
+        assert not results[-1].allowed
+        assert results[-1].retry_after == pytest.approx(6.0)
+
+    @pytest.mark.asyncio
+    async def test_refill(self):
+        """Test tokens come back at the configured rate."""
+        backend = InMemoryRateLimitBackend()
+        await _drain(backend, "client", 60, now=1000.0)
+
+        assert not (await backend.acquire("client", 60, now=1000.5)).allowed
+        assert (await backend.acquire("client", 60, now=1001.0)).allowed
+        assert not (await backend.acquire("client", 60, now=1001.0)).allowed
+
+    @pytest.mark.asyncio
+    async def test_clients_are_independent(self):
+        """Test one client's usage does not affect another."""
+        backend = InMemoryRateLimitBackend()
+        await _drain(backend, "busy", 5, now=1000.0)
+
+        assert (await backend.acquire("quiet", 5, now=1000.0)).allowed
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction_bounds_memory(self):
+        """Test tracked clients never exceed max_clients."""
+        backend = InMemoryRateLimitBackend(max_clients=100)
+
+        for i in range(1000):
+            await backend.acquire(f"client-{i}", 60, now=1000.0)
+
+        assert len(backend) == 100
+
+
+class TestRedisBackend:
+    """Test the Redis backend against a local fake."""
+
+    @pytest.fixture
+    def backend(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")
+        return RedisRateLimitBackend(client=fakeredis.aioredis.FakeRedis())
+
+    @pytest.mark.asyncio
+    async def test_matches_in_memory(self, backend):
+        """Test the Lua script makes the same decisions as the in-memory backend."""
+        memory = InMemoryRateLimitBackend()
+        for now in [1000.0] * 12 + [1003.0, 1006.0, 1006.1, 1012.0]:
+            expected = await memory.acquire("client", 10, now=now)
+            actual = await backend.acquire("client", 10, now=now)
+            assert actual.allowed == expected.allowed
+            assert actual.remaining == expected.remaining
+            assert actual.retry_after == pytest.approx(expected.retry_after)
+
+    @pytest.mark.asyncio
+    async def test_shared_between_workers(self, backend):
+        """Test two backends on one Redis share a client's budget."""
+        other = RedisRateLimitBackend(client=backend.client)
+
+        assert (await backend.acquire("client", 2, now=1000.0)).allowed
+        assert (await other.acquire("client", 2, now=1000.0)).allowed
+        assert not (await backend.acquire("client", 2, now=1000.0)).allowed
+
+
+class FailingBackend(InMemoryRateLimitBackend):
+    """Backend that is unreachable."""
+
+    async def acquire(self, key, requests_per_minute, now=None):
+        raise ConnectionError("redis down")
+
+
+class TestRateLimiter:
+    """Test the middleware-facing limiter."""
+
+    @pytest.mark.asyncio
+    async def test_fails_open(self):
+        """Test requests pass when the backend is unavailable."""
+        limiter = RateLimiter(10, FailingBackend())
+        assert (await limiter.check("client")).allowed
+
+    def test_retry_after_header(self):
+        """Test Retry-After rounds up to whole seconds."""
+        assert RateLimiter.retry_after_header(RateLimitResult(False, 0, 0.2)) == "1"
+        assert RateLimiter.retry_after_header(RateLimitResult(False, 0, 6.5)) == "7"
+
+    def test_backend_from_settings(self):
+        """Test the configured backend is created."""
+        backend = create_rate_limit_backend(Settings(rate_limit_max_clients=7))
+        assert isinstance(backend, InMemoryRateLimitBackend)
+        assert backend.max_clients == 7
@@ -0,0 +1,150 @@
+"""Test the model registry."""
+
+import asyncio
+
+import pytest
+
+from opencar.ml.registry import ModelRegistry
+
+
+class FakeModel:
+    """Model recording its lifecycle."""
+
+    def __init__(self, name, footprint=0):
+        self.name = name
+        self.footprint = footprint
+        self.closed = False
+
+    def memory_footprint(self):
+        return self.footprint
+
+    async def close(self):
+        self.closed = True
+
+
+def _loader(loaded, name, footprint=0, delay=0.0):
+    async def load():
+        await asyncio.sleep(delay)
+        model = FakeModel(name, footprint)
+        loaded.append(model)
+        return model
+
+    return load
+
+
+class TestModelRegistry:
+    """Test lazy loading, eviction and reloads."""
+
+    @pytest.mark.asyncio
+    async def test_lazy_and_shared_load(self):
+        """Test models load on first use, once, even under concurrency."""
+        loaded = []
+        registry = ModelRegistry()
+        registry.register("detector", _loader(loaded, "a", delay=0.01))
+        assert loaded == []
+
+        async def use():
+            async with registry.use() as model:
+                return model
+
+        models = await asyncio.gather(*(use() for _ in range(5)))
+
+        assert len(loaded) == 1
+        assert all(model is loaded[0] for model in models)
+
+    @pytest.mark.asyncio
+    async def test_select_by_name_and_version(self):
+        """Test "name", "name:version" and the latest-version default."""
+        loaded = []
+        registry = ModelRegistry()
+        registry.register("detector", _loader(loaded, "d"))
+        registry.register("lanes", _loader(loaded, "v1"), version="1")
+        registry.register("lanes", _loader(loaded, "v2"), version="2")
+
+        async with registry.use() as model:
+            assert model.name == "d"
+        async with registry.use("lanes") as model:
+            assert model.name == "v2"
+        async with registry.use("lanes:1") as model:
+            assert model.name == "v1"
+        with pytest.raises(KeyError):
+            registry.resolve("lanes:3")
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction_by_count(self):
+        """Test the least recently used model is evicted and closed."""
+        loaded = []
+        registry = ModelRegistry(max_models=2)
+        for name in ("a", "b", "c"):
+            registry.register(name, _loader(loaded, name))
+
+        for name in ("a", "b", "a", "c"):
+            async with registry.use(name):
+                pass
+        await asyncio.sleep(0)
+
+        assert registry.get_stats()["resident"] == ["a:latest", "c:latest"]
+        assert [m.name for m in loaded if m.closed] == ["b"]
+
+    @pytest.mark.asyncio
+    async def test_eviction_by_bytes(self):
+        """Test the memory budget evicts models as well."""
+        loaded = []
+        registry = ModelRegistry(max_models=5, max_bytes=100)
+        registry.register("a", _loader(loaded, "a", footprint=60))
+        registry.register("b", _loader(loaded, "b", footprint=60))
+
+        async with registry.use("a"):
+            pass
+        async with registry.use("b"):
+            pass
+
+        assert registry.get_stats()["resident"] == ["b:latest"]
+        assert registry.nbytes == 60
+
+    @pytest.mark.asyncio
+    async def test_evicted_model_drains_before_close(self):
+        """Test a model in use is closed only after its request finishes."""
+        loaded = []
+        registry = ModelRegistry(max_models=1)
+        registry.register("a", _loader(loaded, "a"))
+        registry.register("b", _loader(loaded, "b"))
+
+        async with registry.use("a") as model_a:
+            async with registry.use("b"):
+                pass
+            await asyncio.sleep(0)
+            assert not model_a.closed
+        await asyncio.sleep(0)
+
+        assert model_a.closed
+
+    @pytest.mark.asyncio
+    async def test_reload_swaps_then_drains(self):
+        """Test reload serves new requests from the new instance while old ones finish."""
+        loaded = []
+        registry = ModelRegistry()
+        registry.register("detector", _loader(loaded, "d", delay=0.01))
+
+        async with registry.use() as old:
+            reload = asyncio.ensure_future(registry.reload())
+            await asyncio.sleep(0.05)
+            async with registry.use() as new:
+                assert new is not old
+            assert not old.closed and not reload.done()
+        assert await reload == ["detector:latest"]
+        assert old.closed and not new.closed
+
+    @pytest.mark.asyncio
+    async def test_close(self):
+        """Test closing the registry closes resident models."""
+        loaded = []
+        registry = ModelRegistry()
+        registry.register("detector", _loader(loaded, "d"))
+        async with registry.use():
+            pass
+
+        await registry.close()
+
+        assert loaded[0].closed
+        assert registry.peek() is None
@@ -0,0 +1,209 @@
+"""Test the content-hash result cache."""
+
+import httpx
+import pytest
+
+from opencar.cache.result_cache import ResultCache, create_result_cache
+from opencar.config.settings import Settings
+from opencar.integrations.openai_client import OpenAIClient
+from opencar.monitoring.metrics import MetricsRegistry
+
+
+def _cache(**kwargs):
+    return ResultCache(registry=MetricsRegistry(), **kwargs)
+
+
+class TestCacheKeys:
+    """Test cache key construction."""
+
+    def test_same_content_same_key(self):
+        """Test keys depend on content and parameters, not identity."""
+        key = ResultCache.make_key("detect", b"frame", confidence_threshold=0.5)
+        assert key == ResultCache.make_key("detect", bytes(b"frame"), confidence_threshold=0.5)
+        assert key.startswith("detect:")
+
+    def test_parameters_change_key(self):
+        """Test every parameter and the namespace are part of the key."""
+        base = ResultCache.make_key("detect", b"frame", confidence_threshold=0.5)
+        assert base != ResultCache.make_key("detect", b"frame", confidence_threshold=0.6)
+        assert base != ResultCache.make_key("detect", b"frame2", confidence_threshold=0.5)
+        assert base != ResultCache.make_key("analyze", b"frame", confidence_threshold=0.5)
+
+
+class TestResultCache:
+    """Test the in-process tier."""
+
+    @pytest.mark.asyncio
+    async def test_hit_and_miss(self):
+        """Test stored values are returned as fresh copies."""
+        cache = _cache()
+        assert await cache.get("detect:a") is None
+
+        await cache.set("detect:a", [{"class_name": "car"}])
+        first = await cache.get("detect:a")
+        first[0]["class_name"] = "mutated"
+
+        assert await cache.get("detect:a") == [{"class_name": "car"}]
+        stats = cache.get_stats()
+        assert (stats["hits"], stats["misses"]) == (2, 1)
+        assert stats["hit_rate"] == pytest.approx(2 / 3)
+
+    @pytest.mark.asyncio
+    async def test_lru_entry_cap(self):
+        """Test the least recently used entry is evicted first."""
+        cache = _cache(max_entries=2)
+        await cache.set("detect:a", 1)
+        await cache.set("detect:b", 2)
+        await cache.get("detect:a")
+        await cache.set("detect:c", 3)
+
+        assert await cache.get("detect:b") is None
+        assert await cache.get("detect:a") == 1
+        assert len(cache) == 2
+        assert cache.evictions == 1
+
+    @pytest.mark.asyncio
+    async def test_byte_cap(self):
+        """Test the encoded size stays under the byte cap."""
+        cache = _cache(max_bytes=100)
+        for i in range(10):
+            await cache.set(f"detect:{i}", "x" * 30)
+
+        assert cache.nbytes <= 100
+        assert len(cache) == 3
+
+        await cache.set("detect:big", "x" * 200)
+        assert await cache.get("detect:big") is None
+
+    @pytest.mark.asyncio
+    async def test_ttl(self, monkeypatch):
+        """Test entries expire after the TTL."""
+        now = [1000.0]
+        monkeypatch.setattr("opencar.cache.result_cache.time.monotonic", lambda: now[0])
+        cache = _cache(ttl_seconds=10)
+        await cache.set("detect:a", 1)
+
+        now[0] += 9
+        assert await cache.get("detect:a") == 1
+        now[0] += 2
+        assert await cache.get("detect:a") is None
+        assert cache.nbytes == 0
+
+    @pytest.mark.asyncio
+    async def test_clear_namespace(self):
+        """Test clearing one namespace keeps the others."""
+        cache = _cache()
+        await cache.set("detect:a", 1)
+        await cache.set("analyze:a", 2)
+
+        cache.clear("detect")
+
+        assert await cache.get("detect:a") is None
+        assert await cache.get("analyze:a") == 2
+
+    @pytest.mark.asyncio
+    async def test_metrics(self):
+        """Test hit/miss counters are exported."""
+        registry = MetricsRegistry()
+        cache = ResultCache(registry=registry)
+        await cache.set("detect:a", 1)
+        await cache.get("detect:a")
+        await cache.get("detect:b")
+
+        text = registry.generate_latest().decode()
+        assert 'opencar_result_cache_lookups_total{namespace="detect",result="hit"} 1.0' in text
+        assert 'opencar_result_cache_lookups_total{namespace="detect",result="miss"} 1.0' in text
+
+    def test_from_settings(self):
+        """Test the cache follows settings."""
+        cache = create_result_cache(Settings(result_cache_max_entries=7))
+        assert cache.max_entries == 7
+        assert cache.redis is None
+        assert create_result_cache(Settings(result_cache_enabled=False)) is None
+        with pytest.raises(ValueError):
+            Settings(result_cache_backend="disk")
+
+
+class TestRedisTier:
+    """Test the shared Redis tier."""
+
+    @pytest.fixture
+    def redis_client(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        return fakeredis.aioredis.FakeRedis()
+
+    @pytest.mark.asyncio
+    async def test_shared_between_workers(self, redis_client):
+        """Test a result stored by one worker is served to another."""
+        worker_a = _cache(redis_client=redis_client)
+        worker_b = _cache(redis_client=redis_client)
+
+        await worker_a.set("analyze:a", {"scene_type": "urban"})
+
+        assert await worker_b.get("analyze:a") == {"scene_type": "urban"}
+        assert worker_b.redis_hits == 1
+        # Promoted into the local tier
+        assert await worker_b.get("analyze:a") == {"scene_type": "urban"}
+        assert worker_b.hits == 1
+        assert 0 < await redis_client.ttl("opencar:rc:analyze:a") <= 3600
+
+    @pytest.mark.asyncio
+    async def test_redis_failure_is_a_miss(self):
+        """Test an unreachable Redis degrades to the local tier."""
+
+        class DownRedis:
+            async def get(self, key):
+                raise ConnectionError("redis down")
+
+            async def set(self, key, value, ex=None):
+                raise ConnectionError("redis down")
+
+        cache = _cache(redis_client=DownRedis())
+        await cache.set("detect:a", 1)
+
+        assert await cache.get("detect:a") == 1
+        assert await cache.get("detect:b") is None
+
+
+class TestOpenAIClientCache:
+    """Test scene analysis results are cached by image content."""
+
+    def _client(self, status_code):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(
+                status_code,
+                json={"choices": [{"message": {"content": "Clear urban road, light traffic."}}]},
+            )
+
+        client = OpenAIClient(api_key="sk-test", cache=_cache())
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return client, calls
+
+    @pytest.mark.asyncio
+    async def test_repeated_frame_skips_api(self):
+        """Test a resent frame is answered without another API call."""
+        client, calls = self._client(200)
+
+        first = await client.analyze_image(b"frame", "traffic")
+        second = await client.analyze_image(b"frame", "traffic")
+        await client.analyze_image(b"frame", "safety")
+
+        assert first == second
+        assert first["scene_type"] == "urban"
+        assert len(calls) == 2
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_fallback_not_cached(self):
+        """Test mock fallbacks after API errors are retried next time."""
+        client, calls = self._client(400)
+
+        await client.analyze_image(b"frame")
+        await client.analyze_image(b"frame")
+
+        assert len(calls) == 2
+        assert len(client._cache) == 0
+        await client.close()
@@ -0,0 +1,138 @@
+"""Test in-flight coalescing of upstream calls."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from opencar.cache.result_cache import ResultCache
+from opencar.integrations.openai_client import OpenAIClient
+from opencar.integrations.singleflight import SingleFlight
+from opencar.monitoring.metrics import MetricsRegistry
+
+
+class TestSingleFlight:
+    """Test the coalescing primitive."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        """Test concurrent callers with the same key run the call once."""
+        flight = SingleFlight()
+        executions = 0
+
+        async def call():
+            nonlocal executions
+            executions += 1
+            await asyncio.sleep(0.01)
+            return {"value": 42}
+
+        results = await asyncio.gather(*(flight.do("key", call) for _ in range(10)))
+
+        assert executions == 1
+        assert all(result == {"value": 42} for result in results)
+        # Followers get copies, not the leader's object
+        assert len({id(result) for result in results}) == 10
+        assert flight.get_stats() == {
+            "calls": 10, "upstream_calls": 1, "coalesced": 9, "in_flight": 0
+        }
+
+    @pytest.mark.asyncio
+    async def test_different_keys_and_later_calls_run_separately(self):
+        """Test only concurrent calls with equal keys are coalesced."""
+        flight = SingleFlight()
+
+        async def call():
+            await asyncio.sleep(0)
+            return 1
+
+        await asyncio.gather(flight.do("a", call), flight.do("b", call))
+        await flight.do("a", call)
+
+        assert flight.executions == 3
+
+    @pytest.mark.asyncio
+    async def test_exception_reaches_every_caller(self):
+        """Test a failed call is raised to all waiters and then forgotten."""
+        flight = SingleFlight()
+
+        async def call():
+            await asyncio.sleep(0.01)
+            raise ConnectionError("upstream down")
+
+        results = await asyncio.gather(
+            *(flight.do("key", call) for _ in range(3)), return_exceptions=True
+        )
+
+        assert all(isinstance(result, ConnectionError) for result in results)
+        assert flight.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_leader_cancellation_does_not_cancel_followers(self):
+        """Test followers still get the result when the first caller goes away."""
+        flight = SingleFlight()
+
+        async def call():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        leader = asyncio.ensure_future(flight.do("key", call))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", call))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await follower == "done"
+        assert flight.executions == 1
+
+    def test_key(self):
+        """Test keys are stable and sensitive to every part."""
+        assert SingleFlight.make_key("m", "p", 0.7) == SingleFlight.make_key("m", "p", 0.7)
+        assert SingleFlight.make_key("m", "p", 0.7) != SingleFlight.make_key("m", "p", 0.3)
+
+
+class TestOpenAIClientCoalescing:
+    """Test OpenAIClient against a local stand-in for the API."""
+
+    def _client(self):
+        calls = []
+
+        async def handler(request):
+            calls.append(request)
+            await asyncio.sleep(0.02)
+            return httpx.Response(
+                200, json={"choices": [{"message": {"content": "Clear urban road."}}]}
+            )
+
+        client = OpenAIClient(api_key="sk-test", cache=ResultCache(registry=MetricsRegistry()))
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return client, calls
+
+    @pytest.mark.asyncio
+    async def test_concurrent_analyses(self):
+        """Test identical concurrent analyses make one upstream request."""
+        client, calls = self._client()
+
+        results = await asyncio.gather(
+            *(client.analyze_image(b"frame", "traffic") for _ in range(8)),
+            client.analyze_image(b"other-frame", "traffic"),
+            client.analyze_image(b"frame", "safety"),
+        )
+
+        assert len(calls) == 3
+        assert all(result == results[0] for result in results[:8])
+        assert client.get_client_info()["singleflight"]["coalesced"] == 7
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_completions(self):
+        """Test identical concurrent completions make one upstream request."""
+        client, calls = self._client()
+
+        results = await asyncio.gather(
+            *(client.generate_completion("Describe the scene") for _ in range(5)),
+            client.generate_completion("Describe the scene", temperature=0.1),
+        )
+
+        assert len(calls) == 2
+        assert set(results) == {"Clear urban road."}
+        await client.close()
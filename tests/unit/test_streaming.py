@@ -0,0 +1,132 @@
+"""Test WebSocket frame streaming."""
+
+import asyncio
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from opencar.api.streaming import FrameStream
+from opencar.monitoring.metrics import MetricsRegistry
+
+
+class FakeWebSocket:
+    """WebSocket fed from a list of messages, recording what is sent."""
+
+    def __init__(self, messages, delay=0.0):
+        self.messages = list(messages)
+        self.delay = delay
+        self.sent = []
+
+    async def receive(self):
+        await asyncio.sleep(self.delay)
+        if not self.messages:
+            return {"type": "websocket.disconnect", "code": 1000}
+        message = self.messages.pop(0)
+        if isinstance(message, bytes):
+            return {"type": "websocket.receive", "bytes": message}
+        return {"type": "websocket.receive", "text": message}
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+
+def _detector(calls, delay=0.0):
+    async def detect_batch(frames, threshold):
+        calls.append((list(frames), threshold))
+        await asyncio.sleep(delay)
+        return [[{"frame": frame.decode()}] for frame in frames]
+
+    return detect_batch
+
+
+def _stream(calls, **kwargs):
+    return FrameStream(_detector(calls), registry=MetricsRegistry(), **kwargs)
+
+
+class TestFrameStream:
+    """Test drop policies, batching and the connection loop."""
+
+    @pytest.mark.asyncio
+    async def test_drop_oldest(self):
+        """Test a full queue discards its stalest frame."""
+        stream = _stream([], max_pending=2, drop_policy="drop_oldest")
+        for data in (b"a", b"b", b"c"):
+            await stream.put(data)
+
+        batch = await stream.next_batch()
+        assert [frame.data for frame in batch] == [b"b", b"c"]
+        assert [frame.frame_id for frame in batch] == [1, 2]
+        assert stream.frames_dropped == 1
+
+    @pytest.mark.asyncio
+    async def test_drop_newest(self):
+        """Test a full queue discards the incoming frame."""
+        stream = _stream([], max_pending=2, drop_policy="drop_newest")
+        for data in (b"a", b"b", b"c"):
+            await stream.put(data)
+
+        batch = await stream.next_batch()
+        assert [frame.data for frame in batch] == [b"a", b"b"]
+        assert stream.frames_dropped == 1
+
+    @pytest.mark.asyncio
+    async def test_block_waits_for_room(self):
+        """Test the block policy holds the producer until a batch is taken."""
+        stream = _stream([], max_pending=1, drop_policy="block")
+        await stream.put(b"a")
+        blocked = asyncio.ensure_future(stream.put(b"b"))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+
+        assert [frame.data for frame in await stream.next_batch()] == [b"a"]
+        await asyncio.wait_for(blocked, timeout=1.0)
+        assert [frame.data for frame in await stream.next_batch()] == [b"b"]
+        assert stream.frames_dropped == 0
+
+    @pytest.mark.asyncio
+    async def test_batches_and_drains_on_close(self):
+        """Test batches are capped and queued frames survive close."""
+        stream = _stream([], max_pending=8, max_batch_size=3)
+        for i in range(5):
+            await stream.put(str(i).encode())
+        stream.close()
+
+        sizes = []
+        while batch := await stream.next_batch():
+            sizes.append(len(batch))
+        assert sizes == [3, 2]
+
+    def test_invalid_drop_policy(self):
+        """Test unknown drop policies are rejected."""
+        with pytest.raises(ValueError):
+            _stream([], drop_policy="sometimes")
+
+    @pytest.mark.asyncio
+    async def test_run(self):
+        """Test a connection is served until disconnect with settings updates applied."""
+        calls = []
+        stream = _stream(calls, max_pending=4, drop_policy="block", confidence_threshold=0.5)
+        websocket = FakeWebSocket(
+            ['{"confidence_threshold": 0.8}', b"a", b"b", "not json", b"c"], delay=0.001
+        )
+
+        await asyncio.wait_for(stream.run(websocket), timeout=2.0)
+
+        assert [m["frame_id"] for m in websocket.sent] == [0, 1, 2]
+        assert [m["detections"][0]["frame"] for m in websocket.sent] == ["a", "b", "c"]
+        assert all(threshold == 0.8 for _, threshold in calls)
+        stats = stream.get_stats()
+        assert stats["frames_processed"] == 3
+        assert stats["latency_ms"]["count"] == 3
+
+    @pytest.mark.asyncio
+    async def test_run_stops_when_send_fails(self):
+        """Test a client vanishing mid-send ends the stream cleanly."""
+
+        class ClosedWebSocket(FakeWebSocket):
+            async def send_json(self, data):
+                raise WebSocketDisconnect(1001)
+
+        stream = _stream([])
+        await asyncio.wait_for(stream.run(ClosedWebSocket([b"a", b"b"])), timeout=2.0)
+        assert stream.frames_processed == 1
@@ -0,0 +1,177 @@
+"""Test the multi-object tracker."""
+
+import numpy as np
+import pytest
+
+from opencar.ml.inference.postprocess import DETECTION_DTYPE
+from opencar.perception.processors import tracker as tracker_module
+from opencar.perception.processors.tracker import (
+    KalmanBoxFilter,
+    MultiObjectTracker,
+    assign,
+    iou_pairs,
+    xyah_to_xyxy,
+    xyxy_to_xyah,
+)
+from opencar.perception.utils.nms import calculate_iou
+
+
+def _detections(boxes, confidence=0.9, class_id=0):
+    detections = np.zeros(len(boxes), dtype=DETECTION_DTYPE)
+    detections["bbox"] = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    detections["confidence"] = confidence
+    detections["class_id"] = class_id
+    return detections
+
+
+class TestKalmanBoxFilter:
+    """Test the batched motion model."""
+
+    def test_box_conversion_round_trip(self):
+        """Test xyxy -> xyah -> xyxy is lossless."""
+        boxes = np.array([[10.0, 20.0, 50.0, 100.0], [0.0, 0.0, 5.0, 5.0]])
+        xyah = xyxy_to_xyah(boxes)
+        np.testing.assert_allclose(xyah[0], [30.0, 60.0, 0.5, 80.0])
+        np.testing.assert_allclose(xyah_to_xyxy(xyah), boxes)
+
+    def test_learns_constant_velocity(self):
+        """Test predictions follow boxes moving at constant speed."""
+        kalman = KalmanBoxFilter()
+        boxes = np.array([[0.0, 0.0, 20.0, 40.0], [100.0, 100.0, 140.0, 140.0]])
+        velocity = np.array([[5.0, 0.0, 5.0, 0.0], [0.0, -3.0, 0.0, -3.0]])
+        mean, covariance = kalman.initiate(xyxy_to_xyah(boxes))
+        for step in range(1, 30):
+            mean, covariance = kalman.predict(mean, covariance)
+            measurements = xyxy_to_xyah(boxes + step * velocity)
+            mean, covariance = kalman.update(mean, covariance, measurements)
+
+        mean, _ = kalman.predict(mean, covariance)
+        np.testing.assert_allclose(xyah_to_xyxy(mean[:, :4]), boxes + 30 * velocity, atol=0.5)
+
+
+class TestAssociation:
+    """Test candidate search and assignment."""
+
+    def test_iou_pairs_match_dense_iou(self):
+        """Test the blocked search finds exactly the pairs of the dense matrix."""
+        rng = np.random.default_rng(0)
+        xy = rng.uniform(0, 500, (300, 2))
+        boxes_a = np.hstack([xy, xy + rng.uniform(5, 40, (300, 2))])
+        boxes_b = boxes_a + rng.normal(0, 3, boxes_a.shape)
+
+        rows, cols, ious = iou_pairs(boxes_a, boxes_b, 0.3, block_size=16)
+
+        areas_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+        areas_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+        dense = calculate_iou(boxes_a[:, None], boxes_b[None], areas_a[:, None], areas_b[None])
+        expected = set(zip(*np.nonzero(dense >= 0.3)))
+        assert set(zip(rows.tolist(), cols.tolist())) == expected
+        np.testing.assert_allclose(ious, dense[rows, cols])
+
+    def test_uncontested_pairs_pass_through(self):
+        """Test pairs with no competing candidate are matched directly."""
+        rows, cols = assign(np.array([0, 2]), np.array([1, 0]), np.array([0.5, 0.7]))
+        assert sorted(zip(rows.tolist(), cols.tolist())) == [(0, 1), (2, 0)]
+
+    def test_greedy_fallback(self, monkeypatch):
+        """Test contested pairs are matched best-IoU-first without SciPy."""
+        monkeypatch.setattr(tracker_module, "SCIPY_AVAILABLE", False)
+        rows, cols = assign(np.array([0, 0, 1]), np.array([0, 1, 0]), np.array([0.9, 0.8, 0.85]))
+        assert list(zip(rows.tolist(), cols.tolist())) == [(0, 0)]
+
+    def test_optimal_assignment(self):
+        """Test SciPy maximizes the total IoU of contested pairs."""
+        pytest.importorskip("scipy")
+        rows, cols = assign(np.array([0, 0, 1]), np.array([0, 1, 0]), np.array([0.9, 0.8, 0.85]))
+        assert sorted(zip(rows.tolist(), cols.tolist())) == [(0, 1), (1, 0)]
+
+
+class TestMultiObjectTracker:
+    """Test track lifecycle and identity."""
+
+    def test_ids_follow_moving_objects(self):
+        """Test each object keeps its ID while moving."""
+        tracker = MultiObjectTracker()
+        boxes = np.array([[0.0, 0.0, 40.0, 80.0], [200.0, 50.0, 260.0, 110.0]])
+        velocity = np.array([[4.0, 0.0, 4.0, 0.0], [-3.0, 2.0, -3.0, 2.0]])
+
+        for step in range(20):
+            expected = boxes + step * velocity
+            tracks = tracker.update(_detections(expected[::-1]))
+            assert sorted(tracks["track_id"].tolist()) == [1, 2]
+            for track in tracks:
+                # Detections arrive in reverse order; IDs follow the objects
+                obj = 1 - (track["track_id"] - 1)
+                np.testing.assert_allclose(track["bbox"], expected[obj], atol=2.0)
+        assert tracker.num_tracks == 2
+
+    def test_new_tracks_need_min_hits(self):
+        """Test tracks appearing after warm-up are reported after min_hits matches."""
+        tracker = MultiObjectTracker(min_hits=3)
+        static = [0.0, 0.0, 50.0, 50.0]
+        for _ in range(5):
+            tracker.update(_detections([static]))
+
+        newcomer = [300.0, 300.0, 350.0, 350.0]
+        reported = [len(tracker.update(_detections([static, newcomer]))) for _ in range(3)]
+        assert reported == [1, 1, 2]
+
+    def test_low_confidence_detections_keep_tracks(self):
+        """Test a track survives on low-confidence detections without new tracks."""
+        tracker = MultiObjectTracker(max_age=1)
+        box = np.array([100.0, 100.0, 150.0, 200.0])
+        for step in range(3):
+            tracker.update(_detections([box + step]))
+
+        for step in range(3, 8):
+            tracks = tracker.update(_detections([box + step], confidence=0.3))
+            assert tracks["track_id"].tolist() == [1]
+        assert tracker.num_tracks == 1
+
+    def test_missed_tracks_expire(self):
+        """Test tracks are kept for max_age missed frames, then dropped."""
+        tracker = MultiObjectTracker(max_age=2)
+        for _ in range(3):
+            tracker.update(_detections([[0.0, 0.0, 50.0, 50.0]]))
+
+        empty = _detections([])
+        tracker.update(empty)
+        tracker.update(empty)
+        assert tracker.num_tracks == 1
+        tracker.update(empty)
+        assert tracker.num_tracks == 0
+
+        tracks = tracker.update(_detections([[0.0, 0.0, 50.0, 50.0]]))
+        assert len(tracks) == 0  # a new, unconfirmed track
+
+    def test_class_aware_matching(self):
+        """Test detections only continue tracks of their own class."""
+        tracker = MultiObjectTracker()
+        box = [[0.0, 0.0, 50.0, 50.0]]
+        first = tracker.update(_detections(box, class_id=0))
+        second = tracker.update(_detections(box, class_id=1))
+
+        assert first["track_id"].tolist() == [1]
+        assert second["track_id"].tolist() == [2]
+
+    def test_predict_skips_inference(self):
+        """Test predict() extrapolates tracks without counting them missed."""
+        tracker = MultiObjectTracker(max_age=1)
+        box = np.array([0.0, 0.0, 40.0, 40.0])
+        velocity = np.array([5.0, 0.0, 5.0, 0.0])
+        for step in range(30):
+            tracker.update(_detections([box + step * velocity]))
+
+        for _ in range(4):
+            tracks = tracker.predict()
+            assert tracks["track_id"].tolist() == [1]
+        np.testing.assert_allclose(tracks["bbox"][0], box + 33 * velocity, atol=1.0)
+        assert tracker.num_tracks == 1
+
+    def test_reset(self):
+        """Test reset drops tracks and restarts IDs."""
+        tracker = MultiObjectTracker()
+        tracker.update(_detections([[0.0, 0.0, 10.0, 10.0]]))
+        tracker.reset()
+        assert tracker.num_tracks == 0
+        assert tracker.update(_detections([[50.0, 50.0, 60.0, 60.0]]))["track_id"].tolist() == [1]
@@ -0,0 +1,126 @@
+"""Test multi-process inference workers."""
+
+import asyncio
+import functools
+import os
+import signal
+
+import numpy as np
+import pytest
+
+from opencar.ml.inference.backends import MockBackend, ONNXRuntimeBackend
+from opencar.ml.inference.postprocess import DETECTION_DTYPE
+from opencar.ml.inference.workers import InferenceWorkerPool
+from opencar.perception.models.detector import ObjectDetector
+
+
+class TestInferenceWorkerPool:
+    """Test the shared-memory worker pool."""
+
+    @pytest.mark.asyncio
+    async def test_round_trip(self):
+        """Test concurrent frames come back as per-frame detections."""
+        pool = InferenceWorkerPool(
+            num_workers=2,
+            backend_factory=functools.partial(MockBackend, latency=0),
+            slots_per_worker=2,
+        )
+        await pool.start()
+        try:
+            frames = [np.full((3, 64, 64), i, dtype=np.uint8) for i in range(10)]
+            results = await asyncio.gather(*(pool.submit(frame, 0.5) for frame in frames))
+        finally:
+            await pool.close()
+
+        assert pool.input_shape == (3, 640, 640)
+        assert len(results) == 10
+        for detections in results:
+            assert detections.dtype == DETECTION_DTYPE
+            assert len(detections) > 0
+            assert (detections["confidence"] > 0.5).all()
+        assert not pool.is_running
+
+    @pytest.mark.asyncio
+    async def test_submit_validation(self):
+        """Test oversized frames and submissions to a stopped pool are rejected."""
+        pool = InferenceWorkerPool(
+            num_workers=1,
+            backend_factory=functools.partial(MockBackend, latency=0),
+            max_frame_bytes=16,
+        )
+        with pytest.raises(ValueError):
+            await pool.submit(np.zeros(32, dtype=np.uint8))
+        with pytest.raises(RuntimeError):
+            await pool.submit(np.zeros(4, dtype=np.uint8))
+
+    @pytest.mark.asyncio
+    async def test_failed_worker_start(self, tmp_path):
+        """Test a worker that cannot load its model fails start."""
+        pool = InferenceWorkerPool(
+            num_workers=1,
+            backend_factory=functools.partial(ONNXRuntimeBackend, tmp_path / "missing.onnx"),
+        )
+        with pytest.raises(RuntimeError):
+            await pool.start()
+        assert not pool.is_running
+
+    @pytest.mark.asyncio
+    async def test_killed_worker_is_replaced(self):
+        """Test a killed worker fails its requests, is restarted and serves again."""
+        pool = InferenceWorkerPool(
+            num_workers=1,
+            backend_factory=functools.partial(MockBackend, latency=0.5),
+            slots_per_worker=2,
+            monitor_interval=0.05,
+        )
+        await pool.start()
+        try:
+            frame = np.zeros((3, 64, 64), dtype=np.uint8)
+            in_flight = asyncio.ensure_future(pool.submit(frame))
+            await asyncio.sleep(0.2)
+            os.kill(pool._processes[0].pid, signal.SIGKILL)
+
+            with pytest.raises(RuntimeError, match="worker exited"):
+                await asyncio.wait_for(in_flight, 2.0)
+            stats = pool.get_stats()
+            assert stats["in_flight"] == 0
+            assert stats["total_restarts"] == 1
+
+            for _ in range(100):
+                if pool.is_healthy:
+                    break
+                await asyncio.sleep(0.05)
+            assert pool.is_healthy
+            assert pool.get_stats()["alive"] == 1
+            assert sorted(pool._free_slots[0]) == [0, 1]
+            assert len(await pool.submit(frame)) > 0
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_detector_health_requires_live_workers(self):
+        """Test the detector reports unhealthy while a worker is down."""
+        detector = ObjectDetector(device="cpu", inference_workers=1)
+        detector.worker_pool.monitor_interval = 60.0
+        try:
+            await detector.initialize()
+            assert await detector.health_check()
+            process = detector.worker_pool._processes[0]
+            process.kill()
+            await asyncio.to_thread(process.join, 5.0)
+            assert not await detector.health_check()
+        finally:
+            await detector.close()
+
+    @pytest.mark.asyncio
+    async def test_detector_uses_workers(self, sample_image_data):
+        """Test ObjectDetector serves through worker processes."""
+        detector = ObjectDetector(device="cpu", inference_workers=1)
+        try:
+            detections = await detector.detect(sample_image_data)
+            stats = detector.get_stats()
+        finally:
+            await detector.close()
+
+        assert isinstance(detections, list) and detections
+        assert stats["workers"]["total_requests"] == 1